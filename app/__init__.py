@@ -40,6 +40,24 @@ def create_app(config_object=DevelopmentConfig):
     from .services.redis import init_redis
     init_redis(app)
 
+    # Initialize tenant/user snapshot cache (after Redis for invalidation fan-out)
+    from .services.identity_cache import init_identity_cache
+    init_identity_cache(app)
+
+    # Configure the service result caches
+    from .services.user_v2.data_status_service import init_data_status_cache
+    init_data_status_cache(app)
+    from .services.user_v2.computation_context_service import init_snapshot_cache
+    init_snapshot_cache(app)
+    from .services.topic_tree import init_topic_tree_cache
+    init_topic_tree_cache(app)
+    from .services.framework_coverage import init_coverage_cache
+    init_coverage_cache(app)
+
+    # Recompute computed fields affected by raw data writes
+    from .services.recompute_pipeline import init_recompute_pipeline
+    init_recompute_pipeline(app)
+
     # Register multi-tenant middleware
     from .middleware.tenant import load_tenant
     app.before_request(load_tenant)
@@ -181,3 +199,28 @@ def register_cli_commands(app):
         except Exception as e:
             print(f"❌ SUPER_ADMIN management failed: {str(e)}")
             raise
+
+    @app.cli.command("refresh-analytics-rollups")
+    @click.option('--full', is_flag=True, help='Rebuild every rollup instead of reading changes since the last refresh')
+    @click.option('--interval', type=int, default=0, help='Keep running and refresh every N seconds (background worker)')
+    def refresh_analytics_rollups_command(full, interval):
+        """Refresh the rollups behind the cross-tenant analytics dashboard."""
+        import time
+        from app.services.analytics_rollup import AnalyticsRollupService
+
+        while True:
+            try:
+                result = AnalyticsRollupService.refresh(full=full)
+                print(f"📊 Analytics rollups refreshed up to {result['watermark']}")
+                print(f"   └── Changed entries: {result['entries_changed']}")
+                print(f"   └── Cells recounted: {result['cells_recounted']}")
+                print(f"   └── Benchmarks refreshed: {result['benchmarks_refreshed']}")
+            except Exception as e:
+                print(f"❌ Analytics rollup refresh failed: {str(e)}")
+                if not interval:
+                    raise
+
+            if not interval:
+                break
+            full = False
+            time.sleep(interval)
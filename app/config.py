@@ -31,6 +31,23 @@ class Config:
     REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
     REDIS_ENABLED = os.environ.get('REDIS_ENABLED', 'False').lower() == 'true'
 
+    # Tenant/user snapshot cache used by load_tenant and the Flask-Login user_loader
+    IDENTITY_CACHE_ENABLED = True
+    IDENTITY_CACHE_TTL = 30  # Seconds a cached tenant/user snapshot stays valid
+    IDENTITY_CACHE_MAX_USERS = 5000
+    IDENTITY_CACHE_PUBSUB = True  # Fan out invalidations to other workers via Redis (when enabled)
+
+    # Write-triggered recomputation of computed fields (materialized in ESGData.calculated_value)
+    COMPUTED_FIELD_RECOMPUTE_ON_WRITE = True
+    COMPUTED_FIELD_RECOMPUTE_BATCH_SIZE = 500  # Computed keys evaluated and persisted per batch
+    COMPUTATION_CONTEXT_CACHE_TTL = 15  # Seconds a computation context snapshot is shared between endpoints
+    DATA_STATUS_MATRIX_CACHE_TTL = 60  # Seconds an admin data status matrix is cached (data writes drop it earlier)
+    TOPIC_TREE_CACHE_TTL = 300  # Seconds a topic tree is cached (topic, framework and field writes drop it earlier)
+    FRAMEWORK_COVERAGE_CACHE_TTL = 300  # Seconds a company's framework coverage summary is cached (assignment and field writes drop it earlier)
+    DEPENDENCY_GRAPH_MAX_AGE = 30  # Seconds before a compiled dependency graph is rebuilt even if no write was seen (other workers without Redis)
+    ACTIVE_ASSIGNMENT_INDEX_MAX_AGE = 30  # Seconds before a tenant's active-assignment index is rebuilt even if no write was seen
+    ANALYTICS_ROLLUP_WATERMARK_LAG = 900  # Seconds of esg_data writes re-read behind the rollup watermark (late-committing transactions)
+
     # File Upload Configuration
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uploads'))
     MAX_CONTENT_LENGTH = 20 * 1024 * 1024  # 20MB max file size
@@ -57,12 +74,16 @@ class Config:
     # os.makedirs(UPLOAD_FOLDER, exist_ok=True)  # <-- REMOVED for Read-only FS compatibility
 
     # Enhancement #4: Bulk Excel Upload Configuration
-    BULK_UPLOAD_MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB for Excel file
+    BULK_UPLOAD_MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB for Excel file
     BULK_UPLOAD_MAX_ATTACHMENT_SIZE = 20 * 1024 * 1024  # 20MB per attachment (reuses MAX_CONTENT_LENGTH)
     BULK_UPLOAD_MAX_TOTAL_SIZE = 200 * 1024 * 1024  # 200MB total per batch
-    BULK_UPLOAD_MAX_ROWS = 1000  # Maximum rows per upload
+    BULK_UPLOAD_MAX_ROWS = 50000  # Maximum rows per upload
+    BULK_UPLOAD_PARSE_CHUNK_SIZE = 5000  # Rows normalized per chunk while streaming an upload
+    BULK_UPLOAD_SUBMIT_BATCH_SIZE = 1000  # Rows written per bulk INSERT/UPDATE statement on submit
     BULK_UPLOAD_ALLOWED_FORMATS = {'.xlsx', '.xls', '.csv'}  # Allowed file formats
     BULK_UPLOAD_SESSION_TIMEOUT = 30 * 60  # 30 minutes session timeout
+    BULK_UPLOAD_SESSION_BACKEND = os.environ.get('BULK_UPLOAD_SESSION_BACKEND', 'auto')  # auto, redis or local
+    BULK_UPLOAD_SESSION_DIR = os.environ.get('BULK_UPLOAD_SESSION_DIR')  # Local backend directory (default: <tmp>/esg_bulk_uploads)
 
     # Phase 0: Feature Flags for User Dashboard Enhancements
     # Global kill switch - can disable new interface entirely
@@ -21,7 +21,7 @@ Usage:
 
 import re
 from flask import g, request, abort
-from app.models.company import Company
+from app.services.identity_cache import get_company_by_slug
 
 
 def load_tenant():
@@ -36,7 +36,7 @@ def load_tenant():
     1. Extract hostname and strip port (localhost:5000 → localhost)
     2. Extract subdomain (first part before first dot)
     3. Handle special cases: localhost, 127.x.x.x (set g.tenant = None)
-    4. Query Company by slug for tenant resolution
+    4. Resolve Company by slug (cached snapshot, see services/identity_cache.py)
     5. Abort with 404 if tenant not found
     
     Examples:
@@ -78,8 +78,8 @@ def load_tenant():
         g.tenant = None
         return
     
-    # Resolve tenant by slug lookup
-    g.tenant = Company.query.filter_by(slug=subdomain).first()
+    # Resolve tenant by slug lookup (served from the tenant snapshot cache when possible)
+    g.tenant = get_company_by_slug(subdomain)
     
     # Abort early for unknown tenants
     if g.tenant is None:
@@ -2,7 +2,7 @@ from .user import User
 from .company import Company
 from .framework import Framework, FrameworkDataField, FieldVariableMapping, Topic
 from .entity import Entity
-from .esg_data import ESGData, ESGDataAuditLog, ESGDataAttachment
+from .esg_data import ESGData, ESGDataAuditLog, ESGDataAttachment, ESGDataBreakdown
 from .data_assignment import DataPointAssignment
 from .audit_log import AuditLog
 from .system_config import SystemConfig
@@ -10,6 +10,7 @@ from .sync_operation import SyncOperation
 from .dimension import Dimension, DimensionValue, FieldDimension
 from .user_feedback import UserFeedback
 from .issue_report import IssueReport, IssueComment
+from .analytics_rollup import AnalyticsDailyRollup, AnalyticsFieldBenchmark, AnalyticsRollupWatermark
 
 __all__ = [
     'User',
@@ -22,6 +23,7 @@ __all__ = [
     'ESGData',
     'ESGDataAuditLog',
     'ESGDataAttachment',
+    'ESGDataBreakdown',
     'DataPointAssignment',
     'AuditLog',
     'SystemConfig',
@@ -31,5 +33,8 @@ __all__ = [
     'FieldDimension',
     'UserFeedback',
     'IssueReport',
-    'IssueComment'
+    'IssueComment',
+    'AnalyticsDailyRollup',
+    'AnalyticsFieldBenchmark',
+    'AnalyticsRollupWatermark'
 ]
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Materialized rollups behind the cross-tenant analytics dashboard.
+
+The superadmin analytics endpoints (CrossTenantAnalyticsService) read these
+tables instead of counting and grouping esg_data and data_point_assignments
+on every request. They are derived data, rebuilt by AnalyticsRollupService
+(`flask refresh-analytics-rollups`), so they carry no foreign keys and can
+be dropped and regenerated at any time.
+"""
+
+from ..extensions import db
+from datetime import datetime, UTC
+
+
+class AnalyticsDailyRollup(db.Model):
+    """
+    Daily activity of one company within one framework.
+
+    Entry counts are keyed by the day an entry was created, update activity
+    by the day it was last seen updated and assignment counts by the day the
+    assignment was made.
+    """
+
+    __tablename__ = 'analytics_daily_rollups'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    day = db.Column(db.Date, nullable=False)
+    company_id = db.Column(db.Integer, nullable=False)
+    framework_id = db.Column(db.String(36), nullable=False)
+
+    entries_created = db.Column(db.Integer, nullable=False, default=0)  # ESGData rows created on day
+    entries_completed = db.Column(db.Integer, nullable=False, default=0)  # ... of which hold a raw value
+    entries_updated = db.Column(db.Integer, nullable=False, default=0)  # ESGData rows written on day
+    assignments_created = db.Column(db.Integer, nullable=False, default=0)  # Assignments made on day
+    assignments_active = db.Column(db.Integer, nullable=False, default=0)  # ... of which are still active
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'company_id', 'framework_id', name='uq_analytics_daily_rollup'),
+        db.Index('idx_analytics_rollup_company_day', 'company_id', 'day'),
+        db.Index('idx_analytics_rollup_framework_day', 'framework_id', 'day'),
+    )
+
+    def __init__(self, day, company_id, framework_id):
+        self.day = day
+        self.company_id = company_id
+        self.framework_id = framework_id
+        self.entries_created = 0
+        self.entries_completed = 0
+        self.entries_updated = 0
+        self.assignments_created = 0
+        self.assignments_active = 0
+
+    def __repr__(self):
+        return f'<AnalyticsDailyRollup {self.day} company={self.company_id} framework={self.framework_id}>'
+
+
+class AnalyticsFieldBenchmark(db.Model):
+    """
+    Distribution of a field's numeric values across active tenants.
+
+    One row per field for all industries (industry '') plus one per
+    industry with reported values.
+    """
+
+    __tablename__ = 'analytics_field_benchmarks'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    field_id = db.Column(db.String(36), nullable=False)
+    framework_id = db.Column(db.String(36), nullable=False)
+    industry = db.Column(db.String(50), nullable=False, default='')
+    industries_covered = db.Column(db.JSON, nullable=True)
+
+    sample_size = db.Column(db.Integer, nullable=False)
+    min_value = db.Column(db.Float, nullable=False)
+    max_value = db.Column(db.Float, nullable=False)
+    mean_value = db.Column(db.Float, nullable=False)
+    median_value = db.Column(db.Float, nullable=False)
+    percentile_25 = db.Column(db.Float, nullable=False)
+    percentile_75 = db.Column(db.Float, nullable=False)
+    percentile_90 = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('field_id', 'industry', name='uq_analytics_field_benchmark'),
+        db.Index('idx_analytics_benchmark_framework', 'framework_id', 'industry'),
+    )
+
+    def __repr__(self):
+        return f'<AnalyticsFieldBenchmark {self.field_id} {self.industry or "all"}: n={self.sample_size}>'
+
+
+class AnalyticsRollupWatermark(db.Model):
+    """High-water mark of the source rows already folded into the rollups."""
+
+    __tablename__ = 'analytics_rollup_watermarks'
+
+    source = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=False)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(UTC))
+
+    def __repr__(self):
+        return f'<AnalyticsRollupWatermark {self.source}: {self.watermark}>'
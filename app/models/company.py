@@ -1,5 +1,7 @@
 from ..extensions import db
 from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
 
 
 class Company(db.Model):
@@ -28,6 +30,7 @@ class Company(db.Model):
     slug = db.Column(db.String(60), unique=True, nullable=False)  # Used in sub-domain routing
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     is_global_framework_provider = db.Column(db.Boolean, default=False, nullable=False)
+    industry = db.Column(db.String(50), nullable=True)  # Grouping for cross-tenant benchmarks
     
     # Fiscal Year Configuration
     fy_end_month = db.Column(db.Integer, nullable=False, default=3)  # March = 3 (default for Apr-Mar FY)
@@ -163,17 +166,8 @@ class Company(db.Model):
         Returns:
             date: The fiscal year start date
         """
-        from datetime import date
-        start_month = self.get_fy_start_month()
-        
-        # If FY end is in March (3), FY start is April (4) of previous year
-        # If FY end is in December (12), FY start is January (1) of same year
-        if start_month > self.fy_end_month:
-            start_year = fy_year - 1
-        else:
-            start_year = fy_year
-        
-        return date(start_year, start_month, 1)
+        from ..utils.fiscal_calendar import fy_bounds
+        return fy_bounds(self.fy_end_month, self.fy_end_day, fy_year)[0]
     
     def get_fy_end_date(self, fy_year):
         """
@@ -185,14 +179,22 @@ class Company(db.Model):
         Returns:
             date: The fiscal year end date
         """
-        from datetime import date
-        import calendar
-        
-        # Validate day exists in the month (e.g., Feb 31 doesn't exist)
-        max_day = calendar.monthrange(fy_year, self.fy_end_month)[1]
-        actual_day = min(self.fy_end_day, max_day)
+        from ..utils.fiscal_calendar import fy_bounds
+        return fy_bounds(self.fy_end_month, self.fy_end_day, fy_year)[1]
+    
+    def get_fiscal_calendar(self, fy_year, frequency):
+        """
+        Get the shared (memoized) reporting calendar for a fiscal year and frequency.
         
-        return date(fy_year, self.fy_end_month, actual_day)
+        Args:
+            fy_year (int): The fiscal year (based on the year containing FY end date)
+            frequency (str): 'Monthly', 'Quarterly' or 'Annual'
+            
+        Returns:
+            FiscalCalendar: Immutable calendar with period ends and O(1) lookups
+        """
+        from ..utils.fiscal_calendar import get_fiscal_calendar
+        return get_fiscal_calendar(self.fy_end_month, self.fy_end_day, fy_year, frequency)
     
     def get_validation_threshold(self):
         """
@@ -256,4 +258,27 @@ class Company(db.Model):
         return f'<Company {self.slug}: {self.name}{global_status}>'
     
     def __str__(self):
-        return self.name 
\ No newline at end of file
+        return self.name
+
+
+@event.listens_for(Company, 'after_insert')
+@event.listens_for(Company, 'after_update')
+@event.listens_for(Company, 'after_delete')
+def invalidate_cached_tenant(mapper, connection, target):
+    """
+    Drop the cached tenant snapshot (and its users) when a company is written.
+
+    Covers activate/deactivate, superadmin edits and slug changes (the old
+    slug entry carries the company tag).
+    """
+    from ..services.identity_cache import record_identity_write
+
+    record_identity_write(target, [('company', target.id), ('slug', target.slug)])
+
+
+@event.listens_for(Company, 'after_update')
+def invalidate_dependency_graphs_on_provider_change(mapper, connection, target):
+    """Every tenant's dependency graph includes global provider fields, so rebuild them all."""
+    if inspect(target).attrs.is_global_framework_provider.history.has_changes():
+        from ..services.dependency_graph import record_dependency_write
+        record_dependency_write(object_session(target), target.id, global_provider=True)
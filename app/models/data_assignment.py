@@ -1,9 +1,15 @@
 from ..extensions import db
 import uuid
+from collections import defaultdict
 from datetime import datetime, UTC
-from sqlalchemy import Enum, event
+from sqlalchemy import Enum, event, func, or_, and_, tuple_
+from sqlalchemy.orm import Session, object_session
 from .mixins import TenantScopedQueryMixin, TenantScopedModelMixin
 
+def _not_postgresql(ddl, target, bind, **kw):
+    return kw['dialect'].name != 'postgresql'
+
+
 class DataPointAssignment(db.Model, TenantScopedQueryMixin, TenantScopedModelMixin):
     """Data Point Assignment model with FY and frequency configuration."""
     
@@ -61,6 +67,12 @@ class DataPointAssignment(db.Model, TenantScopedQueryMixin, TenantScopedModelMix
         db.Index('idx_assignment_active_lookup', 'field_id', 'entity_id', 'series_status'),  # Fast active assignment lookup
         db.Index('idx_assignment_company_active', 'company_id', 'series_status'),  # Company-filtered active assignments
         db.Index('idx_assignment_field_company_active', 'field_id', 'company_id', 'series_status'),  # Fast field+company lookup
+        # Keyset pagination of the history timeline, in its sort order. Outside PostgreSQL
+        # NULLs already sort last when descending (and SQLite indexes take no NULLS clause)
+        db.Index('idx_assignment_company_timeline', company_id, assigned_date.desc().nulls_last(),
+                 series_version.desc(), id.desc()).ddl_if(dialect='postgresql'),
+        db.Index('idx_assignment_company_timeline', company_id, assigned_date.desc(),
+                 series_version.desc(), id.desc()).ddl_if(callable_=_not_postgresql),
     )
 
     def __init__(self, field_id, entity_id, frequency, assigned_by, company_id=None, unit=None, assigned_topic_id=None, data_series_id=None, series_version=1, attachment_required=False):
@@ -108,84 +120,56 @@ class DataPointAssignment(db.Model, TenantScopedQueryMixin, TenantScopedModelMix
         effective_topic = self.effective_topic
         return effective_topic.get_full_path() if effective_topic else 'Unassigned'
 
-    def get_valid_reporting_dates(self, fy_year=None, target_date=None):
+    def get_reporting_calendar(self, fy_year=None, target_date=None):
         """
-        Generate list of valid reporting dates based on frequency and company's FY configuration.
-        
-        Enhanced in Phase 2 to support:
-        - Automatic FY detection from target date
-        - Multiple FY support for indefinite assignments
-        - Better company FY integration
+        Get the shared fiscal calendar for this assignment's frequency.
         
         Args:
             fy_year (int, optional): The fiscal year (based on the year containing FY end date)
             target_date (date, optional): Date to determine FY year from (defaults to today)
         
         Returns:
-            List[date]: List of valid reporting dates for the fiscal year
+            FiscalCalendar: Memoized calendar, or None if the assignment has no company
         """
         if not self.company:
-            # Return empty list instead of raising exception for defensive programming
-            return []
-        
-        from datetime import date, timedelta
-        from dateutil.relativedelta import relativedelta
+            return None
         
         # Auto-detect FY year if not provided
         if fy_year is None:
+            from datetime import date
+            from ..utils.fiscal_calendar import fy_bounds
+            
             if target_date is None:
                 target_date = date.today()
             
-            # Use company FY configuration to determine FY year
-            fy_end_month = self.company.fy_end_month
-            fy_end_day = self.company.fy_end_day
-            
             # Check if target_date is before or after FY end for current calendar year
-            try:
-                import calendar
-                max_day = calendar.monthrange(target_date.year, fy_end_month)[1]
-                actual_end_day = min(fy_end_day, max_day)
-                fy_end_current_year = date(target_date.year, fy_end_month, actual_end_day)
-                
-                if target_date <= fy_end_current_year:
-                    fy_year = target_date.year
-                else:
-                    fy_year = target_date.year + 1
-            except Exception:
-                # Fallback to simple year-based calculation
-                fy_year = target_date.year
+            fy_end_current_year = fy_bounds(self.company.fy_end_month, self.company.fy_end_day, target_date.year)[1]
+            fy_year = target_date.year if target_date <= fy_end_current_year else target_date.year + 1
+        
+        return self.company.get_fiscal_calendar(fy_year, self.frequency)
+    
+    def get_valid_reporting_dates(self, fy_year=None, target_date=None):
+        """
+        Generate list of valid reporting dates based on frequency and company's FY configuration.
         
-        valid_dates = []
+        Enhanced in Phase 2 to support:
+        - Automatic FY detection from target date
+        - Multiple FY support for indefinite assignments
+        - Better company FY integration
         
-        # Get FY start and end dates from company configuration
-        fy_start = self.company.get_fy_start_date(fy_year)
-        fy_end = self.company.get_fy_end_date(fy_year)
+        Args:
+            fy_year (int, optional): The fiscal year (based on the year containing FY end date)
+            target_date (date, optional): Date to determine FY year from (defaults to today)
         
-        if self.frequency == 'Annual':
-            # Only FY end date
-            valid_dates.append(fy_end)
-            
-        elif self.frequency == 'Quarterly':
-            # Generate quarterly dates
-            current_date = fy_start
-            while current_date <= fy_end:
-                # Last day of quarter
-                quarter_end = (current_date + relativedelta(months=3)) - timedelta(days=1)
-                if quarter_end <= fy_end:
-                    valid_dates.append(quarter_end)
-                current_date = current_date + relativedelta(months=3)
-                    
-        elif self.frequency == 'Monthly':
-            # Generate monthly dates
-            current_date = fy_start
-            while current_date <= fy_end:
-                # Last day of month
-                month_end = (current_date + relativedelta(months=1)) - timedelta(days=1)
-                if month_end <= fy_end:
-                    valid_dates.append(month_end)
-                current_date = current_date + relativedelta(months=1)
+        Returns:
+            List[date]: List of valid reporting dates for the fiscal year
+        """
+        calendar = self.get_reporting_calendar(fy_year, target_date)
+        if calendar is None:
+            # Return empty list instead of raising exception for defensive programming
+            return []
         
-        return valid_dates
+        return list(calendar.period_ends)
     
     def is_valid_reporting_date(self, reporting_date, fy_year=None):
         """
@@ -201,8 +185,8 @@ class DataPointAssignment(db.Model, TenantScopedQueryMixin, TenantScopedModelMix
             bool: True if the date is valid for reporting
         """
         try:
-            valid_dates = self.get_valid_reporting_dates(fy_year, reporting_date)
-            return reporting_date in valid_dates
+            calendar = self.get_reporting_calendar(fy_year, reporting_date)
+            return calendar is not None and reporting_date in calendar.period_end_set
         except Exception:
             # If validation fails, be permissive (return True)
             return True
@@ -326,6 +310,76 @@ class DataPointAssignment(db.Model, TenantScopedQueryMixin, TenantScopedModelMix
         ).count()
         
         return direct_count + legacy_count
+
+    @staticmethod
+    def get_data_entry_counts(assignments):
+        """
+        Data entry counts of many assignments with one grouped query.
+
+        Counts the same entries as get_data_entry_count: entries linked to
+        the assignment plus unlinked entries of its field and entity.
+
+        Args:
+            assignments: DataPointAssignment objects
+
+        Returns:
+            dict: Assignment ID -> number of data entries
+        """
+        from ..models.esg_data import ESGData
+
+        assignments = list(assignments)
+        if not assignments:
+            return {}
+
+        pairs = list({(a.field_id, a.entity_id) for a in assignments})
+        rows = db.session.query(
+            ESGData.assignment_id, ESGData.field_id, ESGData.entity_id, func.count()
+        ).filter(or_(
+            ESGData.assignment_id.in_([a.id for a in assignments]),
+            and_(
+                ESGData.assignment_id.is_(None),
+                tuple_(ESGData.field_id, ESGData.entity_id).in_(pairs)
+            )
+        )).group_by(
+            ESGData.assignment_id, ESGData.field_id, ESGData.entity_id
+        ).all()
+
+        direct_counts = defaultdict(int)
+        legacy_counts = defaultdict(int)
+        for assignment_id, field_id, entity_id, count in rows:
+            if assignment_id is None:
+                legacy_counts[(field_id, entity_id)] += count
+            else:
+                direct_counts[assignment_id] += count
+
+        return {
+            a.id: direct_counts[a.id] + legacy_counts[(a.field_id, a.entity_id)]
+            for a in assignments
+        }
+
+    @staticmethod
+    def get_previous_versions(assignments):
+        """
+        Previous version in the same data series of many assignments, with one query.
+
+        Args:
+            assignments: DataPointAssignment objects
+
+        Returns:
+            dict: Assignment ID -> previous version (absent for first versions
+            and missing predecessors)
+        """
+        keys = {
+            (a.data_series_id, a.series_version - 1): a.id
+            for a in assignments if a.series_version > 1
+        }
+        if not keys:
+            return {}
+
+        previous = DataPointAssignment.query.filter(
+            tuple_(DataPointAssignment.data_series_id, DataPointAssignment.series_version).in_(list(keys))
+        ).all()
+        return {keys[(p.data_series_id, p.series_version)]: p for p in previous}
     
     @property
     def version_display(self):
@@ -466,4 +520,42 @@ def validate_single_active_assignment(mapper, connection, target):
             raise ValueError(
                 f"Cannot create active assignment: {active_count} active assignment(s) already exist "
                 f"for field {target.field_id}, entity {target.entity_id}, company {target.company_id}"
-            )
\ No newline at end of file
+            )
+
+@event.listens_for(DataPointAssignment, 'after_insert')
+@event.listens_for(DataPointAssignment, 'after_update')
+@event.listens_for(DataPointAssignment, 'after_delete')
+def invalidate_assignment_resolution_cache(mapper, connection, target):
+    """
+    Drop cached resolutions for the written field+entity+company.
+
+    The pair is also remembered on the session and invalidated again when the
+    transaction ends, so a resolution cached by a concurrent reader between
+    flush and commit cannot outlive the transaction.
+    """
+    from ..services.assignment_versioning import invalidate_assignment_cache
+
+    cache_tag = (target.company_id, target.field_id, target.entity_id)
+    invalidate_assignment_cache(*cache_tag)
+
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('assignment_cache_tags', set()).add(cache_tag)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def invalidate_finished_assignment_resolutions(session):
+    """
+    Re-invalidate resolutions for assignments written in the finished transaction.
+
+    On rollback this also drops anything the same session resolved from its
+    own uncommitted rows.
+    """
+    cache_tags = session.info.pop('assignment_cache_tags', None)
+    if not cache_tags:
+        return
+
+    from ..services.assignment_versioning import invalidate_assignment_cache
+    for cache_tag in cache_tags:
+        invalidate_assignment_cache(*cache_tag)
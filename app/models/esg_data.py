@@ -1,9 +1,20 @@
 from ..extensions import db
 import uuid
+import hashlib
 from datetime import datetime, UTC, date
 from typing import Optional, Dict, Any
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import object_session
 from .mixins import TenantScopedQueryMixin, TenantScopedModelMixin
 
+# Separators of canonical dimension keys, percent-encoded inside names and values
+_DIMENSION_KEY_ESCAPES = str.maketrans({'%': '%25', '|': '%7C', ':': '%3A'})
+
+
+def _dimension_key_part(text):
+    return str(text).strip().translate(_DIMENSION_KEY_ESCAPES)
+
+
 class ESGData(db.Model, TenantScopedQueryMixin, TenantScopedModelMixin):
     """ESG Data model for storing actual metric values.
     
@@ -28,6 +39,9 @@ class ESGData(db.Model, TenantScopedQueryMixin, TenantScopedModelMixin):
     
     # Phase 2.5: Dimensional data support
     dimension_values = db.Column(db.JSON, nullable=True)  # {"gender": "Male", "age": "<30", "department": "IT"}
+    # Canonical key of dimension_values (see canonical_dimension_key), maintained on write
+    # so dimensional lookups are indexed equality probes instead of JSON scans
+    dimension_key = db.Column(db.String(255), nullable=False, default='', server_default='')
 
     # Phase 4: Draft support for auto-save functionality
     is_draft = db.Column(db.Boolean, default=False, nullable=False)  # Flag to mark draft entries
@@ -87,12 +101,14 @@ class ESGData(db.Model, TenantScopedQueryMixin, TenantScopedModelMixin):
     # Add indexes for better query performance
     __table_args__ = (
         # Uniqueness constraint: Prevent duplicate entries for same field/entity/date/company
+        # and dimension combination
         # Note: is_draft is NOT included to allow multiple draft versions
         db.UniqueConstraint(
             'field_id',
             'entity_id',
             'reporting_date',
             'company_id',
+            'dimension_key',
             name='uq_esg_single_entry_per_date'
         ),
         db.Index('idx_esg_entity_date', 'entity_id', 'reporting_date'),
@@ -100,12 +116,17 @@ class ESGData(db.Model, TenantScopedQueryMixin, TenantScopedModelMixin):
         db.Index('idx_esg_company', 'company_id'),  # Index for tenant filtering
         db.Index('idx_esg_assignment', 'assignment_id'),  # Index for assignment relationship
         # Phase 2.5: Add index for dimensional queries
-        # Note: Removed idx_esg_dimensions as JSON columns cannot be indexed with B-tree in Postgres
+        # Note: Removed idx_esg_dimensions as JSON columns cannot be indexed with B-tree in Postgres;
+        # dimensional queries use the canonical dimension_key column instead
+        db.Index('idx_esg_dimension_key', 'field_id', 'entity_id', 'dimension_key'),
         # Phase 4: Add index for draft queries
         db.Index('idx_esg_draft_lookup', 'field_id', 'entity_id', 'reporting_date', 'is_draft'),
         # Validation Engine: Add index for review status queries
         db.Index('idx_esg_review_status', 'review_status', 'company_id'),
         db.Index('idx_esg_review_pending', 'review_status', 'submitted_at'),
+        # Analytics rollups: change window scan and per-day recounts
+        db.Index('idx_esg_updated_at', 'updated_at'),
+        db.Index('idx_esg_company_created', 'company_id', 'created_at'),
     )
 
     def __init__(self, entity_id, field_id, raw_value, reporting_date, company_id=None, calculated_value=None, unit=None, dimension_values=None, assignment_id=None, notes=None):
@@ -117,6 +138,7 @@ class ESGData(db.Model, TenantScopedQueryMixin, TenantScopedModelMixin):
         self.calculated_value = calculated_value
         self.reporting_date = reporting_date
         self.dimension_values = dimension_values or {}
+        self.dimension_key = ESGData.canonical_dimension_key(self.dimension_values)
         self.unit = unit  # Phase 1: Support for user-selected units
         self.notes = notes  # Enhancement #2: Support for notes/comments
 
@@ -187,6 +209,65 @@ class ESGData(db.Model, TenantScopedQueryMixin, TenantScopedModelMixin):
         sorted_items = sorted(self.dimension_values.items())
         return ",".join([f"{k}:{v}" for k, v in sorted_items])
 
+    # Longest canonical key stored verbatim; longer keys are stored as a digest
+    DIMENSION_KEY_MAX_LENGTH = 255
+
+    @staticmethod
+    def canonical_dimension_key(dimensions):
+        """Build an order- and case-insensitive key for a dimension dict.
+
+        Two dimension dicts describe the same breakdown exactly when their
+        canonical keys are equal, so keys can be matched in bulk (set/dict
+        lookups, or equality on the indexed dimension_key column) instead of
+        comparing dicts row by row. Only scalar values form the key and a
+        structured breakdown payload (breakdowns/totals) belongs to the
+        field's total entry, whose key is "". "%", "|" and ":" inside names
+        and values are percent-encoded so they cannot be read as separators.
+
+        Args:
+            dimensions (dict): Dimension name -> value mapping (may be None)
+
+        Returns:
+            str: Key like "age:<30|gender:Male" ("" for no dimensions)
+        """
+        if not dimensions or 'breakdowns' in dimensions:
+            return ""
+
+        items = sorted(
+            (_dimension_key_part(k).lower(), _dimension_key_part(v))
+            for k, v in dimensions.items()
+            if not isinstance(v, (dict, list))
+        )
+        key = "|".join(f"{k}:{v}" for k, v in items)
+        if len(key) > ESGData.DIMENSION_KEY_MAX_LENGTH:
+            return "sha1:" + hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return key
+
+    @staticmethod
+    def dimension_key_matches(dimension_key, dimension_filter):
+        """Check if a canonical dimension key satisfies a dimension filter.
+
+        Key counterpart of matches_dimension_filter(): every filtered
+        dimension must be present with the given value.
+
+        Args:
+            dimension_key (str): Canonical key from canonical_dimension_key()
+            dimension_filter (dict): Filter like {"gender": "Male", "age": "<30"}
+
+        Returns:
+            bool: True if all dimensions in filter match the key
+        """
+        if not dimension_filter:
+            return True
+        if not dimension_key or dimension_key.startswith("sha1:"):
+            return False
+
+        dimensions = dict(item.split(":", 1) for item in dimension_key.split("|") if ":" in item)
+        return all(
+            dimensions.get(_dimension_key_part(k).lower()) == _dimension_key_part(v)
+            for k, v in dimension_filter.items()
+        )
+
     # Enhancement #2: Notes helper methods
     def has_notes(self):
         """Check if this data entry has notes.
@@ -448,3 +529,160 @@ class ESGDataAttachment(db.Model):
 
     def __repr__(self):
         return f'<ESGDataAttachment {self.filename}>'
+
+
+class ESGDataBreakdown(db.Model):
+    """Normalized fact row of a dimensional breakdown.
+
+    Structured dimension_values (version 2, with breakdowns) are flattened
+    into one row per (breakdown, dimension) holding the numeric amount, so
+    by-dimension, cross-entity and time-series totals run as GROUP BY queries
+    joined to esg_data instead of loading and walking every JSON payload.
+    Rows are rewritten whenever the entry's dimension_values change.
+    """
+
+    __tablename__ = 'esg_data_breakdowns'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    data_id = db.Column(db.String(36), db.ForeignKey('esg_data.data_id', ondelete='CASCADE'), nullable=False)
+    dimension = db.Column(db.String(100), nullable=False)
+    dimension_value = db.Column(db.String(255), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_esg_breakdown_data', 'data_id', 'dimension', 'dimension_value'),
+    )
+
+    @staticmethod
+    def rows_for(data_id, dimension_values):
+        """Fact rows for an entry's dimension_values.
+
+        Mirrors DimensionalDataService.calculate_totals(): breakdowns without
+        a numeric value or without a value for a dimension are skipped.
+
+        Args:
+            data_id (str): ESGData ID
+            dimension_values (dict): Stored dimension_values JSON
+
+        Returns:
+            list: Insert parameter dicts (empty for non-structured dimensions)
+        """
+        if not dimension_values or dimension_values.get('version') != 2:
+            return []
+
+        rows = []
+        for breakdown in dimension_values.get('breakdowns', []):
+            if breakdown.get('raw_value') is None:
+                continue
+            try:
+                amount = float(breakdown['raw_value'])
+            except (ValueError, TypeError):
+                continue
+            for dimension, value in (breakdown.get('dimensions') or {}).items():
+                if value:
+                    rows.append({
+                        'data_id': data_id,
+                        'dimension': dimension,
+                        'dimension_value': str(value),
+                        'amount': amount
+                    })
+        return rows
+
+    @staticmethod
+    def replace_rows(connection, entries):
+        """Rewrite the fact rows of many entries with one DELETE and one INSERT.
+
+        Bulk Core/ORM statements bypass the ESGData mapper events below, so
+        their callers rewrite the facts of the entries they wrote with this.
+
+        Args:
+            connection: Connection or Session to execute on
+            entries (iterable): (data_id, dimension_values) pairs
+        """
+        entries = list(entries)
+        if not entries:
+            return
+        table = ESGDataBreakdown.__table__
+        connection.execute(table.delete().where(table.c.data_id.in_([data_id for data_id, _ in entries])))
+        rows = [row for data_id, dimension_values in entries
+                for row in ESGDataBreakdown.rows_for(data_id, dimension_values)]
+        if rows:
+            connection.execute(table.insert(), rows)
+
+    def __repr__(self):
+        return f'<ESGDataBreakdown {self.data_id} {self.dimension}={self.dimension_value}: {self.amount}>'
+
+
+def _write_breakdown_facts(connection, target):
+    ESGDataBreakdown.replace_rows(connection, [(target.data_id, target.dimension_values)])
+
+
+@event.listens_for(ESGData, 'after_insert')
+def insert_breakdown_facts(mapper, connection, target):
+    """Flatten a new entry's dimensional breakdown into fact rows."""
+    if target.dimension_values:
+        _write_breakdown_facts(connection, target)
+
+
+@event.listens_for(ESGData, 'after_update')
+def update_breakdown_facts(mapper, connection, target):
+    """Rewrite the fact rows when an entry's dimension_values change."""
+    if inspect(target).attrs.dimension_values.history.has_changes():
+        _write_breakdown_facts(connection, target)
+
+
+@event.listens_for(ESGData, 'before_delete')
+def delete_breakdown_facts(mapper, connection, target):
+    """Fact rows go with their entry."""
+    table = ESGDataBreakdown.__table__
+    connection.execute(table.delete().where(table.c.data_id == target.data_id))
+
+
+@event.listens_for(ESGData, 'before_insert')
+@event.listens_for(ESGData, 'before_update')
+def sync_dimension_key(mapper, connection, target):
+    """Keep the indexed dimension_key in step with dimension_values."""
+    target.dimension_key = ESGData.canonical_dimension_key(target.dimension_values)
+
+
+# Columns whose change alters the inputs of dependant computed fields
+RECOMPUTE_TRIGGER_COLUMNS = ('raw_value', 'dimension_values', 'is_draft', 'reporting_date', 'entity_id', 'field_id')
+
+
+def _record_raw_writes(target, keys):
+    from ..services.recompute_pipeline import record_raw_writes
+    record_raw_writes(object_session(target), target.company_id, keys)
+
+
+@event.listens_for(ESGData, 'after_insert')
+@event.listens_for(ESGData, 'after_delete')
+def record_raw_value_write(mapper, connection, target):
+    """Queue dependant computed fields of a submitted or deleted raw value for recomputation (drafts are ignored)."""
+    if not target.is_draft:
+        _record_raw_writes(target, [(target.field_id, target.entity_id, target.reporting_date)])
+
+
+@event.listens_for(ESGData, 'after_update')
+def record_updated_raw_value(mapper, connection, target):
+    """
+    Queue recomputation when an update touches the computation inputs.
+
+    Promoting a draft counts as a new submission. When the row moved (date,
+    entity or field changed) its previous position is recomputed as well.
+    """
+    if target.is_draft:
+        return
+
+    state = inspect(target)
+    histories = {column: state.attrs[column].history for column in RECOMPUTE_TRIGGER_COLUMNS}
+    if not any(history.has_changes() for history in histories.values()):
+        return
+
+    keys = {(target.field_id, target.entity_id, target.reporting_date)}
+    previous = tuple(
+        (histories[column].deleted or [getattr(target, column)])[0]
+        for column in ('field_id', 'entity_id', 'reporting_date')
+    )
+    if previous[2] is not None:
+        keys.add(previous)
+    _record_raw_writes(target, keys)
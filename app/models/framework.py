@@ -1,7 +1,8 @@
 from ..extensions import db
 import uuid
 import re
-from sqlalchemy.orm import validates
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, validates, object_session
 from sqlalchemy.ext.hybrid import hybrid_property
 
 
@@ -246,50 +247,41 @@ class FrameworkDataField(db.Model):
             return []
         return [mapping.raw_field for mapping in self.variable_mappings]
 
-    def check_circular_dependency(self, visited=None):
+    def _dependency_graph(self):
+        """Compiled dependency graph of this field's company (see services/dependency_graph.py)."""
+        from ..services.dependency_graph import get_dependency_graph
+        return get_dependency_graph(self.company_id)
+
+    def check_circular_dependency(self):
         """Check for circular dependencies in computed fields.
-        
-        Args:
-            visited (set): Set of visited field IDs to detect cycles
-            
+
         Returns:
-            bool: True if circular dependency found
+            bool: True if the field is on, or depends on, a dependency cycle
         """
-        if visited is None:
-            visited = set()
-            
-        if self.field_id in visited:
-            return True
-            
         if not self.is_computed:
             return False
-            
-        visited.add(self.field_id)
-        
-        for mapping in self.variable_mappings:
-            if mapping.raw_field.check_circular_dependency(visited):
-                return True
-                
-        visited.remove(self.field_id)
-        return False
+        return self._dependency_graph().has_cycle(self.field_id)
 
     def get_dependants(self):
         """Get all computed fields that depend on this field (Phase 3 dependency tracking)."""
         from . import FieldVariableMapping
-        dependant_mappings = FieldVariableMapping.query.filter_by(raw_field_id=self.field_id).all()
-        return [mapping.computed_field for mapping in dependant_mappings]
+        return FrameworkDataField.query.join(
+            FieldVariableMapping, FieldVariableMapping.computed_field_id == FrameworkDataField.field_id
+        ).filter(
+            FieldVariableMapping.raw_field_id == self.field_id
+        ).distinct().all()
 
     def has_dependants(self):
         """Check if this field has any dependants (Phase 3)."""
         return len(self.get_dependants()) > 0
 
-    def get_all_dependencies(self, visited=None):
+    def get_all_dependencies(self):
         """
         Get all raw field dependencies recursively.
-        Returns flat list of all dependency field objects.
+        Returns flat list of all dependency field objects (each field once).
 
-        Args:
-            visited (set): Set of visited field IDs to prevent circular dependencies
+        Dependencies are read from the company's compiled dependency graph
+        and loaded with a single query.
 
         Returns:
             list: List of FrameworkDataField objects that this field depends on
@@ -297,24 +289,15 @@ class FrameworkDataField(db.Model):
         if not self.is_computed:
             return []
 
-        if visited is None:
-            visited = set()
-
-        if self.field_id in visited:
-            return []  # Circular dependency protection
-
-        visited.add(self.field_id)
-        dependencies = []
-
-        for mapping in self.variable_mappings:
-            raw_field = mapping.raw_field
-            dependencies.append(raw_field)
-
-            # Recursively get dependencies if raw field is also computed
-            if raw_field.is_computed:
-                dependencies.extend(raw_field.get_all_dependencies(visited))
+        dependency_ids = self._dependency_graph().all_dependencies(self.field_id)
+        if not dependency_ids:
+            return []
 
-        return dependencies
+        fields = {
+            field.field_id: field
+            for field in FrameworkDataField.query.filter(FrameworkDataField.field_id.in_(dependency_ids))
+        }
+        return [fields[field_id] for field_id in dependency_ids if field_id in fields]
 
     def get_dependency_tree(self):
         """
@@ -327,29 +310,7 @@ class FrameworkDataField(db.Model):
         if not self.is_computed:
             return None
 
-        tree = {
-            'field_id': self.field_id,
-            'field_name': self.field_name,
-            'is_computed': True,
-            'formula': self.formula_expression,
-            'dependencies': []
-        }
-
-        for mapping in self.variable_mappings:
-            dep_info = {
-                'variable': mapping.variable_name,
-                'coefficient': mapping.coefficient,
-                'field_id': mapping.raw_field_id,
-                'field_name': mapping.raw_field.field_name,
-                'is_computed': mapping.raw_field.is_computed
-            }
-
-            if mapping.raw_field.is_computed:
-                dep_info['dependencies'] = mapping.raw_field.get_dependency_tree()
-
-            tree['dependencies'].append(dep_info)
-
-        return tree
+        return self._dependency_graph().dependency_tree(self.field_id)
 
     def validate_frequency_compatibility(self, proposed_frequency):
         """
@@ -401,18 +362,7 @@ class FrameworkDataField(db.Model):
         Returns:
             list: List of FrameworkDataField objects that depend on this field
         """
-        from . import FieldVariableMapping
-
-        dependent_mappings = FieldVariableMapping.query.filter_by(
-            raw_field_id=self.field_id
-        ).all()
-
-        dependent_fields = []
-        for mapping in dependent_mappings:
-            if mapping.computed_field and mapping.computed_field.is_computed:
-                dependent_fields.append(mapping.computed_field)
-
-        return dependent_fields
+        return [field for field in self.get_dependants() if field.is_computed]
 
     def can_be_removed(self):
         """
@@ -512,3 +462,91 @@ class FieldVariableMapping(db.Model):
 
     def __repr__(self):
         return f'<FieldVariableMapping {self.coefficient}*{self.variable_name}={self.raw_field_id}>'
+
+
+@event.listens_for(FrameworkDataField, 'after_insert')
+@event.listens_for(FrameworkDataField, 'after_update')
+@event.listens_for(FrameworkDataField, 'after_delete')
+def record_field_dependency_write(mapper, connection, target):
+    """Remember the company whose dependency graph a field write changes."""
+    session = object_session(target)
+    if session is not None:
+        pending = session.info.setdefault('dependency_graph_pending', {'companies': set(), 'fields': set()})
+        pending['companies'].add(target.company_id)
+
+
+@event.listens_for(FieldVariableMapping, 'after_insert')
+@event.listens_for(FieldVariableMapping, 'after_update')
+@event.listens_for(FieldVariableMapping, 'after_delete')
+def record_mapping_dependency_write(mapper, connection, target):
+    """Remember the computed field whose company's dependency graph a mapping write changes."""
+    session = object_session(target)
+    if session is not None:
+        pending = session.info.setdefault('dependency_graph_pending', {'companies': set(), 'fields': set()})
+        pending['fields'].add(target.computed_field_id)
+
+
+@event.listens_for(Session, 'after_flush')
+def invalidate_flushed_dependency_graphs(session, flush_context):
+    """
+    Bump the dependency graphs of companies whose fields or mappings were flushed.
+
+    Mapping writes are resolved to their company and global provider status
+    with two queries per flush, however many rows were written.
+    """
+    pending = session.info.pop('dependency_graph_pending', None)
+    if not pending:
+        return
+
+    from .company import Company
+    from ..services.dependency_graph import record_dependency_write
+
+    connection = session.connection()
+    company_ids = set(pending['companies'])
+    if pending['fields']:
+        company_ids.update(connection.execute(
+            select(FrameworkDataField.company_id).where(FrameworkDataField.field_id.in_(pending['fields']))
+        ).scalars())
+    company_ids.discard(None)
+    if not company_ids:
+        return
+
+    providers = set(connection.execute(
+        select(Company.id).where(Company.id.in_(company_ids), Company.is_global_framework_provider.is_(True))
+    ).scalars())
+    for company_id in company_ids:
+        record_dependency_write(session, company_id, company_id in providers)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def invalidate_finished_dependency_graphs(session):
+    """Re-bump dependency graphs written in the finished transaction."""
+    if 'dependency_graph_writes' not in session.info:
+        return
+
+    from ..services.dependency_graph import finish_dependency_writes
+    finish_dependency_writes(session)
+
+
+@event.listens_for(Topic, 'after_insert')
+@event.listens_for(Topic, 'after_update')
+@event.listens_for(Topic, 'after_delete')
+@event.listens_for(Framework, 'after_insert')
+@event.listens_for(Framework, 'after_update')
+@event.listens_for(Framework, 'after_delete')
+def invalidate_topic_trees(mapper, connection, target):
+    """Cached topic trees show topic and framework names and structure, so rebuild them."""
+    from ..services.topic_tree import record_topic_tree_write
+    record_topic_tree_write(object_session(target))
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def invalidate_finished_topic_trees(session):
+    """Re-bump topic trees written in the finished transaction."""
+    if 'topic_tree_written' not in session.info:
+        return
+
+    from ..services.topic_tree import finish_topic_tree_writes
+    finish_topic_tree_writes(session)
@@ -77,7 +77,8 @@ class User(db.Model, UserMixin):
 # Set up the user loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    from ..services.identity_cache import get_user_by_id
+    return get_user_by_id(int(user_id))
 
 
 # -------------------------------------------------------------------------
@@ -139,4 +140,14 @@ def _validate_super_admin_role_change(mapper, connection, target):  # pylint: di
 def _normalize_email(mapper, connection, target):  # pylint: disable=unused-argument
     """Ensure email is always stored in lowercase for consistency."""
     if target.email:
-        target.email = target.email.lower().strip()
\ No newline at end of file
+        target.email = target.email.lower().strip()
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):  # pylint: disable=unused-argument
+    """Drop the cached user snapshot when the user's role, status or profile is written."""
+    from ..services.identity_cache import record_identity_write
+
+    record_identity_write(target, [('user', target.id)])
@@ -678,7 +678,19 @@ def validate_formula():
                 'valid': False,
                 'message': f'Variables not mapped: {", ".join(sorted(unmapped))}'
             })
-        
+
+        # When editing an existing computed field, reject mappings that would make it
+        # depend on itself (checked against the company's compiled dependency graph)
+        field_id = data.get('field_id')
+        dependency_ids = [dep['field_id'] for dep in dependencies if dep.get('field_id')]
+        if field_id and dependency_ids and current_user.company_id:
+            from ..services.dependency_graph import get_dependency_graph
+            if get_dependency_graph(current_user.company_id).would_create_cycle(field_id, dependency_ids):
+                return jsonify({
+                    'valid': False,
+                    'message': 'Formula would create a circular dependency'
+                })
+
         return jsonify({'valid': True})
         
     except Exception as e:
@@ -1237,65 +1249,62 @@ def audit_log():
 @login_required
 @admin_or_super_admin_required
 def data_status_matrix():
-    # Get entities and assignments (which are now our data points)
-    entities = get_admin_entities()
-    assignments = get_admin_assignments()
-    
-    # Build matrix data
-    matrix_data = []
-    for entity in entities:
-        entity_assignments = [a for a in assignments if a.entity_id == entity.id and a.series_status == 'active']
-        
-        for assignment in entity_assignments:
-            # Get framework field information
-            framework_field = FrameworkDataField.query.get(assignment.field_id)
-            if not framework_field:
-                continue
-            
-            # Get ESG data for this assignment
-            if is_super_admin():
-                esg_data = ESGData.query.filter_by(
-                    field_id=assignment.field_id,
-                    entity_id=entity.id
-                ).order_by(ESGData.reporting_date.desc()).all()
-            else:
-                esg_data = ESGData.query_for_tenant(db.session).filter_by(
-                    field_id=assignment.field_id,
-                    entity_id=entity.id
-                ).order_by(ESGData.reporting_date.desc()).all()
-            
-            # Calculate status
-            status = 'no_data'
-            latest_value = None
-            latest_date = None
-            
-            if esg_data:
-                latest_entry = esg_data[0]
-                latest_date = latest_entry.reporting_date
-                
-                if framework_field.is_computed:
-                    latest_value = latest_entry.calculated_value
-                    status = 'computed' if latest_value is not None else 'pending_computation'
-                else:
-                    latest_value = latest_entry.raw_value
-                    status = 'complete' if latest_value is not None else 'incomplete'
-            
-            matrix_data.append({
-                'entity_id': entity.id,
-                'entity_name': entity.name,
-                'field_id': assignment.field_id,
-                'assignment_id': assignment.id,
-                'field_name': framework_field.field_name,
-                'frequency': assignment.frequency,
-                'value_type': assignment.value_type,
-                'unit': assignment.effective_unit,
-                'status': status,
-                'latest_value': latest_value,
-                'latest_date': latest_date.isoformat() if latest_date else None,
-                'is_computed': framework_field.is_computed
-            })
-    
-    return jsonify(matrix_data)
+    """
+    Latest value and status of every active assignment of the tenant.
+
+    Query parameters (all optional):
+    - entity_id, field_id, frequency, status, search: Filters
+    - page, per_page: Pagination (default: all rows)
+    - compact: 'true' returns column names once and rows as arrays
+
+    Without pagination or compact parameters the response is the plain list
+    of cell objects.
+    """
+    from ..services.user_v2.data_status_service import DataStatusService, MATRIX_COLUMNS, MATRIX_STATUSES
+
+    if is_super_admin():
+        company_id = None
+    else:
+        tenant = get_current_tenant()
+        if not tenant:
+            return jsonify([])
+        company_id = tenant.id
+
+    status = request.args.get('status')
+    if status and status not in MATRIX_STATUSES:
+        return jsonify({'error': f'Invalid status. Must be one of: {", ".join(MATRIX_STATUSES)}'}), 400
+
+    page = request.args.get('page', type=int)
+    per_page = request.args.get('per_page', type=int)
+    if page or per_page:
+        page = max(page or 1, 1)
+        per_page = min(max(per_page or 100, 1), 1000)
+    compact = request.args.get('compact', 'false').lower() == 'true'
+
+    matrix = DataStatusService.get_status_matrix(
+        company_id,
+        entity_id=request.args.get('entity_id', type=int),
+        field_id=request.args.get('field_id'),
+        frequency=request.args.get('frequency'),
+        status=status,
+        search=request.args.get('search'),
+        page=page,
+        per_page=per_page
+    )
+
+    if compact:
+        return jsonify({
+            'columns': MATRIX_COLUMNS,
+            'rows': matrix['rows'],
+            'total': matrix['total'],
+            'page': page,
+            'per_page': per_page
+        })
+
+    items = [dict(zip(MATRIX_COLUMNS, row)) for row in matrix['rows']]
+    if page:
+        return jsonify({'items': items, 'total': matrix['total'], 'page': page, 'per_page': per_page})
+    return jsonify(items)
 
 @admin_bp.route('/esg_data_details/<data_id>')
 @login_required
@@ -1840,16 +1849,34 @@ def get_field_unit_options(field_id):
 @login_required
 @admin_or_super_admin_required
 def convert_unit():
-    """Convert a value from one unit to another (Phase 4)."""
+    """Convert a value, or a list of values, from one unit to another (Phase 4)."""
     try:
         data = request.get_json()
-        value = float(data.get('value', 0))
         from_unit = data.get('from_unit')
         to_unit = data.get('to_unit')
         
         if not from_unit or not to_unit:
             return jsonify({'error': 'Both from_unit and to_unit are required'}), 400
         
+        if 'values' in data:
+            values = [None if value is None else float(value) for value in data['values']]
+            converted_values, success, error = UnitConverter.convert_values(values, from_unit, to_unit)
+            if success:
+                return jsonify({
+                    'success': True,
+                    'original_unit': from_unit,
+                    'converted_values': converted_values,
+                    'target_unit': to_unit,
+                    'conversion_factor': UnitConverter.get_conversion_factor(from_unit, to_unit)
+                })
+            return jsonify({
+                'success': False,
+                'error': error,
+                'original_unit': from_unit,
+                'target_unit': to_unit
+            }), 400
+        
+        value = float(data.get('value', 0))
         converted_value, success, error = UnitConverter.convert_value(value, from_unit, to_unit)
         
         if success:
@@ -1859,7 +1886,7 @@ def convert_unit():
                 'original_unit': from_unit,
                 'converted_value': converted_value,
                 'target_unit': to_unit,
-                'conversion_factor': converted_value / value if value != 0 else 1
+                'conversion_factor': UnitConverter.get_conversion_factor(from_unit, to_unit)
             })
         else:
             return jsonify({
@@ -1881,7 +1908,7 @@ def convert_unit():
 @login_required
 @admin_or_super_admin_required
 def validate_unit():
-    """Validate if a unit is appropriate for a field (Phase 4)."""
+    """Validate if a unit, or a list of units, is appropriate for a field (Phase 4)."""
     try:
         data = request.get_json()
         unit = data.get('unit')
@@ -1891,6 +1918,21 @@ def validate_unit():
             return jsonify({'error': 'field_id is required'}), 400
         
         field = FrameworkDataField.query.get_or_404(field_id)
+        
+        if 'units' in data:
+            # Validate each distinct unit once
+            results = {u: validate_esg_data_unit(u, field) for u in set(data['units'])}
+            return jsonify({
+                'is_valid': all(is_valid for is_valid, _ in results.values()),
+                'results': [
+                    {'unit': u, 'is_valid': results[u][0], 'error_message': results[u][1]}
+                    for u in data['units']
+                ],
+                'field_id': field_id,
+                'field_unit_category': field.unit_category,
+                'field_default_unit': field.default_unit
+            })
+        
         is_valid, error_message = validate_esg_data_unit(unit, field)
         
         return jsonify({
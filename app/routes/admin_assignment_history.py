@@ -16,7 +16,10 @@ from flask import Blueprint, render_template, request, jsonify, current_app, red
 from flask_login import login_required, current_user
 from functools import wraps
 from datetime import date, datetime
-from sqlalchemy import desc, and_, or_, func
+import base64
+import binascii
+import json
+from sqlalchemy import desc, and_, or_, func, tuple_
 from sqlalchemy.orm import joinedload
 
 from ..models.data_assignment import DataPointAssignment
@@ -102,6 +105,9 @@ def assignment_timeline_api():
     - search: Search in field names, entity names, or reasons
     - page: Page number for pagination (default: 1)
     - per_page: Items per page (default: 20)
+    - cursor: Keyset pagination; pass the previous response's next_cursor (empty
+      for the first page). Pages are read from the index instead of an OFFSET
+      and no total is computed.
     """
     tenant = get_current_tenant()
     
@@ -114,6 +120,8 @@ def assignment_timeline_api():
     search = request.args.get('search', '').strip()
     page = request.args.get('page', 1, type=int)
     per_page = min(request.args.get('per_page', 20, type=int), 100)  # Cap at 100
+    keyset = 'cursor' in request.args
+    cursor = request.args.get('cursor', '').strip()
     
     try:
         # Base query with tenant scoping and eager loading
@@ -150,38 +158,72 @@ def assignment_timeline_api():
             except ValueError:
                 return jsonify({'error': 'Invalid date_to format. Use YYYY-MM-DD'}), 400
         
-        # Search filtering
+        # Search filtering: plain joins on the name columns (trigram-indexed
+        # on PostgreSQL, see migrate_assignment_timeline) instead of
+        # correlated EXISTS subqueries
         if search:
-            search_filter = or_(
-                DataPointAssignment.field.has(FrameworkDataField.field_name.ilike(f'%{search}%')),
-                DataPointAssignment.entity.has(Entity.name.ilike(f'%{search}%')),
-                DataPointAssignment.assigned_by_user.has(User.name.ilike(f'%{search}%'))
-            )
-            query = query.filter(search_filter)
-        
-        # Order by assigned date (newest first) and version
+            pattern = f'%{search}%'
+            query = query.outerjoin(
+                FrameworkDataField, DataPointAssignment.field_id == FrameworkDataField.field_id
+            ).outerjoin(
+                Entity, DataPointAssignment.entity_id == Entity.id
+            ).outerjoin(
+                User, DataPointAssignment.assigned_by == User.id
+            ).filter(or_(
+                FrameworkDataField.field_name.ilike(pattern),
+                Entity.name.ilike(pattern),
+                User.name.ilike(pattern)
+            ))
+        
+        # Order by assigned date (newest first) and version; the ID keeps the
+        # order total so keyset pages neither skip nor repeat rows
         query = query.order_by(
-            desc(DataPointAssignment.assigned_date),
-            desc(DataPointAssignment.series_version)
+            desc(DataPointAssignment.assigned_date).nulls_last(),
+            desc(DataPointAssignment.series_version),
+            desc(DataPointAssignment.id)
         )
         
-        # Paginate results
-        pagination = query.paginate(
-            page=page, 
-            per_page=per_page, 
-            error_out=False
-        )
+        if keyset:
+            if cursor:
+                try:
+                    query = query.filter(_after_cursor(_decode_cursor(cursor)))
+                except ValueError:
+                    return jsonify({'error': 'Invalid cursor'}), 400
+            assignments = query.limit(per_page + 1).all()
+            has_next = len(assignments) > per_page
+            assignments = assignments[:per_page]
+            pagination_data = {
+                'per_page': per_page,
+                'has_next': has_next,
+                'next_cursor': _encode_cursor(assignments[-1]) if has_next else None
+            }
+        else:
+            # Paginate results
+            pagination = query.paginate(
+                page=page, 
+                per_page=per_page, 
+                error_out=False
+            )
+            assignments = pagination.items
+            pagination_data = {
+                'page': pagination.page,
+                'per_page': pagination.per_page,
+                'total': pagination.total,
+                'pages': pagination.pages,
+                'has_prev': pagination.has_prev,
+                'has_next': pagination.has_next,
+                'next_cursor': _encode_cursor(assignments[-1]) if pagination.has_next and assignments else None
+            }
         
-        assignments = pagination.items
+        # Data entry counts and previous versions of the whole page, one query each
+        data_counts = DataPointAssignment.get_data_entry_counts(assignments)
+        previous_versions = DataPointAssignment.get_previous_versions(assignments)
         
         # Format timeline data
         timeline_data = []
         for assignment in assignments:
-            # Get data entry count for this assignment
-            data_count = assignment.get_data_entry_count()
-            
-            # Get changes from previous version if exists
-            changes_summary = get_assignment_changes_summary(assignment)
+            data_count = data_counts[assignment.id]
+            changes_summary = describe_assignment_changes(assignment, previous_versions.get(assignment.id))
             
             timeline_item = {
                 'id': assignment.id,
@@ -210,14 +252,7 @@ def assignment_timeline_api():
         
         return jsonify({
             'timeline': timeline_data,
-            'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_prev': pagination.has_prev,
-                'has_next': pagination.has_next
-            }
+            'pagination': pagination_data
         })
         
     except Exception as e:
@@ -514,18 +549,20 @@ def get_assignment_history_stats(company_id):
 
 def get_assignment_changes_summary(assignment):
     """Get a summary of changes made in this assignment version."""
+    if assignment.series_version <= 1:
+        return 'Initial assignment'
+    
+    # Get the previous version in the same series
+    previous_version = DataPointAssignment.get_previous_versions([assignment]).get(assignment.id)
+    return describe_assignment_changes(assignment, previous_version)
+
+
+def describe_assignment_changes(assignment, previous_version):
+    """Summarize the changes from an already loaded previous version (None if missing)."""
     try:
         if assignment.series_version <= 1:
             return 'Initial assignment'
         
-        # Get the previous version in the same series
-        previous_version = DataPointAssignment.query.filter(
-            and_(
-                DataPointAssignment.data_series_id == assignment.data_series_id,
-                DataPointAssignment.series_version == assignment.series_version - 1
-            )
-        ).first()
-        
         if not previous_version:
             return 'Version history unavailable'
         
@@ -550,4 +587,39 @@ def get_assignment_changes_summary(assignment):
         
     except Exception as e:
         current_app.logger.error(f'Error generating changes summary: {str(e)}')
-        return 'Changes unavailable'
\ No newline at end of file
+        return 'Changes unavailable'
+
+def _encode_cursor(assignment):
+    """Opaque keyset cursor pointing just past an assignment in timeline order."""
+    key = [
+        assignment.assigned_date.isoformat() if assignment.assigned_date else None,
+        assignment.series_version,
+        assignment.id
+    ]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    """(assigned_date, series_version, id) of a cursor; raises ValueError if malformed."""
+    try:
+        assigned_date, series_version, assignment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        assigned_date = datetime.fromisoformat(assigned_date) if assigned_date else None
+        return assigned_date, int(series_version), str(assignment_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+
+def _after_cursor(key):
+    """Filter for rows after key in (assigned_date DESC NULLS LAST, series_version DESC, id DESC) order."""
+    assigned_date, series_version, assignment_id = key
+    if assigned_date is None:
+        return and_(
+            DataPointAssignment.assigned_date.is_(None),
+            tuple_(DataPointAssignment.series_version, DataPointAssignment.id) < (series_version, assignment_id)
+        )
+    # Row-value comparison, so the descending timeline index serves the range
+    return or_(
+        tuple_(DataPointAssignment.assigned_date, DataPointAssignment.series_version, DataPointAssignment.id)
+        < (assigned_date, series_version, assignment_id),
+        DataPointAssignment.assigned_date.is_(None)
+    )
@@ -1748,8 +1748,10 @@ def get_field_dependencies(field_id):
                 'dependency_tree': None
             })
 
-        dependencies = field.get_all_dependencies()
-        dependency_tree = field.get_dependency_tree()
+        from ..services.dependency_graph import get_dependency_graph
+
+        graph = get_dependency_graph(field.company_id)
+        dependencies = [graph.node(dep_id) for dep_id in graph.all_dependencies(field_id)]
 
         return jsonify({
             'field_id': field_id,
@@ -1763,7 +1765,7 @@ def get_field_dependencies(field_id):
                     'is_computed': dep.is_computed
                 } for dep in dependencies
             ],
-            'dependency_tree': dependency_tree
+            'dependency_tree': graph.dependency_tree(field_id)
         })
 
     except Exception as e:
@@ -1862,15 +1864,18 @@ def get_dependency_tree():
     try:
         framework_id = request.args.get('framework_id')
 
-        query = FrameworkDataField.query.filter_by(is_computed=True)
-        if framework_id:
-            query = query.filter_by(framework_id=framework_id)
+        from ..services.dependency_graph import get_dependency_graph
 
-        computed_fields = query.all()
+        query = db.session.query(FrameworkDataField.field_id, FrameworkDataField.company_id).filter(
+            FrameworkDataField.is_computed.is_(True)
+        )
+        if framework_id:
+            query = query.filter(FrameworkDataField.framework_id == framework_id)
 
+        # Trees are read from each company's compiled dependency graph
         tree = []
-        for field in computed_fields:
-            tree.append(field.get_dependency_tree())
+        for field_id, company_id in query.all():
+            tree.append(get_dependency_graph(company_id).dependency_tree(field_id))
 
         return jsonify({
             'success': True,
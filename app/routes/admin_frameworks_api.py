@@ -10,6 +10,7 @@ def _is_super_admin():
     return getattr(_cu, 'role', None) == 'SUPER_ADMIN'
 
 from ..services import frameworks_service
+from ..services.topic_tree import get_topic_tree
 from ..models.framework import Topic  # Needed for hierarchical topics tree
 
 admin_frameworks_api_bp = Blueprint('admin_frameworks_api', __name__, url_prefix='/admin/frameworks')
@@ -307,108 +308,10 @@ def get_all_topics_hierarchical():
     try:
         company_id = current_user.company_id
         framework_id = request.args.get('framework_id')  # Optional framework filter
-        
-        # Import here to avoid circular imports
-        from ..models.framework import Framework, FrameworkDataField
-        
-        # Get frameworks for this company (filtered or all) - includes global frameworks only
-        from ..models.company import Company
-        global_provider = Company.get_global_provider()
-        global_provider_id = global_provider.id if global_provider else None
 
-        if framework_id:
-            # Check if specific framework exists and is accessible (company-specific or global only)
-            framework = Framework.query.filter_by(framework_id=framework_id).first()
-            if framework and (framework.company_id == company_id or
-                            (global_provider_id and framework.company_id == global_provider_id)):
-                frameworks = [framework]
-                framework_ids = [framework_id]
-            else:
-                frameworks = []
-                framework_ids = []
-        else:
-            # Get frameworks for this company + global frameworks only
-            if global_provider_id:
-                frameworks = Framework.query.filter(
-                    (Framework.company_id == company_id) |
-                    (Framework.company_id == global_provider_id)
-                ).all()
-            else:
-                # Fallback if no global provider exists
-                frameworks = Framework.query.filter_by(company_id=company_id).all()
-            framework_ids = [f.framework_id for f in frameworks]
-        
-        if not framework_ids:
-            return jsonify([])  # No frameworks, return empty tree
-            
-        # Get topics for the selected framework(s)
-        topics = Topic.query.filter(Topic.framework_id.in_(framework_ids)).all()
-        
-        # Build unified hierarchical structure across all frameworks
-        def build_unified_topic_tree(parent_id=None):
-            children = []
-            for topic in topics:
-                if topic.parent_id == parent_id:
-                    # Calculate field count for this topic (include global provider fields)
-                    if global_provider_id and global_provider_id != company_id:
-                        field_count = FrameworkDataField.query.filter_by(
-                            topic_id=topic.topic_id
-                        ).filter(
-                            or_(
-                                FrameworkDataField.company_id == company_id,
-                                FrameworkDataField.company_id == global_provider_id
-                            )
-                        ).count()
-                    else:
-                        field_count = FrameworkDataField.query.filter_by(
-                            topic_id=topic.topic_id,
-                            company_id=company_id
-                        ).count()
-                    
-                    # Get all descendants to calculate total field count
-                    def get_descendant_field_count(topic_obj):
-                        if global_provider_id and global_provider_id != company_id:
-                            count = FrameworkDataField.query.filter_by(
-                                topic_id=topic_obj.topic_id
-                            ).filter(
-                                or_(
-                                    FrameworkDataField.company_id == company_id,
-                                    FrameworkDataField.company_id == global_provider_id
-                                )
-                            ).count()
-                        else:
-                            count = FrameworkDataField.query.filter_by(
-                                topic_id=topic_obj.topic_id,
-                                company_id=company_id
-                            ).count()
-                        for child in topic_obj.children:
-                            count += get_descendant_field_count(child)
-                        return count
-                    
-                    total_field_count = get_descendant_field_count(topic)
-                    
-                    topic_data = {
-                        'topic_id': topic.topic_id,
-                        'name': topic.name,
-                        'description': topic.description,
-                        'level': topic.level,
-                        'full_path': topic.get_full_path(),
-                        'framework_id': topic.framework_id,
-                        'framework_name': next((f.framework_name for f in frameworks if f.framework_id == topic.framework_id), 'Unknown'),
-                        'field_count': field_count,
-                        'total_field_count': total_field_count,  # Including children
-                        'has_children': len([t for t in topics if t.parent_id == topic.topic_id]) > 0,
-                        'children': build_unified_topic_tree(topic.topic_id)
-                    }
-                    children.append(topic_data)
-            
-            # Sort children by framework name, then by name for consistent display
-            children.sort(key=lambda x: (x['framework_name'], x['name']))
-            return children
+        # Tree of company-specific and global frameworks, cached per (company, framework filter)
+        return jsonify(get_topic_tree(company_id, framework_id))
 
-        topic_tree = build_unified_topic_tree()
-        return jsonify(topic_tree)
-        
     except Exception as e:
         current_app.logger.error(f"Error getting unified topics tree: {str(e)}")
         return jsonify({'error': 'Failed to get topics tree'}), 500
@@ -1696,7 +1696,7 @@ def get_benchmark_data():
     - industry: Filter by specific industry
     """
     try:
-        framework_id = request.args.get('framework_id', type=int)
+        framework_id = request.args.get('framework_id')
         industry = request.args.get('industry')
         
         benchmarks = CrossTenantAnalyticsService.get_benchmark_data(
@@ -2292,7 +2292,13 @@ def hard_delete_company(company_id):
         # Delete in reverse dependency order to avoid foreign key constraints
         
         # 1. Delete ESG data and related records first (highest level dependencies)
+        from ..models.esg_data import ESGDataBreakdown
+        ESGDataBreakdown.query.filter(ESGDataBreakdown.data_id.in_(
+            db.session.query(ESGData.data_id).filter_by(company_id=company_id)
+        )).delete(synchronize_session=False)
         ESGData.query.filter_by(company_id=company_id).delete(synchronize_session=False)
+        from ..models.analytics_rollup import AnalyticsDailyRollup
+        AnalyticsDailyRollup.query.filter_by(company_id=company_id).delete(synchronize_session=False)
         
         # 2. Delete field dimension assignments
         FieldDimension.query.filter_by(company_id=company_id).delete(synchronize_session=False)
@@ -2305,6 +2311,8 @@ def hard_delete_company(company_id):
         
         # 5. Delete data point assignments
         DataPointAssignment.query.filter_by(company_id=company_id).delete(synchronize_session=False)
+        from ..services.assignment_versioning import invalidate_company_assignments
+        invalidate_company_assignments(company_id)
         
         # 6. Delete field variable mappings for framework fields belonging to this company
         framework_field_ids = db.session.query(FrameworkDataField.field_id).filter_by(company_id=company_id).subquery()
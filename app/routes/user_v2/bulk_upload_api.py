@@ -191,8 +191,8 @@ def validate_upload():
                 'error': 'upload_id is required'
             }), 400
 
-        # Retrieve parsed rows ONLY from file storage (FIX: BUG-ENH4-006 - no session storage)
-        upload_data = SessionStorageService.retrieve(upload_id)
+        # Retrieve the summary and parsed rows ONLY from upload storage (FIX: BUG-ENH4-006 - no session storage)
+        upload_data = SessionStorageService.retrieve(upload_id, slices=['rows'])
         if not upload_data:
             return jsonify({
                 'success': False,
@@ -313,8 +313,8 @@ def submit_upload():
                 'error': 'upload_id is required'
             }), 400
 
-        # Retrieve validated rows ONLY from file storage (FIX: BUG-ENH4-006 - no session storage)
-        upload_data = SessionStorageService.retrieve(upload_id)
+        # Retrieve the summary and validated rows ONLY from upload storage (FIX: BUG-ENH4-006 - no session storage)
+        upload_data = SessionStorageService.retrieve(upload_id, slices=['validated_rows'])
         if not upload_data:
             return jsonify({
                 'success': False,
@@ -4,9 +4,7 @@ from datetime import date, datetime
 from ...decorators.auth import tenant_required_for
 from ...services.user_v2.entity_service import EntityService
 from ...services.user_v2.field_service import FieldService
-from ...models.esg_data import ESGData
-from ...models.data_assignment import DataPointAssignment
-from ...extensions import db
+from ...services.user_v2.data_status_service import DataStatusService
 from . import user_v2_bp
 
 @user_v2_bp.route('/dashboard')
@@ -71,61 +69,22 @@ def dashboard():
     )
     current_app.logger.info(f'Found {len(all_fields)} assigned fields for entity {current_entity.id}')
 
+    # Compute every field's status (overdue/complete/pending) for the selected FY
+    # with one assignment query and one data query for the whole entity
+    field_statuses = DataStatusService.get_field_statuses(
+        entity_id=current_entity.id,
+        field_ids=[field_data['field_id'] for field_data in all_fields],
+        fy_year=selected_fy_year,
+        company=company
+    )
+
     # Separate raw input fields from computed fields
     raw_input_fields = []
     computed_fields = []
 
     for field_data in all_fields:
-        # Get field status based on overdue logic (check all past-due dates in selected FY)
-        today = date.today()
-
-        # Get the assignment for this field to access frequency and reporting dates
-        from ...models.data_assignment import DataPointAssignment
-
-        assignment = DataPointAssignment.query.filter_by(
-            field_id=field_data['field_id'],
-            entity_id=current_entity.id,
-            series_status='active'
-        ).first()
-
-        if assignment:
-            # Get all valid reporting dates for selected FY
-            valid_dates = assignment.get_valid_reporting_dates(selected_fy_year)
-
-            # Filter only past-due dates
-            past_due_dates = [
-                d for d in valid_dates
-                if FiscalYearService.is_overdue(d, company, today)
-            ]
-
-            if past_due_dates:
-                # Check if all past-due dates have data
-                missing_dates = []
-                for report_date in past_due_dates:
-                    data_entry = ESGData.query.filter_by(
-                        field_id=field_data['field_id'],
-                        entity_id=current_entity.id,
-                        reporting_date=report_date
-                    ).first()
-
-                    # Check if data exists and has a value
-                    if not data_entry or (data_entry.raw_value is None and data_entry.calculated_value is None):
-                        missing_dates.append(report_date)
-
-                # Determine status
-                if missing_dates:
-                    status = 'overdue'  # Some past-due dates are missing data
-                else:
-                    status = 'complete'  # All past-due dates have data
-            else:
-                # No dates are past due yet
-                status = 'pending'
-        else:
-            # No active assignment found
-            status = 'pending'
-
         # Add status to field data
-        field_data['status'] = status
+        field_data['status'] = field_statuses.get(field_data['field_id'], 'pending')
 
         # Categorize field
         if field_data['is_computed']:
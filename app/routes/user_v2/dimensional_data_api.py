@@ -12,6 +12,7 @@ from app.models.esg_data import ESGData, ESGDataAuditLog
 from app.models.dimension import Dimension, DimensionValue
 from app.services.user_v2.dimensional_data_service import DimensionalDataService
 from app.services.user_v2.aggregation_service import AggregationService
+from app.services.recompute_pipeline import process_pending
 from app.extensions import db
 import logging
 
@@ -223,6 +224,9 @@ def submit_simple_data():
         # Commit to database
         db.session.commit()
 
+        # Refresh computed fields that depend on the submitted value
+        process_pending()
+
         return jsonify({
             'success': True,
             'message': 'Data saved successfully',
@@ -396,6 +400,9 @@ def submit_dimensional_data():
         # Commit to database
         db.session.commit()
 
+        # Refresh computed fields that depend on the submitted total
+        process_pending()
+
         return jsonify({
             'success': True,
             'message': 'Dimensional data saved successfully',
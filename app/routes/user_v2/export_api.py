@@ -3,19 +3,17 @@ Export API for historical data - User V2
 
 This module provides endpoints for exporting historical field data to CSV and Excel formats.
 Supports both dimensional and non-dimensional data with proper column expansion.
+Exports are streamed (see HistoryExport), so their size is not bounded by memory.
 """
 
-from flask import Blueprint, send_file, request, jsonify
+from flask import Blueprint, Response, send_file, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
-from io import BytesIO
-import pandas as pd
-from datetime import datetime
-from sqlalchemy import desc
+from datetime import date, datetime
 
 from ...decorators.auth import tenant_required_for
-from ...models.esg_data import ESGData
 from ...models.framework import FrameworkDataField
 from ...models.data_assignment import DataPointAssignment
+from ...services.user_v2.export_service import HistoryExport
 
 export_api_bp = Blueprint('user_v2_export_api', __name__, url_prefix='/api/user/v2/export')
 
@@ -75,112 +73,82 @@ def export_field_history(field_id):
                 'error': 'Field not assigned to this entity'
             }), 404
 
-        # Build query for historical data
-        query = ESGData.query.filter_by(
-            field_id=field_id,
-            entity_id=entity_id,
-            is_draft=False
-        ).order_by(desc(ESGData.reporting_date))
-
-        if limit:
-            query = query.limit(limit)
-
-        historical_entries = query.all()
+        export = HistoryExport(
+            company_id=current_user.company_id,
+            field_ids=[field_id],
+            entity_ids=[entity_id],
+            limit=limit,
+            identity_columns=False
+        )
 
-        if not historical_entries:
+        if not export.has_rows():
             return jsonify({
                 'success': False,
                 'error': 'No historical data available to export'
             }), 404
 
-        # Build dataframe
-        data = []
-        dimension_columns = set()  # Track unique dimension keys
-
-        for entry in historical_entries:
-            # Determine value to show
-            if field.is_computed:
-                value = entry.calculated_value
-            else:
-                value = entry.raw_value
-
-            # Check if entry has dimensional data
-            has_dimensions = entry.dimension_values is not None and len(entry.dimension_values) > 0 if entry.dimension_values else False
-
-            # Base row data
-            row = {
-                'Reporting Date': entry.reporting_date.isoformat(),
-                'Value': value,
-                'Unit': entry.unit or field.default_unit,
-                'Has Dimensions': 'Yes' if has_dimensions else 'No',
-                'Notes': entry.notes if entry.notes else '',  # Enhancement #2: Include notes
-                'Created At': entry.created_at.isoformat() if entry.created_at else None,
-                'Updated At': entry.updated_at.isoformat() if entry.updated_at else None
-            }
-
-            # Add dimension columns if applicable
-            if has_dimensions and entry.dimension_values:
-                # Handle dimensional data based on structure
-                if 'breakdowns' in entry.dimension_values:
-                    # New dimensional data format
-                    for breakdown in entry.dimension_values.get('breakdowns', []):
-                        dims = breakdown.get('dimensions', {})
-                        for dim_key, dim_value in dims.items():
-                            column_name = f'Dimension: {dim_key}'
-                            row[column_name] = dim_value
-                            dimension_columns.add(column_name)
-                else:
-                    # Old dimensional data format (flat structure)
-                    for dim_key, dim_value in entry.dimension_values.items():
-                        if dim_key not in ['dimensions', 'breakdowns']:
-                            column_name = f'Dimension: {dim_key}'
-                            row[column_name] = dim_value
-                            dimension_columns.add(column_name)
-
-            data.append(row)
-
-        # Create DataFrame
-        df = pd.DataFrame(data)
-
-        # Reorder columns: base columns first, then dimensions
-        base_columns = ['Reporting Date', 'Value', 'Unit', 'Has Dimensions', 'Notes', 'Created At', 'Updated At']  # Enhancement #2: Added Notes column
-        dimension_columns_sorted = sorted(list(dimension_columns))
-        final_columns = base_columns + dimension_columns_sorted
-
-        # Ensure all columns exist (fill missing with None)
-        for col in final_columns:
-            if col not in df.columns:
-                df[col] = None
-
-        df = df[final_columns]
-
-        # Generate filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         safe_field_name = field.field_name.replace(' ', '_').replace('/', '_').replace('\\', '_')
+        return _export_response(export, export_format, safe_field_name)
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': f'Export failed: {str(e)}'
+        }), 500
 
-        # Create file in memory
-        output = BytesIO()
 
-        if export_format == 'excel':
-            # Export to Excel
-            filename = f'{safe_field_name}_history_{timestamp}.xlsx'
-            df.to_excel(output, index=False, engine='openpyxl', sheet_name='Historical Data')
-            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        else:
-            # Export to CSV
-            filename = f'{safe_field_name}_history_{timestamp}.csv'
-            df.to_csv(output, index=False, encoding='utf-8')
-            mimetype = 'text/csv'
+@export_api_bp.route('/history', methods=['GET'])
+@login_required
+@tenant_required_for('USER')
+def export_history():
+    """
+    Export the history of several fields and entities to CSV or Excel.
 
-        output.seek(0)
+    Query Parameters:
+        field_id (repeatable, optional): Fields to export (default: all assigned fields)
+        entity_id (repeatable, optional): Entities to export (default: all entities)
+        start_date (optional): First reporting date, YYYY-MM-DD
+        end_date (optional): Last reporting date, YYYY-MM-DD
+        format: 'csv' or 'excel' (default: 'csv')
 
-        return send_file(
-            output,
-            mimetype=mimetype,
-            as_attachment=True,
-            download_name=filename
+    Returns:
+        Streamed file download with Field and Entity columns leading each row
+    """
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ['csv', 'excel']:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid format. Must be "csv" or "excel"'
+            }), 400
+
+        try:
+            start_date = date.fromisoformat(request.args['start_date']) if request.args.get('start_date') else None
+            end_date = date.fromisoformat(request.args['end_date']) if request.args.get('end_date') else None
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid date format. Use YYYY-MM-DD'
+            }), 400
+
+        export = HistoryExport(
+            company_id=current_user.company_id,
+            field_ids=request.args.getlist('field_id') or None,
+            entity_ids=request.args.getlist('entity_id', type=int) or None,
+            start_date=start_date,
+            end_date=end_date
         )
 
+        if not export.has_rows():
+            return jsonify({
+                'success': False,
+                'error': 'No historical data available to export'
+            }), 404
+
+        return _export_response(export, export_format, 'esg_data')
+
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -188,3 +156,22 @@ def export_field_history(field_id):
             'success': False,
             'error': f'Export failed: {str(e)}'
         }), 500
+
+
+def _export_response(export, export_format, name):
+    """Stream CSV, or send the write-only XLSX from its temporary file."""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if export_format == 'excel':
+        return send_file(
+            export.write_xlsx(),
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=f'{name}_history_{timestamp}.xlsx'
+        )
+
+    return Response(
+        stream_with_context(export.iter_csv()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={name}_history_{timestamp}.csv'}
+    )
@@ -10,6 +10,7 @@ from flask_login import login_required, current_user
 
 from ...decorators.auth import tenant_required_for
 from ...services.user_v2.field_service import FieldService
+from ...utils.formula_compiler import formula_compiler
 from ...extensions import db
 
 field_api_bp = Blueprint('user_v2_field_api', __name__, url_prefix='/api/user/v2')
@@ -296,6 +297,24 @@ def get_field_dates(field_id):
         from datetime import date as date_class
         today = date_class.today()
 
+        # Prefetch submissions for every valid date at once instead of per date
+        if has_dimensions:
+            data_by_date = {}
+            if valid_dates:
+                for data_entry in ESGData.query.filter(
+                    ESGData.field_id == field_id,
+                    ESGData.entity_id == entity_id,
+                    ESGData.reporting_date.in_(valid_dates)
+                ).all():
+                    data_by_date.setdefault(data_entry.reporting_date, []).append(data_entry)
+        else:
+            from ...services.user_v2.data_status_service import DataStatusService
+            reported_dates = set()
+            if valid_dates:
+                reported_dates = DataStatusService.get_reported_dates(
+                    entity_id, [field_id], start_date=min(valid_dates), end_date=max(valid_dates)
+                )[field_id]
+
         dates_with_status = []
         for report_date in valid_dates:
             # Calculate due date for this reporting period
@@ -306,11 +325,7 @@ def get_field_dates(field_id):
             if has_dimensions:
                 # For dimensional data, check if all required combinations have data
                 # ESGData stores dimensions in a JSON field: dimension_values
-                existing_data = ESGData.query.filter_by(
-                    field_id=field_id,
-                    entity_id=entity_id,
-                    reporting_date=report_date
-                ).all()
+                existing_data = data_by_date.get(report_date, [])
 
                 # Check if using new format (version 2) or old format
                 is_complete = False
@@ -358,13 +373,7 @@ def get_field_dates(field_id):
                     is_complete = found_combinations >= required_combinations_count
             else:
                 # For non-dimensional data, check if ESGData exists with a value
-                esg_data = ESGData.query.filter_by(
-                    field_id=field_id,
-                    entity_id=entity_id,
-                    reporting_date=report_date
-                ).first()
-
-                is_complete = esg_data and (esg_data.raw_value is not None or esg_data.calculated_value is not None)
+                is_complete = report_date in reported_dates
 
             # Determine status based on completion and overdue logic
             if is_complete:
@@ -989,14 +998,11 @@ def get_computed_field_details(field_id):
                     # Parse and evaluate formula
                     formula = field.formula_expression
                     if formula:
-                        # Replace variables with their values
                         calc_expression = formula
-                        for var_name, var_value in var_values.items():
-                            calc_expression = calc_expression.replace(var_name, str(var_value))
 
-                        # Safely evaluate the expression
+                        # Evaluate the cached compiled formula
                         try:
-                            calculated_result = eval(calc_expression, {"__builtins__": {}}, {})
+                            calculated_result = formula_compiler.for_field(field).evaluate(var_values)
 
                             # Apply constant multiplier if present
                             if field.constant_multiplier:
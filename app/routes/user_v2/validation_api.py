@@ -3,6 +3,7 @@ Validation API Blueprint
 
 Provides endpoints for automated data validation:
 - /api/user/validate-submission - Validate data before submission
+- /api/user/validate-submissions - Validate a batch of submissions at once
 
 Author: Claude Code
 Date: 2025-11-21
@@ -159,6 +160,81 @@ def validate_submission():
         }), 500
 
 
+@validation_api.route('/api/user/validate-submissions', methods=['POST'])
+@login_required
+def validate_submissions():
+    """
+    Validate a batch of ESG data submissions (e.g. a bulk upload) at once.
+
+    History and dependency values for all submissions are prefetched, so the
+    cost does not grow by one set of queries per submission.
+
+    Request Body:
+        {
+            "submissions": [
+                {"field_id": "abc-123", "entity_id": 1, "value": 1500,
+                 "reporting_date": "2024-12-31", ...},  // as /api/user/validate-submission
+                ...
+            ]
+        }
+
+    Response:
+        {
+            "success": true,
+            "validations": [{"passed": ..., "risk_score": ..., "flags": [...]}, ...]
+        }
+    """
+    try:
+        data = request.get_json() or {}
+        submissions = data.get('submissions')
+        if not isinstance(submissions, list):
+            return jsonify({
+                'success': False,
+                'error': "Missing required field: submissions"
+            }), 400
+
+        if not current_user.company_id:
+            return jsonify({
+                'success': False,
+                'error': "User must be associated with a company"
+            }), 403
+
+        rows = []
+        for index, submission in enumerate(submissions):
+            try:
+                reporting_date = submission['reporting_date']
+                if isinstance(reporting_date, str):
+                    reporting_date = datetime.strptime(reporting_date, '%Y-%m-%d').date()
+                rows.append({
+                    'field_id': submission['field_id'],
+                    'entity_id': int(submission['entity_id']),
+                    'value': float(submission['value']),
+                    'reporting_date': reporting_date,
+                    'company_id': current_user.company_id,
+                    'assignment_id': submission.get('assignment_id'),
+                    'dimension_values': submission.get('dimension_values'),
+                    'attachments': [{'exists': True}] if submission.get('has_attachments') else []
+                })
+            except (KeyError, ValueError, TypeError) as e:
+                return jsonify({
+                    'success': False,
+                    'error': f"Invalid submission at index {index}: {str(e)}"
+                }), 400
+
+        return jsonify({
+            'success': True,
+            'validations': ValidationService.validate_submissions(rows)
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"[validation_api] Batch validation error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Validation failed: {str(e)}"
+        }), 500
+
+
 @validation_api.route('/api/user/validation-stats', methods=['GET'])
 @login_required
 def get_validation_stats():
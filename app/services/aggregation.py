@@ -13,17 +13,21 @@ Features:
 - Reusable across user and admin interfaces
 """
 
+from bisect import bisect_left, bisect_right
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
 from typing import Dict, List, Optional, Tuple, Any, Union
 from enum import Enum
 from flask import current_app, g
 from sqlalchemy import and_, or_
+from sqlalchemy.orm import selectinload
 
 from ..models.data_assignment import DataPointAssignment
 from ..models.framework import FrameworkDataField, FieldVariableMapping
 from ..models.esg_data import ESGData
 from ..extensions import db
+from ..utils.formula_compiler import formula_compiler, FormulaError
+from ..utils.fiscal_calendar import fiscal_year_for_date, fy_bounds
 
 
 class AggregationMethod(Enum):
@@ -54,7 +58,10 @@ class AggregationRule:
 
 class AggregationService:
     """Service class for handling ESG data aggregation logic."""
-    
+
+    # Maximum entity IDs per IN-list in bulk dependency scans
+    BULK_ENTITY_CHUNK_SIZE = 500
+
     def __init__(self):
         self.default_rules = self._get_default_aggregation_rules()
     
@@ -222,9 +229,8 @@ class AggregationService:
             # For annual computations, calculate based on financial year
             # Use company's fiscal year configuration
             company = computed_assignment.company
-            current_fy_year = reporting_date.year if reporting_date.month >= company.get_fy_start_month() else reporting_date.year - 1
-            fy_start = company.get_fy_start_date(current_fy_year)
-            fy_end = company.get_fy_end_date(current_fy_year)
+            current_fy_year = fiscal_year_for_date(company.fy_end_month, company.fy_end_day, reporting_date)
+            fy_start, fy_end = fy_bounds(company.fy_end_month, company.fy_end_day, current_fy_year)
             
             if dependency_assignment.frequency == 'Monthly':
                 # Calculate months between FY start and reporting date
@@ -348,7 +354,8 @@ class AggregationService:
             # Evaluate the formula
             result = self._evaluate_formula(
                 computed_field.formula_expression,
-                dependency_values
+                dependency_values,
+                computed_field.field_id
             )
             
             if result is not None:
@@ -371,43 +378,216 @@ class AggregationService:
                                custom_rules: Optional[Dict[str, Dict[str, AggregationRule]]] = None) -> Dict[Tuple[str, int, date], Optional[float]]:
         """
         Compute multiple fields efficiently with bulk operations.
-        
+
+        Set-based batch engine: computed fields, assignments and dependency
+        values are loaded for all tuples at once, then aggregation and formula
+        evaluation run in memory. The number of queries is constant in the
+        number of tuples (field load, assignment resolution, one ranged
+        ESGData scan per entity chunk).
+
         Args:
             field_entity_date_tuples: List of (field_id, entity_id, reporting_date) tuples
             custom_rules: Optional custom rules per field
-            
+
         Returns:
             Dict mapping (field_id, entity_id, reporting_date) to computed value
         """
-        results = {}
-        
+        results = {key: None for key in field_entity_date_tuples}
+
+        if not field_entity_date_tuples:
+            return results
+
         try:
-            # Group by field_id for efficient processing
-            field_groups = {}
-            for field_id, entity_id, reporting_date in field_entity_date_tuples:
-                if field_id not in field_groups:
-                    field_groups[field_id] = []
-                field_groups[field_id].append((entity_id, reporting_date))
-            
-            # Process each field group
-            for field_id, entity_date_pairs in field_groups.items():
+            # 1. Load all computed fields with their variable mappings in one query
+            computed_field_ids = {field_id for field_id, _, _ in field_entity_date_tuples}
+            computed_fields = {
+                field.field_id: field
+                for field in FrameworkDataField.query.options(
+                    selectinload(FrameworkDataField.variable_mappings)
+                ).filter(FrameworkDataField.field_id.in_(computed_field_ids)).all()
+                if field.is_computed
+            }
+
+            # 2. Resolve assignments for computed fields and dependencies in bulk
+            from .assignment_versioning import resolve_assignments_bulk
+            entity_ids = {entity_id for _, entity_id, _ in field_entity_date_tuples}
+            dependency_field_ids = {
+                mapping.raw_field_id
+                for field in computed_fields.values()
+                for mapping in field.variable_mappings
+            }
+            assignments = resolve_assignments_bulk(
+                list(computed_field_ids | dependency_field_ids),
+                list(entity_ids)
+            )
+
+            # 3. Plan the aggregation window of every dependency of every tuple
+            plans = {}
+            for key in field_entity_date_tuples:
+                field_id, entity_id, reporting_date = key
+                computed_field = computed_fields.get(field_id)
+                computed_assignment = assignments.get((field_id, entity_id))
+                if not computed_field or not computed_assignment:
+                    continue
+
                 field_custom_rules = custom_rules.get(field_id) if custom_rules else None
-                
-                for entity_id, reporting_date in entity_date_pairs:
-                    result = self.compute_field_value(
-                        field_id, 
-                        entity_id, 
-                        reporting_date, 
-                        field_custom_rules
+                windows = []
+                for mapping in computed_field.variable_mappings:
+                    dependency_assignment = assignments.get((mapping.raw_field_id, entity_id))
+                    if not dependency_assignment:
+                        continue
+                    try:
+                        rule = self._get_aggregation_rule(
+                            dependency_assignment.frequency,
+                            computed_assignment.frequency,
+                            mapping.raw_field_id,
+                            field_custom_rules
+                        )
+                    except ValueError as ve:
+                        current_app.logger.error(f'Frequency validation error for field {field_id}: {str(ve)}')
+                        continue
+                    period_start, period_end = self._calculate_aggregation_period(
+                        reporting_date,
+                        rule.lookback_months,
+                        computed_assignment
                     )
-                    results[(field_id, entity_id, reporting_date)] = result
-            
+                    windows.append((mapping, rule, period_start, period_end))
+                plans[key] = (computed_field, windows)
+
+            # 4. Fetch every dependency value needed by any window in ranged scans
+            all_windows = [window for _, windows in plans.values() for window in windows]
+            if not all_windows:
+                return results
+
+            series = self._fetch_dependency_series(
+                {mapping.raw_field_id for mapping, _, _, _ in all_windows},
+                {key[1] for key in plans},
+                min(start for _, _, start, _ in all_windows),
+                max(end for _, _, _, end in all_windows)
+            )
+
+            # 5. Reduce each window in memory, then evaluate each formula once
+            #    over the value columns of all its tuples (vectorized)
+            field_batches = {}
+            for key, (computed_field, windows) in plans.items():
+                entity_id = key[1]
+                dependency_values = {}
+                for mapping, rule, period_start, period_end in windows:
+                    numeric_values = self._slice_series(
+                        series.get((mapping.raw_field_id, entity_id)),
+                        period_start,
+                        period_end,
+                        mapping
+                    )
+                    aggregated_value = self._apply_aggregation_method(
+                        numeric_values,
+                        rule.method,
+                        rule.weight_factor
+                    )
+                    if aggregated_value is not None:
+                        dependency_values[mapping.variable_name] = aggregated_value * mapping.coefficient
+
+                if dependency_values:
+                    field_batches.setdefault(computed_field.field_id, (computed_field, [], []))
+                    field_batches[computed_field.field_id][1].append(key)
+                    field_batches[computed_field.field_id][2].append(dependency_values)
+
+            for computed_field, keys, value_rows in field_batches.values():
+                try:
+                    compiled = formula_compiler.for_field(computed_field)
+                except FormulaError as e:
+                    current_app.logger.error(f"Error compiling formula for field {computed_field.field_id}: {str(e)}")
+                    continue
+                columns = {
+                    name: [row.get(name) for row in value_rows]
+                    for name in compiled.variables
+                }
+                for key, value in zip(keys, compiled.evaluate_many(columns)):
+                    results[key] = value
+
             return results
-            
+
         except Exception as e:
             current_app.logger.error(f"Error in bulk computation: {str(e)}")
             return results
-    
+
+    def _fetch_dependency_series(self,
+                                 dependency_field_ids: set,
+                                 entity_ids: set,
+                                 period_start: date,
+                                 period_end: date) -> Dict[Tuple[str, int], Tuple[List[date], List[Tuple[float, str]]]]:
+        """
+        Load dependency values for many fields and entities in ranged scans.
+
+        Rows of computed dependencies contribute their materialized
+        calculated_value. Only the columns needed for aggregation are selected, so no ORM objects
+        are hydrated. Entities are chunked to keep IN-lists bounded.
+
+        Returns:
+            Dict mapping (field_id, entity_id) to parallel lists of sorted
+            reporting dates and (numeric_value, dimension_key) tuples
+        """
+        columns = (
+            ESGData.field_id,
+            ESGData.entity_id,
+            ESGData.reporting_date,
+            ESGData.raw_value,
+            ESGData.calculated_value,
+            ESGData.dimension_key
+        )
+        entity_list = sorted(entity_ids)
+        series = {}
+
+        for offset in range(0, len(entity_list), self.BULK_ENTITY_CHUNK_SIZE):
+            entity_chunk = entity_list[offset:offset + self.BULK_ENTITY_CHUNK_SIZE]
+            filters = [
+                ESGData.field_id.in_(dependency_field_ids),
+                ESGData.entity_id.in_(entity_chunk),
+                ESGData.reporting_date >= period_start,
+                ESGData.reporting_date <= period_end,
+                or_(ESGData.raw_value.isnot(None), ESGData.calculated_value.isnot(None))
+            ]
+
+            if hasattr(g, 'tenant') and g.tenant:
+                query = ESGData.query_for_tenant(db.session).with_entities(*columns)
+            else:
+                query = db.session.query(*columns)
+
+            rows = query.filter(*filters).order_by(ESGData.reporting_date).all()
+
+            for field_id, entity_id, reporting_date, raw_value, calculated_value, dimension_key in rows:
+                try:
+                    # Computed dependencies only carry their materialized value
+                    numeric_value = float(raw_value if raw_value is not None else calculated_value)
+                except (ValueError, TypeError):
+                    continue
+                dates, values = series.setdefault((field_id, entity_id), ([], []))
+                dates.append(reporting_date)
+                values.append((numeric_value, dimension_key))
+
+        return series
+
+    @staticmethod
+    def _slice_series(series: Optional[Tuple[List[date], List[Tuple[float, str]]]],
+                      period_start: date,
+                      period_end: date,
+                      mapping: Optional['FieldVariableMapping'] = None) -> List[float]:
+        """Return the numeric values of a sorted series within [period_start, period_end]."""
+        if not series:
+            return []
+
+        dates, values = series
+        window = values[bisect_left(dates, period_start):bisect_right(dates, period_end)]
+
+        if mapping and mapping.dimension_filter and mapping.aggregation_type == 'SPECIFIC_DIMENSION':
+            # Same dimension key matching as _aggregate_dependency_values
+            return [
+                value for value, dimension_key in window
+                if ESGData.dimension_key_matches(dimension_key, mapping.dimension_filter)
+            ]
+
+        return [value for value, _ in window]
+
     def _get_dependency_values(self, 
                              computed_field: FrameworkDataField,
                              computed_assignment: DataPointAssignment,
@@ -559,19 +739,21 @@ class AggregationService:
                 ESGData.entity_id == entity_id,
                 ESGData.reporting_date >= period_start,
                 ESGData.reporting_date <= period_end,
-                ESGData.raw_value.isnot(None)
+                or_(ESGData.raw_value.isnot(None), ESGData.calculated_value.isnot(None))
             ]
             
             # Apply dimensional filtering if specified
             if mapping and mapping.dimension_filter and mapping.aggregation_type == 'SPECIFIC_DIMENSION':
-                # Filter for specific dimensional values
-                dimension_conditions = []
-                for dim_name, dim_value in mapping.dimension_filter.items():
-                    # Use JSON contains operator for dimension filtering
-                    dimension_conditions.append(
-                        ESGData.dimension_values.op('->>')(dim_name) == dim_value
-                    )
-                base_query_filters.extend(dimension_conditions)
+                # Filter for specific dimensional values: resolve the stored dimension
+                # keys that satisfy the filter, then probe the indexed dimension_key
+                stored_keys = db.session.query(ESGData.dimension_key).filter(
+                    ESGData.field_id == dependency_field_id,
+                    ESGData.entity_id == entity_id
+                ).distinct()
+                base_query_filters.append(ESGData.dimension_key.in_([
+                    dimension_key for (dimension_key,) in stored_keys
+                    if ESGData.dimension_key_matches(dimension_key, mapping.dimension_filter)
+                ]))
                 
                 current_app.logger.debug(f'Applying dimension filter: {mapping.dimension_filter}')
             elif mapping and mapping.aggregation_type == 'SUM_ALL_DIMENSIONS':
@@ -595,7 +777,8 @@ class AggregationService:
             numeric_values = []
             for value_entry in dependency_values:
                 try:
-                    numeric_value = float(value_entry.raw_value)
+                    raw_value = value_entry.raw_value
+                    numeric_value = float(raw_value if raw_value is not None else value_entry.calculated_value)
                     numeric_values.append(numeric_value)
                 except (ValueError, TypeError):
                     current_app.logger.warning(f'Non-numeric value found: {value_entry.raw_value}')
@@ -628,9 +811,8 @@ class AggregationService:
         if computed_assignment.frequency == 'Annual':
             # Use company's fiscal year configuration
             company = computed_assignment.company
-            current_fy_year = reporting_date.year if reporting_date.month >= company.get_fy_start_month() else reporting_date.year - 1
-            fy_start = company.get_fy_start_date(current_fy_year)
-            fy_end = company.get_fy_end_date(current_fy_year)
+            current_fy_year = fiscal_year_for_date(company.fy_end_month, company.fy_end_day, reporting_date)
+            fy_start, fy_end = fy_bounds(company.fy_end_month, company.fy_end_day, current_fy_year)
             return fy_start, min(fy_end, reporting_date)
         
         # For other frequencies, use lookback months
@@ -675,31 +857,20 @@ class AggregationService:
     
     def _evaluate_formula(self, 
                         formula_expression: str,
-                        values: Dict[str, float]) -> Optional[float]:
-        """Evaluate the formula with the given values."""
+                        values: Dict[str, float],
+                        field_id: Optional[str] = None) -> Optional[float]:
+        """Evaluate the formula with the given values using the cached compiled formula."""
         try:
-            # Create a copy of formula for substitution
-            computed_formula = formula_expression
-            
-            current_app.logger.debug(f"Original formula: {formula_expression}")
-            current_app.logger.debug(f"Variable values: {values}")
-            
-            # Substitute variables with their values
-            for var_name, value in values.items():
-                computed_formula = computed_formula.replace(var_name, str(value))
+            current_app.logger.debug(f"Formula: {formula_expression}, variable values: {values}")
             
-            current_app.logger.debug(f"Formula after substitution: {computed_formula}")
-            
-            # Evaluate the formula
-            result = eval(computed_formula)
+            result = formula_compiler.compile(formula_expression, field_id).evaluate(values)
             
             current_app.logger.debug(f"Formula evaluation result: {result}")
             
-            return float(result)
+            return result
             
-        except Exception as e:
+        except FormulaError as e:
             current_app.logger.error(f"Error evaluating formula '{formula_expression}' with values {values}: {str(e)}")
-            current_app.logger.error(f"Computed formula was: {computed_formula if 'computed_formula' in locals() else 'N/A'}")
             return None
     
     def get_aggregation_summary(self, 
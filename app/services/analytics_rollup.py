@@ -0,0 +1,407 @@
+"""
+Analytics Rollup Service
+
+Keeps the materialized tables behind the cross-tenant analytics dashboard
+(see app/models/analytics_rollup.py) in step with esg_data and
+data_point_assignments.
+
+A refresh only reads the esg_data rows whose updated_at lies past the stored
+watermark, less ANALYTICS_ROLLUP_WATERMARK_LAG: updated_at is stamped before
+the writing transaction commits (bulk uploads commit many rows at once), so
+rows can become visible after a later timestamp was already read. The
+watermark is the latest updated_at actually read. Every count is recomputed
+from esg_data rather than incremented, so re-reading the overlap is safe:
+the daily cells the rows were created in are recounted, as is the update
+activity of their company and framework, and the benchmarks of their fields
+are recomputed. Assignments carry no update timestamp, so their per-day
+counts are regrouped from data_point_assignments (a far smaller table) on
+every refresh and only changed cells are written.
+
+Hard deletes of esg_data rows are not visible through the watermark; a full
+refresh (`flask refresh-analytics-rollups --full`) rebuilds every table.
+Run one refresher at a time.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, UTC
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import current_app
+from sqlalchemy import and_, case, func, or_, tuple_
+
+from ..extensions import db
+from ..models.analytics_rollup import AnalyticsDailyRollup, AnalyticsFieldBenchmark, AnalyticsRollupWatermark
+from ..models.company import Company
+from ..models.data_assignment import DataPointAssignment
+from ..models.esg_data import ESGData
+from ..models.framework import FrameworkDataField
+
+
+ESG_DATA_SOURCE = 'esg_data'
+DEFAULT_WATERMARK_LAG = 900  # Seconds re-read behind the watermark for late commits
+RECOUNT_CHUNK_SIZE = 200  # (company, day) pairs recounted per query
+BENCHMARK_FIELD_CHUNK_SIZE = 50  # Fields whose values are loaded per query
+
+# (day, company_id, framework_id)
+CellKey = Tuple[date, int, str]
+
+# (company_id, framework_id)
+PairKey = Tuple[int, str]
+
+
+def _as_date(value) -> Optional[date]:
+    """func.date() yields a date on PostgreSQL and an ISO string on SQLite."""
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _is_completed():
+    return and_(ESGData.raw_value.isnot(None), ESGData.raw_value != '')
+
+
+class AnalyticsRollupService:
+    """Refresh and metadata of the cross-tenant analytics rollups."""
+
+    @staticmethod
+    def get_watermark() -> Optional[datetime]:
+        """Latest esg_data updated_at folded into the rollups (None before the first refresh)."""
+        mark = db.session.get(AnalyticsRollupWatermark, ESG_DATA_SOURCE)
+        return mark.watermark if mark else None
+
+    @staticmethod
+    def refresh(full: bool = False, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Fold esg_data and assignment changes into the rollups.
+
+        Args:
+            full: Rebuild every rollup instead of reading past the watermark
+            now: Upper bound of the change window (default: current UTC time)
+
+        Returns:
+            Dict with the size of the refresh and the new watermark
+        """
+        now = now or datetime.now(UTC).replace(tzinfo=None)
+        lag = timedelta(seconds=current_app.config.get('ANALYTICS_ROLLUP_WATERMARK_LAG', DEFAULT_WATERMARK_LAG))
+        since = None if full else AnalyticsRollupService.get_watermark()
+
+        try:
+            if full:
+                AnalyticsDailyRollup.query.delete(synchronize_session=False)
+                AnalyticsFieldBenchmark.query.delete(synchronize_session=False)
+
+            touched_cells, touched_pairs, touched_fields, changed, latest = AnalyticsRollupService._collect_changes(
+                since, now, lag
+            )
+            entry_counts = AnalyticsRollupService._recount_entries(None if full else touched_cells)
+            updates = AnalyticsRollupService._recount_updates(None if full else touched_pairs)
+            assignment_counts = AnalyticsRollupService._count_assignments()
+
+            rows = AnalyticsRollupService._load_rollups(
+                [] if full else list(touched_cells | set(updates)),
+                with_assignments=not full,
+                updated_pairs=[] if full else list(touched_pairs)
+            )
+
+            def rollup(key: CellKey) -> AnalyticsDailyRollup:
+                if key not in rows:
+                    rows[key] = AnalyticsDailyRollup(*key)
+                    db.session.add(rows[key])
+                return rows[key]
+
+            for key in (entry_counts if full else touched_cells):
+                created, completed = entry_counts.get(key, (0, 0))
+                row = rollup(key)
+                row.entries_created = created
+                row.entries_completed = completed
+
+            # A row's update moves from the day of its previous write to the
+            # day of this one, so every day of a touched pair is recounted
+            for key, row in rows.items():
+                if (key[1], key[2]) in touched_pairs and key not in updates:
+                    row.entries_updated = 0
+            for key, count in updates.items():
+                rollup(key).entries_updated = count
+
+            stale = [key for key, row in rows.items() if row.assignments_created or row.assignments_active]
+            for key in set(stale) | set(assignment_counts):
+                created, active = assignment_counts.get(key, (0, 0))
+                row = rollup(key)
+                row.assignments_created = created
+                row.assignments_active = active
+
+            AnalyticsRollupService._refresh_benchmarks(sorted(touched_fields))
+
+            mark = db.session.get(AnalyticsRollupWatermark, ESG_DATA_SOURCE)
+            if mark is None:
+                mark = AnalyticsRollupWatermark(source=ESG_DATA_SOURCE)
+                db.session.add(mark)
+            watermark = max(filter(None, (since, latest)), default=now - lag)
+            mark.watermark = watermark
+            mark.refreshed_at = now
+            db.session.commit()
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return {
+            'full': full,
+            'entries_changed': changed,
+            'cells_recounted': len(entry_counts) if full else len(touched_cells),
+            'assignment_cells': len(assignment_counts),
+            'benchmarks_refreshed': len(touched_fields),
+            'watermark': watermark.isoformat()
+        }
+
+    @staticmethod
+    def _collect_changes(since: Optional[datetime], now: datetime, lag: timedelta):
+        """
+        Group the esg_data rows written in (since - lag, now].
+
+        Returns:
+            Tuple of (cells to recount, (company, framework) pairs whose
+            update activity to recount, fields to re-benchmark, number of
+            rows written past since, latest updated_at read)
+        """
+        query = db.session.query(
+            ESGData.company_id,
+            ESGData.field_id,
+            FrameworkDataField.framework_id,
+            func.date(ESGData.created_at),
+            func.count(),
+            func.sum(case((ESGData.updated_at > since, 1), else_=0)) if since is not None else func.count(),
+            func.max(ESGData.updated_at)
+        ).join(
+            FrameworkDataField, ESGData.field_id == FrameworkDataField.field_id
+        ).filter(
+            ESGData.company_id.isnot(None),
+            ESGData.updated_at <= now
+        )
+        if since is not None:
+            query = query.filter(ESGData.updated_at > since - lag)
+
+        touched_cells: Set[CellKey] = set()
+        touched_pairs: Set[PairKey] = set()
+        touched_fields: Set[str] = set()
+        changed = 0
+        latest = None
+        for company_id, field_id, framework_id, created_day, _count, new_count, last_update in query.group_by(
+            ESGData.company_id, ESGData.field_id, FrameworkDataField.framework_id, func.date(ESGData.created_at)
+        ):
+            created_day = _as_date(created_day)
+            if created_day is not None:
+                touched_cells.add((created_day, company_id, framework_id))
+            touched_pairs.add((company_id, framework_id))
+            touched_fields.add(field_id)
+            changed += new_count or 0
+            if last_update is not None and (latest is None or last_update > latest):
+                latest = last_update
+
+        return touched_cells, touched_pairs, touched_fields, changed, latest
+
+    @staticmethod
+    def _recount_entries(cells: Optional[Set[CellKey]]) -> Dict[CellKey, Tuple[int, int]]:
+        """
+        Count created and completed entries per cell.
+
+        Args:
+            cells: Cells to recount, or None for all of esg_data
+
+        Returns:
+            Dict mapping cell key to (entries_created, entries_completed)
+        """
+        def grouped(query):
+            return query.group_by(
+                ESGData.company_id, FrameworkDataField.framework_id, func.date(ESGData.created_at)
+            )
+
+        query = db.session.query(
+            ESGData.company_id,
+            FrameworkDataField.framework_id,
+            func.date(ESGData.created_at),
+            func.count(),
+            func.sum(case((_is_completed(), 1), else_=0))
+        ).join(
+            FrameworkDataField, ESGData.field_id == FrameworkDataField.field_id
+        ).filter(
+            ESGData.company_id.isnot(None),
+            ESGData.created_at.isnot(None)
+        )
+
+        if cells is None:
+            results = grouped(query).all()
+        else:
+            # Each (company, day) pair is an index range on idx_esg_company_created
+            pairs = sorted({(company_id, day) for day, company_id, _ in cells})
+            results = []
+            for chunk in _chunks(pairs, RECOUNT_CHUNK_SIZE):
+                results.extend(grouped(query.filter(or_(*[
+                    and_(
+                        ESGData.company_id == company_id,
+                        ESGData.created_at >= datetime.combine(day, time.min),
+                        ESGData.created_at < datetime.combine(day + timedelta(days=1), time.min)
+                    )
+                    for company_id, day in chunk
+                ]))).all())
+
+        return {
+            (_as_date(day), company_id, framework_id): (created, completed or 0)
+            for company_id, framework_id, day, created, completed in results
+        }
+
+    @staticmethod
+    def _recount_updates(pairs: Optional[Set[PairKey]]) -> Dict[CellKey, int]:
+        """
+        Count entries by the day they were last written.
+
+        Args:
+            pairs: (company, framework) pairs to recount, or None for all of esg_data
+
+        Returns:
+            Dict mapping cell key to entries_updated
+        """
+        query = db.session.query(
+            ESGData.company_id,
+            FrameworkDataField.framework_id,
+            func.date(ESGData.updated_at),
+            func.count()
+        ).join(
+            FrameworkDataField, ESGData.field_id == FrameworkDataField.field_id
+        ).filter(
+            ESGData.company_id.isnot(None),
+            ESGData.updated_at.isnot(None)
+        )
+
+        def grouped(query):
+            return query.group_by(
+                ESGData.company_id, FrameworkDataField.framework_id, func.date(ESGData.updated_at)
+            ).all()
+
+        if pairs is None:
+            results = grouped(query)
+        else:
+            results = []
+            for chunk in _chunks(sorted(pairs), RECOUNT_CHUNK_SIZE):
+                results.extend(grouped(query.filter(
+                    tuple_(ESGData.company_id, FrameworkDataField.framework_id).in_(chunk)
+                )))
+
+        return {
+            (_as_date(day), company_id, framework_id): count
+            for company_id, framework_id, day, count in results
+        }
+
+    @staticmethod
+    def _count_assignments() -> Dict[CellKey, Tuple[int, int]]:
+        """Assignments made and still active per cell, grouped in SQL."""
+        results = db.session.query(
+            DataPointAssignment.company_id,
+            FrameworkDataField.framework_id,
+            func.date(DataPointAssignment.assigned_date),
+            func.count(),
+            func.sum(case((DataPointAssignment.series_status == 'active', 1), else_=0))
+        ).join(
+            FrameworkDataField, DataPointAssignment.field_id == FrameworkDataField.field_id
+        ).filter(
+            DataPointAssignment.company_id.isnot(None),
+            DataPointAssignment.assigned_date.isnot(None)
+        ).group_by(
+            DataPointAssignment.company_id, FrameworkDataField.framework_id,
+            func.date(DataPointAssignment.assigned_date)
+        ).all()
+
+        return {
+            (_as_date(day), company_id, framework_id): (created, active or 0)
+            for company_id, framework_id, day, created, active in results
+        }
+
+    @staticmethod
+    def _load_rollups(keys: List[CellKey], with_assignments: bool,
+                      updated_pairs: List[PairKey]) -> Dict[CellKey, AnalyticsDailyRollup]:
+        """
+        Existing rollup rows for the given cells, the cells of the given pairs
+        holding update activity and, optionally, every cell holding
+        assignment counts.
+        """
+        rows = []
+        for chunk in _chunks(keys, RECOUNT_CHUNK_SIZE):
+            rows.extend(AnalyticsDailyRollup.query.filter(
+                tuple_(AnalyticsDailyRollup.day, AnalyticsDailyRollup.company_id,
+                       AnalyticsDailyRollup.framework_id).in_(chunk)
+            ).all())
+        for chunk in _chunks(sorted(updated_pairs), RECOUNT_CHUNK_SIZE):
+            rows.extend(AnalyticsDailyRollup.query.filter(
+                tuple_(AnalyticsDailyRollup.company_id, AnalyticsDailyRollup.framework_id).in_(chunk),
+                AnalyticsDailyRollup.entries_updated > 0
+            ).all())
+        if with_assignments:
+            rows.extend(AnalyticsDailyRollup.query.filter(or_(
+                AnalyticsDailyRollup.assignments_created > 0,
+                AnalyticsDailyRollup.assignments_active > 0
+            )).all())
+        return {(row.day, row.company_id, row.framework_id): row for row in rows}
+
+    @staticmethod
+    def _refresh_benchmarks(field_ids: List[str]) -> None:
+        """Recompute the value distribution of each field, overall and per industry."""
+        table = AnalyticsFieldBenchmark.__table__
+        for chunk in _chunks(field_ids, BENCHMARK_FIELD_CHUNK_SIZE):
+            values = defaultdict(list)
+            industries = defaultdict(set)
+            frameworks = {}
+            for field_id, framework_id, raw_value, industry in db.session.query(
+                ESGData.field_id, FrameworkDataField.framework_id, ESGData.raw_value, Company.industry
+            ).join(
+                Company, ESGData.company_id == Company.id
+            ).join(
+                FrameworkDataField, ESGData.field_id == FrameworkDataField.field_id
+            ).filter(
+                ESGData.field_id.in_(chunk),
+                Company.is_active == True,
+                _is_completed()
+            ):
+                try:
+                    numeric_value = float(raw_value)
+                except (ValueError, TypeError):
+                    continue
+                frameworks[field_id] = framework_id
+                values[(field_id, '')].append(numeric_value)
+                industries[(field_id, '')].add(industry or 'Not Specified')
+                if industry:
+                    values[(field_id, industry)].append(numeric_value)
+                    industries[(field_id, industry)].add(industry)
+
+            db.session.execute(table.delete().where(table.c.field_id.in_(chunk)))
+            benchmarks = [
+                {
+                    'field_id': field_id,
+                    'framework_id': frameworks[field_id],
+                    'industry': industry,
+                    'industries_covered': sorted(industries[(field_id, industry)]),
+                    **AnalyticsRollupService._distribution(samples)
+                }
+                for (field_id, industry), samples in values.items()
+            ]
+            if benchmarks:
+                db.session.execute(table.insert(), benchmarks)
+
+    @staticmethod
+    def _distribution(values: List[float]) -> Dict[str, Any]:
+        values = sorted(values)
+        size = len(values)
+        return {
+            'sample_size': size,
+            'min_value': values[0],
+            'max_value': values[-1],
+            'mean_value': sum(values) / size,
+            'median_value': values[size // 2],
+            'percentile_25': values[int(size * 0.25)],
+            'percentile_75': values[int(size * 0.75)],
+            'percentile_90': values[int(size * 0.90)]
+        }
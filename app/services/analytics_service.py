@@ -10,23 +10,29 @@ Key Features:
 - Industry-specific comparisons
 - Trend analysis and reporting
 - Privacy-first design with opt-out capabilities
+
+Counts, activity and benchmarks are served from materialized rollups kept
+current by AnalyticsRollupService, not computed over esg_data per request.
 """
 
 from flask import current_app
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, case
+from ..models.analytics_rollup import AnalyticsDailyRollup, AnalyticsFieldBenchmark
 from ..models.company import Company
-from ..models.esg_data import ESGData
-from ..models.data_assignment import DataPointAssignment
 from ..models.framework import Framework, FrameworkDataField
 from ..models.entity import Entity
-from ..models.user import User
 from ..extensions import db
+from .analytics_rollup import AnalyticsRollupService
 from datetime import datetime, timedelta
 import json
 from typing import Dict, List, Optional, Any
 import hashlib
 
 
+RECENT_ACTIVITY_DAYS = 30
+BENCHMARK_MIN_SAMPLE_SIZE = 5  # Only publish benchmarks with sufficient data
+
+
 class CrossTenantAnalyticsService:
     """
     Service for cross-tenant analytics with privacy controls.
@@ -40,6 +46,10 @@ class CrossTenantAnalyticsService:
         """
         Get system-wide ESG metrics across all tenants.
         
+        Data volumes, completion and activity are read from the analytics
+        rollups (see AnalyticsRollupService), so the cost does not grow with
+        esg_data.
+        
         Returns:
             Dict containing global metrics like total companies, data points,
             completion rates, and high-level trends.
@@ -48,24 +58,22 @@ class CrossTenantAnalyticsService:
             # Basic system metrics
             total_companies = Company.query.filter_by(is_active=True).count()
             total_entities = Entity.query.count()
-            total_data_points = DataPointAssignment.query.filter_by(series_status='active').count()
-            total_esg_records = ESGData.query.count()
             total_frameworks = Framework.query.count()
             
-            # Data completion metrics
-            completed_data_points = ESGData.query.filter(
-                ESGData.raw_value.isnot(None),
-                ESGData.raw_value != ''
-            ).count()
+            # Data volume, completion and recent activity (last 30 days)
+            recent_cutoff = (datetime.utcnow() - timedelta(days=RECENT_ACTIVITY_DAYS)).date()
+            total_esg_records, completed_data_points, total_data_points, recent_updates = db.session.query(
+                func.coalesce(func.sum(AnalyticsDailyRollup.entries_created), 0),
+                func.coalesce(func.sum(AnalyticsDailyRollup.entries_completed), 0),
+                func.coalesce(func.sum(AnalyticsDailyRollup.assignments_active), 0),
+                func.coalesce(func.sum(case(
+                    (AnalyticsDailyRollup.day >= recent_cutoff, AnalyticsDailyRollup.entries_updated),
+                    else_=0
+                )), 0)
+            ).one()
             
             completion_rate = (completed_data_points / total_data_points * 100) if total_data_points > 0 else 0
             
-            # Recent activity (last 30 days)
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            recent_updates = ESGData.query.filter(
-                ESGData.updated_at >= thirty_days_ago
-            ).count()
-            
             # Industry distribution
             industry_distribution = db.session.query(
                 Company.industry,
@@ -75,15 +83,16 @@ class CrossTenantAnalyticsService:
                 Company.industry.isnot(None)
             ).group_by(Company.industry).all()
             
-            # Framework usage - need to join through FrameworkDataField
+            # Framework usage
+            usage_count = func.sum(AnalyticsDailyRollup.assignments_created)
             framework_usage = db.session.query(
                 Framework.framework_name,
-                func.count(DataPointAssignment.id).label('usage_count')
-            ).join(
-                FrameworkDataField, Framework.framework_id == FrameworkDataField.framework_id
+                usage_count.label('usage_count')
             ).join(
-                DataPointAssignment, FrameworkDataField.field_id == DataPointAssignment.field_id
-            ).group_by(Framework.framework_id, Framework.framework_name).all()
+                AnalyticsDailyRollup, Framework.framework_id == AnalyticsDailyRollup.framework_id
+            ).group_by(
+                Framework.framework_id, Framework.framework_name
+            ).having(usage_count > 0).all()
             
             return {
                 'success': True,
@@ -108,6 +117,7 @@ class CrossTenantAnalyticsService:
                         {'framework': name, 'usage_count': count}
                         for name, count in framework_usage
                     ],
+                    'data_as_of': CrossTenantAnalyticsService._data_as_of(),
                     'generated_at': datetime.utcnow().isoformat()
                 }
             }
@@ -133,17 +143,11 @@ class CrossTenantAnalyticsService:
             Dict containing anonymized tenant comparison metrics
         """
         try:
-            # Build base query
+            # Active tenants
             query = db.session.query(
                 Company.id,
                 Company.name,
-                Company.industry,
-                func.count(Entity.id).label('entity_count'),
-                func.count(DataPointAssignment.id).label('data_point_count')
-            ).outerjoin(
-                Entity, Company.id == Entity.company_id
-            ).outerjoin(
-                DataPointAssignment, DataPointAssignment.entity_id == Entity.id
+                Company.industry
             ).filter(
                 Company.is_active == True
             )
@@ -152,22 +156,32 @@ class CrossTenantAnalyticsService:
             if industry:
                 query = query.filter(Company.industry == industry)
             
-            # Group and execute
-            tenant_data = query.group_by(
-                Company.id, Company.name, Company.industry
-            ).all()
+            tenants = query.order_by(Company.id).all()
+            company_ids = [company_id for company_id, _, _ in tenants]
+            
+            # Entity counts and rolled-up assignment/completion counts per tenant
+            entity_counts = dict(db.session.query(
+                Entity.company_id,
+                func.count(Entity.id)
+            ).filter(
+                Entity.company_id.in_(company_ids)
+            ).group_by(Entity.company_id).all()) if company_ids else {}
+            
+            rollup_counts = {
+                company_id: (data_point_count or 0, completed_count or 0)
+                for company_id, data_point_count, completed_count in db.session.query(
+                    AnalyticsDailyRollup.company_id,
+                    func.sum(AnalyticsDailyRollup.assignments_created),
+                    func.sum(AnalyticsDailyRollup.entries_completed)
+                ).filter(
+                    AnalyticsDailyRollup.company_id.in_(company_ids)
+                ).group_by(AnalyticsDailyRollup.company_id)
+            } if company_ids else {}
             
             # Calculate completion rates for each tenant
             comparison_data = []
-            for company_id, name, company_industry, entity_count, data_point_count in tenant_data:
-                # Get completion rate
-                completed_count = ESGData.query.join(
-                    Entity, ESGData.entity_id == Entity.id
-                ).filter(
-                    Entity.company_id == company_id,
-                    ESGData.raw_value.isnot(None),
-                    ESGData.raw_value != ''
-                ).count()
+            for company_id, name, company_industry in tenants:
+                data_point_count, completed_count = rollup_counts.get(company_id, (0, 0))
                 
                 completion_rate = (completed_count / data_point_count * 100) if data_point_count > 0 else 0
                 
@@ -177,7 +191,7 @@ class CrossTenantAnalyticsService:
                 comparison_data.append({
                     'tenant_id': tenant_id,
                     'industry': company_industry or 'Not Specified',
-                    'entity_count': entity_count,
+                    'entity_count': entity_counts.get(company_id, 0),
                     'data_point_count': data_point_count,
                     'completion_rate': round(completion_rate, 2),
                     'completed_data_points': completed_count
@@ -205,6 +219,7 @@ class CrossTenantAnalyticsService:
                     'total_tenants': len(comparison_data),
                     'filter_applied': {'industry': industry} if industry else None,
                     'anonymized': anonymize,
+                    'data_as_of': CrossTenantAnalyticsService._data_as_of(),
                     'generated_at': datetime.utcnow().isoformat()
                 }
             }
@@ -217,7 +232,7 @@ class CrossTenantAnalyticsService:
             }
     
     @staticmethod
-    def get_benchmark_data(framework_id: Optional[int] = None,
+    def get_benchmark_data(framework_id: Optional[str] = None,
                           industry: Optional[str] = None) -> Dict[str, Any]:
         """
         Get benchmarking data for ESG performance.
@@ -230,78 +245,41 @@ class CrossTenantAnalyticsService:
             Dict containing benchmark metrics and percentiles
         """
         try:
-            # Build base query for ESG data
+            # Precomputed distributions with sufficient data
             query = db.session.query(
-                ESGData.raw_value,
-                Company.industry,
-                Framework.framework_name.label('framework_name'),
-                FrameworkDataField.field_name.label('field_name')
-            ).join(
-                Entity, ESGData.entity_id == Entity.id
-            ).join(
-                Company, Entity.company_id == Company.id
+                AnalyticsFieldBenchmark,
+                Framework.framework_name,
+                FrameworkDataField.field_name
             ).join(
-                FrameworkDataField, ESGData.field_id == FrameworkDataField.field_id
+                FrameworkDataField, AnalyticsFieldBenchmark.field_id == FrameworkDataField.field_id
             ).join(
-                Framework, FrameworkDataField.framework_id == Framework.framework_id
+                Framework, AnalyticsFieldBenchmark.framework_id == Framework.framework_id
             ).filter(
-                Company.is_active == True,
-                ESGData.raw_value.isnot(None),
-                ESGData.raw_value != ''
+                AnalyticsFieldBenchmark.industry == (industry or ''),
+                AnalyticsFieldBenchmark.sample_size >= BENCHMARK_MIN_SAMPLE_SIZE
             )
             
             # Apply filters
             if framework_id:
-                query = query.filter(Framework.framework_id == framework_id)
-            if industry:
-                query = query.filter(Company.industry == industry)
-            
-            # Execute query
-            benchmark_data = query.all()
-            
-            # Process numeric values for benchmarking
-            numeric_benchmarks = {}
-            for value, company_industry, framework_name, field_name in benchmark_data:
-                try:
-                    # Try to convert to float for numeric analysis
-                    numeric_value = float(value)
-                    
-                    key = f"{framework_name}::{field_name}"
-                    if key not in numeric_benchmarks:
-                        numeric_benchmarks[key] = {
-                            'framework': framework_name,
-                            'field': field_name,
-                            'values': [],
-                            'industries': set()
-                        }
-                    
-                    numeric_benchmarks[key]['values'].append(numeric_value)
-                    numeric_benchmarks[key]['industries'].add(company_industry or 'Not Specified')
-                    
-                except (ValueError, TypeError):
-                    # Skip non-numeric values
-                    continue
+                query = query.filter(AnalyticsFieldBenchmark.framework_id == framework_id)
             
-            # Calculate percentiles and statistics
             benchmark_results = {}
-            for key, data in numeric_benchmarks.items():
-                values = sorted(data['values'])
-                if len(values) >= 5:  # Only calculate benchmarks with sufficient data
-                    benchmark_results[key] = {
-                        'framework': data['framework'],
-                        'field': data['field'],
-                        'sample_size': len(values),
-                        'industries_covered': list(data['industries']),
-                        'statistics': {
-                            'min': min(values),
-                            'max': max(values),
-                            'mean': sum(values) / len(values),
-                            'median': values[len(values) // 2],
-                            'percentile_25': values[int(len(values) * 0.25)],
-                            'percentile_75': values[int(len(values) * 0.75)],
-                            'percentile_90': values[int(len(values) * 0.90)]
-                        }
+            for benchmark, framework_name, field_name in query.all():
+                benchmark_results[f"{framework_name}::{field_name}"] = {
+                    'framework': framework_name,
+                    'field': field_name,
+                    'sample_size': benchmark.sample_size,
+                    'industries_covered': benchmark.industries_covered or [],
+                    'statistics': {
+                        'min': benchmark.min_value,
+                        'max': benchmark.max_value,
+                        'mean': benchmark.mean_value,
+                        'median': benchmark.median_value,
+                        'percentile_25': benchmark.percentile_25,
+                        'percentile_75': benchmark.percentile_75,
+                        'percentile_90': benchmark.percentile_90
                     }
+                }
             
             return {
                 'success': True,
@@ -312,6 +290,7 @@ class CrossTenantAnalyticsService:
                         'framework_id': framework_id,
                         'industry': industry
                     },
+                    'data_as_of': CrossTenantAnalyticsService._data_as_of(),
                     'generated_at': datetime.utcnow().isoformat()
                 }
             }
@@ -338,29 +317,29 @@ class CrossTenantAnalyticsService:
             start_date = datetime.utcnow() - timedelta(days=days)
             
             # Daily data entry trends
+            entries_count = func.sum(AnalyticsDailyRollup.entries_created)
             daily_trends = db.session.query(
-                func.date(ESGData.created_at).label('date'),
-                func.count(ESGData.id).label('entries_count')
+                AnalyticsDailyRollup.day,
+                entries_count.label('entries_count')
             ).filter(
-                ESGData.created_at >= start_date
+                AnalyticsDailyRollup.day >= start_date.date()
             ).group_by(
-                func.date(ESGData.created_at)
-            ).order_by('date').all()
+                AnalyticsDailyRollup.day
+            ).having(entries_count > 0).order_by(AnalyticsDailyRollup.day).all()
             
             # Framework adoption trends
+            new_data_points = func.sum(AnalyticsDailyRollup.assignments_created)
             framework_trends = db.session.query(
                 Framework.framework_name,
-                func.date(DataPointAssignment.assigned_date).label('date'),
-                func.count(DataPointAssignment.id).label('new_data_points')
-            ).join(
-                FrameworkDataField, DataPointAssignment.field_id == FrameworkDataField.field_id
+                AnalyticsDailyRollup.day,
+                new_data_points.label('new_data_points')
             ).join(
-                Framework, FrameworkDataField.framework_id == Framework.framework_id
+                Framework, AnalyticsDailyRollup.framework_id == Framework.framework_id
             ).filter(
-                DataPointAssignment.assigned_date >= start_date
+                AnalyticsDailyRollup.day >= start_date.date()
             ).group_by(
-                Framework.framework_id, Framework.framework_name, func.date(DataPointAssignment.assigned_date)
-            ).order_by('date').all()
+                Framework.framework_id, Framework.framework_name, AnalyticsDailyRollup.day
+            ).having(new_data_points > 0).order_by(AnalyticsDailyRollup.day).all()
             
             # Company onboarding trends
             company_trends = db.session.query(
@@ -385,11 +364,12 @@ class CrossTenantAnalyticsService:
                         for name, date, count in framework_trends
                     ],
                     'company_onboarding': [
-                        {'date': date.isoformat(), 'new_companies': count}
+                        {'date': str(date), 'new_companies': count}
                         for date, count in company_trends
                     ],
                     'analysis_period_days': days,
                     'start_date': start_date.isoformat(),
+                    'data_as_of': CrossTenantAnalyticsService._data_as_of(),
                     'generated_at': datetime.utcnow().isoformat()
                 }
             }
@@ -401,6 +381,12 @@ class CrossTenantAnalyticsService:
                 'error': 'Failed to generate trend analysis'
             }
     
+    @staticmethod
+    def _data_as_of() -> Optional[str]:
+        """Time up to which the rollups reflect esg_data (None before the first refresh)."""
+        watermark = AnalyticsRollupService.get_watermark()
+        return watermark.isoformat() if watermark else None
+    
     @staticmethod
     def _anonymize_tenant_id(company_id: int) -> str:
         """
@@ -12,9 +12,13 @@ Key Features:
 - Performance-optimized resolution (< 50ms target)
 """
 
+import threading
+import time
 import uuid
+from collections import namedtuple
 from datetime import datetime, UTC, date
 from typing import Optional, List, Dict, Any, Tuple
+from flask import current_app
 from sqlalchemy import and_, or_, desc
 from sqlalchemy.orm import joinedload
 
@@ -23,6 +27,8 @@ from ..models.data_assignment import DataPointAssignment
 from ..models.esg_data import ESGData
 from ..models.company import Company
 from ..middleware.tenant import get_current_tenant
+from ..utils.cache import LRUTTLCache, MISSING, snapshot_instance, restore_instance
+from .redis import RedisCacheTier, SharedVersionCounter
 
 
 class AssignmentVersioningService:
@@ -232,6 +238,8 @@ class AssignmentVersioningService:
                 'created_at': datetime.now(UTC).isoformat()
             }
 
+            invalidate_assignment_cache(current_assignment.company_id, current_assignment.field_id, current_assignment.entity_id)
+
             # Don't commit here - let the calling function handle transaction commit
 
             return {
@@ -369,6 +377,7 @@ class AssignmentVersioningService:
 
         # Mark as inactive (caller will commit the transaction)
         assignment.series_status = 'inactive'
+        invalidate_assignment_cache(assignment.company_id, assignment.field_id, assignment.entity_id)
 
         return {
             'success': True,
@@ -798,9 +807,21 @@ class AssignmentResolutionService:
             
             # Check cache first for performance (< 50ms target)
             cached_result = assignment_cache.get(field_id, entity_id, reporting_date, company_id)
-            if cached_result is not None:
-                return cached_result
+            if cached_result is not MISSING:
+                if cached_result is None:
+                    return None
+                return restore_instance(DataPointAssignment, cached_result, db.session)
             
+            # In a tenant context resolve from the per-tenant active-assignment
+            # index: one query per tenant (and per assignment write) instead of
+            # one query per field+entity pair.
+            if company_id:
+                record = active_assignment_index.lookup(company_id, field_id, entity_id)
+                assignment = (restore_instance(DataPointAssignment, record._asdict(), db.session)
+                              if record else None)
+                assignment_cache.set(field_id, entity_id, reporting_date, assignment, company_id)
+                return assignment
+
             # Use provided company config or auto-detect from tenant
             if not company_fy_config and current_tenant:
                 company_fy_config = current_tenant
@@ -858,6 +879,56 @@ class AssignmentResolutionService:
                 print(f"Error resolving assignment for field {field_id}, entity {entity_id}: {str(e)}")
             return None
     
+    @staticmethod
+    def resolve_assignments_bulk(
+        field_ids: List[str],
+        entity_ids: List[int]
+    ) -> Dict[Tuple[str, int], DataPointAssignment]:
+        """
+        Resolve active assignments for every (field_id, entity_id) combination at once.
+
+        Bulk counterpart of resolve_assignment() for batch computations: a single
+        query replaces one query per pair. Like resolve_assignment(), date
+        compatibility is not enforced here.
+
+        Args:
+            field_ids: Framework data field IDs
+            entity_ids: Entity IDs
+
+        Returns:
+            Dict mapping (field_id, entity_id) to the highest-version active assignment
+        """
+        field_ids = list(set(field_ids))
+        entity_ids = list(set(entity_ids))
+        if not field_ids or not entity_ids:
+            return {}
+
+        current_tenant = get_current_tenant()
+        company_id = current_tenant.id if current_tenant else None
+
+        query = DataPointAssignment.query.filter(
+            DataPointAssignment.field_id.in_(field_ids),
+            DataPointAssignment.entity_id.in_(entity_ids),
+            DataPointAssignment.series_status == 'active'
+        )
+
+        if company_id:
+            query = query.filter(DataPointAssignment.company_id == company_id)
+
+        assignments = query.options(
+            joinedload(DataPointAssignment.company),
+            joinedload(DataPointAssignment.field)
+        ).order_by(
+            desc(DataPointAssignment.series_version)
+        ).all()
+
+        resolved = {}
+        for assignment in assignments:
+            # Ordered by version, so the first hit per pair is the latest version
+            resolved.setdefault((assignment.field_id, assignment.entity_id), assignment)
+
+        return resolved
+
     @staticmethod
     def _is_date_compatible(assignment: DataPointAssignment, reporting_date: date, company: Optional['Company'] = None) -> bool:
         """
@@ -905,57 +976,181 @@ def resolve_assignment(field_id: str, entity_id: int, reporting_date: date, comp
     return AssignmentResolutionService.resolve_assignment(field_id, entity_id, reporting_date, company_fy_config)
 
 
+def resolve_assignments_bulk(field_ids: List[str], entity_ids: List[int]) -> Dict[Tuple[str, int], DataPointAssignment]:
+    """Resolve active assignments for many field+entity pairs with a single query."""
+    return AssignmentResolutionService.resolve_assignments_bulk(field_ids, entity_ids)
+
+
 class AssignmentCache:
     """
-    Phase 4: Simple caching mechanism for assignment resolution performance.
-    
-    This cache helps achieve the < 50ms performance target for frequently
-    accessed assignment resolutions.
+    Phase 4: Caching layer for assignment resolution performance.
+
+    Backed by an O(1) LRU cache with a TTL. Entries are plain column snapshots
+    (never ORM instances), so they are safe to share across requests, sessions
+    and - through the optional Redis tier - gunicorn workers. Each entry is
+    tagged with its (company, field, entity) so assignment writes can drop
+    exactly the affected resolutions.
     """
-    
-    def __init__(self, max_size: int = 1000):
-        self.cache = {}
-        self.max_size = max_size
-        self.access_order = []
-    
-    def get_cache_key(self, field_id: str, entity_id: int, reporting_date: date, company_id: Optional[int] = None) -> str:
+
+    def __init__(self, max_size: int = 1000, ttl: Optional[float] = 300, shared: bool = True):
+        second_tier = RedisCacheTier('assignment_resolution') if shared else None
+        self._cache = LRUTTLCache(max_size=max_size, ttl=ttl, second_tier=second_tier)
+
+    @property
+    def max_size(self) -> int:
+        return self._cache.max_size
+
+    def get_cache_key(self, field_id: str, entity_id: int, reporting_date: date, company_id: Optional[int] = None) -> Tuple:
         """Generate cache key for assignment resolution."""
-        return f"{field_id}:{entity_id}:{reporting_date.isoformat()}:{company_id or 'none'}"
-    
-    def get(self, field_id: str, entity_id: int, reporting_date: date, company_id: Optional[int] = None) -> Optional[DataPointAssignment]:
-        """Get cached assignment if available."""
-        key = self.get_cache_key(field_id, entity_id, reporting_date, company_id)
-        
-        if key in self.cache:
-            # Move to end (most recently used)
-            self.access_order.remove(key)
-            self.access_order.append(key)
-            return self.cache[key]
-        
-        return None
-    
+        return (field_id, entity_id, reporting_date.isoformat(), company_id)
+
+    @staticmethod
+    def _tag(company_id: Optional[int], field_id: str, entity_id: int) -> Tuple:
+        return (company_id, field_id, entity_id)
+
+    def get(self, field_id: str, entity_id: int, reporting_date: date, company_id: Optional[int] = None) -> Any:
+        """
+        Get a cached resolution.
+
+        Returns:
+            The assignment snapshot dict, None for a cached negative result,
+            or MISSING when nothing is cached
+        """
+        return self._cache.get(self.get_cache_key(field_id, entity_id, reporting_date, company_id))
+
     def set(self, field_id: str, entity_id: int, reporting_date: date, assignment: Optional[DataPointAssignment], company_id: Optional[int] = None):
-        """Cache assignment resolution result."""
-        key = self.get_cache_key(field_id, entity_id, reporting_date, company_id)
-        
-        # Evict oldest if at capacity
-        if len(self.cache) >= self.max_size and key not in self.cache:
-            oldest_key = self.access_order.pop(0)
-            del self.cache[oldest_key]
-        
-        self.cache[key] = assignment
-        if key not in self.access_order:
-            self.access_order.append(key)
-    
+        """Cache assignment resolution result (None caches a negative result)."""
+        value = snapshot_instance(assignment) if assignment is not None else None
+        self._cache.set(
+            self.get_cache_key(field_id, entity_id, reporting_date, company_id),
+            value,
+            tags=(self._tag(company_id, field_id, entity_id), ('company', company_id))
+        )
+
+    def invalidate(self, company_id: Optional[int], field_id: str, entity_id: int) -> int:
+        """Drop every cached resolution for a field+entity pair in a company."""
+        dropped = self._cache.invalidate_tag(self._tag(company_id, field_id, entity_id))
+        if company_id is not None:
+            # Resolutions made outside a tenant context are cached under company None
+            dropped += self._cache.invalidate_tag(self._tag(None, field_id, entity_id))
+        return dropped
+
+    def invalidate_company(self, company_id: Optional[int]) -> int:
+        """Drop every cached resolution for a company."""
+        return self._cache.invalidate_tag(('company', company_id))
+
     def clear(self):
         """Clear all cached assignments."""
-        self.cache.clear()
-        self.access_order.clear()
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for monitoring."""
+        return self._cache.stats()
 
 
 # Global assignment cache instance
 assignment_cache = AssignmentCache()
 
+
+ActiveAssignmentRecord = namedtuple('ActiveAssignmentRecord', [
+    'id', 'field_id', 'entity_id', 'company_id', 'unit', 'frequency', 'attachment_required',
+    'assigned_topic_id', 'data_series_id', 'series_version', 'series_status',
+    'assigned_date', 'assigned_by',
+])
+
+
+class ActiveAssignmentIndex:
+    """
+    Phase 4: Per-tenant in-memory index of active assignments.
+
+    Maps (field_id, entity_id) to a compact ActiveAssignmentRecord for the
+    highest active version. Each tenant's index is built with one query and
+    kept until the company's version counter is bumped by an assignment
+    write. When Redis is enabled the counter is shared, so a write in one
+    worker makes every worker rebuild on its next lookup (checked at most
+    every SHARED_VERSION_CHECK_INTERVAL seconds). Without Redis other
+    workers' writes are picked up once the index is older than
+    ACTIVE_ASSIGNMENT_INDEX_MAX_AGE seconds.
+    """
+
+    SHARED_VERSION_CHECK_INTERVAL = 1.0
+    DEFAULT_MAX_AGE = 30
+
+    def __init__(self):
+        self._indexes: Dict[int, Tuple[Tuple[int, int], float, Dict[Tuple[str, int], ActiveAssignmentRecord]]] = {}
+        self._versions = SharedVersionCounter('assignment_index_version', self.SHARED_VERSION_CHECK_INTERVAL)
+        self._lock = threading.RLock()
+
+    def version(self, company_id: int) -> Tuple[int, int]:
+        """Current (local, shared) version of a company's assignments."""
+        return self._versions.version(company_id)
+
+    def bump(self, company_id: Optional[int]):
+        """Mark a company's index as stale after an assignment write."""
+        if company_id is None:
+            return
+        self._versions.bump(company_id)
+        with self._lock:
+            self._indexes.pop(company_id, None)
+
+    def get_index(self, company_id: int) -> Dict[Tuple[str, int], ActiveAssignmentRecord]:
+        """Return the company's index, rebuilding it if its version moved or it is too old."""
+        version = self.version(company_id)
+        max_age = current_app.config.get('ACTIVE_ASSIGNMENT_INDEX_MAX_AGE', self.DEFAULT_MAX_AGE)
+        cached = self._indexes.get(company_id)
+        if self._is_fresh(cached, version, max_age):
+            return cached[2]
+
+        with self._lock:
+            cached = self._indexes.get(company_id)
+            if self._is_fresh(cached, version, max_age):
+                return cached[2]
+            index = self._build(company_id)
+            self._indexes[company_id] = (version, time.monotonic(), index)
+            return index
+
+    @staticmethod
+    def _is_fresh(cached, version: Tuple[int, int], max_age: Optional[float]) -> bool:
+        if not cached or cached[0] != version:
+            return False
+        return not max_age or time.monotonic() - cached[1] < max_age
+
+    def lookup(self, company_id: int, field_id: str, entity_id: int) -> Optional[ActiveAssignmentRecord]:
+        """Active assignment record for a field+entity pair, or None."""
+        return self.get_index(company_id).get((field_id, entity_id))
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+        self._versions.clear()
+
+    @staticmethod
+    def _build(company_id: int) -> Dict[Tuple[str, int], ActiveAssignmentRecord]:
+        columns = [getattr(DataPointAssignment, name) for name in ActiveAssignmentRecord._fields]
+        rows = db.session.query(*columns).filter(
+            DataPointAssignment.company_id == company_id,
+            DataPointAssignment.series_status == 'active'
+        ).order_by(DataPointAssignment.series_version).all()
+
+        # Ascending version order, so the latest version of a pair wins
+        return {(row.field_id, row.entity_id): ActiveAssignmentRecord(*row) for row in rows}
+
+
+# Global active-assignment index instance
+active_assignment_index = ActiveAssignmentIndex()
+
+
+def invalidate_assignment_cache(company_id: Optional[int], field_id: str, entity_id: int) -> int:
+    """Invalidation hook fired whenever an assignment row is written."""
+    active_assignment_index.bump(company_id)
+    return assignment_cache.invalidate(company_id, field_id, entity_id)
+
+
+def invalidate_company_assignments(company_id: Optional[int]) -> int:
+    """Invalidation hook for bulk writes that touch all of a company's assignments."""
+    active_assignment_index.bump(company_id)
+    return assignment_cache.invalidate_company(company_id)
+
 def handle_assignment_edge_cases(field_id: str, entity_id: int, reporting_date: date) -> Dict[str, Any]:
     """Phase 4: Detect and provide solutions for assignment edge cases."""
     return AssignmentVersioningService.handle_edge_cases(field_id, entity_id, reporting_date)
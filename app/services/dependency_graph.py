@@ -0,0 +1,394 @@
+"""
+Compiled dependency graph of computed fields.
+
+Each tenant's graph is built from a single scan of its computed fields (and
+those of global framework providers, which tenants can use) joined to their
+variable mappings and raw fields. The graph holds forward and reverse
+adjacency, a topological order, precomputed transitive closures and the set
+of fields on a cycle, so dependency questions are answered without the
+per-edge relationship loads of the recursive model methods.
+
+Graphs are immutable and cached per company until the company's version is
+bumped by a write to a FrameworkDataField or FieldVariableMapping (see the
+listeners in models/framework.py). Writes to a global provider's fields bump
+the shared 'global' version, which every tenant graph depends on. A graph
+is also rebuilt once it is DEPENDENCY_GRAPH_MAX_AGE seconds old, so workers
+see writes made by other workers even without Redis.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased
+
+from ..extensions import db
+from ..models.company import Company
+from ..models.framework import FrameworkDataField, FieldVariableMapping
+from .redis import SharedVersionCounter
+
+
+FieldNode = namedtuple('FieldNode', ['field_id', 'field_name', 'is_computed', 'formula_expression', 'company_id'])
+DependencyEdge = namedtuple('DependencyEdge', ['variable_name', 'coefficient', 'raw_field_id'])
+
+
+class DependencyGraph:
+    """
+    Immutable dependency graph over field IDs.
+
+    Edges point from a computed field to the fields its formula variables map
+    to. Everything derived from the edges is computed once in the
+    constructor in O(V + E) (plus the size of the closures).
+    """
+
+    def __init__(self, nodes: Dict[str, FieldNode], edges: Dict[str, Tuple[DependencyEdge, ...]]):
+        self.nodes = nodes
+        self.edges = edges
+
+        reverse: Dict[str, List[str]] = {}
+        for computed_id, field_edges in edges.items():
+            for edge in field_edges:
+                dependants = reverse.setdefault(edge.raw_field_id, [])
+                if computed_id not in dependants:
+                    dependants.append(computed_id)
+        self.reverse: Dict[str, Tuple[str, ...]] = {key: tuple(value) for key, value in reverse.items()}
+
+        self.cyclic_fields: FrozenSet[str] = self._find_cyclic_fields()
+        self.topological_order: Tuple[str, ...] = self._topological_order()
+        self._dependency_closure = self._build_dependency_closure()
+        self._dependant_closure = self._build_dependant_closure()
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def _successors(self, field_id: str) -> List[str]:
+        return [edge.raw_field_id for edge in self.edges.get(field_id, ())]
+
+    def _find_cyclic_fields(self) -> FrozenSet[str]:
+        """Fields on a dependency cycle (iterative Tarjan SCC, O(V + E))."""
+        index_of: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack = set()
+        stack: List[str] = []
+        cyclic = set()
+        counter = 0
+
+        for root in self.edges:
+            if root in index_of:
+                continue
+            work = [(root, iter(self._successors(root)))]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                node, successors = work[-1]
+                advanced = False
+                for successor in successors:
+                    if successor not in index_of:
+                        index_of[successor] = lowlink[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(self._successors(successor))))
+                        advanced = True
+                        break
+                    if successor in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[successor])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self._successors(node):
+                        cyclic.update(component)
+
+        return frozenset(cyclic)
+
+    def _topological_order(self) -> Tuple[str, ...]:
+        """Acyclic fields ordered dependencies-first (Kahn's algorithm)."""
+        fields = (set(self.nodes) | set(self.edges) | set(self.reverse)) - self.cyclic_fields
+        remaining = {
+            field_id: len({dep for dep in self._successors(field_id) if dep not in self.cyclic_fields})
+            for field_id in fields
+        }
+        ready = sorted(field_id for field_id, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            field_id = ready.pop()
+            order.append(field_id)
+            for dependant in self.reverse.get(field_id, ()):
+                if dependant in remaining:
+                    remaining[dependant] -= 1
+                    if remaining[dependant] == 0:
+                        ready.append(dependant)
+        return tuple(order)
+
+    def _build_dependency_closure(self) -> Dict[str, Tuple[str, ...]]:
+        """All (transitive) dependencies per computed field, in depth-first order."""
+        closure: Dict[str, Tuple[str, ...]] = {}
+
+        def expand(field_id, visiting):
+            result = []
+            seen = set()
+            for dep in self._successors(field_id):
+                if dep in visiting:
+                    continue
+                if dep not in seen:
+                    seen.add(dep)
+                    result.append(dep)
+                nested = closure.get(dep)
+                if nested is None:
+                    nested = expand(dep, visiting | {dep}) if dep in self.edges else ()
+                for nested_dep in nested:
+                    if nested_dep not in seen:
+                        seen.add(nested_dep)
+                        result.append(nested_dep)
+            return tuple(result)
+
+        for field_id in self.topological_order:
+            if field_id in self.edges:
+                closure[field_id] = expand(field_id, frozenset((field_id,)))
+        for field_id in self.cyclic_fields:
+            closure[field_id] = expand(field_id, frozenset((field_id,)))
+        return closure
+
+    def _build_dependant_closure(self) -> Dict[str, FrozenSet[str]]:
+        """All (transitive) dependants per field."""
+        closure: Dict[str, FrozenSet[str]] = {}
+        for field_id, dependencies in self._dependency_closure.items():
+            for dep in dependencies:
+                closure.setdefault(dep, set()).add(field_id)
+        return {field_id: frozenset(dependants) for field_id, dependants in closure.items()}
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def __contains__(self, field_id: str) -> bool:
+        return field_id in self.nodes
+
+    def node(self, field_id: str) -> Optional[FieldNode]:
+        return self.nodes.get(field_id)
+
+    def dependencies(self, field_id: str) -> Tuple[str, ...]:
+        """Fields a computed field's variables map to directly."""
+        return tuple(self._successors(field_id))
+
+    def all_dependencies(self, field_id: str) -> Tuple[str, ...]:
+        """All fields a computed field depends on, directly or transitively (each once)."""
+        return self._dependency_closure.get(field_id, ())
+
+    def dependants(self, field_id: str) -> Tuple[str, ...]:
+        """Computed fields that map a variable directly to field_id."""
+        return self.reverse.get(field_id, ())
+
+    def all_dependants(self, field_id: str) -> FrozenSet[str]:
+        """Computed fields that depend on field_id, directly or transitively."""
+        return self._dependant_closure.get(field_id, frozenset())
+
+    def has_cycle(self, field_id: str) -> bool:
+        """True if field_id is on a dependency cycle or depends on one."""
+        if field_id in self.cyclic_fields:
+            return True
+        return any(dep in self.cyclic_fields for dep in self.all_dependencies(field_id))
+
+    def would_create_cycle(self, field_id: str, dependency_ids: Iterable[str]) -> bool:
+        """True if mapping field_id to dependency_ids would make it depend on itself."""
+        for dep in dependency_ids:
+            if dep == field_id or field_id in self.all_dependencies(dep):
+                return True
+        return False
+
+    def dependency_tree(self, field_id: str) -> Optional[Dict]:
+        """
+        Hierarchical dependency structure, as FrameworkDataField.get_dependency_tree().
+
+        Returns:
+            dict: Nested structure with field info and dependencies, or None
+            if the field is not computed
+        """
+        node = self.nodes.get(field_id)
+        if node is None or not node.is_computed:
+            return None
+        return self._tree(field_id, frozenset((field_id,)))
+
+    def _tree(self, field_id: str, path: FrozenSet[str]) -> Dict:
+        node = self.nodes[field_id]
+        tree = {
+            'field_id': field_id,
+            'field_name': node.field_name,
+            'is_computed': True,
+            'formula': node.formula_expression,
+            'dependencies': []
+        }
+
+        for edge in self.edges.get(field_id, ()):
+            raw_node = self.nodes.get(edge.raw_field_id)
+            dep_info = {
+                'variable': edge.variable_name,
+                'coefficient': edge.coefficient,
+                'field_id': edge.raw_field_id,
+                'field_name': raw_node.field_name if raw_node else None,
+                'is_computed': bool(raw_node and raw_node.is_computed)
+            }
+
+            # Cycles are cut where they close instead of recursing forever
+            if dep_info['is_computed'] and edge.raw_field_id not in path:
+                dep_info['dependencies'] = self._tree(edge.raw_field_id, path | {edge.raw_field_id})
+
+            tree['dependencies'].append(dep_info)
+
+        return tree
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'nodes': len(self.nodes),
+            'edges': sum(len(field_edges) for field_edges in self.edges.values()),
+            'cyclic_fields': len(self.cyclic_fields)
+        }
+
+
+class DependencyGraphRegistry:
+    """
+    Per-company cache of compiled DependencyGraphs.
+
+    A graph is rebuilt when the version of its company or the shared
+    'global' version (global framework providers) has moved since it was
+    built. Versions are SharedVersionCounters, so a bump in one worker is
+    seen by the others when Redis is enabled. Without Redis the shared part
+    never moves, so graphs are also rebuilt once older than
+    DEPENDENCY_GRAPH_MAX_AGE seconds.
+    """
+
+    GLOBAL_KEY = 'global'
+    DEFAULT_MAX_AGE = 30
+
+    def __init__(self):
+        self._graphs: Dict[int, Tuple[tuple, float, DependencyGraph]] = {}
+        self._versions = SharedVersionCounter('dependency_graph_version')
+        self._lock = threading.RLock()
+
+    def version(self, company_id: int) -> tuple:
+        return self._versions.version(company_id) + self._versions.version(self.GLOBAL_KEY)
+
+    def get(self, company_id: int) -> DependencyGraph:
+        """Return the company's graph, rebuilding it if its version moved or it is too old."""
+        version = self.version(company_id)
+        max_age = current_app.config.get('DEPENDENCY_GRAPH_MAX_AGE', self.DEFAULT_MAX_AGE)
+        cached = self._graphs.get(company_id)
+        if self._is_fresh(cached, version, max_age):
+            return cached[2]
+
+        with self._lock:
+            cached = self._graphs.get(company_id)
+            if self._is_fresh(cached, version, max_age):
+                return cached[2]
+            graph = self.build(company_id)
+            self._graphs[company_id] = (version, time.monotonic(), graph)
+            return graph
+
+    @staticmethod
+    def _is_fresh(cached, version: tuple, max_age: Optional[float]) -> bool:
+        if not cached or cached[0] != version:
+            return False
+        return not max_age or time.monotonic() - cached[1] < max_age
+
+    def bump(self, company_id: Optional[int], global_provider: bool = False):
+        """Mark a company's graph (or every graph, for a global provider) as stale."""
+        if company_id is not None:
+            self._versions.bump(company_id)
+            with self._lock:
+                self._graphs.pop(company_id, None)
+        if global_provider:
+            self._versions.bump(self.GLOBAL_KEY)
+            with self._lock:
+                self._graphs.clear()
+
+    def clear(self):
+        with self._lock:
+            self._graphs.clear()
+        self._versions.clear()
+
+    @staticmethod
+    def build(company_id: int) -> DependencyGraph:
+        """Build a company's graph from one scan of computed fields, mappings and raw fields."""
+        raw_field = aliased(FrameworkDataField)
+        computed = FrameworkDataField
+
+        rows = db.session.query(
+            computed.field_id, computed.field_name, computed.formula_expression, computed.company_id,
+            FieldVariableMapping.variable_name, FieldVariableMapping.coefficient,
+            raw_field.field_id, raw_field.field_name, raw_field.is_computed,
+            raw_field.formula_expression, raw_field.company_id
+        ).join(
+            Company, Company.id == computed.company_id
+        ).outerjoin(
+            FieldVariableMapping, FieldVariableMapping.computed_field_id == computed.field_id
+        ).outerjoin(
+            raw_field, raw_field.field_id == FieldVariableMapping.raw_field_id
+        ).filter(
+            computed.is_computed.is_(True),
+            or_(computed.company_id == company_id, Company.is_global_framework_provider.is_(True))
+        ).order_by(
+            computed.field_id, FieldVariableMapping.variable_name
+        ).all()
+
+        nodes: Dict[str, FieldNode] = {}
+        edges: Dict[str, List[DependencyEdge]] = {}
+        for (field_id, field_name, formula, field_company_id, variable_name, coefficient,
+             raw_id, raw_name, raw_is_computed, raw_formula, raw_company_id) in rows:
+            nodes[field_id] = FieldNode(field_id, field_name, True, formula, field_company_id)
+            field_edges = edges.setdefault(field_id, [])
+            if variable_name is None or raw_id is None:
+                continue
+            field_edges.append(DependencyEdge(variable_name, coefficient, raw_id))
+            if raw_id not in nodes:
+                nodes[raw_id] = FieldNode(raw_id, raw_name, bool(raw_is_computed), raw_formula, raw_company_id)
+
+        return DependencyGraph(nodes, {field_id: tuple(field_edges) for field_id, field_edges in edges.items()})
+
+
+# Global dependency graph registry
+dependency_graphs = DependencyGraphRegistry()
+
+
+def get_dependency_graph(company_id: int) -> DependencyGraph:
+    """Compiled dependency graph for a company."""
+    return dependency_graphs.get(company_id)
+
+
+def record_dependency_write(session, company_id: Optional[int], global_provider: bool = False):
+    """
+    Invalidation hook fired when a field or variable mapping is written.
+
+    The company is remembered on the session and bumped again when the
+    transaction ends, so a graph rebuilt from the pre-commit state by another
+    session cannot outlive the transaction.
+    """
+    dependency_graphs.bump(company_id, global_provider)
+    if session is not None:
+        session.info.setdefault('dependency_graph_writes', set()).add((company_id, global_provider))
+
+
+def finish_dependency_writes(session):
+    """Re-bump the graphs of companies written in a finished transaction."""
+    writes = session.info.pop('dependency_graph_writes', None)
+    for company_id, global_provider in writes or ():
+        dependency_graphs.bump(company_id, global_provider)
@@ -12,17 +12,41 @@ This service provides methods for:
 
 from flask import current_app
 from sqlalchemy import and_, or_
-from ..models.framework import FrameworkDataField, FieldVariableMapping
+from ..models.framework import FrameworkDataField
 from ..models.data_assignment import DataPointAssignment
 from ..models.entity import Entity
 from ..extensions import db
 from ..middleware.tenant import get_current_tenant
+from ..utils.formula_compiler import formula_compiler
+from .dependency_graph import DependencyGraph, get_dependency_graph
 from typing import List, Dict, Set, Tuple, Optional
 
 
 class DependencyService:
     """Service for managing field dependencies and cascading operations."""
 
+    @staticmethod
+    def _graphs_for_fields(field_ids) -> Dict[str, DependencyGraph]:
+        """
+        Dependency graph to use for each field.
+
+        The current tenant's graph (which includes global provider fields) is
+        used when there is a tenant; otherwise each field's own company graph,
+        resolved with one query for all fields.
+        """
+        field_ids = [field_id for field_id in field_ids if field_id]
+        tenant = get_current_tenant()
+        if tenant:
+            graph = get_dependency_graph(tenant.id)
+            return {field_id: graph for field_id in field_ids}
+
+        if not field_ids:
+            return {}
+        rows = db.session.query(FrameworkDataField.field_id, FrameworkDataField.company_id).filter(
+            FrameworkDataField.field_id.in_(set(field_ids))
+        ).all()
+        return {field_id: get_dependency_graph(company_id) for field_id, company_id in rows}
+
     @staticmethod
     def get_dependencies_for_fields(field_ids: List[str]) -> Dict[str, List[str]]:
         """
@@ -34,17 +58,11 @@ class DependencyService:
         Returns:
             Dictionary mapping field_id to list of dependency field_ids
         """
-        dependency_map = {}
-
-        for field_id in field_ids:
-            field = FrameworkDataField.query.get(field_id)
-            if field and field.is_computed:
-                deps = field.get_all_dependencies()
-                dependency_map[field_id] = [d.field_id for d in deps]
-            else:
-                dependency_map[field_id] = []
-
-        return dependency_map
+        graphs = DependencyService._graphs_for_fields(field_ids)
+        return {
+            field_id: list(graphs[field_id].all_dependencies(field_id)) if field_id in graphs else []
+            for field_id in field_ids
+        }
 
     @staticmethod
     def get_auto_include_fields(selected_fields: List[str],
@@ -70,12 +88,15 @@ class DependencyService:
         already_selected = set()
         notifications = []
 
+        graphs = DependencyService._graphs_for_fields(selected_fields)
+
         for field_id in selected_fields:
-            field = FrameworkDataField.query.get(field_id)
+            graph = graphs.get(field_id)
+            field = graph.node(field_id) if graph else None
             if not field or not field.is_computed:
                 continue
 
-            dependencies = field.get_all_dependencies()
+            dependencies = [graph.node(dep_id) for dep_id in graph.all_dependencies(field_id)]
             dep_count = len(dependencies)
 
             if dep_count > 0:
@@ -144,16 +165,19 @@ class DependencyService:
             frequency = assignment['frequency']
             field_freq_map[field_id] = frequency
 
+        graphs = DependencyService._graphs_for_fields(field_freq_map)
+
         # Check each computed field
         for assignment in assignments:
-            field = FrameworkDataField.query.get(assignment['field_id'])
+            graph = graphs.get(assignment['field_id'])
+            field = graph.node(assignment['field_id']) if graph else None
             if not field or not field.is_computed:
                 continue
 
             computed_freq = assignment['frequency']
             computed_level = freq_hierarchy.get(computed_freq, 1)
 
-            for dep in field.get_all_dependencies():
+            for dep in (graph.node(dep_id) for dep_id in graph.all_dependencies(field.field_id)):
                 dep_freq = field_freq_map.get(dep.field_id)
                 if not dep_freq:
                     continue
@@ -198,25 +222,34 @@ class DependencyService:
         blocking_fields = []
         affected_computed = []
 
+        graph = get_dependency_graph(tenant.id)
+        field_names = dict(db.session.query(FrameworkDataField.field_id, FrameworkDataField.field_name).filter(
+            FrameworkDataField.field_id.in_(field_ids)
+        ).all()) if field_ids else {}
+
+        # Active assignment counts of every dependent computed field, in one query
+        dependent_ids = {dep_id for field_id in field_names for dep_id in graph.dependants(field_id)}
+        assignment_counts = dict(db.session.query(
+            DataPointAssignment.field_id, db.func.count(DataPointAssignment.id)
+        ).filter(
+            DataPointAssignment.field_id.in_(dependent_ids),
+            DataPointAssignment.company_id == tenant.id,
+            DataPointAssignment.series_status == 'active'
+        ).group_by(DataPointAssignment.field_id).all()) if dependent_ids else {}
+
         for field_id in field_ids:
-            field = FrameworkDataField.query.get(field_id)
-            if not field:
+            if field_id not in field_names:
                 continue
-
             # Get computed fields depending on this
-            dependents = field.get_fields_depending_on_this()
+            dependents = [graph.node(dep_id) for dep_id in graph.dependants(field_id)]
 
             for computed_field in dependents:
                 # Check if computed field is assigned
-                assignments = DataPointAssignment.query.filter_by(
-                    field_id=computed_field.field_id,
-                    company_id=tenant.id,
-                    series_status='active'
-                ).count()
+                assignments = assignment_counts.get(computed_field.field_id, 0)
 
                 if assignments > 0:
                     blocking_fields.append({
-                        'removed_field': field.field_name,
+                        'removed_field': field_names[field_id],
                         'blocked_by': computed_field.field_name,
                         'assignment_count': assignments
                     })
@@ -254,32 +287,40 @@ class DependencyService:
         if not tenant:
             return {'error': 'No tenant context'}
 
-        field = FrameworkDataField.query.get(computed_field_id)
+        graph = get_dependency_graph(tenant.id)
+        field = graph.node(computed_field_id)
         if not field or not field.is_computed:
             return {'dependency_assignments': {}, 'existing_assignments': {}}
 
         dependency_assignments = {}
         existing_assignments = {}
-
-        for dep in field.get_all_dependencies():
+        dependency_ids = graph.all_dependencies(computed_field_id)
+
+        # Existing active assignments of all dependencies, in one query
+        existing_by_field = {}
+        if dependency_ids:
+            for dep_field_id, entity_id in db.session.query(
+                DataPointAssignment.field_id, DataPointAssignment.entity_id
+            ).filter(
+                DataPointAssignment.field_id.in_(dependency_ids),
+                DataPointAssignment.company_id == tenant.id,
+                DataPointAssignment.series_status == 'active'
+            ):
+                existing_by_field.setdefault(dep_field_id, []).append(entity_id)
+
+        for dep_field_id in dependency_ids:
             # Start with computed field's entities
             dep_entities = set(assigned_entities)
 
             # Check existing assignments for this dependency
-            existing = DataPointAssignment.query.filter_by(
-                field_id=dep.field_id,
-                company_id=tenant.id,
-                series_status='active'
-            ).all()
-
-            existing_entity_ids = [a.entity_id for a in existing]
+            existing_entity_ids = existing_by_field.get(dep_field_id, [])
 
             if existing_entity_ids:
-                existing_assignments[dep.field_id] = existing_entity_ids
+                existing_assignments[dep_field_id] = existing_entity_ids
                 # Merge with existing entities (union)
                 dep_entities.update(existing_entity_ids)
 
-            dependency_assignments[dep.field_id] = list(dep_entities)
+            dependency_assignments[dep_field_id] = list(dep_entities)
 
         return {
             'dependency_assignments': dependency_assignments,
@@ -305,12 +346,15 @@ class DependencyService:
         missing_dependencies = {}
         orphaned_computed_fields = []
 
+        graphs = DependencyService._graphs_for_fields(field_ids_in_assignment)
+
         for assignment in assignments:
-            field = FrameworkDataField.query.get(assignment['field_id'])
+            graph = graphs.get(assignment['field_id'])
+            field = graph.node(assignment['field_id']) if graph else None
             if not field or not field.is_computed:
                 continue
 
-            required_deps = [d.field_id for d in field.get_all_dependencies()]
+            required_deps = graph.all_dependencies(field.field_id)
             missing = [dep_id for dep_id in required_deps
                       if dep_id not in field_ids_in_assignment]
 
@@ -346,12 +390,16 @@ class DependencyService:
         Returns:
             List of FrameworkDataField objects that are computed and depend on this field
         """
-        field = FrameworkDataField.query.get(field_id)
-        if not field:
+        graph = DependencyService._graphs_for_fields([field_id]).get(field_id)
+        dependant_ids = graph.dependants(field_id) if graph else ()
+        if not dependant_ids:
             return []
 
-        # Use the existing method from FrameworkDataField model
-        return field.get_fields_depending_on_this()
+        fields = {
+            field.field_id: field
+            for field in FrameworkDataField.query.filter(FrameworkDataField.field_id.in_(dependant_ids))
+        }
+        return [fields[dep_id] for dep_id in dependant_ids if dep_id in fields]
 
     @staticmethod
     def get_dependencies(computed_field_id: str) -> List[str]:
@@ -364,12 +412,10 @@ class DependencyService:
         Returns:
             List of field_ids that this computed field depends on
         """
-        computed_field = FrameworkDataField.query.get(computed_field_id)
-        if not computed_field or not computed_field.is_computed:
+        graph = DependencyService._graphs_for_fields([computed_field_id]).get(computed_field_id)
+        if graph is None:
             return []
-
-        dependencies = computed_field.get_all_dependencies()
-        return [dep.field_id for dep in dependencies]
+        return list(graph.all_dependencies(computed_field_id))
 
     @staticmethod
     def calculate_computed_value(computed_field: FrameworkDataField,
@@ -391,19 +437,14 @@ class DependencyService:
         Raises:
             ValueError: If formula evaluation fails or dependencies missing
         """
-        if not computed_field.is_computed or not computed_field.formula:
+        if not computed_field.is_computed or not computed_field.formula_expression:
             raise ValueError(f"Field {computed_field.field_id} is not a computed field")
 
-        # Get variable mappings for this computed field
-        variable_mappings = FieldVariableMapping.query.filter_by(
-            field_id=computed_field.field_id
-        ).all()
-
         # Build evaluation context with variable names
         eval_context = {}
-        for mapping in variable_mappings:
+        for mapping in computed_field.variable_mappings:
             variable_name = mapping.variable_name
-            dependency_field_id = mapping.dependency_field_id
+            dependency_field_id = mapping.raw_field_id
 
             if dependency_field_id not in dependency_values:
                 raise ValueError(
@@ -411,30 +452,11 @@ class DependencyService:
                     f"(variable: {variable_name})"
                 )
 
-            eval_context[variable_name] = dependency_values[dependency_field_id]
-
-        # Evaluate formula
-        try:
-            # Use eval with restricted globals for safety
-            # Only allow basic math operations
-            safe_globals = {
-                '__builtins__': {},
-                'abs': abs,
-                'min': min,
-                'max': max,
-                'round': round,
-                'sum': sum
-            }
-
-            result = eval(computed_field.formula, safe_globals, eval_context)
-
-            # Ensure result is numeric
-            return float(result)
+            coefficient = mapping.coefficient if mapping.coefficient is not None else 1.0
+            eval_context[variable_name] = float(dependency_values[dependency_field_id]) * coefficient
 
-        except Exception as e:
-            raise ValueError(
-                f"Failed to evaluate formula '{computed_field.formula}': {str(e)}"
-            )
+        # Evaluate the cached compiled formula (raises FormulaError, a ValueError)
+        return formula_compiler.for_field(computed_field).evaluate(eval_context)
 
 
 # Export service instance
@@ -14,6 +14,7 @@ Key Features:
 from datetime import date, datetime
 from typing import List, Tuple, Optional
 from app.models import Company
+from app.utils.fiscal_calendar import fiscal_year_for_date
 
 class FiscalYearService:
     """Service for fiscal year operations."""
@@ -104,19 +105,7 @@ class FiscalYearService:
         Returns:
             int: The fiscal year that contains the given date
         """
-        # Start checking from a reasonable range around the date's calendar year
-        for fy_year in range(check_date.year - 1, check_date.year + 2):
-            if FiscalYearService.is_date_in_fy(company, check_date, fy_year):
-                return fy_year
-        
-        # If not found in nearby years, calculate more precisely
-        # This handles edge cases for unusual fiscal year configurations
-        if company.get_fy_start_month() > check_date.month:
-            # We're before the FY start month, so this is the next FY
-            return check_date.year + 1
-        else:
-            # We're after or in the FY start month, so this is the current FY
-            return check_date.year
+        return fiscal_year_for_date(company.fy_end_month, company.fy_end_day, check_date)
     
     @staticmethod
     def get_next_reporting_period_end(company: Company, frequency: str, after_date: Optional[date] = None) -> date:
@@ -136,21 +125,8 @@ class FiscalYearService:
         
         current_fy = FiscalYearService.get_fy_year_for_date(company, after_date)
         
-        # Get all reporting dates for current and next fiscal year
-        from app.models import DataPointAssignment
-        
-        # Create a temporary assignment to use the reporting date logic
-        temp_assignment = DataPointAssignment(
-            field_id='temp',
-            entity_id=1,
-            frequency=frequency,
-            assigned_by=1,
-            company_id=company.id
-        )
-        temp_assignment.company = company
-        
-        # Get reporting dates for current FY
-        current_fy_dates = temp_assignment.get_valid_reporting_dates(current_fy)
+        # Reporting dates for current FY come from the shared fiscal calendar
+        current_fy_dates = company.get_fiscal_calendar(current_fy, frequency).period_ends
         
         # Find next date after after_date
         future_dates = [d for d in current_fy_dates if d > after_date]
@@ -159,7 +135,7 @@ class FiscalYearService:
             return min(future_dates)
         
         # If no future dates in current FY, get first date of next FY
-        next_fy_dates = temp_assignment.get_valid_reporting_dates(current_fy + 1)
+        next_fy_dates = company.get_fiscal_calendar(current_fy + 1, frequency).period_ends
         return min(next_fy_dates) if next_fy_dates else None
     
     @staticmethod
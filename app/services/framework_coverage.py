@@ -0,0 +1,109 @@
+"""
+Framework coverage engine.
+
+Coverage of a framework, as seen by a company, is the share of the
+framework's fields (defined by the framework's owner: the company itself or
+the global framework provider) that the company has an active assignment
+for. The coverage of every framework a company can see is computed with one
+grouped query over frameworks, their fields and the company's assignments,
+and kept as a per-company summary shared by the KPI cards, chart data,
+framework list and single-framework coverage.
+
+A summary is cached until the company's assignment version (see
+ActiveAssignmentIndex) or dependency graph version (bumped by every field
+write of the company or of a global provider) moves, with
+FRAMEWORK_COVERAGE_CACHE_TTL as an upper bound.
+"""
+
+from collections import namedtuple
+from typing import Dict
+
+from sqlalchemy import and_, case, func
+
+from ..extensions import db
+from ..models.company import Company
+from ..models.data_assignment import DataPointAssignment
+from ..models.framework import Framework, FrameworkDataField
+from ..utils.cache import LRUTTLCache, MISSING
+
+
+FrameworkCoverage = namedtuple('FrameworkCoverage', ['total_fields', 'fields_with_data', 'last_assigned'])
+
+EMPTY_COVERAGE = FrameworkCoverage(0, 0, None)
+
+coverage_cache = LRUTTLCache(max_size=500, ttl=300)
+
+
+def init_coverage_cache(app):
+    """
+    Configure the coverage cache from the app config.
+
+    Args:
+        app: Flask application instance
+    """
+    coverage_cache.ttl = app.config.get('FRAMEWORK_COVERAGE_CACHE_TTL', 300)
+
+
+def get_coverage_summary(company_id: int) -> Dict[str, FrameworkCoverage]:
+    """
+    Coverage of every framework visible to a company, served from the cache.
+
+    Args:
+        company_id: Requesting company; its assignments determine coverage
+
+    Returns:
+        Dict mapping framework_id to FrameworkCoverage (frameworks created
+        since the summary was built have no fields yet and are absent; use
+        EMPTY_COVERAGE)
+    """
+    from .assignment_versioning import active_assignment_index
+    from .dependency_graph import dependency_graphs
+
+    cache_key = (company_id, active_assignment_index.version(company_id), dependency_graphs.version(company_id))
+    summary = coverage_cache.get(cache_key)
+    if summary is MISSING:
+        summary = build_coverage_summary(company_id)
+        coverage_cache.set(cache_key, summary)
+    return summary
+
+
+def build_coverage_summary(company_id: int) -> Dict[str, FrameworkCoverage]:
+    """Compute the coverage of the company's and global frameworks with one grouped query."""
+    owner_ids = [company_id]
+    global_provider_id = Company.get_global_provider_id()
+    if global_provider_id and global_provider_id != company_id:
+        owner_ids.append(global_provider_id)
+
+    rows = db.session.query(
+        Framework.framework_id,
+        func.count(func.distinct(FrameworkDataField.field_id)),
+        func.count(func.distinct(case(
+            (DataPointAssignment.series_status == 'active', FrameworkDataField.field_id)
+        ))),
+        func.max(DataPointAssignment.assigned_date)
+    ).outerjoin(
+        FrameworkDataField, and_(
+            FrameworkDataField.framework_id == Framework.framework_id,
+            FrameworkDataField.company_id == Framework.company_id
+        )
+    ).outerjoin(
+        # Assignments are always the requesting company's, also for global frameworks
+        DataPointAssignment, and_(
+            DataPointAssignment.field_id == FrameworkDataField.field_id,
+            DataPointAssignment.company_id == company_id
+        )
+    ).filter(
+        Framework.company_id.in_(owner_ids)
+    ).group_by(Framework.framework_id).all()
+
+    return {
+        framework_id: FrameworkCoverage(total_fields, fields_with_data, last_assigned)
+        for framework_id, total_fields, fields_with_data, last_assigned in rows
+    }
+
+
+def percent_covered(coverage: FrameworkCoverage) -> float:
+    """Covered share of a framework's fields, in percent (0 for a framework without fields)."""
+    if not coverage.total_fields:
+        return 0
+    return coverage.fields_with_data / coverage.total_fields * 100
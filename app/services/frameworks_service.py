@@ -3,6 +3,7 @@ from ..models import Framework, FrameworkDataField, DataPointAssignment, Topic,
 from sqlalchemy import func
 from datetime import datetime, timedelta
 import uuid
+from .framework_coverage import get_coverage_summary, percent_covered, EMPTY_COVERAGE
 
 def get_global_provider_company_id():
     """
@@ -230,32 +231,15 @@ def get_framework_kpis(company_id):
         series_status='active'
     ).count()
 
-    # Calculate overall coverage
+    # Calculate overall coverage (mean over the company's own frameworks)
     frameworks = Framework.query.filter_by(company_id=company_id).all()
-    total_coverage_sum = 0
-    framework_count_for_coverage = 0
-
-    for framework in frameworks:
-        total_fields = FrameworkDataField.query.filter_by(
-            framework_id=framework.framework_id,
-            company_id=company_id
-        ).count()
-        
-        fields_with_data = 0
-        if total_fields > 0:
-                fields_with_data = db.session.query(FrameworkDataField)\
-                .join(DataPointAssignment, FrameworkDataField.field_id == DataPointAssignment.field_id)\
-                .filter(\
-                    FrameworkDataField.framework_id == framework.framework_id,\
-                    FrameworkDataField.company_id == company_id,\
-                    DataPointAssignment.company_id == company_id,\
-                    DataPointAssignment.series_status == 'active'\
-                ).distinct().count()
-            
-        coverage_percentage = (fields_with_data / total_fields * 100) if total_fields > 0 else 0
-        total_coverage_sum += coverage_percentage
-        framework_count_for_coverage += 1
-    
+    coverage_summary = get_coverage_summary(company_id)
+    total_coverage_sum = sum(
+        percent_covered(coverage_summary.get(framework.framework_id, EMPTY_COVERAGE))
+        for framework in frameworks
+    )
+    framework_count_for_coverage = len(frameworks)
+
     overall_coverage = (total_coverage_sum / framework_count_for_coverage) if framework_count_for_coverage > 0 else 0
 
     # Get recent activity (latest framework creation or assignment)
@@ -285,45 +269,16 @@ def get_chart_data(company_id):
     frameworks_by_type = separate_frameworks_by_type(company_id)
     all_frameworks = frameworks_by_type['global'] + frameworks_by_type['company']
 
-    framework_coverages = []
-    for framework in all_frameworks:
-        # Use the framework's actual company_id for coverage calculation
-        framework_company_id = framework.company_id
-        
-        total_fields = FrameworkDataField.query.filter_by(
-            framework_id=framework.framework_id,
-            company_id=framework_company_id
-        ).count()
-        
-        fields_with_data = 0
-        if total_fields > 0:
-            # For global frameworks, check if current company has assignments
-            if framework.company_id != company_id:
-                # This is a global framework, check current company's assignments
-                fields_with_data = db.session.query(FrameworkDataField)\
-                    .join(DataPointAssignment, FrameworkDataField.field_id == DataPointAssignment.field_id)\
-                    .filter(\
-                        FrameworkDataField.framework_id == framework.framework_id,\
-                        FrameworkDataField.company_id == framework_company_id,\
-                        DataPointAssignment.company_id == company_id,\
-                        DataPointAssignment.series_status == 'active'\
-                    ).distinct().count()
-            else:
-                # This is a company framework, use normal calculation
-                fields_with_data = db.session.query(FrameworkDataField)\
-                .join(DataPointAssignment, FrameworkDataField.field_id == DataPointAssignment.field_id)\
-                .filter(\
-                    FrameworkDataField.framework_id == framework.framework_id,\
-                        FrameworkDataField.company_id == framework_company_id,\
-                    DataPointAssignment.company_id == company_id,\
-                    DataPointAssignment.series_status == 'active'\
-                ).distinct().count()
-        
-        coverage_percentage = (fields_with_data / total_fields * 100) if total_fields > 0 else 0
-        framework_coverages.append({
+    # Coverage of all frameworks from one grouped query (global frameworks
+    # are covered by the current company's assignments)
+    coverage_summary = get_coverage_summary(company_id)
+    framework_coverages = [
+        {
             'name': framework.framework_name,
-            'coverage': round(coverage_percentage, 1)
-        })
+            'coverage': round(percent_covered(coverage_summary.get(framework.framework_id, EMPTY_COVERAGE)), 1)
+        }
+        for framework in all_frameworks
+    ]
     
     top_5_frameworks = sorted(framework_coverages, key=lambda x: x['coverage'], reverse=True)[:5]
 
@@ -368,13 +323,13 @@ def list_frameworks(company_id, search=None, sort=None, include_global=True):
                 filtered_frameworks.append(framework)
         all_frameworks = filtered_frameworks
     
+    global_provider_id = get_global_provider_company_id()
+    coverage_summary = get_coverage_summary(company_id)
+
     framework_data = []
     for framework in all_frameworks:
-        # Get framework type information
-        type_info = get_framework_type_info(framework.framework_id, company_id)
-        
-        # Calculate coverage (using appropriate company_id for data lookup)
-        coverage_data = get_framework_coverage(framework.framework_id, company_id)
+        # Coverage uses the framework owner's fields and the requesting company's assignments
+        coverage_data = _coverage_data(coverage_summary.get(framework.framework_id, EMPTY_COVERAGE))
         
         framework_data.append({
             'framework_id': framework.framework_id,
@@ -383,9 +338,10 @@ def list_frameworks(company_id, search=None, sort=None, include_global=True):
             'coverage_percentage': coverage_data['coverage_percentage'],
             'total_fields': coverage_data['total_fields'],
             'last_updated': coverage_data['last_updated'],
-            'is_global': type_info['is_global'],
-            'is_editable': type_info['is_editable'],
-            'owner_company_id': type_info['owner_company_id']
+            # Same type information as get_framework_type_info, without a query per framework
+            'is_global': framework.company_id == global_provider_id,
+            'is_editable': framework.company_id == company_id,
+            'owner_company_id': framework.company_id
         })
 
     # Apply sorting
@@ -424,46 +380,16 @@ def get_framework_coverage(framework_id, company_id):
     if framework.company_id not in (company_id, global_provider_id):
         return None  # Return None to indicate access denied
     
-    # Use the framework's actual company_id for field lookups
-    framework_company_id = framework.company_id
-    
-    total_fields = FrameworkDataField.query.filter_by(
-        framework_id=framework_id,
-        company_id=framework_company_id
-    ).count()
-    
-    fields_with_data = 0
-    if total_fields > 0:
-        # For coverage calculation, always check assignments against the requesting company
-        fields_with_data = db.session.query(FrameworkDataField)\
-            .join(DataPointAssignment, FrameworkDataField.field_id == DataPointAssignment.field_id)\
-            .filter(
-                FrameworkDataField.framework_id == framework_id,
-                FrameworkDataField.company_id == framework_company_id,
-                DataPointAssignment.company_id == company_id,  # Always use requesting company for assignments
-                DataPointAssignment.series_status == 'active'
-            ).distinct().count()
-    
-    coverage_percentage = (fields_with_data / total_fields * 100) if total_fields > 0 else 0
-    
-    # Get last assignment for this framework by the requesting company
-    last_assignment = DataPointAssignment.query\
-        .join(FrameworkDataField)\
-        .filter(\
-            FrameworkDataField.framework_id == framework_id,\
-            FrameworkDataField.company_id == framework_company_id,\
-            DataPointAssignment.company_id == company_id\
-        )\
-        .order_by(DataPointAssignment.assigned_date.desc())\
-        .first()
-    
-    last_updated = last_assignment.assigned_date.isoformat() if last_assignment else None
-    
+    # Fields come from the framework's owner, assignments from the requesting company
+    return _coverage_data(get_coverage_summary(company_id).get(framework_id, EMPTY_COVERAGE))
+
+def _coverage_data(coverage):
+    """Coverage statistics of a framework in the shape returned by get_framework_coverage."""
     return {
-        'coverage_percentage': round(coverage_percentage, 1),
-        'fields_with_data': fields_with_data,
-        'total_fields': total_fields,
-        'last_updated': last_updated
+        'coverage_percentage': round(percent_covered(coverage), 1),
+        'fields_with_data': coverage.fields_with_data,
+        'total_fields': coverage.total_fields,
+        'last_updated': coverage.last_assigned.isoformat() if coverage.last_assigned else None
     }
 
 def get_recent_activity(company_id):
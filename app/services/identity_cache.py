@@ -0,0 +1,274 @@
+# services/identity_cache.py
+"""
+Process-local snapshot cache for the tenant and user resolved on every request.
+
+load_tenant() resolves the subdomain slug to a Company and the Flask-Login
+user_loader resolves the session user id to a User before any view runs.
+Both rows change rarely, so their column snapshots are cached for a short
+TTL (IDENTITY_CACHE_TTL) and rebuilt into session-bound instances with
+restore_instance(), which means g.tenant and current_user are still regular
+Company/User objects that lazy-load relationships and can be modified.
+
+Entries are tagged:
+- ('company', id) and ('slug', slug) for tenants
+- ('user', id) and ('company', company_id) for users
+
+Every flush that writes a Company or User invalidates its tags locally, and
+again once the transaction ends. After a commit the tags are also published
+on a Redis channel so that the other workers drop their copies. The TTL
+bounds staleness when Redis is not configured.
+
+The message origin and the subscriber thread are per process and created
+lazily on first use, so workers forked from a preloaded app (gunicorn
+--preload) get their own origin and their own listener.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Iterable, Optional, Tuple
+
+import redis
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from ..extensions import db
+from ..utils.cache import LRUTTLCache, MISSING, snapshot_instance, restore_instance
+from .redis import get_redis_client
+
+
+INVALIDATION_CHANNEL = 'identity_cache:invalidate'
+
+tenant_cache = LRUTTLCache(max_size=1000, ttl=30)
+user_cache = LRUTTLCache(max_size=5000, ttl=30)
+
+# Identifies this process so it can ignore its own invalidation messages;
+# regenerated in a forked child, which must not share its parent's origin
+_origin = None
+_origin_pid = None
+
+# App the subscriber runs for (None when pub/sub is off) and the process it runs in
+_listener_app = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def init_identity_cache(app):
+    """
+    Configure the caches from the app config and enable the Redis listener.
+
+    The listener itself starts on first use of the caches in each process.
+
+    Args:
+        app: Flask application instance
+    """
+    global _listener_app, _listener_pid
+
+    ttl = app.config.get('IDENTITY_CACHE_TTL', 30)
+    tenant_cache.ttl = ttl
+    user_cache.ttl = ttl
+    user_cache.max_size = app.config.get('IDENTITY_CACHE_MAX_USERS', 5000)
+    clear_identity_cache()
+
+    with _listener_lock:
+        if app.config.get('IDENTITY_CACHE_PUBSUB', True) and get_redis_client() is not None:
+            _listener_app = app
+        else:
+            _listener_app = None
+            _listener_pid = None
+
+
+def _enabled() -> bool:
+    return current_app.config.get('IDENTITY_CACHE_ENABLED', True)
+
+
+def get_company_by_slug(slug: str):
+    """
+    Company for a tenant slug, served from the snapshot cache when possible.
+
+    Returns:
+        Company bound to the current session, or None if the slug is unknown
+    """
+    from ..models.company import Company
+
+    if not _enabled():
+        return Company.query.filter_by(slug=slug).first()
+
+    _ensure_invalidation_listener()
+    snapshot = tenant_cache.get(('slug', slug))
+    if snapshot is not MISSING:
+        return restore_instance(Company, snapshot, db.session)
+
+    company = Company.query.filter_by(slug=slug).first()
+    if company is not None:
+        tenant_cache.set(('slug', slug), snapshot_instance(company),
+                         tags=(('company', company.id), ('slug', slug)))
+    return company
+
+
+def get_user_by_id(user_id: int):
+    """
+    User for an id, served from the snapshot cache when possible.
+
+    Returns:
+        User bound to the current session, or None if the id is unknown
+    """
+    from ..models.user import User
+
+    if not _enabled():
+        return db.session.get(User, user_id)
+
+    _ensure_invalidation_listener()
+    snapshot = user_cache.get(('user', user_id))
+    if snapshot is not MISSING:
+        return restore_instance(User, snapshot, db.session)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        user_cache.set(('user', user_id), snapshot_instance(user),
+                       tags=(('user', user_id), ('company', user.company_id)))
+    return user
+
+
+def invalidate_identity_tags(tags: Iterable[Tuple[str, object]], publish: bool = False):
+    """
+    Drop cached tenants/users carrying any of the tags.
+
+    Args:
+        tags: Tags such as ('company', 3), ('slug', 'acme') or ('user', 7)
+        publish: Also notify the other workers through Redis
+    """
+    tags = [tuple(tag) for tag in tags]
+    for tag in tags:
+        tenant_cache.invalidate_tag(tag)
+        user_cache.invalidate_tag(tag)
+
+    if publish and tags:
+        _publish(tags)
+
+
+def invalidate_company(company_id: int, slug: Optional[str] = None, publish: bool = True):
+    """Drop the cached tenant (and its users) after a company changed."""
+    tags = [('company', company_id)]
+    if slug:
+        tags.append(('slug', slug))
+    invalidate_identity_tags(tags, publish=publish)
+
+
+def invalidate_user(user_id: int, publish: bool = True):
+    """Drop the cached user after a role/status/profile change."""
+    invalidate_identity_tags([('user', user_id)], publish=publish)
+
+
+def record_identity_write(target, tags: Iterable[Tuple[str, object]]):
+    """
+    Invalidation hook for Company/User mapper events.
+
+    Invalidates the tags now and remembers them on the session so they are
+    invalidated (and published) again when the transaction ends.
+    """
+    tags = list(tags)
+    invalidate_identity_tags(tags)
+
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('identity_cache_tags', set()).update(tags)
+
+
+@event.listens_for(Session, 'after_commit')
+def publish_committed_identity_writes(session):
+    """Re-invalidate and fan out tags of tenants/users written in the committed transaction."""
+    tags = session.info.pop('identity_cache_tags', None)
+    if tags:
+        invalidate_identity_tags(tags, publish=True)
+
+
+@event.listens_for(Session, 'after_rollback')
+def invalidate_rolled_back_identity_writes(session):
+    """Drop anything cached from uncommitted tenant/user rows of a rolled back transaction."""
+    tags = session.info.pop('identity_cache_tags', None)
+    if tags:
+        invalidate_identity_tags(tags)
+
+
+def clear_identity_cache():
+    tenant_cache.clear()
+    user_cache.clear()
+
+
+def identity_cache_stats():
+    return {'tenants': tenant_cache.stats(), 'users': user_cache.stats()}
+
+
+def _publish(tags):
+    client = get_redis_client()
+    if not client:
+        return
+    try:
+        client.publish(INVALIDATION_CHANNEL, json.dumps({'origin': process_origin(), 'tags': tags}))
+    except (redis.RedisError, TypeError, ValueError) as e:
+        current_app.logger.warning(f"Identity cache invalidation publish failed: {str(e)}")
+
+
+def handle_invalidation_message(message) -> bool:
+    """
+    Apply an invalidation published by another worker.
+
+    Returns:
+        True if the message was applied, False if it was ignored
+    """
+    try:
+        payload = json.loads(message['data'])
+    except (TypeError, ValueError, KeyError):
+        return False
+    if payload.get('origin') == process_origin():
+        return False
+    invalidate_identity_tags(payload.get('tags', ()))
+    return True
+
+
+def process_origin() -> str:
+    """Origin of this process's invalidation messages, generated once per process."""
+    global _origin, _origin_pid
+
+    pid = os.getpid()
+    if _origin_pid != pid:
+        _origin, _origin_pid = uuid.uuid4().hex, pid
+    return _origin
+
+
+def _ensure_invalidation_listener():
+    """Start the subscriber thread once per process (threads do not survive fork())."""
+    global _listener_pid
+
+    pid = os.getpid()
+    if _listener_app is None or _listener_pid == pid:
+        return
+    with _listener_lock:
+        if _listener_app is None or _listener_pid == pid:
+            return
+        _listener_pid = pid
+        threading.Thread(
+            target=_listen_for_invalidations, args=(_listener_app,),
+            name='identity-cache-invalidation', daemon=True
+        ).start()
+
+
+def _listen_for_invalidations(app):
+    """Subscriber loop; reconnects after errors and clears the caches since messages may be lost."""
+    while True:
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            for message in pubsub.listen():
+                handle_invalidation_message(message)
+        except redis.RedisError as e:
+            app.logger.warning(f"Identity cache invalidation listener error: {str(e)}")
+            clear_identity_cache()
+            time.sleep(5)
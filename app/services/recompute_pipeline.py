@@ -0,0 +1,315 @@
+# services/recompute_pipeline.py
+"""
+Write-triggered recomputation of computed fields.
+
+Raw ESGData writes (single submit, draft promotion, bulk upload) are recorded
+as source keys (company, field, entity, reporting_date). When the transaction
+commits they move to a per-session queue; process_pending() then:
+
+1. expands the source keys through the reverse dependency index of the
+   company's dependency graph into (computed_field, entity, period_end) keys,
+   deduplicated, so a burst of writes to the same period is computed once
+2. groups the keys by dependency level, so a computed field is recomputed
+   only after the computed fields it depends on have been persisted
+3. evaluates each level in batches with AggregationService.compute_multiple_fields
+4. materializes the results into ESGData.calculated_value with bulk
+   INSERT/UPDATE statements and a single commit
+
+Read paths can therefore fetch calculated_value as a plain row instead of
+recomputing. Writes made by a rolled back transaction are discarded.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, UTC
+from typing import Dict, Iterable, Optional, Set, Tuple
+from uuid import uuid4
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from .dependency_graph import DependencyGraph, get_dependency_graph
+
+
+PENDING_KEY = 'recompute_pending'  # Source keys written by the open transaction
+QUEUE_KEY = 'recompute_queue'      # Committed source keys waiting for process_pending()
+
+DEFAULT_BATCH_SIZE = 500
+
+# (field_id, entity_id, reporting_date)
+SourceKey = Tuple[str, int, date]
+
+
+def _enabled() -> bool:
+    return has_app_context() and current_app.config.get('COMPUTED_FIELD_RECOMPUTE_ON_WRITE', True)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+def record_raw_writes(session: Session, company_id: Optional[int], keys: Iterable[SourceKey]):
+    """
+    Remember raw writes of the open transaction as recompute sources.
+
+    Called by the ESGData mapper listeners and explicitly by bulk write paths
+    that bypass the ORM. The keys are queued once the transaction commits.
+
+    Args:
+        session: Session the writes were made in
+        company_id: Company owning the rows
+        keys: (field_id, entity_id, reporting_date) of the written rows
+    """
+    if company_id is None or session is None:
+        return
+    pending = session.info.setdefault(PENDING_KEY, defaultdict(set))
+    pending[company_id].update(
+        (field_id, entity_id, _as_date(reporting_date)) for field_id, entity_id, reporting_date in keys
+    )
+
+
+@event.listens_for(Session, 'after_commit')
+def queue_committed_raw_writes(session):
+    """Move the sources of the committed transaction to the recompute queue."""
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    for company_id, keys in pending.items():
+        _invalidate_read_caches(company_id, keys)
+    if _enabled():
+        queue = session.info.setdefault(QUEUE_KEY, defaultdict(set))
+        for company_id, keys in pending.items():
+            queue[company_id].update(keys)
+
+
+def _invalidate_read_caches(company_id: int, keys: Iterable[SourceKey]):
+    """Drop cached computation contexts and status matrices built from the written rows."""
+    from .user_v2.computation_context_service import ComputationContextService
+    from .user_v2.data_status_service import DataStatusService
+    ComputationContextService.invalidate_snapshots(company_id, {entity_id for _, entity_id, _ in keys})
+    DataStatusService.invalidate_status_matrix(company_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_rolled_back_raw_writes(session):
+    """Sources of a rolled back transaction were never written."""
+    session.info.pop(PENDING_KEY, None)
+
+
+def has_pending(session: Optional[Session] = None) -> bool:
+    session = session or db.session()
+    return bool(session.info.get(QUEUE_KEY))
+
+
+def dependency_levels(graph: DependencyGraph) -> Dict[str, int]:
+    """
+    Level of every acyclic field: 0 for raw fields, otherwise one more than
+    its deepest dependency. Fields of the same level never depend on each
+    other, so a level can be computed in one batch.
+    """
+    levels = {}
+    for field_id in graph.topological_order:
+        levels[field_id] = 1 + max(
+            (levels.get(dependency_id, 0) for dependency_id in graph.dependencies(field_id)),
+            default=-1
+        )
+    return levels
+
+
+def expand_affected_keys(company_id: int, source_keys: Iterable[SourceKey]) -> Set[SourceKey]:
+    """
+    Map raw writes to the (computed_field, entity, period_end) keys they affect.
+
+    Every transitive dependant of a written field that is assigned to the
+    entity is affected for the reporting period (of its own frequency) that
+    contains the written date. Assignments are resolved with one query.
+
+    Returns:
+        Set of (computed_field_id, entity_id, reporting_date) keys
+    """
+    from .assignment_versioning import resolve_assignments_bulk
+
+    graph = get_dependency_graph(company_id)
+    by_source = {}
+    for field_id, entity_id, reporting_date in set(source_keys):
+        dependants = graph.all_dependants(field_id)
+        if dependants:
+            by_source[(field_id, entity_id, reporting_date)] = dependants
+    if not by_source:
+        return set()
+
+    assignments = resolve_assignments_bulk(
+        list({field_id for dependants in by_source.values() for field_id in dependants}),
+        list({entity_id for _, entity_id, _ in by_source})
+    )
+
+    affected = set()
+    for (_, entity_id, reporting_date), dependants in by_source.items():
+        for computed_field_id in dependants:
+            assignment = assignments.get((computed_field_id, entity_id))
+            if not assignment:
+                continue
+            calendar = assignment.get_reporting_calendar(target_date=reporting_date)
+            period_end = calendar.period_end_for(reporting_date) if calendar else None
+            if period_end:
+                affected.add((computed_field_id, entity_id, period_end))
+    return affected
+
+
+def recompute(company_id: int, keys: Iterable[SourceKey], batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Recompute computed field keys level by level and persist the results.
+
+    Args:
+        company_id: Company owning the keys
+        keys: (computed_field_id, entity_id, reporting_date) keys to recompute
+        batch_size: Keys per compute/persist batch (default COMPUTED_FIELD_RECOMPUTE_BATCH_SIZE)
+
+    Returns:
+        Dict with the number of keys, batches, computed values and skipped (cyclic) keys
+    """
+    from .aggregation import aggregation_service
+
+    batch_size = batch_size or current_app.config.get('COMPUTED_FIELD_RECOMPUTE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    levels = dependency_levels(get_dependency_graph(company_id))
+    stats = {'keys': 0, 'batches': 0, 'computed': 0, 'skipped': 0}
+
+    by_level = defaultdict(list)
+    for key in keys:
+        level = levels.get(key[0])
+        if level is None:
+            # Part of a dependency cycle; there is no valid evaluation order
+            stats['skipped'] += 1
+            continue
+        by_level[level].append(key)
+
+    for level in sorted(by_level):
+        level_keys = sorted(by_level[level], key=lambda key: (key[0], key[1], key[2]))
+        for offset in range(0, len(level_keys), batch_size):
+            batch = level_keys[offset:offset + batch_size]
+            results = aggregation_service.compute_multiple_fields(batch)
+            _persist_results(company_id, results)
+            stats['keys'] += len(batch)
+            stats['batches'] += 1
+            stats['computed'] += sum(1 for value in results.values() if value is not None)
+
+    return stats
+
+
+def _persist_results(company_id: int, results: Dict[SourceKey, Optional[float]]):
+    """
+    Materialize computed values into ESGData.calculated_value.
+
+    Existing rows are located with one column query and updated in bulk;
+    keys without a row get a new one when a value was computed. A key that
+    can no longer be computed clears its stale value.
+    """
+    from ..models.esg_data import ESGData
+
+    if not results:
+        return
+
+    existing = {
+        (field_id, entity_id, reporting_date): data_id
+        for data_id, field_id, entity_id, reporting_date in db.session.query(
+            ESGData.data_id, ESGData.field_id, ESGData.entity_id, ESGData.reporting_date
+        ).filter(
+            ESGData.company_id == company_id,
+            ESGData.field_id.in_({key[0] for key in results}),
+            ESGData.entity_id.in_({key[1] for key in results}),
+            ESGData.reporting_date.in_({key[2] for key in results}),
+            ESGData.dimension_key == '',
+            ESGData.is_draft.is_(False)
+        )
+    }
+
+    now = datetime.now(UTC)
+    updates = []
+    new_rows = []
+    for key, value in results.items():
+        data_id = existing.get(key)
+        if data_id:
+            updates.append({'data_id': data_id, 'calculated_value': value, 'updated_at': now})
+        elif value is not None:
+            field_id, entity_id, reporting_date = key
+            new_rows.append({
+                'data_id': str(uuid4()),
+                'field_id': field_id,
+                'entity_id': entity_id,
+                'reporting_date': reporting_date,
+                'company_id': company_id,
+                'raw_value': None,
+                'calculated_value': value,
+                'dimension_values': {},
+                'dimension_key': '',
+                'created_at': now,
+                'updated_at': now
+            })
+
+    if updates:
+        db.session.execute(update(ESGData), updates)
+    if new_rows:
+        db.session.execute(ESGData.__table__.insert(), new_rows)
+
+
+def process_pending(session: Optional[Session] = None, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Recompute everything affected by the committed raw writes of a session.
+
+    All sources queued since the last call are coalesced, so any number of
+    writes (e.g. a 1,000 row bulk upload) results in one batched recompute
+    per company. Errors are logged and rolled back; raw data is already
+    committed at this point.
+
+    Returns:
+        Dict with the number of source keys, affected keys, batches and computed values
+    """
+    session = session or db.session()
+    queue = session.info.pop(QUEUE_KEY, None)
+    totals = {'sources': 0, 'keys': 0, 'batches': 0, 'computed': 0, 'skipped': 0}
+    if not queue:
+        return totals
+
+    for company_id, source_keys in queue.items():
+        try:
+            affected = expand_affected_keys(company_id, source_keys)
+            stats = recompute(company_id, affected, batch_size)
+            session.commit()
+            _invalidate_read_caches(company_id, affected)
+        except Exception as e:
+            session.rollback()
+            current_app.logger.error(f'Error recomputing computed fields for company {company_id}: {str(e)}')
+            continue
+
+        totals['sources'] += len(source_keys)
+        for name, count in stats.items():
+            totals[name] += count
+
+    if totals['keys']:
+        current_app.logger.info(
+            f"Recomputed {totals['computed']}/{totals['keys']} computed values "
+            f"from {totals['sources']} raw writes in {totals['batches']} batches"
+        )
+    return totals
+
+
+def process_pending_after_request(response):
+    """after_request hook: recompute for write paths that did not process their queue."""
+    if has_pending():
+        process_pending()
+    return response
+
+
+def init_recompute_pipeline(app):
+    """
+    Register the end-of-request recompute hook.
+
+    Args:
+        app: Flask application instance
+    """
+    app.after_request(process_pending_after_request)
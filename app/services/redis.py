@@ -1,10 +1,14 @@
 # services/redis.py
+import json
 import redis
+import threading
 import time
 from flask import current_app
 
 # Global redis client instance
 redis_client = None
+# Client for binary payloads (responses are not decoded to str)
+redis_binary_client = None
 
 def init_redis(app):
     """
@@ -13,7 +17,7 @@ def init_redis(app):
     Args:
         app: Flask application instance
     """
-    global redis_client
+    global redis_client, redis_binary_client
     
     redis_url = app.config.get('REDIS_URL', 'redis://localhost:6379/0')
     
@@ -26,13 +30,19 @@ def init_redis(app):
                 socket_timeout=5
             )
             redis_client.ping()
+            redis_binary_client = redis.Redis.from_url(
+                redis_url,
+                socket_timeout=5
+            )
             app.logger.info("Redis connection established")
         except redis.ConnectionError as e:
             app.logger.warning(f"Redis connection failed: {str(e)} - Continuing without Redis")
             redis_client = None
+            redis_binary_client = None
     else:
         # Redis disabled - running without rate limiting
         redis_client = None
+        redis_binary_client = None
         app.logger.info("Redis disabled - Running without rate limiting")
 
 def check_rate_limit(email, limit_key='verification_attempt', timeout=900):  # 15 minutes
@@ -82,3 +92,175 @@ def get_redis_client():
         redis.Redis: Redis client instance or None if not initialized
     """
     return redis_client
+
+
+def get_redis_binary_client():
+    """
+    Get the Redis client instance for binary payloads
+
+    Returns:
+        redis.Redis: Redis client returning bytes, or None if not initialized
+    """
+    return redis_binary_client
+
+
+class RedisCacheTier:
+    """
+    Shared second tier for LRUTTLCache backed by Redis.
+
+    Values are stored as JSON, together with their tags, under
+    "<namespace>:<key>" with the cache TTL, and every tag keeps a Redis set of
+    its member keys so that a tag invalidation from one gunicorn worker is
+    visible to all of them. Invalidations also bump a shared generation
+    counter, which tells the other workers to drop the copies they hold in
+    their local tier. When Redis is disabled or unreachable every operation
+    degrades to a no-op / miss.
+    """
+
+    GENERATION_KEY = 'all'
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self._generations = SharedVersionCounter(f'{namespace}:generation')
+
+    def _key(self, key):
+        if isinstance(key, (tuple, list)):
+            key = ':'.join('' if part is None else str(part) for part in key)
+        return f'{self.namespace}:{key}'
+
+    def _tag_key(self, tag):
+        return self._key(('tag',) + (tag if isinstance(tag, tuple) else (tag,)))
+
+    def get(self, key):
+        from ..utils.cache import MISSING
+
+        client = get_redis_client()
+        if not client:
+            return MISSING
+        try:
+            raw = client.get(self._key(key))
+        except redis.RedisError as e:
+            current_app.logger.warning(f"Redis cache read failed: {str(e)}")
+            return MISSING
+        if raw is None:
+            return MISSING
+        try:
+            payload = json.loads(raw)
+            return payload['value'], tuple(_restore_tag(tag) for tag in payload['tags'])
+        except (ValueError, TypeError, KeyError):
+            # Written in another format (e.g. by an older release): treat as a miss
+            return MISSING
+
+    def set(self, key, value, ttl=None, tags=()):
+        client = get_redis_client()
+        if not client:
+            return
+        redis_key = self._key(key)
+        try:
+            pipe = client.pipeline()
+            payload = json.dumps({'value': value, 'tags': list(tags)})
+            if ttl:
+                pipe.setex(redis_key, int(ttl), payload)
+            else:
+                pipe.set(redis_key, payload)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, redis_key)
+                if ttl:
+                    pipe.expire(tag_key, int(ttl))
+            pipe.execute()
+        except (redis.RedisError, TypeError, ValueError) as e:
+            current_app.logger.warning(f"Redis cache write failed: {str(e)}")
+
+    def invalidate_tag(self, tag):
+        client = get_redis_client()
+        if not client:
+            return
+        tag_key = self._tag_key(tag)
+        try:
+            members = client.smembers(tag_key)
+            client.delete(tag_key, *members)
+        except redis.RedisError as e:
+            current_app.logger.warning(f"Redis cache invalidation failed: {str(e)}")
+        self._generations.bump(self.GENERATION_KEY)
+
+    def clear(self):
+        client = get_redis_client()
+        if not client:
+            return
+        try:
+            keys = list(client.scan_iter(match=f'{self.namespace}:*'))
+            if keys:
+                client.delete(*keys)
+        except redis.RedisError as e:
+            current_app.logger.warning(f"Redis cache clear failed: {str(e)}")
+        self._generations.bump(self.GENERATION_KEY)
+
+    def generation(self):
+        """Shared invalidation generation; local copies stored at another one are stale."""
+        return self._generations.version(self.GENERATION_KEY)[1]
+
+
+def _restore_tag(tag):
+    """Turn a tag read back from JSON into the hashable tuple it was written as."""
+    return tuple(_restore_tag(part) for part in tag) if isinstance(tag, list) else tag
+
+
+class SharedVersionCounter:
+    """
+    Per-key version counters for invalidating per-process caches.
+
+    version(key) is a (local, shared) pair: the local part is bumped in this
+    process immediately, the shared part is an INCR counter in Redis stored
+    under "<namespace>:<key>" and is re-read at most every check_interval
+    seconds. A cache built at one version is stale as soon as either part
+    moves, so a bump in one worker reaches all of them. Without Redis the
+    shared part stays 0.
+    """
+
+    def __init__(self, namespace, check_interval=1.0):
+        self.namespace = namespace
+        self.check_interval = check_interval
+        self._local = {}
+        self._shared = {}
+        self._lock = threading.Lock()
+
+    def _key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def _shared_version(self, key):
+        cached = self._shared.get(key)
+        now = time.monotonic()
+        if cached and now - cached[1] < self.check_interval:
+            return cached[0]
+
+        version = 0
+        client = get_redis_client()
+        if client:
+            try:
+                version = int(client.get(self._key(key)) or 0)
+            except (redis.RedisError, ValueError):
+                version = cached[0] if cached else 0
+        self._shared[key] = (version, now)
+        return version
+
+    def version(self, key):
+        """Current (local, shared) version of key."""
+        return (self._local.get(key, 0), self._shared_version(key))
+
+    def bump(self, key):
+        """Move the version of key so caches built for it are rebuilt."""
+        with self._lock:
+            self._local[key] = self._local.get(key, 0) + 1
+
+        client = get_redis_client()
+        if client:
+            try:
+                version = client.incr(self._key(key))
+                self._shared[key] = (int(version), time.monotonic())
+            except redis.RedisError:
+                pass
+
+    def clear(self):
+        """Forget cached shared versions so the next check reads Redis."""
+        self._shared.clear()
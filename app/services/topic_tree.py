@@ -0,0 +1,165 @@
+"""
+Topic tree of the assign data points page.
+
+A tenant's tree (its own frameworks plus those of the global framework
+provider, optionally narrowed to one framework) is built from a fixed number
+of queries: the frameworks, their topics and one GROUP BY count of fields per
+topic. Parent -> children maps are built in a single pass over the topics;
+levels and full paths are filled in top-down and subtree field totals
+bottom-up, instead of scanning the topic list per parent and walking
+topic.parent / topic.children relationships per node.
+
+Built trees are cached per (company, framework filter). The cache key holds
+the company's dependency graph version, which moves on every field write of
+the company or of a global provider, and the topic tree version, which moves
+on every Topic or Framework write (see the listeners in models/framework.py).
+"""
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+
+from ..extensions import db
+from ..models.company import Company
+from ..models.framework import Framework, FrameworkDataField, Topic
+from ..utils.cache import LRUTTLCache, MISSING
+from .redis import SharedVersionCounter
+
+
+topic_tree_cache = LRUTTLCache(max_size=500, ttl=300)
+topic_tree_versions = SharedVersionCounter('topic_tree_version')
+
+# Topic and framework writes are rare admin operations, so they move one
+# version shared by every tenant
+TOPIC_TREE_VERSION_KEY = 'all'
+
+
+def init_topic_tree_cache(app):
+    """
+    Configure the topic tree cache from the app config.
+
+    Args:
+        app: Flask application instance
+    """
+    topic_tree_cache.ttl = app.config.get('TOPIC_TREE_CACHE_TTL', 300)
+
+
+def get_topic_tree(company_id: int, framework_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Hierarchical topic tree of a company, served from the cache.
+
+    Args:
+        company_id: Tenant whose frameworks (and global frameworks) are shown
+        framework_id: Only this framework (must be the tenant's or global)
+
+    Returns:
+        List of root topic dicts, each with nested 'children'
+    """
+    from .dependency_graph import dependency_graphs
+
+    cache_key = (
+        company_id, framework_id,
+        dependency_graphs.version(company_id), topic_tree_versions.version(TOPIC_TREE_VERSION_KEY)
+    )
+    tree = topic_tree_cache.get(cache_key)
+    if tree is MISSING:
+        tree = build_topic_tree(company_id, framework_id)
+        topic_tree_cache.set(cache_key, tree)
+    return tree
+
+
+def build_topic_tree(company_id: int, framework_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Build a company's topic tree with four queries, whatever the number of topics."""
+    global_provider_id = Company.get_global_provider_id()
+    owner_ids = [company_id]
+    if global_provider_id and global_provider_id != company_id:
+        owner_ids.append(global_provider_id)
+
+    framework_query = db.session.query(Framework.framework_id, Framework.framework_name).filter(
+        Framework.company_id.in_(owner_ids)
+    )
+    if framework_id:
+        framework_query = framework_query.filter(Framework.framework_id == framework_id)
+    framework_names = dict(framework_query.all())
+    if not framework_names:
+        return []
+
+    topics = db.session.query(
+        Topic.topic_id, Topic.name, Topic.description, Topic.parent_id, Topic.framework_id
+    ).filter(Topic.framework_id.in_(list(framework_names))).all()
+
+    framework_topics = select(Topic.topic_id).where(Topic.framework_id.in_(list(framework_names)))
+    field_counts = dict(db.session.query(
+        FrameworkDataField.topic_id, func.count(FrameworkDataField.field_id)
+    ).filter(
+        FrameworkDataField.topic_id.in_(framework_topics),
+        FrameworkDataField.company_id.in_(owner_ids)
+    ).group_by(FrameworkDataField.topic_id).all())
+
+    nodes = {}
+    children = defaultdict(list)
+    for topic_id, name, description, parent_id, topic_framework_id in topics:
+        nodes[topic_id] = {
+            'topic_id': topic_id,
+            'name': name,
+            'description': description,
+            'level': 0,
+            'full_path': name,
+            'framework_id': topic_framework_id,
+            'framework_name': framework_names.get(topic_framework_id, 'Unknown'),
+            'field_count': field_counts.get(topic_id, 0),
+            'total_field_count': 0,  # Including children
+            'has_children': False,
+            'children': []
+        }
+        children[parent_id].append(topic_id)
+
+    # Levels and paths top-down from the roots; topics whose parent is not
+    # in the tree are unreachable, as before
+    order = []
+    stack = list(children[None])
+    while stack:
+        topic_id = stack.pop()
+        order.append(topic_id)
+        node = nodes[topic_id]
+        for child_id in children[topic_id]:
+            child = nodes[child_id]
+            child['level'] = node['level'] + 1
+            child['full_path'] = f"{node['full_path']} > {child['name']}"
+            stack.append(child_id)
+
+    # Totals bottom-up: every topic comes after its parent in order
+    for topic_id in reversed(order):
+        node = nodes[topic_id]
+        node['children'] = _sorted_nodes(nodes[child_id] for child_id in children[topic_id])
+        node['has_children'] = bool(node['children'])
+        node['total_field_count'] = node['field_count'] + sum(
+            child['total_field_count'] for child in node['children']
+        )
+
+    return _sorted_nodes(nodes[topic_id] for topic_id in children[None])
+
+
+def _sorted_nodes(nodes) -> List[Dict[str, Any]]:
+    # Sort children by framework name, then by name for consistent display
+    return sorted(nodes, key=lambda node: (node['framework_name'], node['name']))
+
+
+def record_topic_tree_write(session):
+    """
+    Invalidation hook fired when a Topic or Framework is written.
+
+    The write is remembered on the session and the version bumped again when
+    the transaction ends, so a tree rebuilt from the pre-commit state by
+    another session cannot outlive the transaction.
+    """
+    topic_tree_versions.bump(TOPIC_TREE_VERSION_KEY)
+    if session is not None:
+        session.info['topic_tree_written'] = True
+
+
+def finish_topic_tree_writes(session):
+    """Re-bump the topic tree version if the finished transaction wrote topics or frameworks."""
+    if session.info.pop('topic_tree_written', False):
+        topic_tree_versions.bump(TOPIC_TREE_VERSION_KEY)
@@ -11,6 +11,8 @@ Modules:
 - dimensional_data_service: Dimensional data matrix operations (Phase 2)
 - aggregation_service: Data aggregation across dimensions and entities (Phase 2)
 - computation_context_service: Computation context and dependency analysis (Phase 3)
+- data_status_service: Set-based data completion status
+- export_service: Streaming CSV/XLSX export of historical data
 """
 
 from .entity_service import EntityService
@@ -20,6 +22,8 @@ from .dimensional_data_service import DimensionalDataService
 from .aggregation_service import AggregationService
 from .computation_context_service import ComputationContextService
 from .draft_service import DraftService  # Phase 4: Auto-save draft service
+from .data_status_service import DataStatusService
+from .export_service import HistoryExport
 
 __all__ = [
     'EntityService',
@@ -28,5 +32,7 @@ __all__ = [
     'DimensionalDataService',
     'AggregationService',
     'ComputationContextService',
-    'DraftService'  # Phase 4
+    'DraftService',  # Phase 4
+    'DataStatusService',
+    'HistoryExport'
 ]
@@ -4,7 +4,7 @@ Handles data aggregation across dimensions and entities.
 """
 
 from typing import Dict, List, Any, Optional
-from app.models.esg_data import ESGData
+from app.models.esg_data import ESGData, ESGDataBreakdown
 from app.models.entity import Entity
 from app.extensions import db
 from flask_login import current_user
@@ -25,6 +25,9 @@ class AggregationService:
         """
         Aggregate data by a specific dimension.
 
+        Totals are grouped from the breakdown fact rows of the entry, so the
+        dimension_values JSON is not loaded.
+
         Args:
             field_id: Framework field ID
             entity_id: Entity ID
@@ -35,64 +38,41 @@ class AggregationService:
             Dictionary with aggregated values by dimension
         """
         # Get the ESG data entry
-        esg_data = ESGData.query.filter_by(
+        entry = db.session.query(ESGData.data_id, ESGData.raw_value).filter_by(
             field_id=field_id,
             entity_id=entity_id,
             reporting_date=reporting_date,
             company_id=current_user.company_id
         ).first()
 
-        if not esg_data or not esg_data.dimension_values:
+        facts = []
+        if entry:
+            facts = db.session.query(
+                ESGDataBreakdown.dimension,
+                ESGDataBreakdown.dimension_value,
+                func.sum(ESGDataBreakdown.amount)
+            ).filter(
+                ESGDataBreakdown.data_id == entry.data_id
+            ).group_by(ESGDataBreakdown.dimension, ESGDataBreakdown.dimension_value).all()
+
+        if not facts:
             return {
                 'success': False,
                 'error': 'No dimensional data found'
             }
 
-        dim_values = esg_data.dimension_values
-        if dim_values.get('version') != 2:
-            return {
-                'success': False,
-                'error': 'Incompatible data version'
-            }
-
-        # Check if the dimension exists in the data
-        dimensions = dim_values.get('dimensions', [])
-        if dimension_name not in dimensions:
+        aggregated = {value: total for dimension, value, total in facts if dimension == dimension_name}
+        if not aggregated:
             return {
                 'success': False,
                 'error': f'Dimension {dimension_name} not found in data'
             }
 
-        # Get pre-calculated totals if available
-        totals = dim_values.get('totals', {})
-        by_dimension = totals.get('by_dimension', {})
-
-        if dimension_name in by_dimension:
-            return {
-                'success': True,
-                'dimension_name': dimension_name,
-                'aggregated_values': by_dimension[dimension_name],
-                'total': totals.get('overall', 0)
-            }
-
-        # If not pre-calculated, calculate from breakdowns
-        breakdowns = dim_values.get('breakdowns', [])
-        aggregated = {}
-
-        for breakdown in breakdowns:
-            dim_value = breakdown.get('dimensions', {}).get(dimension_name)
-            if dim_value and breakdown.get('raw_value') is not None:
-                try:
-                    current = aggregated.get(dim_value, 0)
-                    aggregated[dim_value] = current + float(breakdown.get('raw_value', 0))
-                except (ValueError, TypeError):
-                    continue
-
         return {
             'success': True,
             'dimension_name': dimension_name,
             'aggregated_values': aggregated,
-            'total': sum(aggregated.values())
+            'total': AggregationService._numeric(entry.raw_value)
         }
 
     @staticmethod
@@ -105,6 +85,10 @@ class AggregationService:
         """
         Calculate totals across multiple entities.
 
+        Only entry totals (raw_value holds the overall total of a dimensional
+        entry) and entity names are selected; dimensional totals are grouped
+        in SQL from the breakdown fact rows.
+
         Args:
             field_id: Framework field ID
             entity_ids: List of entity IDs to aggregate
@@ -114,15 +98,16 @@ class AggregationService:
         Returns:
             Dictionary with cross-entity totals
         """
-        # Query all ESG data for the given entities
-        esg_data_list = ESGData.query.filter(
-            ESGData.field_id == field_id,
-            ESGData.entity_id.in_(entity_ids),
-            ESGData.reporting_date == reporting_date,
-            ESGData.company_id == current_user.company_id
+        filters = AggregationService._entry_filters(field_id, entity_ids)
+        rows = db.session.query(
+            ESGData.entity_id, Entity.name, ESGData.raw_value
+        ).outerjoin(
+            Entity, Entity.id == ESGData.entity_id
+        ).filter(
+            *filters, ESGData.reporting_date == reporting_date
         ).all()
 
-        if not esg_data_list:
+        if not rows:
             return {
                 'success': False,
                 'error': 'No data found for specified entities'
@@ -132,30 +117,16 @@ class AggregationService:
         simple_total = 0
         entity_values = {}
 
-        for data in esg_data_list:
-            entity_name = data.entity.name if data.entity else f"Entity {data.entity_id}"
-
-            if data.dimension_values and data.dimension_values.get('version') == 2:
-                # Use overall total from dimensional data
-                totals = data.dimension_values.get('totals', {})
-                value = totals.get('overall', 0)
-            elif data.raw_value:
-                # Use raw value
-                try:
-                    value = float(data.raw_value)
-                except (ValueError, TypeError):
-                    value = 0
-            else:
-                value = 0
-
+        for entity_id, entity_name, raw_value in rows:
+            value = AggregationService._numeric(raw_value)
             simple_total += value
-            entity_values[entity_name] = value
+            entity_values[entity_name or f"Entity {entity_id}"] = value
 
         result = {
             'success': True,
             'field_id': field_id,
             'reporting_date': reporting_date,
-            'entity_count': len(esg_data_list),
+            'entity_count': len(rows),
             'total': simple_total,
             'by_entity': entity_values
         }
@@ -163,48 +134,39 @@ class AggregationService:
         # Add dimensional aggregation if requested
         if aggregate_dimensions:
             dimensional_aggregation = AggregationService._aggregate_dimensions_across_entities(
-                esg_data_list
+                filters + [ESGData.reporting_date == reporting_date]
             )
             result['dimensional_aggregation'] = dimensional_aggregation
 
         return result
 
     @staticmethod
-    def _aggregate_dimensions_across_entities(esg_data_list: List[ESGData]) -> Dict[str, Any]:
+    def _aggregate_dimensions_across_entities(entry_filters: List) -> Dict[str, Any]:
         """
         Aggregate dimensional data across multiple entities.
 
         Args:
-            esg_data_list: List of ESGData records
+            entry_filters: ESGData filters selecting the entries to aggregate
 
         Returns:
             Dictionary with aggregated dimensional data
         """
-        # Collect all dimensions
-        all_dimensions = set()
-        dimension_aggregates = {}
-
-        for data in esg_data_list:
-            if not data.dimension_values or data.dimension_values.get('version') != 2:
-                continue
-
-            dimensions = data.dimension_values.get('dimensions', [])
-            all_dimensions.update(dimensions)
+        facts = db.session.query(
+            ESGDataBreakdown.dimension,
+            ESGDataBreakdown.dimension_value,
+            func.sum(ESGDataBreakdown.amount)
+        ).join(
+            ESGData, ESGData.data_id == ESGDataBreakdown.data_id
+        ).filter(
+            *entry_filters
+        ).group_by(ESGDataBreakdown.dimension, ESGDataBreakdown.dimension_value).all()
 
-            # Aggregate by each dimension
-            totals = data.dimension_values.get('totals', {})
-            by_dimension = totals.get('by_dimension', {})
-
-            for dim_name, dim_totals in by_dimension.items():
-                if dim_name not in dimension_aggregates:
-                    dimension_aggregates[dim_name] = {}
-
-                for dim_value, value in dim_totals.items():
-                    current = dimension_aggregates[dim_name].get(dim_value, 0)
-                    dimension_aggregates[dim_name][dim_value] = current + value
+        dimension_aggregates = {}
+        for dimension, value, total in facts:
+            dimension_aggregates.setdefault(dimension, {})[value] = total
 
         return {
-            'dimensions': list(all_dimensions),
+            'dimensions': list(dimension_aggregates),
             'by_dimension': dimension_aggregates
         }
 
@@ -219,6 +181,9 @@ class AggregationService:
         """
         Aggregate data across a date range.
 
+        The time series reads entry totals only; the per-dimension series is
+        one GROUP BY over the breakdown fact rows.
+
         Args:
             field_id: Framework field ID
             entity_id: Entity ID
@@ -233,14 +198,15 @@ class AggregationService:
         start = datetime.strptime(start_date, '%Y-%m-%d').date()
         end = datetime.strptime(end_date, '%Y-%m-%d').date()
 
-        # Query historical data
-        historical_data = ESGData.query.filter(
-            ESGData.field_id == field_id,
-            ESGData.entity_id == entity_id,
+        filters = AggregationService._entry_filters(field_id, [entity_id]) + [
             ESGData.reporting_date >= start,
-            ESGData.reporting_date <= end,
-            ESGData.company_id == current_user.company_id
-        ).order_by(ESGData.reporting_date).all()
+            ESGData.reporting_date <= end
+        ]
+
+        # Query historical data
+        historical_data = db.session.query(
+            ESGData.reporting_date, ESGData.raw_value
+        ).filter(*filters).order_by(ESGData.reporting_date).all()
 
         if not historical_data:
             return {
@@ -249,38 +215,31 @@ class AggregationService:
             }
 
         # Build time series
-        time_series = []
-        dimension_time_series = {}
-
-        for data in historical_data:
-            date_str = data.reporting_date.isoformat()
+        time_series = [
+            {'date': reporting_date.isoformat(), 'value': AggregationService._numeric(raw_value)}
+            for reporting_date, raw_value in historical_data
+        ]
 
-            # Get value
-            if data.dimension_values and data.dimension_values.get('version') == 2:
-                totals = data.dimension_values.get('totals', {})
-                value = totals.get('overall', 0)
-
-                # If specific dimension requested, get its breakdown
-                if dimension_name:
-                    by_dimension = totals.get('by_dimension', {})
-                    if dimension_name in by_dimension:
-                        for dim_value, dim_total in by_dimension[dimension_name].items():
-                            if dim_value not in dimension_time_series:
-                                dimension_time_series[dim_value] = []
-                            dimension_time_series[dim_value].append({
-                                'date': date_str,
-                                'value': dim_total
-                            })
-            else:
-                try:
-                    value = float(data.raw_value) if data.raw_value else 0
-                except (ValueError, TypeError):
-                    value = 0
-
-            time_series.append({
-                'date': date_str,
-                'value': value
-            })
+        # If specific dimension requested, get its breakdown per date
+        dimension_time_series = {}
+        if dimension_name:
+            facts = db.session.query(
+                ESGData.reporting_date,
+                ESGDataBreakdown.dimension_value,
+                func.sum(ESGDataBreakdown.amount)
+            ).join(
+                ESGData, ESGData.data_id == ESGDataBreakdown.data_id
+            ).filter(
+                *filters, ESGDataBreakdown.dimension == dimension_name
+            ).group_by(
+                ESGData.reporting_date, ESGDataBreakdown.dimension_value
+            ).order_by(ESGData.reporting_date).all()
+
+            for reporting_date, value, total in facts:
+                dimension_time_series.setdefault(value, []).append({
+                    'date': reporting_date.isoformat(),
+                    'value': total
+                })
 
         result = {
             'success': True,
@@ -298,6 +257,23 @@ class AggregationService:
 
         return result
 
+    @staticmethod
+    def _entry_filters(field_id: str, entity_ids: List[int]) -> List:
+        """ESGData filters for a field's entries of the current company."""
+        return [
+            ESGData.field_id == field_id,
+            ESGData.entity_id.in_(entity_ids),
+            ESGData.company_id == current_user.company_id
+        ]
+
+    @staticmethod
+    def _numeric(raw_value) -> float:
+        """Entry total as a number (0 when missing or not numeric)."""
+        try:
+            return float(raw_value) if raw_value else 0
+        except (ValueError, TypeError):
+            return 0
+
     @staticmethod
     def calculate_completion_rate(
         field_id: str,
@@ -1,64 +1,279 @@
 """
 Session Storage Service for Bulk Upload
 
-Provides file-based storage for bulk upload data to avoid session cookie size limits.
-Stores validated rows and upload metadata in temporary JSON files instead of Flask session.
+Provides server-side storage for bulk upload data to avoid session cookie size limits.
+Stores validated rows and upload metadata outside the Flask session.
+
+Every upload is stored as a small summary (filename, user_id, timestamps, ...)
+plus one slice per row list ('rows', 'validated_rows', 'overwrite_rows'), each
+encoded as zlib compressed compact JSON, so a request only loads the slices it
+needs. Two backends are available:
+
+- LocalDiskSessionBackend: one directory per upload with atomic writes and an
+  expiry bucket index so cleanup only touches expired uploads. Only suitable
+  when all workers share a filesystem.
+- RedisSessionBackend: one key per slice with native TTLs, shared by all
+  instances.
 
 BUG FIX: BUG-ENH4-005 - Session cookie exceeds 4KB browser limit
 """
 
 import json
 import os
+import shutil
 import tempfile
-from datetime import datetime, timedelta
+import time
+import zlib
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional
 from flask import current_app
 
+from ...redis import get_redis_binary_client
+
+
+SUMMARY_SLICE = 'summary'
+
+# Expiry index granularity for the local disk backend
+EXPIRY_BUCKET_SECONDS = 60
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_payload(value: Any) -> bytes:
+    """Encode a JSON-compatible value as zlib compressed compact JSON."""
+    raw = json.dumps(value, separators=(',', ':'), default=_json_default)
+    return zlib.compress(raw.encode('utf-8'), 6)
+
+
+def decode_payload(payload: bytes) -> Any:
+    """Decode a value written by encode_payload()."""
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+def split_slices(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Split upload data into the summary slice and one slice per row list.
+
+    Returns:
+        dict: {slice_name: value}; the summary holds every non-list value
+    """
+    slices = {SUMMARY_SLICE: {}}
+    for key, value in data.items():
+        if isinstance(value, list):
+            slices[key] = value
+        else:
+            slices[SUMMARY_SLICE][key] = value
+    slices[SUMMARY_SLICE]['_slices'] = sorted(name for name in slices if name != SUMMARY_SLICE)
+    return slices
+
+
+class LocalDiskSessionBackend:
+    """
+    Stores upload slices under <directory>/<upload_id>/<slice>.bin.
+
+    Slices are written to a temporary file and renamed into place, the summary
+    last, so readers never see a partial write. Each store also drops a marker
+    in <directory>/_expiry/<bucket>/ (bucket = expiry time // 60s), so
+    cleanup_expired() only lists buckets that have already expired.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.expiry_dir = self.directory / '_expiry'
+        self.expiry_dir.mkdir(parents=True, exist_ok=True)
+
+    def _upload_dir(self, upload_id: str) -> Path:
+        # Sanitize upload_id to prevent path traversal
+        safe_id = upload_id.replace('/', '_').replace('\\', '_').lstrip('.')
+        return self.directory / safe_id
+
+    @staticmethod
+    def _write_atomic(path: Path, payload: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def store(self, upload_id: str, slices: Dict[str, Any], ttl: int):
+        upload_dir = self._upload_dir(upload_id)
+        upload_dir.mkdir(exist_ok=True)
+
+        expires_at = time.time() + ttl
+        slices[SUMMARY_SLICE]['_expires_at'] = expires_at
+
+        for name, value in slices.items():
+            if name != SUMMARY_SLICE:
+                self._write_atomic(upload_dir / f'{name}.bin', encode_payload(value))
+        self._write_atomic(upload_dir / f'{SUMMARY_SLICE}.bin', encode_payload(slices[SUMMARY_SLICE]))
+
+        # Drop slices left over from a previous store
+        for path in upload_dir.glob('*.bin'):
+            if path.stem not in slices:
+                path.unlink(missing_ok=True)
+
+        bucket_dir = self.expiry_dir / str(int(expires_at // EXPIRY_BUCKET_SECONDS) + 1)
+        bucket_dir.mkdir(exist_ok=True)
+        (bucket_dir / upload_dir.name).touch()
+
+    def load(self, upload_id: str, names: Iterable[str]) -> Optional[Dict[str, Any]]:
+        upload_dir = self._upload_dir(upload_id)
+        try:
+            summary = decode_payload((upload_dir / f'{SUMMARY_SLICE}.bin').read_bytes())
+        except FileNotFoundError:
+            return None
+
+        if summary.get('_expires_at', 0) < time.time():
+            self.delete(upload_id)
+            return None
+
+        slices = {SUMMARY_SLICE: summary}
+        for name in names:
+            if name in summary.get('_slices', ()):
+                slices[name] = decode_payload((upload_dir / f'{name}.bin').read_bytes())
+        return slices
+
+    def delete(self, upload_id: str):
+        shutil.rmtree(self._upload_dir(upload_id), ignore_errors=True)
+
+    def cleanup_expired(self) -> int:
+        now_bucket = int(time.time() // EXPIRY_BUCKET_SECONDS)
+        deleted_count = 0
+
+        for bucket_dir in self.expiry_dir.iterdir():
+            if not bucket_dir.name.isdigit() or int(bucket_dir.name) > now_bucket:
+                continue
+
+            for marker in bucket_dir.iterdir():
+                summary_path = self.directory / marker.name / f'{SUMMARY_SLICE}.bin'
+                try:
+                    summary = decode_payload(summary_path.read_bytes())
+                except FileNotFoundError:
+                    summary = None
+                except Exception as e:
+                    current_app.logger.warning(f"Failed to read {summary_path}: {str(e)}")
+                    summary = {}
+
+                # A re-stored upload has a later expiry (and marker); keep it
+                if summary is not None and summary.get('_expires_at', 0) < time.time():
+                    shutil.rmtree(self.directory / marker.name, ignore_errors=True)
+                    deleted_count += 1
+
+            shutil.rmtree(bucket_dir, ignore_errors=True)
+
+        return deleted_count
+
+
+class RedisSessionBackend:
+    """
+    Stores upload slices in Redis as "<prefix>:<upload_id>:<slice>" with native TTLs.
+
+    All slices of an upload are written in one pipeline and read with one
+    MGET, so Redis expiry replaces cleanup_expired().
+    """
+
+    def __init__(self, client, prefix: str = 'bulk_upload'):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, upload_id: str, name: str) -> str:
+        return f'{self.prefix}:{upload_id}:{name}'
+
+    def store(self, upload_id: str, slices: Dict[str, Any], ttl: int):
+        previous = self.load(upload_id, ()) or {}
+        stale = set(previous.get(SUMMARY_SLICE, {}).get('_slices', ())) - set(slices)
+
+        pipe = self.client.pipeline()
+        for name, value in slices.items():
+            pipe.setex(self._key(upload_id, name), ttl, encode_payload(value))
+        if stale:
+            pipe.delete(*(self._key(upload_id, name) for name in stale))
+        pipe.execute()
+
+    def load(self, upload_id: str, names: Iterable[str]) -> Optional[Dict[str, Any]]:
+        names = [SUMMARY_SLICE] + [name for name in names if name != SUMMARY_SLICE]
+        payloads = self.client.mget([self._key(upload_id, name) for name in names])
+        if payloads[0] is None:
+            return None
+        return {
+            name: decode_payload(payload)
+            for name, payload in zip(names, payloads)
+            if payload is not None
+        }
+
+    def delete(self, upload_id: str):
+        summary = (self.load(upload_id, ()) or {}).get(SUMMARY_SLICE, {})
+        names = [SUMMARY_SLICE] + list(summary.get('_slices', ()))
+        self.client.delete(*(self._key(upload_id, name) for name in names))
+
+    def cleanup_expired(self) -> int:
+        # Keys expire natively
+        return 0
+
 
 class SessionStorageService:
-    """Manages temporary file storage for bulk upload sessions."""
+    """Manages server-side storage for bulk upload sessions."""
 
     @staticmethod
-    def _get_storage_dir() -> Path:
-        """Get or create the temporary storage directory for bulk uploads."""
-        storage_dir = Path(tempfile.gettempdir()) / 'esg_bulk_uploads'
-        storage_dir.mkdir(exist_ok=True)
-        return storage_dir
+    def _get_backend():
+        """
+        Storage backend selected by BULK_UPLOAD_SESSION_BACKEND.
+
+        'redis' and 'local' force a backend; 'auto' (default) uses Redis when
+        it is configured and falls back to the local disk otherwise.
+        """
+        backend_name = current_app.config.get('BULK_UPLOAD_SESSION_BACKEND', 'auto')
+        client = get_redis_binary_client()
+
+        if backend_name == 'redis' or (backend_name == 'auto' and client is not None):
+            if client is None:
+                raise RuntimeError('BULK_UPLOAD_SESSION_BACKEND is redis but Redis is not available')
+            return RedisSessionBackend(client)
+
+        directory = current_app.config.get('BULK_UPLOAD_SESSION_DIR') or (
+            Path(tempfile.gettempdir()) / 'esg_bulk_uploads'
+        )
+        backends = current_app.extensions.setdefault('bulk_upload_session_backends', {})
+        if str(directory) not in backends:
+            backends[str(directory)] = LocalDiskSessionBackend(directory)
+        return backends[str(directory)]
 
     @staticmethod
-    def _get_file_path(upload_id: str) -> Path:
-        """Get the file path for a given upload_id."""
-        storage_dir = SessionStorageService._get_storage_dir()
-        # Sanitize upload_id to prevent path traversal
-        safe_id = upload_id.replace('/', '_').replace('\\', '_')
-        return storage_dir / f"{safe_id}.json"
+    def _get_timeout() -> int:
+        return current_app.config.get('BULK_UPLOAD_SESSION_TIMEOUT', 30 * 60)
 
     @staticmethod
     def store(upload_id: str, data: Dict[str, Any]) -> bool:
         """
-        Store upload data to a temporary file.
+        Store upload data, replacing anything stored for the upload before.
 
         Args:
             upload_id: Unique identifier for the upload session
-            data: Dictionary containing upload data (rows, metadata, etc.)
+            data: Dictionary containing upload data; list values (rows,
+                validated_rows, ...) are stored as separate slices
 
         Returns:
             True if successful, False otherwise
         """
         try:
-            file_path = SessionStorageService._get_file_path(upload_id)
-
+            data = dict(data)
             # Add timestamp for expiration tracking
             data['_stored_at'] = datetime.now().isoformat()
 
-            # Convert data to JSON-serializable format
-            json_data = json.dumps(data, default=str)
+            SessionStorageService._get_backend().store(
+                upload_id, split_slices(data), SessionStorageService._get_timeout()
+            )
 
-            # Write to file
-            file_path.write_text(json_data, encoding='utf-8')
-
-            current_app.logger.info(f"Stored upload data for {upload_id} at {file_path}")
+            current_app.logger.info(f"Stored upload data for {upload_id}")
             return True
 
         except Exception as e:
@@ -66,46 +281,51 @@ class SessionStorageService:
             return False
 
     @staticmethod
-    def retrieve(upload_id: str) -> Optional[Dict[str, Any]]:
+    def retrieve(upload_id: str, slices: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
-        Retrieve upload data from temporary file.
+        Retrieve upload data.
 
         Args:
             upload_id: Unique identifier for the upload session
+            slices: Row slices to load next to the summary (e.g. ['rows']);
+                None loads every slice, [] only the summary
 
         Returns:
             Dictionary containing upload data, or None if not found/expired
         """
         try:
-            file_path = SessionStorageService._get_file_path(upload_id)
-
-            if not file_path.exists():
-                current_app.logger.warning(f"Upload data not found for {upload_id}")
+            backend = SessionStorageService._get_backend()
+            if slices is None:
+                stored = backend.load(upload_id, ())
+                if stored is not None:
+                    stored = backend.load(upload_id, stored[SUMMARY_SLICE].get('_slices', ()))
+            else:
+                stored = backend.load(upload_id, slices)
+
+            if stored is None:
+                current_app.logger.warning(f"Upload data not found or expired for {upload_id}")
                 return None
 
-            # Read data
-            json_data = file_path.read_text(encoding='utf-8')
-            data = json.loads(json_data)
-
-            # Check expiration (30 minutes default)
-            if '_stored_at' in data:
-                stored_at = datetime.fromisoformat(data['_stored_at'])
-                timeout = current_app.config.get('BULK_UPLOAD_SESSION_TIMEOUT', 30 * 60)
-                if (datetime.now() - stored_at).total_seconds() > timeout:
-                    current_app.logger.warning(f"Upload session expired for {upload_id}")
-                    SessionStorageService.delete(upload_id)
-                    return None
-
+            data = {
+                key: value for key, value in stored.pop(SUMMARY_SLICE).items()
+                if key not in ('_slices', '_expires_at')
+            }
+            data.update(stored)
             return data
 
         except Exception as e:
             current_app.logger.error(f"Failed to retrieve upload data for {upload_id}: {str(e)}")
             return None
 
+    @staticmethod
+    def retrieve_summary(upload_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve only the upload summary (filename, user_id, timestamps)."""
+        return SessionStorageService.retrieve(upload_id, slices=[])
+
     @staticmethod
     def delete(upload_id: str) -> bool:
         """
-        Delete upload data file.
+        Delete upload data.
 
         Args:
             upload_id: Unique identifier for the upload session
@@ -114,12 +334,8 @@ class SessionStorageService:
             True if successful, False otherwise
         """
         try:
-            file_path = SessionStorageService._get_file_path(upload_id)
-
-            if file_path.exists():
-                file_path.unlink()
-                current_app.logger.info(f"Deleted upload data for {upload_id}")
-
+            SessionStorageService._get_backend().delete(upload_id)
+            current_app.logger.info(f"Deleted upload data for {upload_id}")
             return True
 
         except Exception as e:
@@ -129,27 +345,13 @@ class SessionStorageService:
     @staticmethod
     def cleanup_expired() -> int:
         """
-        Clean up expired upload session files.
+        Clean up expired upload sessions.
 
         Returns:
-            Number of files deleted
+            Number of uploads deleted
         """
         try:
-            storage_dir = SessionStorageService._get_storage_dir()
-            timeout = current_app.config.get('BULK_UPLOAD_SESSION_TIMEOUT', 30 * 60)
-            deleted_count = 0
-
-            for file_path in storage_dir.glob('*.json'):
-                try:
-                    # Check file modification time
-                    mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    if (datetime.now() - mtime).total_seconds() > timeout:
-                        file_path.unlink()
-                        deleted_count += 1
-
-                except Exception as e:
-                    current_app.logger.warning(f"Failed to check/delete {file_path}: {str(e)}")
-                    continue
+            deleted_count = SessionStorageService._get_backend().cleanup_expired()
 
             if deleted_count > 0:
                 current_app.logger.info(f"Cleaned up {deleted_count} expired upload sessions")
@@ -4,16 +4,20 @@ Bulk Submission Service
 Handles transactional submission of validated bulk upload data.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from datetime import datetime, UTC
 from uuid import uuid4
 import hashlib
+import time
 from flask import current_app
 
 
 class BulkSubmissionService:
     """Service for submitting validated bulk upload data."""
 
+    # Fallback when BULK_UPLOAD_SUBMIT_BATCH_SIZE is not configured
+    DEFAULT_BATCH_SIZE = 1000
+
     @staticmethod
     def submit_bulk_data(
         validated_rows: List[Dict],
@@ -24,6 +28,15 @@ class BulkSubmissionService:
         """
         Submit validated data in a transaction.
 
+        New entries and their audit logs are written with bulk INSERTs
+        (data IDs are generated client side, so no flush is needed per row)
+        and overwrites are applied with a bulk UPDATE keyed by data_id, in
+        batches of BULK_UPLOAD_SUBMIT_BATCH_SIZE rows with a single commit.
+        The dimensional breakdown fact rows of the written entries are
+        rewritten per batch as well.
+        Computed fields depending on the written values are then recomputed
+        in one batched pass.
+
         Args:
             validated_rows: List of validated row dictionaries
             filename: Original filename
@@ -38,11 +51,15 @@ class BulkSubmissionService:
                 'updated_entries': int,
                 'total': int,
                 'attachments_uploaded': int,
+                'recomputed': int (computed values refreshed),
+                'timings': dict of stage -> milliseconds,
                 'error': str (if failed)
             }
         """
+        from sqlalchemy import update
         from ....extensions import db
-        from ....models.esg_data import ESGData, ESGDataAuditLog, ESGDataAttachment
+        from ....models.esg_data import ESGData, ESGDataAuditLog, ESGDataBreakdown
+        from ...recompute_pipeline import record_raw_writes, process_pending
 
         # Generate batch ID for grouping
         batch_id = str(uuid4())
@@ -50,90 +67,73 @@ class BulkSubmissionService:
         update_count = 0
         attachments_count = 0
         attachments = attachments or {}
+        batch_size = current_app.config.get(
+            'BULK_UPLOAD_SUBMIT_BATCH_SIZE', BulkSubmissionService.DEFAULT_BATCH_SIZE
+        )
+        timings = {stage: 0.0 for stage in
+                   ('prepare', 'insert', 'update', 'breakdowns', 'audit_log', 'attachments', 'commit', 'recompute')}
+        started = time.perf_counter()
 
         try:
-            # Process each row
-            for row in validated_rows:
-                is_overwrite = row.get('is_overwrite', False)
-
-                if is_overwrite:
-                    # UPDATE existing entry
-                    existing = ESGData.query.get(row['existing_data_id'])
-
-                    # Create audit log for update
-                    audit_log = ESGDataAuditLog(
-                        data_id=existing.data_id,
-                        change_type='Excel Upload Update',
-                        old_value=float(existing.raw_value) if existing.raw_value else None,
-                        new_value=float(row['parsed_value']) if row['parsed_value'] is not None else None,
-                        changed_by=current_user.id,
-                        change_metadata={
-                            'source': 'bulk_upload',
-                            'filename': filename,
-                            'row_number': row['row_number'],
-                            'batch_id': batch_id,
-                            'previous_submission_date': existing.created_at.isoformat(),
-                            'has_notes': bool(row.get('notes'))
-                        }
-                    )
-                    db.session.add(audit_log)
-
-                    # Update existing entry
-                    existing.raw_value = str(row['parsed_value'])
-                    existing.dimension_values = row.get('dimensions')
-                    existing.notes = row.get('notes')
-                    existing.updated_at = datetime.now(UTC)
-
-                    update_count += 1
-
-                else:
-                    # CREATE new entry
-                    new_entry = ESGData(
-                        entity_id=row['entity_id'],
-                        field_id=row['field_id'],
-                        raw_value=str(row['parsed_value']),
-                        reporting_date=row['reporting_date'],
-                        company_id=current_user.company_id,
-                        assignment_id=row['assignment_id'],
-                        dimension_values=row.get('dimensions'),
-                        notes=row.get('notes')
-                        # is_draft defaults to False in model
-                    )
-                    db.session.add(new_entry)
-                    db.session.flush()  # Get data_id
-
-                    # Create audit log for new entry
-                    audit_log = ESGDataAuditLog(
-                        data_id=new_entry.data_id,
-                        change_type='Excel Upload',
-                        old_value=None,
-                        new_value=float(row['parsed_value']) if row['parsed_value'] is not None else None,
-                        changed_by=current_user.id,
-                        change_metadata={
-                            'source': 'bulk_upload',
-                            'filename': filename,
-                            'row_number': row['row_number'],
-                            'batch_id': batch_id,
-                            'has_notes': bool(row.get('notes'))
-                        }
+            for offset in range(0, len(validated_rows), batch_size):
+                batch = validated_rows[offset:offset + batch_size]
+
+                stage_start = time.perf_counter()
+                now = datetime.now(UTC)
+                new_entries, updates, audit_logs, new_attachments = BulkSubmissionService._prepare_batch(
+                    batch, filename, batch_id, current_user, attachments, now
+                )
+                timings['prepare'] += time.perf_counter() - stage_start
+
+                stage_start = time.perf_counter()
+                if new_entries:
+                    db.session.execute(ESGData.__table__.insert(), new_entries)
+                timings['insert'] += time.perf_counter() - stage_start
+
+                stage_start = time.perf_counter()
+                if updates:
+                    db.session.execute(update(ESGData), updates)
+                timings['update'] += time.perf_counter() - stage_start
+
+                # Core statements bypass the ESGData mapper events that keep
+                # the dimensional breakdown fact rows in step
+                stage_start = time.perf_counter()
+                ESGDataBreakdown.replace_rows(db.session, (
+                    (entry['data_id'], entry['dimension_values']) for entry in new_entries + updates
+                ))
+                timings['breakdowns'] += time.perf_counter() - stage_start
+
+                stage_start = time.perf_counter()
+                if audit_logs:
+                    db.session.execute(ESGDataAuditLog.__table__.insert(), audit_logs)
+                timings['audit_log'] += time.perf_counter() - stage_start
+
+                # Handle attachments once their entries exist
+                stage_start = time.perf_counter()
+                for data_id, attachment_data in new_attachments:
+                    attachments_count += BulkSubmissionService._save_attachment(
+                        data_id,
+                        attachment_data,
+                        current_user.id
                     )
-                    db.session.add(audit_log)
+                timings['attachments'] += time.perf_counter() - stage_start
 
-                    new_count += 1
+                new_count += len(new_entries)
+                update_count += len(updates)
 
-                    # Handle attachment if provided
-                    row_key = f"row_{row['row_number']}"
-                    if row_key in attachments:
-                        attachment_data = attachments[row_key]
-                        attachment_count = BulkSubmissionService._save_attachment(
-                            new_entry.data_id,
-                            attachment_data,
-                            current_user.id
-                        )
-                        attachments_count += attachment_count
+                # Core statements bypass the ESGData mapper events
+                record_raw_writes(db.session(), current_user.company_id, (
+                    (row['field_id'], row['entity_id'], row['reporting_date']) for row in batch
+                ))
 
             # Commit transaction
+            stage_start = time.perf_counter()
             db.session.commit()
+            timings['commit'] += time.perf_counter() - stage_start
+
+            stage_start = time.perf_counter()
+            recompute_stats = process_pending()
+            timings['recompute'] += time.perf_counter() - stage_start
 
             return {
                 'success': True,
@@ -141,7 +141,9 @@ class BulkSubmissionService:
                 'new_entries': new_count,
                 'updated_entries': update_count,
                 'total': new_count + update_count,
-                'attachments_uploaded': attachments_count
+                'attachments_uploaded': attachments_count,
+                'recomputed': recompute_stats['computed'],
+                'timings': BulkSubmissionService._timings_ms(timings, started)
             }
 
         except Exception as e:
@@ -156,9 +158,126 @@ class BulkSubmissionService:
                 'new_entries': 0,
                 'updated_entries': 0,
                 'total': 0,
-                'attachments_uploaded': 0
+                'attachments_uploaded': 0,
+                'recomputed': 0,
+                'timings': BulkSubmissionService._timings_ms(timings, started)
+            }
+
+    @staticmethod
+    def _prepare_batch(
+        batch: List[Dict],
+        filename: str,
+        batch_id: str,
+        current_user,
+        attachments: Dict[str, Any],
+        now: datetime
+    ) -> Tuple[List[Dict], List[Dict], List[Dict], List[Tuple[str, Any]]]:
+        """
+        Build the parameter sets for one batch of rows.
+
+        Overwritten entries are loaded with a single column query for their
+        previous value and submission date.
+
+        Returns:
+            Tuple of (new entry rows, update mappings keyed by data_id,
+            audit log rows, [(data_id, attachment)] for new entries)
+        """
+        from ....extensions import db
+        from ....models.esg_data import ESGData
+
+        existing_ids = [row['existing_data_id'] for row in batch if row.get('is_overwrite', False)]
+        existing_by_id = {}
+        if existing_ids:
+            existing_by_id = {
+                data_id: (raw_value, created_at)
+                for data_id, raw_value, created_at in db.session.query(
+                    ESGData.data_id, ESGData.raw_value, ESGData.created_at
+                ).filter(
+                    ESGData.data_id.in_(existing_ids),
+                    ESGData.company_id == current_user.company_id
+                )
+            }
+
+        new_entries = []
+        updates = []
+        audit_logs = []
+        new_attachments = []
+
+        for row in batch:
+            new_value = float(row['parsed_value']) if row['parsed_value'] is not None else None
+            change_metadata = {
+                'source': 'bulk_upload',
+                'filename': filename,
+                'row_number': row['row_number'],
+                'batch_id': batch_id,
+                'has_notes': bool(row.get('notes'))
             }
 
+            if row.get('is_overwrite', False):
+                # UPDATE existing entry
+                data_id = row['existing_data_id']
+                if data_id not in existing_by_id:
+                    raise ValueError(f"Row {row['row_number']}: existing entry {data_id} not found")
+                old_raw_value, created_at = existing_by_id[data_id]
+
+                change_type = 'Excel Upload Update'
+                old_value = float(old_raw_value) if old_raw_value else None
+                change_metadata['previous_submission_date'] = created_at.isoformat()
+
+                updates.append({
+                    'data_id': data_id,
+                    'raw_value': str(row['parsed_value']),
+                    'dimension_values': row.get('dimensions'),
+                    'dimension_key': ESGData.canonical_dimension_key(row.get('dimensions')),
+                    'notes': row.get('notes'),
+                    'updated_at': now
+                })
+
+            else:
+                # CREATE new entry (is_draft and review_status use the model defaults)
+                data_id = str(uuid4())
+                change_type = 'Excel Upload'
+                old_value = None
+
+                new_entries.append({
+                    'data_id': data_id,
+                    'entity_id': row['entity_id'],
+                    'field_id': row['field_id'],
+                    'raw_value': str(row['parsed_value']),
+                    'reporting_date': row['reporting_date'],
+                    'company_id': current_user.company_id,
+                    'assignment_id': row['assignment_id'],
+                    'dimension_values': row.get('dimensions') or {},
+                    'dimension_key': ESGData.canonical_dimension_key(row.get('dimensions')),
+                    'notes': row.get('notes'),
+                    'created_at': now,
+                    'updated_at': now
+                })
+
+                row_key = f"row_{row['row_number']}"
+                if row_key in attachments:
+                    new_attachments.append((data_id, attachments[row_key]))
+
+            audit_logs.append({
+                'log_id': str(uuid4()),
+                'data_id': data_id,
+                'change_type': change_type,
+                'old_value': old_value,
+                'new_value': new_value,
+                'changed_by': current_user.id,
+                'change_date': now,
+                'change_metadata': change_metadata
+            })
+
+        return new_entries, updates, audit_logs, new_attachments
+
+    @staticmethod
+    def _timings_ms(timings: Dict[str, float], started: float) -> Dict[str, float]:
+        """Convert per-stage timings (seconds) to rounded milliseconds, plus the total."""
+        result = {f'{stage}_ms': round(seconds * 1000, 2) for stage, seconds in timings.items()}
+        result['total_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
     @staticmethod
     def _save_attachment(data_id: str, file_data, uploaded_by: int) -> int:
         """
@@ -2,21 +2,44 @@
 Template Generation Service
 
 Generates Excel templates with pending/overdue assignments for bulk upload.
+
+Everything the template needs is fetched in bulk up front: the user's active
+assignments with their fields and entities, the (field, entity, reporting
+date) keys that already hold submitted data and the dimension values of every
+dimensional field, whose combinations are expanded once per field. Rows are
+then streamed into an openpyxl write-only workbook backed by a temporary
+file, so memory stays flat however many rows the template holds.
 """
 
-import pandas as pd
-from openpyxl import load_workbook
+import tempfile
+from collections import defaultdict
+from datetime import date
+from itertools import product
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill, Font, Protection
-from datetime import datetime
-from typing import List, Dict, Optional
-from io import BytesIO
+from openpyxl.utils import get_column_letter
+from sqlalchemy.orm import joinedload
+
+DATA_SHEET_NAME = 'Data Entry'
+INSTRUCTIONS_SHEET_NAME = 'Instructions'
+
+LEADING_COLUMNS = ['Field_Name', 'Entity', 'Rep_Date']
+EDITABLE_COLUMNS = ['Value', 'Notes']
+TRAILING_COLUMNS = ['Value', 'Unit', 'Notes', 'Status']
+HIDDEN_COLUMNS = ['Field_ID', 'Entity_ID', 'Assignment_ID']
+
+# (field_id, entity_id, reporting_date) of a submitted entry
+SubmittedKey = Tuple[str, int, date]
 
 
 class TemplateGenerationService:
     """Service for generating Excel templates for bulk data upload."""
 
     @staticmethod
-    def generate_template(user, filter_type: str = 'pending') -> BytesIO:
+    def generate_template(user, filter_type: str = 'pending'):
         """
         Generate Excel template with assignments based on filter.
 
@@ -25,218 +48,191 @@ class TemplateGenerationService:
             filter_type: 'overdue', 'pending', or 'overdue_and_pending'
 
         Returns:
-            BytesIO: Excel file in memory
+            Temporary binary file holding the workbook, positioned at its start;
+            closing it deletes it
         """
-        from ....models.data_assignment import DataPointAssignment
-        from ....models.framework import FrameworkDataField
-        from ....models.entity import Entity
-        from ....models.dimension import FieldDimension
+        today = date.today()
+        active = TemplateGenerationService._get_active_assignments(user)
+        submitted = TemplateGenerationService._get_submitted_keys(active)
 
         # Get assignments based on filter
-        assignments = TemplateGenerationService._get_assignments(user, filter_type)
+        assignments = TemplateGenerationService._get_assignments(active, filter_type, submitted, today)
 
         if not assignments:
             raise ValueError(f"No {filter_type} assignments found for this user")
 
-        # Expand dimensional assignments
-        from datetime import date
-        from ....models.esg_data import ESGData
-
-        today = date.today()
-        rows = []
-
+        schedule = []
         for assignment in assignments:
-            field = assignment.field
-            entity = assignment.entity
-
             # Skip computed fields
-            if field.is_computed:
+            if assignment.field.is_computed:
                 continue
 
-            # Get valid reporting dates
-            valid_dates = assignment.get_valid_reporting_dates()
-            if not valid_dates:
-                continue
+            dates = TemplateGenerationService._get_dates_to_include(assignment, filter_type, submitted, today)
+            if dates:
+                schedule.append((assignment, dates))
 
-            # Determine which dates to include based on filter type
-            dates_to_include = []
-
-            if filter_type == 'overdue':
-                # Include only overdue dates without existing data
-                overdue_dates = [d for d in valid_dates if d < today]
-                for overdue_date in overdue_dates:
-                    existing_data = ESGData.query.filter_by(
-                        field_id=assignment.field_id,
-                        entity_id=assignment.entity_id,
-                        reporting_date=overdue_date,
-                        is_draft=False
-                    ).first()
-                    if not existing_data:
-                        dates_to_include.append(overdue_date)
-
-            elif filter_type == 'pending':
-                # Include next/nearest date if no data exists
-                existing_data = ESGData.query.filter_by(
-                    field_id=assignment.field_id,
-                    entity_id=assignment.entity_id,
-                    is_draft=False
-                ).first()
-                if not existing_data and valid_dates:
-                    dates_to_include.append(valid_dates[0])
-
-            else:  # overdue_and_pending
-                # Include ALL overdue dates without data, plus next pending date
-                overdue_dates = [d for d in valid_dates if d < today]
-                pending_dates = [d for d in valid_dates if d >= today]
-
-                # Add overdue dates without existing data
-                for overdue_date in overdue_dates:
-                    existing_data = ESGData.query.filter_by(
-                        field_id=assignment.field_id,
-                        entity_id=assignment.entity_id,
-                        reporting_date=overdue_date,
-                        is_draft=False
-                    ).first()
-                    if not existing_data:
-                        dates_to_include.append(overdue_date)
-
-                # Add next pending date if exists
-                if pending_dates:
-                    dates_to_include.append(pending_dates[0])
-
-            # Create rows for each date
-            for reporting_date in dates_to_include:
-                # Check if field has dimensions
-                field_dimensions = FieldDimension.query.filter_by(
-                    field_id=field.field_id
-                ).all()
-
-                if field_dimensions:
-                    # Expand dimensional combinations
-                    dim_combinations = TemplateGenerationService._get_dimension_combinations(
-                        field.field_id
-                    )
-
-                    for dim_combo in dim_combinations:
-                        row = TemplateGenerationService._create_row(
-                            field, entity, assignment, reporting_date, dim_combo
-                        )
-                        rows.append(row)
-                else:
-                    # Non-dimensional field
-                    row = TemplateGenerationService._create_row(
-                        field, entity, assignment, reporting_date, None
-                    )
-                    rows.append(row)
+        combinations = TemplateGenerationService._get_dimension_combinations(
+            {assignment.field_id for assignment, _ in schedule}
+        )
+        row_count = sum(
+            len(dates) * len(combinations.get(assignment.field_id, [{}]))
+            for assignment, dates in schedule
+        )
 
         # Check if any rows were generated after filtering
-        if not rows:
+        if not row_count:
             raise ValueError(
                 f"No valid {filter_type} assignments found. "
                 f"All assignments may be computed fields or have no valid reporting dates."
             )
 
+        dimension_names = sorted({
+            name
+            for assignment, _ in schedule
+            for combo in combinations.get(assignment.field_id, [{}])
+            for name in combo
+        })
+
+        def rows() -> Iterator[Dict]:
+            for assignment, dates in schedule:
+                for reporting_date in dates:
+                    for dim_combo in combinations.get(assignment.field_id, [{}]):
+                        yield TemplateGenerationService._create_row(
+                            assignment.field, assignment.entity, assignment, reporting_date, dim_combo
+                        )
+
         # Create Excel file
-        return TemplateGenerationService._create_excel(rows, filter_type)
+        return TemplateGenerationService._create_excel(rows(), dimension_names)
 
     @staticmethod
-    def _get_assignments(user, filter_type: str):
-        """Get assignments based on filter type."""
+    def _get_active_assignments(user) -> List:
+        """Active assignments of the user's entity, with their field and entity loaded."""
         from ....models.data_assignment import DataPointAssignment
-        from ....models.esg_data import ESGData
-        from datetime import date
 
-        today = date.today()
-
-        # Base query - active assignments for user's entity
         # Note: User has entity_id (singular), not entities (plural)
-        base_query = DataPointAssignment.query.filter(
+        return DataPointAssignment.query.options(
+            joinedload(DataPointAssignment.field),
+            joinedload(DataPointAssignment.entity)
+        ).filter(
             DataPointAssignment.entity_id == user.entity_id,
             DataPointAssignment.series_status == 'active'
-        )
+        ).order_by(DataPointAssignment.id).all()
+
+    @staticmethod
+    def _get_submitted_keys(assignments) -> Set[SubmittedKey]:
+        """Keys of the non-draft entries of the assignments' fields and entities, in one query."""
+        from ....models.esg_data import ESGData
+        from ....extensions import db
+
+        if not assignments:
+            return set()
+
+        pairs = {(assignment.field_id, assignment.entity_id) for assignment in assignments}
+        query = db.session.query(
+            ESGData.field_id, ESGData.entity_id, ESGData.reporting_date
+        ).filter(
+            ESGData.entity_id.in_({entity_id for _, entity_id in pairs}),
+            ESGData.field_id.in_({field_id for field_id, _ in pairs}),
+            ESGData.is_draft == False
+        ).distinct()
+
+        return {
+            (field_id, entity_id, reporting_date)
+            for field_id, entity_id, reporting_date in query
+            if (field_id, entity_id) in pairs
+        }
 
+    @staticmethod
+    def _get_assignments(assignments, filter_type: str, submitted: Set[SubmittedKey], today: date) -> List:
+        """Get assignments based on filter type."""
         if filter_type == 'overdue':
             # Assignments with past due dates and no submitted data
-            assignments = []
-            for assignment in base_query.all():
-                valid_dates = assignment.get_valid_reporting_dates()
-                # Handle None return value (e.g., when assignment has no company)
-                if valid_dates is None:
-                    continue
-                overdue_dates = [d for d in valid_dates if d < today]
-
-                for overdue_date in overdue_dates:
-                    # Check if data exists
-                    existing_data = ESGData.query.filter_by(
-                        field_id=assignment.field_id,
-                        entity_id=assignment.entity_id,
-                        reporting_date=overdue_date,
-                        is_draft=False
-                    ).first()
-
-                    if not existing_data:
-                        assignments.append(assignment)
-                        break  # Only add assignment once
-
-            return assignments
+            return [
+                assignment for assignment in assignments
+                if any(
+                    (assignment.field_id, assignment.entity_id, reporting_date) not in submitted
+                    for reporting_date in (assignment.get_valid_reporting_dates() or [])
+                    if reporting_date < today
+                )
+            ]
 
         elif filter_type == 'pending':
             # Assignments with no data submitted (not necessarily overdue)
-            assignments = []
-            for assignment in base_query.all():
-                # Check if any data exists for this assignment
-                existing_data = ESGData.query.filter_by(
-                    field_id=assignment.field_id,
-                    entity_id=assignment.entity_id,
-                    is_draft=False
-                ).first()
-
-                if not existing_data:
-                    assignments.append(assignment)
-
-            return assignments
+            submitted_pairs = {(field_id, entity_id) for field_id, entity_id, _ in submitted}
+            return [
+                assignment for assignment in assignments
+                if (assignment.field_id, assignment.entity_id) not in submitted_pairs
+            ]
 
         else:  # overdue_and_pending
-            return base_query.all()
+            return list(assignments)
 
     @staticmethod
-    def _get_dimension_combinations(field_id: str) -> List[Dict]:
-        """Get all dimension combinations for a field."""
-        from ....models.dimension import FieldDimension, DimensionValue
+    def _get_dates_to_include(assignment, filter_type: str, submitted: Set[SubmittedKey], today: date) -> List[date]:
+        """Reporting dates of an assignment that get a template row."""
+        valid_dates = assignment.get_valid_reporting_dates()
+        if not valid_dates:
+            return []
+
+        def missing(reporting_date):
+            return (assignment.field_id, assignment.entity_id, reporting_date) not in submitted
 
-        field_dimensions = FieldDimension.query.filter_by(
-            field_id=field_id
-        ).all()
+        overdue_dates = [d for d in valid_dates if d < today and missing(d)]
 
-        if not field_dimensions:
-            return [{}]
+        if filter_type == 'overdue':
+            # Include only overdue dates without existing data
+            return overdue_dates
 
-        # Get all dimension values for each dimension
-        dim_values_map = {}
-        for fd in field_dimensions:
-            dim_values = DimensionValue.query.filter_by(
-                dimension_id=fd.dimension_id
-            ).all()
-            dim_values_map[fd.dimension.name] = [dv.value for dv in dim_values]
+        elif filter_type == 'pending':
+            # Include next/nearest date (_get_assignments kept only assignments without data)
+            return valid_dates[:1]
+
+        else:  # overdue_and_pending
+            # Include ALL overdue dates without data, plus next pending date
+            pending_dates = [d for d in valid_dates if d >= today]
+            return overdue_dates + pending_dates[:1]
+
+    @staticmethod
+    def _get_dimension_combinations(field_ids) -> Dict[str, List[Dict]]:
+        """
+        All dimension combinations of each dimensional field.
+
+        Dimensions and their values are read in one query and the cartesian
+        product is built once per field. Fields without dimensions are absent
+        from the result; a field with a valueless dimension maps to [].
+        """
+        from ....models.dimension import Dimension, DimensionValue, FieldDimension
+        from ....extensions import db
+
+        if not field_ids:
+            return {}
+
+        # field_id -> dimension name -> values
+        dim_values_map = defaultdict(dict)
+        for field_id, dim_name, value in db.session.query(
+            FieldDimension.field_id, Dimension.name, DimensionValue.value
+        ).join(
+            Dimension, FieldDimension.dimension_id == Dimension.dimension_id
+        ).outerjoin(
+            DimensionValue, DimensionValue.dimension_id == Dimension.dimension_id
+        ).filter(
+            FieldDimension.field_id.in_(list(field_ids))
+        ).order_by(
+            FieldDimension.field_id, Dimension.name, DimensionValue.display_order, DimensionValue.value
+        ):
+            values = dim_values_map[field_id].setdefault(dim_name, [])
+            if value is not None:
+                values.append(value)
 
         # Generate cartesian product of all dimension combinations
-        combinations = [{}]
-        for dim_name, values in dim_values_map.items():
-            new_combinations = []
-            for combo in combinations:
-                for value in values:
-                    new_combo = combo.copy()
-                    new_combo[dim_name] = value
-                    new_combinations.append(new_combo)
-            combinations = new_combinations
-
-        return combinations
+        return {
+            field_id: [dict(zip(dimensions, combo)) for combo in product(*dimensions.values())]
+            for field_id, dimensions in dim_values_map.items()
+        }
 
     @staticmethod
     def _create_row(field, entity, assignment, reporting_date, dimensions: Optional[Dict]) -> Dict:
         """Create a row dictionary for the template."""
-        from datetime import date
-
         # Determine status based on reporting date
         today = date.today()
         status = 'OVERDUE' if reporting_date < today else 'PENDING'
@@ -263,88 +259,74 @@ class TemplateGenerationService:
         return row
 
     @staticmethod
-    def _create_excel(rows: List[Dict], filter_type: str) -> BytesIO:
-        """Create Excel file with data and instructions sheets."""
-
-        # Create DataFrame
-        df = pd.DataFrame(rows)
-
-        # Verify DataFrame has data
-        if df.empty:
-            raise ValueError("Cannot create Excel template from empty data")
-
-        # Reorder columns: visible columns first, then hidden
-        visible_cols = ['Field_Name', 'Entity', 'Rep_Date']
-
-        # Add dimension columns (only if they exist in DataFrame)
-        dim_cols = [col for col in df.columns if col.startswith('Dimension_')]
-        visible_cols.extend(sorted(dim_cols))
-
-        # Add editable columns
-        visible_cols.extend(['Value', 'Unit', 'Notes', 'Status'])
-
-        # Hidden columns at the end
-        hidden_cols = ['Field_ID', 'Entity_ID', 'Assignment_ID']
-
-        # Only include columns that actually exist in the DataFrame
-        all_cols = [col for col in (visible_cols + hidden_cols) if col in df.columns]
-        df = df[all_cols]
-
-        # Create Excel in memory
-        output = BytesIO()
-
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            # Data Entry sheet
-            df.to_excel(writer, sheet_name='Data Entry', index=False)
-
-            # Instructions sheet
-            instructions_df = TemplateGenerationService._create_instructions()
-            instructions_df.to_excel(writer, sheet_name='Instructions', index=False, header=False)
-
-        # Post-process with openpyxl for formatting
-        output.seek(0)
-        wb = load_workbook(output)
-        ws = wb['Data Entry']
-
-        # Apply formatting
-        gray_fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
-        header_font = Font(bold=True)
+    def _create_excel(rows, dimension_names: List[str]):
+        """
+        Stream rows into a write-only workbook with data and instructions sheets.
 
-        # Format headers
-        for cell in ws[1]:
-            cell.font = header_font
+        Args:
+            rows: Iterable of row dictionaries (see _create_row)
+            dimension_names: Names of the dimension columns, in column order
 
-        # Protect read-only columns (all except Value and Notes)
-        editable_cols = ['Value', 'Notes']
-        for col_idx, col_name in enumerate(df.columns, start=1):
-            col_letter = ws.cell(row=1, column=col_idx).column_letter
+        Returns:
+            Temporary binary file positioned at its start
+        """
+        # Visible columns first (dimensions between the identity and editable columns), then hidden
+        columns = (
+            LEADING_COLUMNS
+            + [f'Dimension_{name}' for name in dimension_names]
+            + TRAILING_COLUMNS
+            + HIDDEN_COLUMNS
+        )
 
-            if col_name not in editable_cols:
-                # Gray fill and protect
-                for row in range(2, len(df) + 2):
-                    cell = ws.cell(row=row, column=col_idx)
-                    cell.fill = gray_fill
-                    cell.protection = Protection(locked=True)
+        workbook = Workbook(write_only=True)
+        ws = workbook.create_sheet(DATA_SHEET_NAME)
 
         # Hide ID columns
-        for col_name in hidden_cols:
-            col_idx = list(df.columns).index(col_name) + 1
-            col_letter = ws.cell(row=1, column=col_idx).column_letter
-            ws.column_dimensions[col_letter].hidden = True
+        for col_idx, col_name in enumerate(columns, start=1):
+            if col_name in HIDDEN_COLUMNS:
+                ws.column_dimensions[get_column_letter(col_idx)].hidden = True
 
         # Enable sheet protection (allows editing unlocked cells)
         # Note: No password set - just UI-level protection
         ws.protection.sheet = True
 
-        # Save to BytesIO
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
+        header_font = Font(bold=True)
+        header = []
+        for col_name in columns:
+            cell = WriteOnlyCell(ws, value=col_name)
+            cell.font = header_font
+            header.append(cell)
+        ws.append(header)
 
+        # Protect read-only columns (all except Value and Notes) with a gray fill
+        gray_fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
+        locked = Protection(locked=True)
+        unlocked = Protection(locked=False)
+
+        def styled(value, editable):
+            cell = WriteOnlyCell(ws, value=value)
+            if editable:
+                cell.protection = unlocked
+            else:
+                cell.fill = gray_fill
+                cell.protection = locked
+            return cell
+
+        editable = [col_name in EDITABLE_COLUMNS for col_name in columns]
+        for row in rows:
+            ws.append([styled(row.get(col_name), is_editable) for col_name, is_editable in zip(columns, editable)])
+
+        instructions = workbook.create_sheet(INSTRUCTIONS_SHEET_NAME)
+        for line in TemplateGenerationService._create_instructions():
+            instructions.append(line)
+
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
         return output
 
     @staticmethod
-    def _create_instructions() -> pd.DataFrame:
+    def _create_instructions() -> List[List[str]]:
         """Create instructions sheet content."""
         instructions = [
             ["HOW TO USE THIS TEMPLATE"],
@@ -382,4 +364,4 @@ class TemplateGenerationService:
             ["• All changes will be validated before saving"],
         ]
 
-        return pd.DataFrame(instructions)
+        return instructions
@@ -5,9 +5,9 @@ Handles file upload, validation, and parsing for bulk Excel uploads.
 """
 
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Optional
+from openpyxl import load_workbook
 from werkzeug.datastructures import FileStorage
-from datetime import datetime
 from flask import current_app
 
 # Try to import python-magic for MIME type validation (optional)
@@ -18,6 +18,14 @@ except ImportError:
     MAGIC_AVAILABLE = False
 
 
+DATA_SHEET_NAME = 'Data Entry'
+REQUIRED_COLUMNS = ['Field_ID', 'Entity_ID', 'Assignment_ID', 'Field_Name', 'Rep_Date']
+
+
+class TemplateColumnsError(ValueError):
+    """Raised when an upload does not have the template's required columns."""
+
+
 class FileUploadService:
     """Service for handling Excel/CSV file uploads and parsing."""
 
@@ -105,6 +113,9 @@ class FileUploadService:
         """
         Parse Excel/CSV file and extract rows.
 
+        Consumes iter_rows(), so the file is streamed chunk by chunk and the
+        row limit is enforced without materializing oversized uploads.
+
         Args:
             file: Uploaded file object
 
@@ -118,51 +129,24 @@ class FileUploadService:
         """
         errors = []
         rows = []
+        max_rows = current_app.config.get('BULK_UPLOAD_MAX_ROWS', 50000)
 
         try:
-            filename = file.filename.lower()
-
-            # Parse based on file type
-            if filename.endswith('.csv'):
-                df = pd.read_csv(file)
-            else:  # .xlsx or .xls
-                df = pd.read_excel(file, sheet_name='Data Entry')
-
-            # Validate required columns exist
-            required_cols = ['Field_ID', 'Entity_ID', 'Assignment_ID', 'Field_Name', 'Rep_Date']
-            missing_cols = [col for col in required_cols if col not in df.columns]
-
-            if missing_cols:
-                errors.append(
-                    f"Template missing required columns: {', '.join(missing_cols)}. "
-                    "Please download a fresh template."
-                )
-                return {
-                    'success': False,
-                    'rows': [],
-                    'total_rows': 0,
-                    'errors': errors
-                }
-
-            # Check max rows limit
-            max_rows = current_app.config.get('BULK_UPLOAD_MAX_ROWS', 1000)
-            if len(df) > max_rows:
-                errors.append(f"Maximum {max_rows} rows allowed (found {len(df)} rows)")
-                return {
-                    'success': False,
-                    'rows': [],
-                    'total_rows': len(df),
-                    'errors': errors
-                }
-
-            # Parse each row
-            for idx, row in df.iterrows():
-                try:
-                    parsed_row = FileUploadService._parse_row(row, idx + 2)  # +2 for Excel row number
-                    if parsed_row:
-                        rows.append(parsed_row)
-                except Exception as e:
-                    errors.append(f"Row {idx + 2}: {str(e)}")
+            row_count = 0
+            for parsed_row in FileUploadService.iter_rows(file):
+                row_count += 1
+                if row_count > max_rows:
+                    return {
+                        'success': False,
+                        'rows': [],
+                        'total_rows': row_count,
+                        'errors': [f"Maximum {max_rows} rows allowed (found more than {max_rows} rows)"]
+                    }
+
+                if 'parse_error' in parsed_row:
+                    errors.append(f"Row {parsed_row['row_number']}: {parsed_row['parse_error']}")
+                else:
+                    rows.append(parsed_row)
 
             # Check if any rows were parsed
             if not rows and not errors:
@@ -175,6 +159,14 @@ class FileUploadService:
                 'errors': errors
             }
 
+        except TemplateColumnsError as e:
+            return {
+                'success': False,
+                'rows': [],
+                'total_rows': 0,
+                'errors': [str(e)]
+            }
+
         except Exception as e:
             errors.append(f"Failed to parse file: {str(e)}")
             return {
@@ -185,63 +177,179 @@ class FileUploadService:
             }
 
     @staticmethod
-    def _parse_row(row, row_number: int) -> Dict:
+    def iter_rows(file: FileStorage, chunk_size: Optional[int] = None) -> Iterator[Dict]:
         """
-        Parse a single row from the DataFrame.
+        Stream parsed rows from the "Data Entry" sheet (or CSV).
+
+        The file is read in chunks (openpyxl read-only mode for .xlsx, chunked
+        read_csv for .csv) and each chunk is normalized with vectorized pandas
+        operations. Rows that cannot be parsed are yielded as
+        {'row_number': int, 'parse_error': str} so callers can report them.
 
         Args:
-            row: pandas Series (row)
-            row_number: Excel row number (for error reporting)
+            file: Uploaded file object
+            chunk_size: Rows per chunk (defaults to BULK_UPLOAD_PARSE_CHUNK_SIZE)
 
-        Returns:
-            dict: Parsed row data
+        Yields:
+            dict: Parsed row data (see _normalize_frame)
+
+        Raises:
+            TemplateColumnsError: If required template columns are missing
         """
-        # Extract dimension columns
-        dimensions = {}
-        for col in row.index:
-            if col.startswith('Dimension_'):
-                dim_name = col.replace('Dimension_', '')
-                dim_value = row[col]
-
-                # Only include non-empty dimension values
-                if pd.notna(dim_value) and str(dim_value).strip() != '':
-                    dimensions[dim_name.lower()] = str(dim_value).strip()
-
-        # Parse reporting date
-        rep_date = row['Rep_Date']
-        if pd.notna(rep_date) and str(rep_date).strip() not in ['', 'N/A', 'None']:
+        if chunk_size is None:
+            chunk_size = current_app.config.get('BULK_UPLOAD_PARSE_CHUNK_SIZE', 5000)
+
+        dimension_columns = None
+        row_number = 2  # Row 1 is the header row in Excel
+        for frame in FileUploadService._iter_frames(file, chunk_size):
+            if dimension_columns is None:
+                missing_cols = [col for col in REQUIRED_COLUMNS if col not in frame.columns]
+                if missing_cols:
+                    raise TemplateColumnsError(
+                        f"Template missing required columns: {', '.join(missing_cols)}. "
+                        "Please download a fresh template."
+                    )
+                # Dimension columns are identified once per file
+                dimension_columns = [col for col in frame.columns if str(col).startswith('Dimension_')]
+
+            yield from FileUploadService._normalize_frame(frame, row_number, dimension_columns)
+            row_number += len(frame)
+
+    @staticmethod
+    def _iter_frames(file: FileStorage, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Yield the upload as DataFrames of at most chunk_size rows."""
+        filename = file.filename.lower()
+
+        if filename.endswith('.csv'):
+            yield from pd.read_csv(file, chunksize=chunk_size)
+
+        elif filename.endswith('.xlsx'):
+            workbook = load_workbook(file, read_only=True, data_only=True)
             try:
-                if isinstance(rep_date, pd.Timestamp):
-                    reporting_date = rep_date.date()
-                elif isinstance(rep_date, datetime):
-                    reporting_date = rep_date.date()
-                else:
-                    # Try parsing string
-                    reporting_date = pd.to_datetime(str(rep_date)).date()
-            except Exception as e:
-                raise ValueError(f"Invalid reporting date format: {rep_date}. Expected YYYY-MM-DD")
-        else:
-            raise ValueError("Reporting date is missing or empty")
-
-        # Build row dictionary
-        parsed_row = {
-            'row_number': row_number,
-            'field_id': str(row['Field_ID']).strip() if pd.notna(row['Field_ID']) else None,
-            'field_name': str(row['Field_Name']).strip() if pd.notna(row['Field_Name']) else '',
-            'entity_id': int(row['Entity_ID']) if pd.notna(row['Entity_ID']) else None,
-            'assignment_id': str(row['Assignment_ID']).strip() if pd.notna(row['Assignment_ID']) else None,
-            'reporting_date': reporting_date,
-            'value': row['Value'] if pd.notna(row['Value']) else None,
-            'dimensions': dimensions if dimensions else None,
-            'notes': str(row['Notes']).strip() if pd.notna(row.get('Notes')) and str(row.get('Notes')).strip() != '' else None
-        }
+                if DATA_SHEET_NAME not in workbook.sheetnames:
+                    raise ValueError(f"Worksheet named '{DATA_SHEET_NAME}' not found")
+
+                sheet_rows = workbook[DATA_SHEET_NAME].iter_rows(values_only=True)
+                header = next(sheet_rows, None)
+                if header is None:
+                    return
+
+                columns = [
+                    str(col).strip() if col is not None else f'Unnamed: {idx}'
+                    for idx, col in enumerate(header)
+                ]
+                width = len(columns)
+
+                batch = []
+                for values in sheet_rows:
+                    # Read-only sheets may report ragged rows; align them to the header
+                    batch.append(tuple(values[:width]) + (None,) * (width - len(values)))
+                    if len(batch) >= chunk_size:
+                        yield pd.DataFrame(batch, columns=columns)
+                        batch = []
+                if batch:
+                    yield pd.DataFrame(batch, columns=columns)
+            finally:
+                workbook.close()
+
+        else:  # .xls (not supported by openpyxl)
+            df = pd.read_excel(file, sheet_name=DATA_SHEET_NAME)
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size]
 
-        # Validate required fields
-        if not parsed_row['field_id']:
-            raise ValueError("Field_ID is missing")
-        if not parsed_row['entity_id']:
-            raise ValueError("Entity_ID is missing")
-        if not parsed_row['assignment_id']:
-            raise ValueError("Assignment_ID is missing")
+    @staticmethod
+    def _clean_text(series: pd.Series) -> List[Optional[str]]:
+        """Strip values as strings; missing and blank values become None."""
+        text = series.astype('string').str.strip()
+        text = text.mask(text == '')
+        return text.astype(object).where(text.notna(), None).tolist()
+
+    @staticmethod
+    def _normalize_frame(df: pd.DataFrame, first_row_number: int, dimension_columns: List[str]) -> List[Dict]:
+        """
+        Normalize one chunk of rows with column-wise (vectorized) operations.
+
+        Args:
+            df: Chunk of rows with template headers
+            first_row_number: Excel row number of the first row in the chunk
+            dimension_columns: The file's Dimension_* columns
 
-        return parsed_row
+        Returns:
+            list: Parsed row dicts, or {'row_number', 'parse_error'} for bad rows
+        """
+        df = df.reset_index(drop=True)
+        size = len(df)
+        clean = FileUploadService._clean_text
+        empty = pd.Series([None] * size, dtype=object)
+
+        def column(name):
+            return df[name] if name in df.columns else empty
+
+        # Skip rows that are completely empty (e.g. formatted but unused sheet rows)
+        non_blank = df.notna().any(axis=1).tolist() if len(df.columns) else [False] * size
+
+        # Reporting dates: one vectorized parse for the whole chunk
+        rep_text = column('Rep_Date').astype('string').str.strip()
+        date_missing = (rep_text.isna() | rep_text.isin(['', 'N/A', 'None'])).tolist()
+        parsed_dates = pd.to_datetime(rep_text.mask(date_missing), errors='coerce', format='mixed')
+        reporting_dates = [None if pd.isna(d) else d.date() for d in parsed_dates]
+        raw_dates = column('Rep_Date').tolist()
+
+        # Entity IDs: numeric conversion for the whole column
+        entity_raw = column('Entity_ID')
+        entity_numeric = pd.to_numeric(entity_raw, errors='coerce')
+        entity_invalid = (entity_raw.notna() & entity_numeric.isna()).tolist()
+        entity_ids = [None if pd.isna(v) else int(v) for v in entity_numeric.tolist()]
+
+        field_ids = clean(column('Field_ID'))
+        assignment_ids = clean(column('Assignment_ID'))
+        field_names = [name or '' for name in clean(column('Field_Name'))]
+        notes = clean(column('Notes'))
+        value_series = column('Value').astype(object)
+        values = value_series.where(value_series.notna(), None).tolist()
+
+        dimension_values = [
+            (col.replace('Dimension_', '').lower(), clean(df[col]))
+            for col in dimension_columns
+        ]
+
+        rows = []
+        for i in range(size):
+            if not non_blank[i]:
+                continue
+            row_number = first_row_number + i
+
+            # First failing check wins: reporting date, then the ID columns
+            if date_missing[i]:
+                error = "Reporting date is missing or empty"
+            elif reporting_dates[i] is None:
+                error = f"Invalid reporting date format: {raw_dates[i]}. Expected YYYY-MM-DD"
+            elif not field_ids[i]:
+                error = "Field_ID is missing"
+            elif entity_invalid[i]:
+                error = f"Invalid Entity_ID: {entity_raw.iloc[i]}"
+            elif not entity_ids[i]:
+                error = "Entity_ID is missing"
+            elif not assignment_ids[i]:
+                error = "Assignment_ID is missing"
+            else:
+                error = None
+
+            if error:
+                rows.append({'row_number': row_number, 'parse_error': error})
+                continue
+
+            dimensions = {name: dim_values[i] for name, dim_values in dimension_values if dim_values[i]}
+            rows.append({
+                'row_number': row_number,
+                'field_id': field_ids[i],
+                'field_name': field_names[i],
+                'entity_id': entity_ids[i],
+                'assignment_id': assignment_ids[i],
+                'reporting_date': reporting_dates[i],
+                'value': values[i],
+                'dimensions': dimensions if dimensions else None,
+                'notes': notes[i]
+            })
+
+        return rows
@@ -4,13 +4,16 @@ Bulk Validation Service
 Handles validation of bulk uploads including overwrite detection.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from datetime import datetime
 
 
 class BulkValidationService:
     """Service for validating bulk upload data."""
 
+    # Uploaded keys matched per overwrite lookup query
+    OVERWRITE_LOOKUP_CHUNK_SIZE = 500
+
     @staticmethod
     def validate_and_check_overwrites(rows: List[Dict], current_user) -> Dict[str, Any]:
         """
@@ -48,40 +51,38 @@ class BulkValidationService:
                 'overwrite_rows': []
             }
 
-        # Check for overwrites (existing data)
+        # Check for overwrites (existing data) with chunked bulk lookups
+        existing_by_key = BulkValidationService._find_existing_data(validation_result['valid_rows'])
+
         overwrite_rows = []
         for row in validation_result['valid_rows']:
-            # Check if data already exists for this field + entity + date + dimensions
-            existing = ESGData.query.filter_by(
-                field_id=row['field_id'],
-                entity_id=row['entity_id'],
-                reporting_date=row['reporting_date'],
-                is_draft=False
-            ).first()
-
-            if existing:
-                # Check if dimensions match (if applicable)
-                if row.get('dimensions'):
-                    # For dimensional data, check if dimensions match
-                    if existing.dimension_values != row['dimensions']:
-                        # Different dimension combination, not an overwrite
-                        continue
-
-                # This is an overwrite
-                overwrite_rows.append({
-                    'row_number': row['row_number'],
-                    'field_name': row['field_name'],
-                    'old_value': existing.raw_value,
-                    'new_value': str(row['parsed_value']),
-                    'submitted_date': existing.created_at.isoformat(),
-                    'has_notes': existing.has_notes(),
-                    'has_attachments': len(existing.attachments) > 0,
-                    'data_id': existing.data_id  # Store for later use
-                })
-
-                # Mark row as overwrite
-                row['is_overwrite'] = True
-                row['existing_data_id'] = existing.data_id
+            existing = existing_by_key.get(
+                (row['field_id'], row['entity_id'], row['reporting_date'])
+            )
+
+            # For dimensional data, only the same dimension combination is an overwrite
+            if existing and row.get('dimensions'):
+                existing = existing['by_dimension_key'].get(
+                    ESGData.canonical_dimension_key(row['dimensions'])
+                )
+            if not existing:
+                continue
+
+            # This is an overwrite
+            overwrite_rows.append({
+                'row_number': row['row_number'],
+                'field_name': row['field_name'],
+                'old_value': existing['raw_value'],
+                'new_value': str(row['parsed_value']),
+                'submitted_date': existing['created_at'].isoformat() if existing['created_at'] else None,
+                'has_notes': bool(existing['notes'] and existing['notes'].strip()),
+                'has_attachments': existing['attachment_count'] > 0,
+                'data_id': existing['data_id']  # Store for later use
+            })
+
+            # Mark row as overwrite
+            row['is_overwrite'] = True
+            row['existing_data_id'] = existing['data_id']
 
         return {
             **validation_result,
@@ -89,6 +90,66 @@ class BulkValidationService:
             'overwrite_rows': overwrite_rows
         }
 
+    @staticmethod
+    def _find_existing_data(rows: List[Dict]) -> Dict[Tuple, Dict[str, Any]]:
+        """
+        Look up submitted (non-draft) data for all uploaded keys in chunks.
+
+        Each chunk is one query matching (field_id, entity_id, reporting_date)
+        row values against esg_data - a probe on the unique entry index - with
+        attachment counts aggregated in the same statement. Entries are
+        further keyed by their stored canonical dimension_key, so dimensional
+        rows are matched without loading dimension_values.
+
+        Args:
+            rows: Validated row dictionaries
+
+        Returns:
+            dict: (field_id, entity_id, reporting_date) -> summary of the oldest
+            existing entry, with 'by_dimension_key' mapping each dimension key
+            to the summary of its entry
+        """
+        from sqlalchemy import func, tuple_
+        from ....extensions import db
+        from ....models.esg_data import ESGData, ESGDataAttachment
+
+        keys = list({(row['field_id'], row['entity_id'], row['reporting_date']) for row in rows})
+        existing_by_key = {}
+
+        for offset in range(0, len(keys), BulkValidationService.OVERWRITE_LOOKUP_CHUNK_SIZE):
+            chunk = keys[offset:offset + BulkValidationService.OVERWRITE_LOOKUP_CHUNK_SIZE]
+            results = db.session.query(
+                ESGData.data_id,
+                ESGData.field_id,
+                ESGData.entity_id,
+                ESGData.reporting_date,
+                ESGData.dimension_key,
+                ESGData.raw_value,
+                ESGData.created_at,
+                ESGData.notes,
+                func.count(ESGDataAttachment.id).label('attachment_count')
+            ).outerjoin(
+                ESGDataAttachment, ESGDataAttachment.data_id == ESGData.data_id
+            ).filter(
+                tuple_(ESGData.field_id, ESGData.entity_id, ESGData.reporting_date).in_(chunk),
+                ESGData.is_draft.is_(False)
+            ).group_by(ESGData.data_id).order_by(ESGData.created_at).all()
+
+            for result in results:
+                key = (result.field_id, result.entity_id, result.reporting_date)
+                summary = {
+                    'data_id': result.data_id,
+                    'raw_value': result.raw_value,
+                    'created_at': result.created_at,
+                    'notes': result.notes,
+                    'attachment_count': result.attachment_count
+                }
+                # Keep the first (oldest) entry per key and per dimension key
+                entry = existing_by_key.setdefault(key, {**summary, 'by_dimension_key': {}})
+                entry['by_dimension_key'].setdefault(result.dimension_key, summary)
+
+        return existing_by_key
+
     @staticmethod
     def check_dimension_version_changes(rows: List[Dict]) -> Dict[str, Any]:
         """
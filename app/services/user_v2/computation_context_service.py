@@ -8,11 +8,21 @@ formulas, dependencies, calculation steps, and historical trends.
 This service helps users understand how computed values are derived and
 identify any data gaps or missing dependencies.
 
+The modal fires several endpoints for the same (field, entity, date) at once,
+so all of them are answered from one ComputationSnapshot: the transitive
+field set comes from the compiled dependency graph, then fields, assignments
+and the relevant ESGData values are loaded with a handful of IN-queries. The
+snapshot holds plain values only and is cached for a short TTL
+(COMPUTATION_CONTEXT_CACHE_TTL) keyed by tenant, dependency graph version,
+field, entity and date, and dropped when the entity's data is written.
+
 Author: Backend Developer Agent
 Phase: 3 - Computation Context
 Date: 2025-01-04
 """
 
+import re
+from collections import namedtuple
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
@@ -24,12 +34,225 @@ from ...models.esg_data import ESGData
 from ...models.entity import Entity
 from ...models.data_assignment import DataPointAssignment
 from ...extensions import db
-from ..assignment_versioning import resolve_assignment
+from ...middleware.tenant import get_current_tenant
+from ...utils.cache import LRUTTLCache, MISSING
+from ...utils.formula_compiler import formula_compiler
+from ..assignment_versioning import resolve_assignments_bulk
+from ..dependency_graph import dependency_graphs
+
+
+ContextField = namedtuple('ContextField', [
+    'field_id', 'field_name', 'field_code', 'description', 'default_unit',
+    'is_computed', 'formula_expression', 'constant_multiplier', 'company_id'
+])
+ContextMapping = namedtuple('ContextMapping', ['variable_name', 'coefficient', 'raw_field_id'])
+# Aggregation window of a direct dependency, from its assignment frequency
+ContextWindow = namedtuple('ContextWindow', ['frequency', 'period_start', 'period_end'])
+# A stored value: raw_value, or the materialized calculated_value of computed rows
+ContextValue = namedtuple('ContextValue', ['value', 'reporting_date', 'updated_at'])
+
+snapshot_cache = LRUTTLCache(max_size=500, ttl=15)
+
+
+def init_snapshot_cache(app):
+    """
+    Configure the computation context snapshot cache from the app config.
+
+    Args:
+        app: Flask application instance
+    """
+    snapshot_cache.ttl = app.config.get('COMPUTATION_CONTEXT_CACHE_TTL', 15)
+
+
+class ComputationSnapshot:
+    """
+    Everything the computation context endpoints need for one
+    (field, entity, reporting_date), loaded up front.
+
+    Attributes:
+        fields: field_id -> ContextField for the field and all its dependencies
+        mappings: computed field_id -> tuple of ContextMapping in formula order
+        assigned: field_ids with an active assignment for the entity
+        windows: direct dependency field_id -> ContextWindow
+        window_values: direct dependency field_id -> [ContextValue] in its window, by date
+        values_at_date: field_id -> ContextValue stored at reporting_date
+        latest_values: direct dependency field_id -> latest ContextValue on or before reporting_date
+    """
+
+    def __init__(self, field_id: str, entity_id: int, reporting_date: date):
+        self.field_id = field_id
+        self.entity_id = entity_id
+        self.reporting_date = reporting_date
+        self.fields: Dict[str, ContextField] = {}
+        self.mappings: Dict[str, Tuple[ContextMapping, ...]] = {}
+        self.assigned = frozenset()
+        self.windows: Dict[str, ContextWindow] = {}
+        self.window_values: Dict[str, List[ContextValue]] = {}
+        self.values_at_date: Dict[str, ContextValue] = {}
+        self.latest_values: Dict[str, ContextValue] = {}
+
+    @property
+    def field(self) -> Optional[ContextField]:
+        return self.fields.get(self.field_id)
+
+    @property
+    def root_mappings(self) -> Tuple[ContextMapping, ...]:
+        return self.mappings.get(self.field_id, ())
+
+    def field_name(self, field_id: str) -> Optional[str]:
+        field = self.fields.get(field_id)
+        return field.field_name if field else None
 
 
 class ComputationContextService:
     """Service for handling computation context and dependency analysis."""
 
+    @staticmethod
+    def get_snapshot(field_id: str, entity_id: int, reporting_date: date) -> ComputationSnapshot:
+        """
+        Return the cached snapshot for a computed field, entity and date, loading it on a miss.
+
+        The key includes the dependency graph version, so formula and mapping
+        changes are picked up immediately. Committed raw data writes drop the
+        entity's snapshots (see recompute_pipeline); the TTL bounds anything else.
+        """
+        tenant = get_current_tenant()
+        company_id = tenant.id if tenant else db.session.query(
+            FrameworkDataField.company_id
+        ).filter(FrameworkDataField.field_id == field_id).scalar()
+
+        cache_key = (company_id, dependency_graphs.version(company_id), field_id, entity_id, reporting_date)
+        snapshot = snapshot_cache.get(cache_key)
+        if snapshot is MISSING:
+            snapshot = ComputationContextService.load_snapshot(company_id, field_id, entity_id, reporting_date)
+            snapshot_cache.set(cache_key, snapshot, tags=((company_id, entity_id),))
+        return snapshot
+
+    @staticmethod
+    def invalidate_snapshots(company_id: int, entity_ids):
+        """Drop cached snapshots of entities whose data changed."""
+        for entity_id in entity_ids:
+            snapshot_cache.invalidate_tag((company_id, entity_id))
+
+    @staticmethod
+    def load_snapshot(company_id: Optional[int], field_id: str, entity_id: int,
+                      reporting_date: date) -> ComputationSnapshot:
+        """
+        Load a snapshot with a fixed number of queries, independent of the tree size.
+
+        Queries: fields (1), assignments (1), values at the date and in the
+        dependency windows (1), latest dependency values (1).
+        """
+        snapshot = ComputationSnapshot(field_id, entity_id, reporting_date)
+
+        graph = dependency_graphs.get(company_id) if company_id is not None else None
+        field_ids = {field_id}
+        if graph is not None:
+            field_ids.update(graph.all_dependencies(field_id))
+            for graph_field_id in field_ids:
+                edges = graph.edges.get(graph_field_id)
+                if edges:
+                    snapshot.mappings[graph_field_id] = tuple(
+                        ContextMapping(edge.variable_name, edge.coefficient if edge.coefficient is not None else 1.0,
+                                       edge.raw_field_id)
+                        for edge in edges
+                    )
+
+        # 1. Fields
+        snapshot.fields = {
+            row.field_id: ContextField(*row)
+            for row in db.session.query(
+                FrameworkDataField.field_id, FrameworkDataField.field_name, FrameworkDataField.field_code,
+                FrameworkDataField.description, FrameworkDataField.default_unit,
+                FrameworkDataField.is_computed, FrameworkDataField.formula_expression,
+                FrameworkDataField.constant_multiplier, FrameworkDataField.company_id
+            ).filter(FrameworkDataField.field_id.in_(field_ids))
+        }
+        if not snapshot.field or not snapshot.field.is_computed:
+            return snapshot
+
+        # 2. Assignments of every field for the entity
+        assignments = resolve_assignments_bulk(list(field_ids), [entity_id])
+        snapshot.assigned = frozenset(assigned_field_id for assigned_field_id, _ in assignments)
+        dependency_ids = {mapping.raw_field_id for mapping in snapshot.root_mappings}
+        for dependency_id in dependency_ids:
+            assignment = assignments.get((dependency_id, entity_id))
+            if assignment:
+                snapshot.windows[dependency_id] = ContextWindow(
+                    assignment.frequency,
+                    *ComputationContextService._aggregation_window(assignment, reporting_date)
+                )
+
+        # 3. Values at the reporting date (tree) and in the dependency windows (steps)
+        window_start = min((window.period_start for window in snapshot.windows.values()), default=reporting_date)
+        window_filters = [ESGData.reporting_date == reporting_date]
+        if snapshot.windows:
+            window_filters.append(and_(
+                ESGData.field_id.in_(snapshot.windows),
+                ESGData.reporting_date >= window_start,
+                ESGData.reporting_date <= reporting_date
+            ))
+        rows = ComputationContextService._value_query(company_id).filter(
+            ESGData.field_id.in_(field_ids),
+            ESGData.entity_id == entity_id,
+            or_(*window_filters)
+        ).order_by(ESGData.reporting_date)
+
+        for row_field_id, row_date, raw_value, calculated_value, updated_at in rows:
+            value = ContextValue(raw_value if raw_value is not None else calculated_value, row_date, updated_at)
+            if row_date == reporting_date:
+                snapshot.values_at_date[row_field_id] = value
+            window = snapshot.windows.get(row_field_id)
+            if window and value.value is not None and window.period_start <= row_date <= window.period_end:
+                snapshot.window_values.setdefault(row_field_id, []).append(value)
+
+        # 4. Latest submitted value of each direct dependency (validation, current values)
+        if dependency_ids:
+            latest = db.session.query(
+                ESGData.field_id, func.max(ESGData.reporting_date).label('reporting_date')
+            ).filter(
+                ESGData.field_id.in_(dependency_ids),
+                ESGData.entity_id == entity_id,
+                ESGData.reporting_date <= reporting_date,
+                ESGData.raw_value.isnot(None),
+                ESGData.dimension_key == '',
+                *ComputationContextService._company_filter(company_id)
+            ).group_by(ESGData.field_id).subquery()
+
+            latest_rows = ComputationContextService._value_query(company_id).join(
+                latest, and_(ESGData.field_id == latest.c.field_id,
+                             ESGData.reporting_date == latest.c.reporting_date)
+            ).filter(ESGData.entity_id == entity_id, ESGData.raw_value.isnot(None))
+
+            for row_field_id, row_date, raw_value, _, updated_at in latest_rows:
+                snapshot.latest_values[row_field_id] = ContextValue(raw_value, row_date, updated_at)
+
+        return snapshot
+
+    @staticmethod
+    def _company_filter(company_id: Optional[int]) -> list:
+        return [ESGData.company_id == company_id] if company_id is not None else []
+
+    @staticmethod
+    def _value_query(company_id: Optional[int]):
+        return db.session.query(
+            ESGData.field_id, ESGData.reporting_date, ESGData.raw_value,
+            ESGData.calculated_value, ESGData.updated_at
+        ).filter(
+            ESGData.is_draft.is_(False),
+            ESGData.dimension_key == '',  # Field totals only, not their dimensional breakdowns
+            *ComputationContextService._company_filter(company_id)
+        )
+
+    @staticmethod
+    def _aggregation_window(assignment: DataPointAssignment, reporting_date: date) -> Tuple[date, date]:
+        """Period whose values feed a dependency's step: the FY for annual dependencies, else one month."""
+        if assignment.frequency == 'Annual':
+            company = assignment.company
+            fy_year = reporting_date.year if reporting_date.month >= company.get_fy_start_month() else reporting_date.year - 1
+            return company.get_fy_start_date(fy_year), min(company.get_fy_end_date(fy_year), reporting_date)
+        return reporting_date - relativedelta(months=1), reporting_date
+
     @staticmethod
     def get_computation_context(field_id: str, entity_id: int, reporting_date: date) -> Dict[str, Any]:
         """
@@ -54,69 +277,44 @@ class ComputationContextService:
             - calculation_status: 'complete'|'partial'|'failed'
         """
         try:
-            # Get the computed field
-            field = FrameworkDataField.query.get(field_id)
+            snapshot = ComputationContextService.get_snapshot(field_id, entity_id, reporting_date)
+            field = snapshot.field
             if not field or not field.is_computed:
                 return {
                     'success': False,
                     'error': 'Field not found or not a computed field'
                 }
 
-            # Get assignment for this field
-            assignment = resolve_assignment(field_id, entity_id, reporting_date)
-            if not assignment:
+            if field_id not in snapshot.assigned:
                 return {
                     'success': False,
                     'error': 'No assignment found for this field'
                 }
 
-            # Build dependency tree
-            dependency_tree = ComputationContextService.build_dependency_tree(
-                field_id, entity_id, reporting_date
-            )
-
-            # Get calculation steps
-            calculation_steps = ComputationContextService.get_calculation_steps(
-                field_id, entity_id, reporting_date
-            )
-
-            # Validate dependencies
-            validation = ComputationContextService.validate_dependencies(
-                field_id, entity_id, reporting_date
-            )
+            dependency_tree = ComputationContextService._tree_from_snapshot(snapshot, field_id, 5, 0)
+            calculation_steps = ComputationContextService._steps_from_snapshot(snapshot)
+            validation = ComputationContextService._validation_from_snapshot(snapshot)
 
             # Get historical trend
             historical_trend = ComputationContextService.get_historical_calculation_trend(
                 field_id, entity_id, periods=12
             )
 
-            # Format formula for display
-            readable_formula = ComputationContextService.format_formula_for_display(
-                field.formula_expression, field_id
+            readable_formula = ComputationContextService._readable_formula(
+                field, snapshot.root_mappings, snapshot.field_name
             )
 
-            # Get current values
             current_values = {}
-            for mapping in field.variable_mappings:
-                dep_data = ESGData.query.filter(
-                    ESGData.field_id == mapping.raw_field_id,
-                    ESGData.entity_id == entity_id,
-                    ESGData.reporting_date <= reporting_date
-                ).order_by(ESGData.reporting_date.desc()).first()
-
-                if dep_data:
+            for mapping in snapshot.root_mappings:
+                latest = snapshot.latest_values.get(mapping.raw_field_id)
+                if latest:
                     current_values[mapping.raw_field_id] = {
-                        'value': dep_data.raw_value,
-                        'date': dep_data.reporting_date.isoformat(),
+                        'value': latest.value,
+                        'date': latest.reporting_date.isoformat(),
                         'variable': mapping.variable_name
                     }
 
-            # Check if computed value exists
-            computed_data = ESGData.query.filter(
-                ESGData.field_id == field_id,
-                ESGData.entity_id == entity_id,
-                ESGData.reporting_date == reporting_date
-            ).first()
+            computed_data = snapshot.values_at_date.get(field_id)
 
             # Determine calculation status
             if validation['is_complete']:
@@ -140,18 +338,19 @@ class ComputationContextService:
                 'dependencies': [
                     {
                         'field_id': mapping.raw_field_id,
-                        'field_name': mapping.raw_field.field_name,
+                        'field_name': snapshot.field_name(mapping.raw_field_id),
                         'variable_name': mapping.variable_name,
                         'coefficient': mapping.coefficient
                     }
-                    for mapping in field.variable_mappings
+                    for mapping in snapshot.root_mappings
                 ],
                 'dependency_tree': dependency_tree,
                 'calculation_steps': calculation_steps,
                 'current_values': current_values,
                 'missing_dependencies': validation['missing'],
                 'historical_trend': historical_trend,  # Return full object with data_points, trend, change_rate
-                'last_calculated': computed_data.updated_at.isoformat() if computed_data else None,
+                'last_calculated': (computed_data.updated_at.isoformat()
+                                    if computed_data and computed_data.updated_at else None),
                 'calculation_status': calculation_status,
                 'validation': validation
             }
@@ -185,72 +384,8 @@ class ComputationContextService:
             - dependencies: Recursive list of dependencies
         """
         try:
-            # Prevent infinite recursion
-            if current_depth >= max_depth:
-                return {
-                    'field_id': field_id,
-                    'field_name': 'Max depth reached',
-                    'status': 'unknown',
-                    'dependencies': []
-                }
-
-            # Get field
-            field = FrameworkDataField.query.get(field_id)
-            if not field:
-                return {
-                    'field_id': field_id,
-                    'field_name': 'Unknown field',
-                    'status': 'missing',
-                    'dependencies': []
-                }
-
-            # Get current value
-            data = ESGData.query.filter(
-                ESGData.field_id == field_id,
-                ESGData.entity_id == entity_id,
-                ESGData.reporting_date == reporting_date
-            ).first()
-
-            value = data.raw_value if data else None
-            status = 'available' if value is not None else 'missing'
-
-            # Build tree node
-            node = {
-                'field_id': field.field_id,
-                'field_name': field.field_name,
-                'field_code': field.field_code,
-                'value': value,
-                'unit': field.default_unit,
-                'status': status,
-                'is_computed': field.is_computed,
-                'dependencies': []
-            }
-
-            # If this is a computed field, recursively get dependencies
-            if field.is_computed:
-                for mapping in field.variable_mappings:
-                    dependency_node = ComputationContextService.build_dependency_tree(
-                        mapping.raw_field_id,
-                        entity_id,
-                        reporting_date,
-                        max_depth,
-                        current_depth + 1
-                    )
-                    dependency_node['variable_name'] = mapping.variable_name
-                    dependency_node['coefficient'] = mapping.coefficient
-                    node['dependencies'].append(dependency_node)
-
-                # Update status based on dependencies
-                if node['dependencies']:
-                    dep_statuses = [dep['status'] for dep in node['dependencies']]
-                    if all(s == 'available' for s in dep_statuses):
-                        node['status'] = 'available'
-                    elif any(s == 'available' for s in dep_statuses):
-                        node['status'] = 'partial'
-                    else:
-                        node['status'] = 'missing'
-
-            return node
+            snapshot = ComputationContextService.get_snapshot(field_id, entity_id, reporting_date)
+            return ComputationContextService._tree_from_snapshot(snapshot, field_id, max_depth, current_depth)
 
         except Exception as e:
             current_app.logger.error(f'Error building dependency tree: {str(e)}')
@@ -262,6 +397,63 @@ class ComputationContextService:
                 'dependencies': []
             }
 
+    @staticmethod
+    def _tree_from_snapshot(snapshot: ComputationSnapshot, field_id: str,
+                            max_depth: int, current_depth: int) -> Dict[str, Any]:
+        """Build one tree node (and its subtree) from the snapshot."""
+        # Prevent infinite recursion
+        if current_depth >= max_depth:
+            return {
+                'field_id': field_id,
+                'field_name': 'Max depth reached',
+                'status': 'unknown',
+                'dependencies': []
+            }
+
+        field = snapshot.fields.get(field_id)
+        if not field:
+            return {
+                'field_id': field_id,
+                'field_name': 'Unknown field',
+                'status': 'missing',
+                'dependencies': []
+            }
+
+        data = snapshot.values_at_date.get(field_id)
+        value = data.value if data else None
+
+        node = {
+            'field_id': field.field_id,
+            'field_name': field.field_name,
+            'field_code': field.field_code,
+            'value': value,
+            'unit': field.default_unit,
+            'status': 'available' if value is not None else 'missing',
+            'is_computed': field.is_computed,
+            'dependencies': []
+        }
+
+        if field.is_computed:
+            for mapping in snapshot.mappings.get(field_id, ()):
+                dependency_node = ComputationContextService._tree_from_snapshot(
+                    snapshot, mapping.raw_field_id, max_depth, current_depth + 1
+                )
+                dependency_node['variable_name'] = mapping.variable_name
+                dependency_node['coefficient'] = mapping.coefficient
+                node['dependencies'].append(dependency_node)
+
+            # Update status based on dependencies
+            if node['dependencies']:
+                dep_statuses = [dep['status'] for dep in node['dependencies']]
+                if all(s == 'available' for s in dep_statuses):
+                    node['status'] = 'available'
+                elif any(s == 'available' for s in dep_statuses):
+                    node['status'] = 'partial'
+                else:
+                    node['status'] = 'missing'
+
+        return node
+
     @staticmethod
     def get_calculation_steps(field_id: str, entity_id: int, reporting_date: date) -> List[Dict[str, Any]]:
         """
@@ -282,124 +474,8 @@ class ComputationContextService:
             - unit: Unit of measurement
         """
         try:
-            field = FrameworkDataField.query.get(field_id)
-            if not field or not field.is_computed:
-                return []
-
-            steps = []
-            step_number = 1
-
-            # Step 1: Gather dependency values
-            dependency_values = {}
-            for mapping in field.variable_mappings:
-                dep_field = mapping.raw_field
-                assignment = resolve_assignment(mapping.raw_field_id, entity_id, reporting_date)
-
-                if assignment:
-                    # Get aggregation period based on frequency
-                    if assignment.frequency == 'Annual':
-                        company = assignment.company
-                        fy_year = reporting_date.year if reporting_date.month >= company.get_fy_start_month() else reporting_date.year - 1
-                        period_start = company.get_fy_start_date(fy_year)
-                        period_end = min(company.get_fy_end_date(fy_year), reporting_date)
-                    else:
-                        period_start = reporting_date - relativedelta(months=1)
-                        period_end = reporting_date
-
-                    # Get values in period
-                    values = ESGData.query.filter(
-                        ESGData.field_id == mapping.raw_field_id,
-                        ESGData.entity_id == entity_id,
-                        ESGData.reporting_date >= period_start,
-                        ESGData.reporting_date <= period_end,
-                        ESGData.raw_value.isnot(None)
-                    ).order_by(ESGData.reporting_date).all()
-
-                    if values:
-                        # For now, use latest value (can be enhanced with aggregation logic)
-                        latest_value = float(values[-1].raw_value) if values[-1].raw_value else 0
-                        dependency_values[mapping.variable_name] = latest_value * mapping.coefficient
-
-                        steps.append({
-                            'step': step_number,
-                            'description': f'Get value for {dep_field.field_name}',
-                            'operation': 'FETCH',
-                            'inputs': {
-                                'field': dep_field.field_name,
-                                'period': f'{period_start.isoformat()} to {period_end.isoformat()}',
-                                'values_count': len(values)
-                            },
-                            'output': latest_value,
-                            'unit': dep_field.default_unit,
-                            'details': f'Retrieved {len(values)} value(s), using latest: {latest_value}'
-                        })
-                        step_number += 1
-
-                        # If coefficient is applied
-                        if mapping.coefficient != 1.0:
-                            steps.append({
-                                'step': step_number,
-                                'description': f'Apply coefficient to {mapping.variable_name}',
-                                'operation': 'MULTIPLY',
-                                'inputs': {
-                                    'value': latest_value,
-                                    'coefficient': mapping.coefficient
-                                },
-                                'output': latest_value * mapping.coefficient,
-                                'unit': dep_field.default_unit,
-                                'details': f'{latest_value} × {mapping.coefficient} = {latest_value * mapping.coefficient}'
-                            })
-                            step_number += 1
-
-            # Step: Evaluate formula
-            if dependency_values:
-                formula = field.formula_expression
-                computed_formula = formula
-
-                for var_name, value in dependency_values.items():
-                    computed_formula = computed_formula.replace(var_name, str(value))
-
-                try:
-                    result = eval(computed_formula)
-                    steps.append({
-                        'step': step_number,
-                        'description': f'Calculate formula: {formula}',
-                        'operation': 'FORMULA',
-                        'inputs': dependency_values,
-                        'output': result,
-                        'unit': field.default_unit,
-                        'details': f'{formula} = {computed_formula} = {result}'
-                    })
-                    step_number += 1
-
-                    # Apply constant multiplier if present
-                    if field.constant_multiplier and field.constant_multiplier != 1.0:
-                        final_result = result * field.constant_multiplier
-                        steps.append({
-                            'step': step_number,
-                            'description': 'Apply constant multiplier',
-                            'operation': 'MULTIPLY',
-                            'inputs': {
-                                'value': result,
-                                'multiplier': field.constant_multiplier
-                            },
-                            'output': final_result,
-                            'unit': field.default_unit,
-                            'details': f'{result} × {field.constant_multiplier} = {final_result}'
-                        })
-
-                except Exception as e:
-                    steps.append({
-                        'step': step_number,
-                        'description': 'Formula evaluation failed',
-                        'operation': 'ERROR',
-                        'inputs': dependency_values,
-                        'output': None,
-                        'unit': None,
-                        'details': f'Error: {str(e)}'
-                    })
-
-            return steps
+            snapshot = ComputationContextService.get_snapshot(field_id, entity_id, reporting_date)
+            return ComputationContextService._steps_from_snapshot(snapshot)
 
         except Exception as e:
             current_app.logger.error(f'Error getting calculation steps: {str(e)}')
@@ -413,6 +489,114 @@ class ComputationContextService:
                 'details': str(e)
             }]
 
+    @staticmethod
+    def _steps_from_snapshot(snapshot: ComputationSnapshot) -> List[Dict[str, Any]]:
+        field = snapshot.field
+        if not field or not field.is_computed:
+            return []
+
+        steps = []
+        step_number = 1
+
+        # Step 1: Gather dependency values
+        dependency_values = {}
+        for mapping in snapshot.root_mappings:
+            window = snapshot.windows.get(mapping.raw_field_id)
+            if not window:
+                continue
+            dep_field = snapshot.fields.get(mapping.raw_field_id)
+            values = snapshot.window_values.get(mapping.raw_field_id)
+            if not values:
+                continue
+
+            # For now, use latest value (can be enhanced with aggregation logic)
+            latest_value = float(values[-1].value) if values[-1].value else 0
+            dependency_values[mapping.variable_name] = latest_value * mapping.coefficient
+
+            steps.append({
+                'step': step_number,
+                'description': f'Get value for {dep_field.field_name}',
+                'operation': 'FETCH',
+                'inputs': {
+                    'field': dep_field.field_name,
+                    'period': f'{window.period_start.isoformat()} to {window.period_end.isoformat()}',
+                    'values_count': len(values)
+                },
+                'output': latest_value,
+                'unit': dep_field.default_unit,
+                'details': f'Retrieved {len(values)} value(s), using latest: {latest_value}'
+            })
+            step_number += 1
+
+            # If coefficient is applied
+            if mapping.coefficient != 1.0:
+                steps.append({
+                    'step': step_number,
+                    'description': f'Apply coefficient to {mapping.variable_name}',
+                    'operation': 'MULTIPLY',
+                    'inputs': {
+                        'value': latest_value,
+                        'coefficient': mapping.coefficient
+                    },
+                    'output': latest_value * mapping.coefficient,
+                    'unit': dep_field.default_unit,
+                    'details': f'{latest_value} × {mapping.coefficient} = {latest_value * mapping.coefficient}'
+                })
+                step_number += 1
+
+        # Step: Evaluate formula
+        if dependency_values:
+            formula = field.formula_expression
+            computed_formula = formula
+
+            try:
+                # Substitution is for display only; evaluation uses the compiled formula
+                computed_formula = re.sub(
+                    r'\b[A-Z]\b',
+                    lambda match: str(dependency_values.get(match.group(0), match.group(0))),
+                    formula
+                )
+                result = formula_compiler.for_field(field).evaluate(dependency_values)
+                steps.append({
+                    'step': step_number,
+                    'description': f'Calculate formula: {formula}',
+                    'operation': 'FORMULA',
+                    'inputs': dependency_values,
+                    'output': result,
+                    'unit': field.default_unit,
+                    'details': f'{formula} = {computed_formula} = {result}'
+                })
+                step_number += 1
+
+                # Apply constant multiplier if present
+                if field.constant_multiplier and field.constant_multiplier != 1.0:
+                    final_result = result * field.constant_multiplier
+                    steps.append({
+                        'step': step_number,
+                        'description': 'Apply constant multiplier',
+                        'operation': 'MULTIPLY',
+                        'inputs': {
+                            'value': result,
+                            'multiplier': field.constant_multiplier
+                        },
+                        'output': final_result,
+                        'unit': field.default_unit,
+                        'details': f'{result} × {field.constant_multiplier} = {final_result}'
+                    })
+
+            except Exception as e:
+                steps.append({
+                    'step': step_number,
+                    'description': 'Formula evaluation failed',
+                    'operation': 'ERROR',
+                    'inputs': dependency_values,
+                    'output': None,
+                    'unit': None,
+                    'details': f'Error: {str(e)}'
+                })
+
+        return steps
+
     @staticmethod
     def format_formula_for_display(formula_expression: str, field_id: str) -> str:
         """
@@ -433,31 +617,45 @@ class ComputationContextService:
             if not field:
                 return formula_expression
 
-            # Create a readable version by replacing variables with field names
-            readable = formula_expression
-            for mapping in field.variable_mappings:
-                dep_field = mapping.raw_field
-                field_label = f"{dep_field.field_name}"
-                if mapping.coefficient != 1.0:
-                    field_label = f"({mapping.coefficient} × {field_label})"
-                readable = readable.replace(mapping.variable_name, field_label)
-
-            # Replace operators with symbols
-            readable = readable.replace('*', ' × ')
-            readable = readable.replace('/', ' ÷ ')
-            readable = readable.replace('+', ' + ')
-            readable = readable.replace('-', ' − ')
-
-            # Add constant multiplier if present
-            if field.constant_multiplier and field.constant_multiplier != 1.0:
-                readable = f"({readable}) × {field.constant_multiplier}"
-
-            return readable
+            mappings = [
+                ContextMapping(mapping.variable_name, mapping.coefficient, mapping.raw_field_id)
+                for mapping in field.variable_mappings
+            ]
+            names = {mapping.raw_field_id: mapping.raw_field.field_name for mapping in field.variable_mappings}
+            return ComputationContextService._readable_formula(
+                field, mappings, names.get, formula_expression
+            )
 
         except Exception as e:
             current_app.logger.error(f'Error formatting formula: {str(e)}')
             return formula_expression
 
+    @staticmethod
+    def _readable_formula(field, mappings, field_name, formula_expression: Optional[str] = None) -> str:
+        """Replace formula variables with field names and operators with symbols."""
+        formula_expression = formula_expression or field.formula_expression
+        if not formula_expression:
+            return "No formula defined"
+
+        readable = formula_expression
+        for mapping in mappings:
+            field_label = f"{field_name(mapping.raw_field_id)}"
+            if mapping.coefficient != 1.0:
+                field_label = f"({mapping.coefficient} × {field_label})"
+            readable = readable.replace(mapping.variable_name, field_label)
+
+        # Replace operators with symbols
+        readable = readable.replace('*', ' × ')
+        readable = readable.replace('/', ' ÷ ')
+        readable = readable.replace('+', ' + ')
+        readable = readable.replace('-', ' − ')
+
+        # Add constant multiplier if present
+        if field.constant_multiplier and field.constant_multiplier != 1.0:
+            readable = f"({readable}) × {field.constant_multiplier}"
+
+        return readable
+
     @staticmethod
     def get_historical_calculation_trend(field_id: str, entity_id: int, periods: int = 12) -> Dict[str, Any]:
         """
@@ -572,56 +770,8 @@ class ComputationContextService:
             - missing: List of missing dependencies
         """
         try:
-            field = FrameworkDataField.query.get(field_id)
-            if not field or not field.is_computed:
-                return {
-                    'is_complete': False,
-                    'satisfied_count': 0,
-                    'total_count': 0,
-                    'missing': []
-                }
-
-            total_count = len(field.variable_mappings)
-            satisfied_count = 0
-            missing = []
-
-            for mapping in field.variable_mappings:
-                dep_field = mapping.raw_field
-
-                # Check if assignment exists
-                assignment = resolve_assignment(mapping.raw_field_id, entity_id, reporting_date)
-                if not assignment:
-                    missing.append({
-                        'field_id': mapping.raw_field_id,
-                        'field_name': dep_field.field_name,
-                        'reason': 'No assignment found for this field'
-                    })
-                    continue
-
-                # Check if data exists
-                data = ESGData.query.filter(
-                    ESGData.field_id == mapping.raw_field_id,
-                    ESGData.entity_id == entity_id,
-                    ESGData.reporting_date <= reporting_date,
-                    ESGData.raw_value.isnot(None)
-                ).first()
-
-                if data:
-                    satisfied_count += 1
-                else:
-                    missing.append({
-                        'field_id': mapping.raw_field_id,
-                        'field_name': dep_field.field_name,
-                        'reason': 'No data submitted for this period'
-                    })
-
-            return {
-                'is_complete': satisfied_count == total_count,
-                'satisfied_count': satisfied_count,
-                'total_count': total_count,
-                'missing': missing,
-                'completeness_percentage': (satisfied_count / total_count * 100) if total_count > 0 else 0
-            }
+            snapshot = ComputationContextService.get_snapshot(field_id, entity_id, reporting_date)
+            return ComputationContextService._validation_from_snapshot(snapshot)
 
         except Exception as e:
             current_app.logger.error(f'Error validating dependencies: {str(e)}')
@@ -632,3 +782,42 @@ class ComputationContextService:
                 'missing': [],
                 'error': str(e)
             }
+
+    @staticmethod
+    def _validation_from_snapshot(snapshot: ComputationSnapshot) -> Dict[str, Any]:
+        field = snapshot.field
+        if not field or not field.is_computed:
+            return {
+                'is_complete': False,
+                'satisfied_count': 0,
+                'total_count': 0,
+                'missing': []
+            }
+
+        total_count = len(snapshot.root_mappings)
+        satisfied_count = 0
+        missing = []
+
+        for mapping in snapshot.root_mappings:
+            if mapping.raw_field_id not in snapshot.assigned:
+                missing.append({
+                    'field_id': mapping.raw_field_id,
+                    'field_name': snapshot.field_name(mapping.raw_field_id),
+                    'reason': 'No assignment found for this field'
+                })
+            elif mapping.raw_field_id in snapshot.latest_values:
+                satisfied_count += 1
+            else:
+                missing.append({
+                    'field_id': mapping.raw_field_id,
+                    'field_name': snapshot.field_name(mapping.raw_field_id),
+                    'reason': 'No data submitted for this period'
+                })
+
+        return {
+            'is_complete': satisfied_count == total_count,
+            'satisfied_count': satisfied_count,
+            'total_count': total_count,
+            'missing': missing,
+            'completeness_percentage': (satisfied_count / total_count * 100) if total_count > 0 else 0
+        }
@@ -0,0 +1,381 @@
+"""
+Data Status Service
+===================
+
+Set-based computation of data completion status (complete / overdue / pending)
+shared by the dashboard, the field dates API and the completeness API.
+
+All submissions needed for a page are fetched with a single query and compared
+in memory against the valid reporting dates of each assignment, instead of one
+query per field and reporting date.
+
+The admin data status matrix (latest value and status of every active
+assignment) is likewise one query, cached per tenant and dropped whenever the
+tenant's data is written.
+"""
+
+from typing import Any, Dict, Optional, List, Iterable, Set, Tuple
+from datetime import date
+from sqlalchemy import or_, desc, case, func, and_
+from sqlalchemy.orm import joinedload
+
+from ...models.esg_data import ESGData
+from ...models.data_assignment import DataPointAssignment
+from ...models.entity import Entity
+from ...models.framework import FrameworkDataField
+from ...extensions import db
+from ...utils.cache import LRUTTLCache, MISSING
+from ..redis import RedisCacheTier
+
+
+MATRIX_COLUMNS = [
+    'entity_id', 'entity_name', 'field_id', 'assignment_id', 'field_name', 'frequency',
+    'value_type', 'unit', 'status', 'latest_value', 'latest_date', 'is_computed'
+]
+MATRIX_STATUSES = ('no_data', 'complete', 'incomplete', 'computed', 'pending_computation')
+
+status_matrix_cache = LRUTTLCache(max_size=200, ttl=60, second_tier=RedisCacheTier('data_status_matrix'))
+
+
+def init_data_status_cache(app):
+    """
+    Configure the status matrix cache from the app config.
+
+    Args:
+        app: Flask application instance
+    """
+    status_matrix_cache.ttl = app.config.get('DATA_STATUS_MATRIX_CACHE_TTL', 60)
+
+
+class DataStatusService:
+    """Service for computing data completion status in bulk."""
+
+    # Chunk size for IN (...) lists of field IDs
+    FIELD_CHUNK_SIZE = 500
+
+    @staticmethod
+    def get_active_assignments(entity_id: int, field_ids: Iterable[str]) -> Dict[str, DataPointAssignment]:
+        """
+        Load the active assignment of each field for an entity with one query.
+
+        Args:
+            entity_id: The entity ID
+            field_ids: Framework data field IDs
+
+        Returns:
+            Dict mapping field_id to its highest-version active assignment
+        """
+        field_ids = list(set(field_ids))
+        if not field_ids:
+            return {}
+
+        assignments = DataPointAssignment.query.options(
+            joinedload(DataPointAssignment.company)
+        ).filter(
+            DataPointAssignment.entity_id == entity_id,
+            DataPointAssignment.field_id.in_(field_ids),
+            DataPointAssignment.series_status == 'active'
+        ).order_by(desc(DataPointAssignment.series_version)).all()
+
+        resolved = {}
+        for assignment in assignments:
+            resolved.setdefault(assignment.field_id, assignment)
+        return resolved
+
+    @classmethod
+    def get_reported_dates(
+        cls,
+        entity_id: int,
+        field_ids: Iterable[str],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        reporting_date: Optional[date] = None
+    ) -> Dict[str, Set[date]]:
+        """
+        Fetch the reporting dates that have a submitted (non-draft) value.
+
+        Args:
+            entity_id: The entity ID
+            field_ids: Framework data field IDs
+            start_date: Optional inclusive lower bound
+            end_date: Optional inclusive upper bound
+            reporting_date: Optional single reporting date to check
+
+        Returns:
+            Dict mapping field_id to the set of dates with a value
+        """
+        field_ids = list(set(field_ids))
+        reported: Dict[str, Set[date]] = {field_id: set() for field_id in field_ids}
+
+        for offset in range(0, len(field_ids), cls.FIELD_CHUNK_SIZE):
+            chunk = field_ids[offset:offset + cls.FIELD_CHUNK_SIZE]
+            query = db.session.query(ESGData.field_id, ESGData.reporting_date).filter(
+                ESGData.entity_id == entity_id,
+                ESGData.field_id.in_(chunk),
+                ESGData.is_draft.is_(False),
+                or_(ESGData.raw_value.isnot(None), ESGData.calculated_value.isnot(None))
+            )
+            if reporting_date is not None:
+                query = query.filter(ESGData.reporting_date == reporting_date)
+            if start_date is not None:
+                query = query.filter(ESGData.reporting_date >= start_date)
+            if end_date is not None:
+                query = query.filter(ESGData.reporting_date <= end_date)
+
+            for field_id, row_date in query.distinct():
+                reported[field_id].add(row_date)
+
+        return reported
+
+    @staticmethod
+    def get_valid_dates(
+        assignments: Iterable[DataPointAssignment],
+        fy_year: Optional[int] = None,
+        target_date: Optional[date] = None
+    ) -> Dict[str, List[date]]:
+        """
+        Valid reporting dates per assignment, generated once per company and frequency.
+
+        Returns:
+            Dict mapping assignment ID to its list of valid reporting dates
+        """
+        by_schedule: Dict[Tuple[Optional[int], str], List[date]] = {}
+        valid_dates = {}
+        for assignment in assignments:
+            schedule = (assignment.company_id, assignment.frequency)
+            if schedule not in by_schedule:
+                by_schedule[schedule] = assignment.get_valid_reporting_dates(fy_year, target_date)
+            valid_dates[assignment.id] = by_schedule[schedule]
+        return valid_dates
+
+    @classmethod
+    def get_field_statuses(
+        cls,
+        entity_id: int,
+        field_ids: Iterable[str],
+        fy_year: int,
+        company,
+        today: Optional[date] = None
+    ) -> Dict[str, str]:
+        """
+        Compute the dashboard status of every field for a fiscal year.
+
+        A field is 'overdue' when any past-due reporting date has no submitted
+        value, 'complete' when all past-due dates have values and 'pending'
+        when nothing is past due yet (or the field has no active assignment).
+
+        Args:
+            entity_id: The entity ID
+            field_ids: Framework data field IDs
+            fy_year: The fiscal year to evaluate
+            company: Company providing the due-date configuration
+            today: Date to evaluate overdue status against (defaults to today)
+
+        Returns:
+            Dict mapping field_id to 'complete', 'overdue' or 'pending'
+        """
+        from ..fiscal_year_service import FiscalYearService
+
+        field_ids = list(field_ids)
+        today = today or date.today()
+        statuses = {field_id: 'pending' for field_id in field_ids}
+
+        assignments = cls.get_active_assignments(entity_id, field_ids)
+        dates_by_assignment = cls.get_valid_dates(assignments.values(), fy_year)
+        valid_dates = {
+            field_id: dates_by_assignment[assignment.id]
+            for field_id, assignment in assignments.items()
+        }
+
+        overdue_cache: Dict[date, bool] = {}
+
+        def is_overdue(report_date: date) -> bool:
+            if report_date not in overdue_cache:
+                overdue_cache[report_date] = FiscalYearService.is_overdue(report_date, company, today)
+            return overdue_cache[report_date]
+
+        past_due = {
+            field_id: {d for d in dates if is_overdue(d)}
+            for field_id, dates in valid_dates.items()
+        }
+        all_past_due = set().union(*past_due.values()) if past_due else set()
+        if not all_past_due:
+            return statuses
+
+        reported = cls.get_reported_dates(
+            entity_id,
+            [field_id for field_id, dates in past_due.items() if dates],
+            start_date=min(all_past_due),
+            end_date=max(all_past_due)
+        )
+
+        for field_id, dates in past_due.items():
+            if dates:
+                statuses[field_id] = 'complete' if dates <= reported[field_id] else 'overdue'
+
+        return statuses
+
+    @staticmethod
+    def get_status_matrix(
+        company_id: Optional[int],
+        entity_id: Optional[int] = None,
+        field_id: Optional[str] = None,
+        frequency: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        page: Optional[int] = None,
+        per_page: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Latest value and status of every active assignment, served from the tenant's cache.
+
+        The cache key includes the company's assignment and dependency graph
+        versions, so assignment and field writes are picked up immediately;
+        committed data writes drop the company's matrices (see
+        invalidate_status_matrix) and the TTL bounds anything else.
+
+        Args:
+            company_id: Tenant to report on (None for all tenants)
+            entity_id: Only this entity
+            field_id: Only this field
+            frequency: Only assignments of this frequency
+            status: Only cells with this status (see MATRIX_STATUSES)
+            search: Case-insensitive substring of the field name
+            page: 1-based page number (default: all rows)
+            per_page: Rows per page
+
+        Returns:
+            Dict with 'total' (cells matching the filters) and 'rows' (lists in
+            MATRIX_COLUMNS order)
+        """
+        from ..assignment_versioning import active_assignment_index
+        from ..dependency_graph import dependency_graphs
+
+        versions = (
+            active_assignment_index.version(company_id), dependency_graphs.version(company_id)
+        ) if company_id is not None else None
+        cache_key = (company_id, versions, entity_id, field_id, frequency, status, search, page, per_page)
+
+        matrix = status_matrix_cache.get(cache_key)
+        if matrix is MISSING:
+            matrix = DataStatusService.load_status_matrix(
+                company_id, entity_id, field_id, frequency, status, search, page, per_page
+            )
+            status_matrix_cache.set(cache_key, matrix, tags=(('company', company_id),))
+        return matrix
+
+    @staticmethod
+    def invalidate_status_matrix(company_id: Optional[int]):
+        """Drop the cached matrices of a company whose data changed (and the all-tenant matrices)."""
+        status_matrix_cache.invalidate_tag(('company', company_id))
+        if company_id is not None:
+            status_matrix_cache.invalidate_tag(('company', None))
+
+    @staticmethod
+    def load_status_matrix(
+        company_id: Optional[int],
+        entity_id: Optional[int] = None,
+        field_id: Optional[str] = None,
+        frequency: Optional[str] = None,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        page: Optional[int] = None,
+        per_page: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the status matrix with one query.
+
+        The latest submitted row per (field, entity) is picked with
+        ROW_NUMBER() over esg_data (preferring the total row over dimensional rows on the same
+        date), outer-joined to the active assignments with their field and
+        entity. Status, filters, ordering, the total count (COUNT(*) OVER ())
+        and the page are all evaluated in SQL.
+
+        Args: see get_status_matrix()
+
+        Returns:
+            Dict with 'total' and 'rows'
+        """
+        rank = func.row_number().over(
+            partition_by=(ESGData.field_id, ESGData.entity_id),
+            order_by=(desc(ESGData.reporting_date), ESGData.dimension_key != '', desc(ESGData.updated_at))
+        ).label('rank')
+        latest = db.session.query(
+            ESGData.field_id, ESGData.entity_id, ESGData.reporting_date,
+            ESGData.raw_value, ESGData.calculated_value, rank
+        ).filter(ESGData.is_draft.is_(False))
+        if company_id is not None:
+            latest = latest.filter(ESGData.company_id == company_id)
+        latest = latest.subquery()
+
+        status_column = case(
+            (latest.c.field_id.is_(None), 'no_data'),
+            (FrameworkDataField.is_computed.is_(True), case(
+                (latest.c.calculated_value.isnot(None), 'computed'), else_='pending_computation'
+            )),
+            (latest.c.raw_value.isnot(None), 'complete'),
+            else_='incomplete'
+        ).label('status')
+
+        query = db.session.query(
+            Entity.id,
+            Entity.name,
+            DataPointAssignment.field_id,
+            DataPointAssignment.id,
+            FrameworkDataField.field_name,
+            DataPointAssignment.frequency,
+            FrameworkDataField.value_type,
+            func.coalesce(func.nullif(DataPointAssignment.unit, ''), FrameworkDataField.default_unit),
+            status_column,
+            latest.c.raw_value,
+            latest.c.calculated_value,
+            latest.c.reporting_date,
+            FrameworkDataField.is_computed,
+            func.count().over().label('total')
+        ).select_from(DataPointAssignment).join(
+            Entity, DataPointAssignment.entity_id == Entity.id
+        ).join(
+            FrameworkDataField, DataPointAssignment.field_id == FrameworkDataField.field_id
+        ).outerjoin(latest, and_(
+            latest.c.field_id == DataPointAssignment.field_id,
+            latest.c.entity_id == DataPointAssignment.entity_id,
+            latest.c.rank == 1
+        )).filter(
+            DataPointAssignment.series_status == 'active'
+        )
+
+        if company_id is not None:
+            query = query.filter(DataPointAssignment.company_id == company_id, Entity.company_id == company_id)
+        if entity_id is not None:
+            query = query.filter(DataPointAssignment.entity_id == entity_id)
+        if field_id is not None:
+            query = query.filter(DataPointAssignment.field_id == field_id)
+        if frequency:
+            query = query.filter(DataPointAssignment.frequency == frequency)
+        if status:
+            query = query.filter(status_column == status)
+        if search:
+            query = query.filter(FrameworkDataField.field_name.ilike(f'%{search}%'))
+
+        query = query.order_by(Entity.name, Entity.id, FrameworkDataField.field_name, DataPointAssignment.id)
+        if page and per_page:
+            query = query.limit(per_page).offset((page - 1) * per_page)
+
+        rows = []
+        total = 0
+        for (matrix_entity_id, entity_name, matrix_field_id, assignment_id, field_name, matrix_frequency,
+             value_type, unit, cell_status, raw_value, calculated_value, latest_date, is_computed, total) in query:
+            rows.append([
+                matrix_entity_id, entity_name, matrix_field_id, assignment_id, field_name, matrix_frequency,
+                value_type, unit, cell_status,
+                calculated_value if is_computed else raw_value,
+                latest_date.isoformat() if isinstance(latest_date, date) else latest_date,
+                bool(is_computed)
+            ])
+
+        if page and per_page and page > 1 and not rows:
+            # Past the last page: the window count came back empty with it
+            count_query = query.limit(None).offset(None).order_by(None)
+            total = count_query.count()
+
+        return {'total': total, 'rows': rows}
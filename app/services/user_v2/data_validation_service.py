@@ -4,7 +4,7 @@ Data Validation Service for Enhancement #4: Bulk Excel Upload
 Unified validation logic for both modal and bulk upload workflows.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional
 from datetime import datetime, date
 from decimal import Decimal, InvalidOperation
 import re
@@ -116,12 +116,15 @@ class DataValidationService:
         }
 
     @staticmethod
-    def validate_bulk_upload(rows: List[Dict]) -> Dict[str, Any]:
+    def validate_bulk_upload(rows: Iterable[Dict]) -> Dict[str, Any]:
         """
         Validate multiple rows from bulk upload.
 
+        Rows are consumed in a single pass, so a generator (for example
+        FileUploadService.iter_rows) can be validated without building a list.
+
         Args:
-            rows: List of row dictionaries with keys:
+            rows: Iterable of row dictionaries with keys:
                   field_id, entity_id, reporting_date, value, dimensions, notes, row_number
 
         Returns:
@@ -145,11 +148,22 @@ class DataValidationService:
         # Pre-fetch all assignments for efficiency
         assignments_cache = {}
 
+        total_rows = 0
         for row in rows:
+            total_rows += 1
             row_number = row.get('row_number', '?')
             field_id = row.get('field_id')
             entity_id = row.get('entity_id')
 
+            # Rows the parser could not read are reported as invalid as-is
+            if 'parse_error' in row:
+                invalid_rows.append({
+                    'row_number': row_number,
+                    'field_name': row.get('field_name', field_id),
+                    'errors': [row['parse_error']]
+                })
+                continue
+
             # Get or cache assignment
             cache_key = f"{field_id}_{entity_id}"
             if cache_key not in assignments_cache:
@@ -196,7 +210,7 @@ class DataValidationService:
 
         return {
             'valid': len(invalid_rows) == 0,
-            'total_rows': len(rows),
+            'total_rows': total_rows,
             'valid_count': len(valid_rows),
             'invalid_count': len(invalid_rows),
             'warning_count': len(warning_rows),
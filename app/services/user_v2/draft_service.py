@@ -14,7 +14,7 @@ Phase 4: Uses ESGData model with is_draft flag and draft_metadata JSON column
 """
 
 import json
-from datetime import datetime, timedelta, date as date_type
+from datetime import datetime, timedelta, date as date_type, UTC
 from typing import Optional, Dict, Any, List
 from sqlalchemy import and_, desc
 from app.extensions import db
@@ -72,7 +72,7 @@ class DraftService:
                 return {
                     'success': False,
                     'message': 'Missing required parameters',
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': datetime.now(UTC).isoformat()
                 }
 
             # Parse reporting_date string to date object
@@ -93,7 +93,7 @@ class DraftService:
             # Prepare draft metadata
             draft_metadata = {
                 'saved_by_user_id': user_id,
-                'draft_timestamp': datetime.now().isoformat(),
+                'draft_timestamp': datetime.now(UTC).isoformat(),
                 'form_data': form_data
             }
 
@@ -104,7 +104,7 @@ class DraftService:
                 existing_draft.unit = form_data.get('unit')
                 existing_draft.dimension_values = form_data.get('dimension_values', {})
                 existing_draft.draft_metadata = draft_metadata
-                existing_draft.updated_at = datetime.now()
+                existing_draft.updated_at = datetime.now(UTC)
 
                 db.session.commit()
 
@@ -148,7 +148,7 @@ class DraftService:
             return {
                 'success': False,
                 'message': f'Error saving draft: {str(e)}',
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now(UTC).isoformat()
             }
 
     @staticmethod
@@ -208,13 +208,13 @@ class DraftService:
                         **form_data  # Include any additional form data
                     },
                     'timestamp': draft.updated_at.isoformat(),
-                    'age_minutes': (datetime.now() - draft.updated_at.replace(tzinfo=None)).total_seconds() / 60
+                    'age_minutes': (datetime.now(UTC).replace(tzinfo=None) - draft.updated_at.replace(tzinfo=None)).total_seconds() / 60
                 }
             else:
                 return {
                     'has_draft': False,
                     'draft_data': None,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': datetime.now(UTC).isoformat()
                 }
 
         except Exception as e:
@@ -222,7 +222,7 @@ class DraftService:
             return {
                 'has_draft': False,
                 'draft_data': None,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': datetime.now(UTC).isoformat(),
                 'error': str(e)
             }
 
@@ -341,7 +341,7 @@ class DraftService:
                     'entity_name': entity.name if entity else 'Unknown',
                     'reporting_date': draft.reporting_date.isoformat() if isinstance(draft.reporting_date, date_type) else str(draft.reporting_date),
                     'updated_at': draft.updated_at.isoformat(),
-                    'age_minutes': (datetime.now() - draft.updated_at.replace(tzinfo=None)).total_seconds() / 60,
+                    'age_minutes': (datetime.now(UTC).replace(tzinfo=None) - draft.updated_at.replace(tzinfo=None)).total_seconds() / 60,
                     'has_value': bool(draft.raw_value)
                 })
 
@@ -374,7 +374,7 @@ class DraftService:
             Dictionary with count of deleted drafts
         """
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
+            cutoff_date = datetime.now(UTC).replace(tzinfo=None) - timedelta(days=days)
 
             old_drafts = ESGData.query.filter(
                 and_(
@@ -453,13 +453,17 @@ class DraftService:
 
             # Simply remove the draft flag
             draft.is_draft = False
-            draft.updated_at = datetime.now()
+            draft.updated_at = datetime.now(UTC)
 
             # Clear draft metadata since it's now real data
             draft.draft_metadata = None
 
             db.session.commit()
 
+            # The promoted value now feeds its dependant computed fields
+            from app.services.recompute_pipeline import process_pending
+            process_pending()
+
             return {
                 'success': True,
                 'data_id': draft.data_id,
@@ -0,0 +1,263 @@
+"""
+History Export Service
+======================
+
+Streaming export of submitted ESG data for any set of fields, entities and
+reporting dates.
+
+Rows are read as plain column tuples in batches (yield_per, a server-side
+cursor where the driver supports one) and written out as they arrive: CSV is
+produced as a generator of text chunks for a streaming response, XLSX through
+openpyxl's write-only workbook into a temporary file. Dimension columns are
+discovered up front in a lightweight pass over the indexed dimension_key and
+the breakdown fact table, so the full dataset is never held in memory.
+"""
+
+import csv
+import io
+import tempfile
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional
+
+from openpyxl import Workbook
+from sqlalchemy import Text, cast, desc, func, select, tuple_
+
+from ...extensions import db
+from ...models.data_assignment import DataPointAssignment
+from ...models.entity import Entity
+from ...models.esg_data import ESGData, ESGDataBreakdown
+from ...models.framework import FrameworkDataField
+
+
+EXPORT_BATCH_SIZE = 1000  # Rows fetched per round trip
+CSV_CHUNK_ROWS = 500  # Rows buffered per yielded CSV chunk
+
+BASE_COLUMNS = ['Reporting Date', 'Value', 'Unit', 'Has Dimensions', 'Notes', 'Created At', 'Updated At']
+IDENTITY_COLUMNS = ['Field', 'Entity']
+
+
+class HistoryExport:
+    """
+    One export of non-draft data of a tenant's entities.
+
+    Only (field, entity) pairs with an active assignment are exported. Rows
+    are ordered by field name, entity name and newest reporting date first.
+
+    Example:
+        export = HistoryExport(company_id, field_ids=[...], start_date=date(2024, 1, 1))
+        if export.has_rows():
+            return Response(stream_with_context(export.iter_csv()), mimetype='text/csv')
+    """
+
+    def __init__(
+        self,
+        company_id: int,
+        field_ids: Optional[List[str]] = None,
+        entity_ids: Optional[List[int]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        limit: Optional[int] = None,
+        identity_columns: bool = True
+    ):
+        """
+        Args:
+            company_id: Tenant whose data is exported
+            field_ids: Fields to export (default: all)
+            entity_ids: Entities to export (default: all)
+            start_date: First reporting date included
+            end_date: Last reporting date included
+            limit: Maximum number of rows
+            identity_columns: Lead each row with the field and entity name
+        """
+        self.company_id = company_id
+        self.field_ids = field_ids
+        self.entity_ids = entity_ids
+        self.start_date = start_date
+        self.end_date = end_date
+        self.limit = limit
+        self.identity_columns = identity_columns
+        self._dimension_names = None
+
+    def _filtered(self, *columns):
+        """Query for columns over the exported esg_data rows."""
+        tenant_entities = select(Entity.id).where(Entity.company_id == self.company_id)
+        assigned = select(DataPointAssignment.field_id, DataPointAssignment.entity_id).where(
+            DataPointAssignment.entity_id.in_(tenant_entities),
+            DataPointAssignment.series_status == 'active'
+        )
+        query = db.session.query(*columns).select_from(ESGData).filter(
+            ESGData.entity_id.in_(tenant_entities),
+            ESGData.is_draft == False,
+            tuple_(ESGData.field_id, ESGData.entity_id).in_(assigned)
+        )
+        if self.field_ids:
+            query = query.filter(ESGData.field_id.in_(self.field_ids))
+        if self.entity_ids:
+            query = query.filter(ESGData.entity_id.in_(self.entity_ids))
+        if self.start_date:
+            query = query.filter(ESGData.reporting_date >= self.start_date)
+        if self.end_date:
+            query = query.filter(ESGData.reporting_date <= self.end_date)
+        return query
+
+    def _ordered(self, *columns):
+        query = self._filtered(*columns).join(
+            FrameworkDataField, ESGData.field_id == FrameworkDataField.field_id
+        ).join(
+            Entity, ESGData.entity_id == Entity.id
+        ).order_by(
+            FrameworkDataField.field_name, Entity.name, desc(ESGData.reporting_date), ESGData.data_id
+        )
+        return query.limit(self.limit) if self.limit else query
+
+    def has_rows(self) -> bool:
+        """True if the export holds at least one row."""
+        return self._filtered(ESGData.data_id).first() is not None
+
+    def dimension_names(self) -> Dict[str, str]:
+        """
+        Dimension names present in the export, keyed by lower-cased name.
+
+        Flat dimensions are read from one representative payload per distinct
+        dimension_key and structured breakdowns from their fact rows. Structured
+        payloads that produced no fact rows (a version other than 2, or only
+        null or non-numeric breakdown values) are read directly, so the pass
+        costs three queries regardless of the number of rows. A limited export
+        scans its own (bounded) rows instead.
+        """
+        if self._dimension_names is not None:
+            return self._dimension_names
+
+        payloads = []
+        names = []
+        if self.limit:
+            payloads = [payload for payload, in self._ordered(ESGData.dimension_values)]
+        else:
+            representatives = self._filtered(func.min(ESGData.data_id)).filter(
+                ESGData.dimension_key != ''
+            ).group_by(ESGData.dimension_key)
+            payloads = [payload for payload, in db.session.query(ESGData.dimension_values).filter(
+                ESGData.data_id.in_(representatives)
+            )]
+            names = [name for name, in self._filtered(ESGDataBreakdown.dimension).join(
+                ESGDataBreakdown, ESGDataBreakdown.data_id == ESGData.data_id
+            ).distinct()]
+            has_facts = select(ESGDataBreakdown.data_id).where(
+                ESGDataBreakdown.data_id == ESGData.data_id
+            ).exists()
+            payloads.extend(payload for payload, in self._filtered(ESGData.dimension_values).filter(
+                ESGData.dimension_key == '',
+                cast(ESGData.dimension_values, Text).like('%"breakdowns"%'),
+                ~has_facts,
+            ).yield_per(EXPORT_BATCH_SIZE))
+
+        for payload in payloads:
+            names.extend(HistoryExport._payload_dimensions(payload))
+
+        # Representatives come back in no particular order; sorting makes the
+        # spelling kept for a name stable between exports
+        self._dimension_names = {}
+        for name in sorted(str(name) for name in names):
+            self._dimension_names.setdefault(name.lower(), name)
+        return self._dimension_names
+
+    def header(self) -> List[str]:
+        """Column names: identity and base columns, then sorted dimension columns."""
+        dimension_columns = sorted(f'Dimension: {name}' for name in self.dimension_names().values())
+        return (IDENTITY_COLUMNS if self.identity_columns else []) + BASE_COLUMNS + dimension_columns
+
+    def iter_rows(self) -> Iterator[List[Any]]:
+        """Yield export rows in header order, fetching EXPORT_BATCH_SIZE rows at a time."""
+        header = self.header()
+        positions = {column: index for index, column in enumerate(header)}
+        dimension_positions = {
+            key: positions[f'Dimension: {name}'] for key, name in self.dimension_names().items()
+        }
+
+        query = self._ordered(
+            FrameworkDataField.field_name,
+            Entity.name,
+            FrameworkDataField.is_computed,
+            FrameworkDataField.default_unit,
+            ESGData.reporting_date,
+            ESGData.raw_value,
+            ESGData.calculated_value,
+            ESGData.unit,
+            ESGData.dimension_values,
+            ESGData.notes,
+            ESGData.created_at,
+            ESGData.updated_at
+        ).yield_per(EXPORT_BATCH_SIZE)
+
+        for (field_name, entity_name, is_computed, default_unit, reporting_date, raw_value,
+             calculated_value, unit, dimension_values, notes, created_at, updated_at) in query:
+            row = [None] * len(header)
+            base = [
+                reporting_date.isoformat(),
+                calculated_value if is_computed else raw_value,
+                unit or default_unit,
+                'Yes' if dimension_values else 'No',
+                notes or '',
+                created_at.isoformat() if created_at else None,
+                updated_at.isoformat() if updated_at else None
+            ]
+            if self.identity_columns:
+                base = [field_name, entity_name] + base
+            row[:len(base)] = base
+
+            for name, value in HistoryExport._dimension_items(dimension_values):
+                position = dimension_positions.get(str(name).lower())
+                if position is not None:
+                    row[position] = value
+            yield row
+
+    def iter_csv(self) -> Iterator[str]:
+        """Yield the export as CSV text, CSV_CHUNK_ROWS rows per chunk."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.header())
+        for count, row in enumerate(self.iter_rows(), start=1):
+            writer.writerow(row)
+            if count % CSV_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def write_xlsx(self, sheet_name: str = 'Historical Data'):
+        """
+        Write the export with a write-only workbook.
+
+        Returns:
+            Temporary binary file positioned at its start; closing it deletes it
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(self.header())
+        for row in self.iter_rows():
+            sheet.append(row)
+
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return output
+
+    @staticmethod
+    def _payload_dimensions(dimension_values) -> List[str]:
+        return [name for name, _ in HistoryExport._dimension_items(dimension_values)]
+
+    @staticmethod
+    def _dimension_items(dimension_values):
+        """(dimension, value) pairs of a payload, in the layout the export has always used."""
+        if not dimension_values:
+            return []
+        if 'breakdowns' in dimension_values:
+            return [
+                item
+                for breakdown in dimension_values.get('breakdowns', [])
+                for item in (breakdown.get('dimensions') or {}).items()
+            ]
+        return [
+            (name, value) for name, value in dimension_values.items()
+            if name not in ('dimensions', 'breakdowns')
+        ]
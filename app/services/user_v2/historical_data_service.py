@@ -291,31 +291,38 @@ class HistoricalDataService:
             DataPointAssignment.series_status == 'active'
         ).all()
 
-        # Filter assignments valid for this date
-        valid_assignments = []
-        for assignment in assignments:
-            if assignment.is_valid_reporting_date(reporting_date):
-                valid_assignments.append(assignment)
+        # Filter assignments valid for this date (dates generated once per frequency)
+        from .data_status_service import DataStatusService
+        valid_dates = DataStatusService.get_valid_dates(assignments, target_date=reporting_date)
+        valid_assignments = [
+            assignment for assignment in assignments
+            if reporting_date in valid_dates[assignment.id]
+        ]
 
         total_fields = len(valid_assignments)
 
-        # Count submitted data
-        submitted_count = 0
-        missing_fields = []
+        # Count submitted data with a single query for all fields
+        reported = DataStatusService.get_reported_dates(
+            entity_id,
+            [assignment.field_id for assignment in valid_assignments],
+            reporting_date=reporting_date
+        )
+        missing_field_ids = [
+            assignment.field_id for assignment in valid_assignments
+            if reporting_date not in reported[assignment.field_id]
+        ]
+        submitted_count = total_fields - len(missing_field_ids)
 
-        for assignment in valid_assignments:
-            data = ESGData.query.filter_by(
-                field_id=assignment.field_id,
-                entity_id=entity_id,
-                reporting_date=reporting_date
-            ).filter(
-                ESGData.raw_value.isnot(None) | ESGData.calculated_value.isnot(None)
-            ).first()
-
-            if data:
-                submitted_count += 1
-            else:
-                field = FrameworkDataField.query.get(assignment.field_id)
+        missing_fields = []
+        if missing_field_ids:
+            fields = {
+                field.field_id: field
+                for field in FrameworkDataField.query.filter(
+                    FrameworkDataField.field_id.in_(set(missing_field_ids))
+                ).all()
+            }
+            for field_id in missing_field_ids:
+                field = fields.get(field_id)
                 if field:
                     missing_fields.append({
                         'field_id': field.field_id,
@@ -10,9 +10,10 @@ Author: Claude Code
 Date: 2025-11-21
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, UTC, date
-from ..models import ESGData, DataPointAssignment, Company, FrameworkDataField
+from sqlalchemy import tuple_
+from ..models import ESGData, DataPointAssignment, Company
 from ..extensions import db
 
 
@@ -22,6 +23,7 @@ class ValidationService:
     # Configuration constants
     LOOKBACK_PERIODS = 2  # Number of sequential periods to compare
     ENABLE_SEASONAL_COMPARISON = True  # Compare with same period last year
+    HISTORY_LOOKUP_CHUNK_SIZE = 500  # History keys matched per query
 
     @classmethod
     def validate_submission(cls,
@@ -54,50 +56,98 @@ class ValidationService:
                 "timestamp": str
             }
         """
-        flags = []
-
         # Get company and assignment for configuration
         company = Company.query.get(company_id)
         if not company:
-            return {
-                "passed": False,
-                "risk_score": 100,
-                "flags": [{
-                    "type": "error",
-                    "severity": "error",
-                    "message": "Company not found"
-                }],
-                "timestamp": datetime.now(UTC).isoformat()
-            }
+            return cls._company_not_found()
 
         assignment = cls._resolve_assignment(field_id, entity_id,
                                              reporting_date, assignment_id)
 
+        row = {
+            'field_id': field_id,
+            'entity_id': entity_id,
+            'company_id': company.id,
+            'value': value,
+            'reporting_date': reporting_date,
+            'dimension_values': dimension_values,
+            'attachments': attachments
+        }
+        context = cls._prefetch_validation_context([row], [assignment], {company.id: company})
+        return cls._validate_row(row, company, assignment, context)
+
+    @classmethod
+    def validate_submissions(cls, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run all validation checks on a batch of submissions (e.g. a bulk upload).
+
+        Companies, assignments, the historical comparison window of every row,
+        dependant computed fields and their dependency values are prefetched
+        in a handful of queries; the checks then run in memory. Results are
+        the same as calling validate_submission() for each row.
+
+        Args:
+            rows: Dicts with the keyword arguments of validate_submission()
+                  (field_id, entity_id, value, reporting_date, company_id and
+                  optionally assignment_id, dimension_values, attachments)
+
+        Returns:
+            List of validation results, in the order of rows
+        """
+        if not rows:
+            return []
+
+        company_ids = {row['company_id'] for row in rows}
+        companies = {company.id: company
+                     for company in Company.query.filter(Company.id.in_(company_ids))}
+        assignments = cls._resolve_assignments_bulk(rows)
+        context = cls._prefetch_validation_context(rows, assignments, companies)
+
+        results = []
+        for row, assignment in zip(rows, assignments):
+            company = companies.get(row['company_id'])
+            if not company:
+                results.append(cls._company_not_found())
+                continue
+            results.append(cls._validate_row(row, company, assignment, context))
+        return results
+
+    @classmethod
+    def _validate_row(cls,
+                      row: Dict[str, Any],
+                      company: Company,
+                      assignment: Optional[DataPointAssignment],
+                      context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the checks for one submission against a prefetched context."""
+        flags = []
+
         # 1. Check required attachments
         if assignment and assignment.attachment_required:
-            attachment_flag = cls._check_required_attachments(attachments)
+            attachment_flag = cls._check_required_attachments(row.get('attachments'))
             if attachment_flag:
                 flags.append(attachment_flag)
 
         # 2. Historical trend analysis
         trend_flags = cls._check_historical_trends(
-            field_id=field_id,
-            entity_id=entity_id,
-            value=value,
-            reporting_date=reporting_date,
+            field_id=row['field_id'],
+            entity_id=row['entity_id'],
+            value=row['value'],
+            reporting_date=row['reporting_date'],
             company=company,
             assignment=assignment,
-            dimension_values=dimension_values
+            dimension_values=row.get('dimension_values'),
+            history=context['history']
         )
         flags.extend(trend_flags)
 
         # 3. Computed field impact validation
         computed_flags = cls._check_computed_field_impact(
-            field_id=field_id,
-            entity_id=entity_id,
-            value=value,
-            reporting_date=reporting_date,
-            company=company
+            field_id=row['field_id'],
+            entity_id=row['entity_id'],
+            value=row['value'],
+            reporting_date=row['reporting_date'],
+            company=company,
+            context=context
         )
         flags.extend(computed_flags)
 
@@ -111,6 +161,19 @@ class ValidationService:
             "timestamp": datetime.now(UTC).isoformat()
         }
 
+    @staticmethod
+    def _company_not_found() -> Dict[str, Any]:
+        return {
+            "passed": False,
+            "risk_score": 100,
+            "flags": [{
+                "type": "error",
+                "severity": "error",
+                "message": "Company not found"
+            }],
+            "timestamp": datetime.now(UTC).isoformat()
+        }
+
     @classmethod
     def _check_required_attachments(cls, attachments: Optional[List]) -> Optional[Dict]:
         """
@@ -141,7 +204,8 @@ class ValidationService:
                                  reporting_date: date,
                                  company: Company,
                                  assignment: Optional[DataPointAssignment],
-                                 dimension_values: Optional[Dict]) -> List[Dict]:
+                                 dimension_values: Optional[Dict],
+                                 history: Optional[Dict] = None) -> List[Dict]:
         """
         Check value against historical trends.
         Compares with:
@@ -156,6 +220,7 @@ class ValidationService:
             company: Company object
             assignment: DataPointAssignment object
             dimension_values: Optional dimensional breakdown
+            history: Optional prefetched history (see _fetch_history); queried when omitted
 
         Returns:
             List of validation flag dicts
@@ -164,13 +229,19 @@ class ValidationService:
         threshold_pct = company.get_validation_threshold()
 
         # Get historical values
-        historical_data = cls._get_historical_values(
-            field_id=field_id,
-            entity_id=entity_id,
-            reporting_date=reporting_date,
-            assignment=assignment,
-            dimension_values=dimension_values
-        )
+        if history is None:
+            historical_data = cls._get_historical_values(
+                field_id=field_id,
+                entity_id=entity_id,
+                reporting_date=reporting_date,
+                assignment=assignment,
+                dimension_values=dimension_values
+            )
+        else:
+            historical_data = cls._historical_values_from(
+                history, field_id, entity_id, reporting_date,
+                cls._frequency(assignment), dimension_values
+            )
 
         # No historical data - show info message
         if not historical_data['sequential'] and not historical_data['seasonal']:
@@ -232,7 +303,8 @@ class ValidationService:
                                      entity_id: int,
                                      value: float,
                                      reporting_date: date,
-                                     company: Company) -> List[Dict]:
+                                     company: Company,
+                                     context: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """
         Check impact on computed fields when dependency changes.
 
@@ -242,31 +314,36 @@ class ValidationService:
             value: New value for the dependency
             reporting_date: Reporting date
             company: Company object
+            context: Optional prefetched context (see _prefetch_validation_context)
 
         Returns:
             List of validation flag dicts
         """
-        from ..services.dependency_service import DependencyService
-
         flags = []
         threshold_pct = company.get_validation_threshold()
 
+        if context is None:
+            row = {'field_id': field_id, 'entity_id': entity_id, 'company_id': company.id,
+                   'reporting_date': reporting_date}
+            context = cls._prefetch_validation_context([row], [None], {company.id: company})
+
         # Find computed fields that depend on this field
-        try:
-            dependent_fields = DependencyService.get_dependent_computed_fields(field_id)
-        except Exception as e:
-            # If DependencyService not fully implemented, skip validation
-            print(f"[ValidationService] Skipping computed field validation: {str(e)}")
+        graph = context['graphs'].get(company.id)
+        if graph is None:
             return flags
 
-        for computed_field in dependent_fields:
+        for computed_field_id in graph.dependants(field_id):
+            computed_field = graph.node(computed_field_id)
+
             # Calculate projected computed field value
             projection = cls._calculate_projected_computed_value(
-                computed_field=computed_field,
+                graph=graph,
+                computed_field_id=computed_field_id,
                 entity_id=entity_id,
                 reporting_date=reporting_date,
                 changed_dependency_id=field_id,
-                changed_dependency_value=value
+                changed_dependency_value=value,
+                history=context['history']
             )
 
             # Skip if dependencies incomplete
@@ -275,13 +352,10 @@ class ValidationService:
 
             projected_value = projection['value']
 
-            # Get historical values for computed field
-            computed_historical = cls._get_historical_values(
-                field_id=computed_field.field_id,
-                entity_id=entity_id,
-                reporting_date=reporting_date,
-                assignment=None,
-                dimension_values=None
+            # Historical values for computed field (no assignment: annual window)
+            computed_historical = cls._historical_values_from(
+                context['history'], computed_field_id, entity_id, reporting_date,
+                cls._frequency(None), None
             )
 
             # Compare projected value with historical
@@ -293,12 +367,12 @@ class ValidationService:
                     flags.append({
                         "type": "computed_field_impact",
                         "severity": "warning",
-                        "message": f"This change will cause {computed_field.name} to "
+                        "message": f"This change will cause {computed_field.field_name} to "
                                   f"{'increase' if variance_pct > 0 else 'decrease'} "
                                   f"by {abs(variance_pct):.1f}%",
                         "details": {
-                            "computed_field_id": computed_field.field_id,
-                            "computed_field_name": computed_field.name,
+                            "computed_field_id": computed_field_id,
+                            "computed_field_name": computed_field.field_name,
                             "projected_value": projected_value,
                             "current_value": last_value,
                             "variance_pct": variance_pct,
@@ -318,6 +392,9 @@ class ValidationService:
         """
         Get historical values for comparison.
 
+        The existing entry, the sequential periods and the seasonal period are
+        fetched with one query over all comparison dates.
+
         Returns:
             {
                 "sequential": [
@@ -327,120 +404,196 @@ class ValidationService:
                 "seasonal": {"value": 1150, "period_label": "Dec 2023", "date": "2023-12-31"}
             }
         """
-        from dateutil.relativedelta import relativedelta
+        frequency = cls._frequency(assignment)
+        history = cls._fetch_history(
+            cls._history_keys(field_id, entity_id, reporting_date, frequency)
+        )
+        return cls._historical_values_from(history, field_id, entity_id, reporting_date,
+                                           frequency, dimension_values)
 
-        result = {
-            "sequential": [],
-            "seasonal": None
-        }
+    @staticmethod
+    def _frequency(assignment: Optional[DataPointAssignment]) -> str:
+        return assignment.frequency if assignment else 'Annual'
 
-        frequency = assignment.frequency if assignment else 'Annual'
+    @classmethod
+    def _comparison_dates(cls, reporting_date: date, frequency: str) -> Dict[str, Any]:
+        """
+        Dates compared against a submission.
+
+        Returns:
+            {"sequential": [dates of the last LOOKBACK_PERIODS periods],
+             "seasonal": same period last year or None}
+        """
+        from dateutil.relativedelta import relativedelta
 
         # Determine period delta based on frequency
         if frequency == 'Monthly':
             period_delta = relativedelta(months=1)
-            seasonal_delta = relativedelta(years=1)
         elif frequency == 'Quarterly':
             period_delta = relativedelta(months=3)
-            seasonal_delta = relativedelta(years=1)
         else:  # Annual
             period_delta = relativedelta(years=1)
-            seasonal_delta = relativedelta(years=1)
-
-        # FIRST: Check for existing data at the SAME reporting_date (for data revisions/updates)
-        existing_query = ESGData.query.filter(
-            ESGData.field_id == field_id,
-            ESGData.entity_id == entity_id,
-            ESGData.reporting_date == reporting_date,
-            ESGData.is_draft == False
-        )
+        seasonal_delta = relativedelta(years=1)
 
-        if dimension_values:
-            existing_data = existing_query.all()
-            matching_data = [d for d in existing_data if d.dimension_values == dimension_values]
-            existing_entry = matching_data[0] if matching_data else None
-        else:
-            existing_entry = existing_query.first()
+        return {
+            "sequential": [reporting_date - (period_delta * i) for i in range(1, cls.LOOKBACK_PERIODS + 1)],
+            "seasonal": reporting_date - seasonal_delta if cls.ENABLE_SEASONAL_COMPARISON else None
+        }
 
-        # If existing data found, treat it as "current period" comparison for revision detection
-        if existing_entry:
+    @classmethod
+    def _history_keys(cls, field_id: str, entity_id: int, reporting_date: date,
+                      frequency: str) -> List[Tuple[str, int, date]]:
+        """(field_id, entity_id, reporting_date) keys of a submission's comparison window."""
+        dates = cls._comparison_dates(reporting_date, frequency)
+        window = [reporting_date] + dates['sequential']
+        if dates['seasonal']:
+            window.append(dates['seasonal'])
+        return [(field_id, entity_id, window_date) for window_date in window]
+
+    @classmethod
+    def _fetch_history(cls, keys) -> Dict[Tuple[str, int, date], List[Tuple[str, float]]]:
+        """
+        Load submitted values for many (field_id, entity_id, reporting_date) keys.
+
+        Each chunk of keys is one query matching the key columns as row values.
+        Only the columns needed for comparison are loaded.
+
+        Args:
+            keys: Iterable of (field_id, entity_id, reporting_date)
+
+        Returns:
+            dict: key -> [(canonical dimension key, value)] in submission order
+        """
+        keys = list(set(keys))
+        history = {}
+
+        for offset in range(0, len(keys), cls.HISTORY_LOOKUP_CHUNK_SIZE):
+            chunk = keys[offset:offset + cls.HISTORY_LOOKUP_CHUNK_SIZE]
+            results = db.session.query(
+                ESGData.field_id,
+                ESGData.entity_id,
+                ESGData.reporting_date,
+                ESGData.raw_value,
+                ESGData.calculated_value,
+                ESGData.dimension_key
+            ).filter(
+                tuple_(ESGData.field_id, ESGData.entity_id, ESGData.reporting_date).in_(chunk),
+                ESGData.is_draft == False
+            ).order_by(ESGData.created_at).all()
+
+            for result in results:
+                try:
+                    value = float(result.calculated_value or result.raw_value or 0)
+                except (TypeError, ValueError):
+                    continue  # Non-numeric entries cannot be compared
+                key = (result.field_id, result.entity_id, result.reporting_date)
+                history.setdefault(key, []).append((result.dimension_key, value))
+
+        return history
+
+    @staticmethod
+    def _history_value(history: Dict, key: Tuple[str, int, date],
+                       dimension_key: Optional[str]) -> Optional[float]:
+        """First value stored for a key, restricted to a dimension combination if given."""
+        for entry_key, value in history.get(key, ()):
+            if dimension_key is None or entry_key == dimension_key:
+                return value
+        return None
+
+    @classmethod
+    def _historical_values_from(cls,
+                                history: Dict,
+                                field_id: str,
+                                entity_id: int,
+                                reporting_date: date,
+                                frequency: str,
+                                dimension_values: Optional[Dict]) -> Dict[str, Any]:
+        """Build the _get_historical_values() result from prefetched history."""
+        result = {
+            "sequential": [],
+            "seasonal": None
+        }
+        dimension_key = ESGData.canonical_dimension_key(dimension_values) if dimension_values else None
+        dates = cls._comparison_dates(reporting_date, frequency)
+
+        # FIRST: Existing data at the SAME reporting_date (for data revisions/updates)
+        # is treated as "current period" comparison for revision detection
+        existing_value = cls._history_value(history, (field_id, entity_id, reporting_date), dimension_key)
+        if existing_value is not None:
             period_label = cls._format_period_label(reporting_date, frequency)
             result["sequential"].append({
-                "value": float(existing_entry.calculated_value or existing_entry.raw_value or 0),
+                "value": existing_value,
                 "period_label": f"{period_label} (existing)",
                 "date": reporting_date.isoformat(),
                 "is_current_period": True  # Flag to indicate this is comparing against existing data
             })
 
-        # Get sequential periods (last 2)
-        for i in range(1, cls.LOOKBACK_PERIODS + 1):
-            past_date = reporting_date - (period_delta * i)
-
-            # Query for historical data
-            query = ESGData.query.filter(
-                ESGData.field_id == field_id,
-                ESGData.entity_id == entity_id,
-                ESGData.reporting_date == past_date,
-                ESGData.is_draft == False
-            )
-
-            # Match dimensions if provided
-            if dimension_values:
-                # For dimensional data, need to match dimension_values
-                hist_data = query.all()
-                matching_data = [d for d in hist_data
-                               if d.dimension_values == dimension_values]
-                if matching_data:
-                    hist_entry = matching_data[0]
-                else:
-                    continue
-            else:
-                hist_entry = query.first()
-
-            if hist_entry:
-                period_label = cls._format_period_label(past_date, frequency)
+        # Sequential periods (last LOOKBACK_PERIODS)
+        for past_date in dates['sequential']:
+            hist_value = cls._history_value(history, (field_id, entity_id, past_date), dimension_key)
+            if hist_value is not None:
                 result["sequential"].append({
-                    "value": float(hist_entry.calculated_value or hist_entry.raw_value or 0),
-                    "period_label": period_label,
+                    "value": hist_value,
+                    "period_label": cls._format_period_label(past_date, frequency),
                     "date": past_date.isoformat()
                 })
 
-        # Get seasonal comparison (same period last year)
-        if cls.ENABLE_SEASONAL_COMPARISON:
-            seasonal_date = reporting_date - seasonal_delta
-
-            query = ESGData.query.filter(
-                ESGData.field_id == field_id,
-                ESGData.entity_id == entity_id,
-                ESGData.reporting_date == seasonal_date,
-                ESGData.is_draft == False
-            )
-
-            if dimension_values:
-                hist_data = query.all()
-                matching_data = [d for d in hist_data
-                               if d.dimension_values == dimension_values]
-                seasonal_entry = matching_data[0] if matching_data else None
-            else:
-                seasonal_entry = query.first()
-
-            if seasonal_entry:
-                period_label = cls._format_period_label(seasonal_date, frequency)
+        # Seasonal comparison (same period last year)
+        seasonal_date = dates['seasonal']
+        if seasonal_date:
+            seasonal_value = cls._history_value(history, (field_id, entity_id, seasonal_date), dimension_key)
+            if seasonal_value is not None:
                 result["seasonal"] = {
-                    "value": float(seasonal_entry.calculated_value or seasonal_entry.raw_value or 0),
-                    "period_label": period_label,
+                    "value": seasonal_value,
+                    "period_label": cls._format_period_label(seasonal_date, frequency),
                     "date": seasonal_date.isoformat()
                 }
 
         return result
 
+    @classmethod
+    def _prefetch_validation_context(cls,
+                                     rows: List[Dict[str, Any]],
+                                     assignments: List[Optional[DataPointAssignment]],
+                                     companies: Dict[int, Company]) -> Dict[str, Any]:
+        """
+        Prefetch everything the checks read for a batch of submissions.
+
+        Collects the comparison window of every row, the annual window of every
+        dependant computed field and the values of their dependencies at the
+        submitted date, and loads them all with _fetch_history().
+
+        Returns:
+            {"graphs": {company_id: DependencyGraph}, "history": see _fetch_history}
+        """
+        from .dependency_graph import get_dependency_graph
+
+        graphs = {company_id: get_dependency_graph(company_id) for company_id in companies}
+
+        keys = set()
+        for row, assignment in zip(rows, assignments):
+            field_id, entity_id, reporting_date = row['field_id'], row['entity_id'], row['reporting_date']
+            keys.update(cls._history_keys(field_id, entity_id, reporting_date, cls._frequency(assignment)))
+
+            graph = graphs.get(row['company_id'])
+            if graph is None:
+                continue
+            for computed_field_id in graph.dependants(field_id):
+                keys.update(cls._history_keys(computed_field_id, entity_id, reporting_date, cls._frequency(None)))
+                keys.update((dependency_id, entity_id, reporting_date)
+                            for dependency_id in graph.dependencies(computed_field_id))
+
+        return {'graphs': graphs, 'history': cls._fetch_history(keys)}
+
     @classmethod
     def _calculate_projected_computed_value(cls,
-                                           computed_field: FrameworkDataField,
+                                           graph,
+                                           computed_field_id: str,
                                            entity_id: int,
                                            reporting_date: date,
                                            changed_dependency_id: str,
-                                           changed_dependency_value: float) -> Dict[str, Any]:
+                                           changed_dependency_value: float,
+                                           history: Dict) -> Dict[str, Any]:
         """
         Calculate projected value for computed field with new dependency value.
 
@@ -451,44 +604,42 @@ class ValidationService:
                 "dependencies": {...}
             }
         """
-        from ..services.dependency_service import DependencyService
+        from ..utils.formula_compiler import formula_compiler
 
         try:
-            # Get all dependencies for this computed field
-            dependencies = DependencyService.get_dependencies(computed_field.field_id)
+            computed_field = graph.node(computed_field_id)
+            if not computed_field.is_computed or not computed_field.formula_expression:
+                raise ValueError(f"Field {computed_field_id} is not a computed field")
+
+            # Direct dependencies are the formula's variables; the compiled
+            # formula is evaluated against exactly these values
+            edges = graph.edges.get(computed_field_id, ())
 
             # Collect dependency values
             dependency_values = {}
-
-            for dep_field_id in dependencies:
+            for dep_field_id in {edge.raw_field_id for edge in edges}:
                 if dep_field_id == changed_dependency_id:
                     # Use the new value being submitted
                     dependency_values[dep_field_id] = changed_dependency_value
                 else:
-                    # Get existing value from database
-                    existing = ESGData.query.filter(
-                        ESGData.field_id == dep_field_id,
-                        ESGData.entity_id == entity_id,
-                        ESGData.reporting_date == reporting_date,
-                        ESGData.is_draft == False
-                    ).first()
-
-                    if existing:
-                        dependency_values[dep_field_id] = float(
-                            existing.calculated_value or existing.raw_value or 0
-                        )
+                    # Existing value from the prefetched history
+                    existing = cls._history_value(history, (dep_field_id, entity_id, reporting_date), None)
+                    if existing is not None:
+                        dependency_values[dep_field_id] = existing
 
             # Check if all dependencies have values
-            complete = len(dependency_values) == len(dependencies)
-
-            if not complete:
+            if len(dependency_values) != len({edge.raw_field_id for edge in edges}):
                 return {"complete": False, "value": None, "dependencies": dependency_values}
 
             # Calculate projected value using formula
-            projected_value = DependencyService.calculate_computed_value(
-                computed_field=computed_field,
-                dependency_values=dependency_values
-            )
+            eval_context = {
+                edge.variable_name: float(dependency_values[edge.raw_field_id]) *
+                (edge.coefficient if edge.coefficient is not None else 1.0)
+                for edge in edges
+            }
+            projected_value = formula_compiler.compile(
+                computed_field.formula_expression, computed_field_id
+            ).evaluate(eval_context)
 
             return {
                 "complete": True,
@@ -595,3 +746,37 @@ class ValidationService:
         except Exception as e:
             print(f"[ValidationService] Could not resolve assignment: {str(e)}")
             return None
+
+    @staticmethod
+    def _resolve_assignments_bulk(rows: List[Dict[str, Any]]) -> List[Optional[DataPointAssignment]]:
+        """
+        Resolve the assignment of every row with at most two queries.
+
+        Rows with an assignment_id are loaded by ID in one query; the others
+        use the active assignment of their (field_id, entity_id).
+
+        Returns:
+            Assignments (or None), in the order of rows
+        """
+        from ..services.assignment_versioning import resolve_assignments_bulk
+
+        assignment_ids = {row['assignment_id'] for row in rows if row.get('assignment_id')}
+        by_id = {}
+        if assignment_ids:
+            by_id = {assignment.id: assignment for assignment in
+                     DataPointAssignment.query.filter(DataPointAssignment.id.in_(assignment_ids))}
+
+        unresolved = [row for row in rows if not row.get('assignment_id')]
+        by_key = {}
+        if unresolved:
+            try:
+                by_key = resolve_assignments_bulk([row['field_id'] for row in unresolved],
+                                                  [row['entity_id'] for row in unresolved])
+            except Exception as e:
+                print(f"[ValidationService] Could not resolve assignments: {str(e)}")
+
+        return [
+            by_id.get(row['assignment_id']) if row.get('assignment_id')
+            else by_key.get((row['field_id'], row['entity_id']))
+            for row in rows
+        ]
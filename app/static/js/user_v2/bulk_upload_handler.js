@@ -295,10 +295,10 @@ class BulkUploadHandler {
             return;
         }
 
-        // Validate file size (5MB)
-        const maxSize = 5 * 1024 * 1024;
+        // Validate file size (20MB)
+        const maxSize = 20 * 1024 * 1024;
         if (file.size > maxSize) {
-            this.showError('File Too Large', `Maximum file size is 5MB. Your file is ${(file.size / 1024 / 1024).toFixed(2)}MB`);
+            this.showError('File Too Large', `Maximum file size is 20MB. Your file is ${(file.size / 1024 / 1024).toFixed(2)}MB`);
             return;
         }
 
@@ -0,0 +1,207 @@
+# In-process caching primitives shared by the service layer
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+from sqlalchemy import Date, DateTime, inspect as sa_inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+# Sentinel returned on a cache miss so that None can be cached as a real value
+MISSING = object()
+
+
+class LRUTTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    get/set/delete are O(1): entries live in an OrderedDict that is reordered
+    with move_to_end() on every hit and evicted with popitem(last=False).
+    Entries can carry tags (e.g. a company or a field+entity pair) so that a
+    write can drop every dependent key at once with invalidate_tag().
+
+    An optional second tier (for instance a Redis-backed one) is consulted on
+    a local miss and populated on every set. It must provide get(key)
+    returning a (value, tags) pair or MISSING, set(key, value, ttl, tags),
+    invalidate_tag(tag), clear() and generation(). Entries promoted from the
+    second tier keep their tags, and every local entry remembers the tier's
+    generation when it was stored: a tier invalidation made by another
+    process moves the generation, so local copies are dropped and re-read
+    from the tier instead of being served until their TTL.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: Optional[float] = 300, second_tier=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.second_tier = second_tier
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, count=False) is not MISSING
+
+    def get(self, key: Hashable, count: bool = True) -> Any:
+        """Return the cached value for key, or MISSING."""
+        generation = self._generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _tags, entry_generation = entry
+                if entry_generation == generation and (expires_at is None or expires_at > time.monotonic()):
+                    self._entries.move_to_end(key)
+                    if count:
+                        self.hits += 1
+                    return value
+                self._remove(key)
+                self.expirations += 1
+
+        if self.second_tier is not None:
+            entry = self.second_tier.get(key)
+            if entry is not MISSING:
+                value, tags = entry
+                self._store(key, value, tuple(tags), generation)
+                if count:
+                    self.hits += 1
+                return value
+
+        if count:
+            with self._lock:
+                self.misses += 1
+        return MISSING
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = ()):
+        """Cache value under key, optionally tagged for group invalidation."""
+        tags = tuple(tags)
+        self._store(key, value, tags, self._generation())
+        if self.second_tier is not None:
+            self.second_tier.set(key, value, self.ttl, tags)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """Drop every entry carrying tag (locally and in the second tier)."""
+        with self._lock:
+            keys = self._tags.pop(tag, set())
+            for key in list(keys):
+                self._remove(key)
+            self.invalidations += len(keys)
+
+        if self.second_tier is not None:
+            self.second_tier.invalidate_tag(tag)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+        if self.second_tier is not None:
+            self.second_tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring cache effectiveness."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+    def _generation(self) -> Any:
+        return self.second_tier.generation() if self.second_tier is not None else None
+
+    def _store(self, key: Hashable, value: Any, tags: tuple, generation: Any = None):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            elif len(self._entries) >= self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+            self._entries[key] = (value, expires_at, tags, generation)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def snapshot_instance(instance) -> Dict[str, Any]:
+    """
+    Capture the column values of an ORM instance as a JSON-safe dict.
+
+    Snapshots can be shared across requests, sessions and processes; use
+    restore_instance() to turn one back into a session-bound instance.
+    """
+    mapper = sa_inspect(instance).mapper
+    snapshot = {}
+    for attr in mapper.column_attrs:
+        value = getattr(instance, attr.key)
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        snapshot[attr.key] = value
+    return snapshot
+
+
+def restore_instance(model, snapshot: Dict[str, Any], session):
+    """
+    Rebuild a persistent instance of model from a snapshot without querying.
+
+    If the session already holds the row, that instance is returned unchanged
+    so pending modifications are never overwritten. Otherwise a detached
+    instance is populated with committed values and attached to the session,
+    so relationships lazy-load normally.
+    """
+    mapper = sa_inspect(model)
+    identity = tuple(snapshot.get(col.key) for col in mapper.primary_key)
+    existing = session.identity_map.get(mapper.identity_key_from_primary_key(identity))
+    if existing is not None:
+        return existing
+
+    instance = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        if attr.key not in snapshot:
+            continue
+        value = snapshot[attr.key]
+        if isinstance(value, str):
+            column_type = attr.columns[0].type
+            if isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column_type, Date):
+                value = date.fromisoformat(value)
+        set_committed_value(instance, attr.key, value)
+
+    make_transient_to_detached(instance)
+    session.add(instance)
+    return instance
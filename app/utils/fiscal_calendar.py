@@ -0,0 +1,136 @@
+# Memoized fiscal-year calendars and reporting period ends
+
+import calendar
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+
+# Months covered by one reporting period of each frequency
+FREQUENCY_MONTHS = {
+    'Monthly': 1,
+    'Quarterly': 3,
+}
+
+
+@lru_cache(maxsize=4096)
+def fy_bounds(fy_end_month: int, fy_end_day: int, fy_year: int) -> Tuple[date, date]:
+    """
+    Start and end date of a fiscal year.
+
+    Args:
+        fy_end_month: Month the fiscal year ends in (1-12)
+        fy_end_day: Day the fiscal year ends on (clamped to the month length)
+        fy_year: The fiscal year (based on the year containing FY end date)
+
+    Returns:
+        Tuple of (fy_start, fy_end)
+    """
+    start_month = (fy_end_month % 12) + 1
+    start_year = fy_year - 1 if start_month > fy_end_month else fy_year
+
+    max_day = calendar.monthrange(fy_year, fy_end_month)[1]
+    end = date(fy_year, fy_end_month, min(fy_end_day, max_day))
+
+    return date(start_year, start_month, 1), end
+
+
+def fiscal_year_for_date(fy_end_month: int, fy_end_day: int, check_date: date) -> int:
+    """
+    Fiscal year containing a date, in O(1) using the cached FY bounds.
+
+    Dates that fall in the gap between an FY end and the next FY start (only
+    possible when fy_end_day is not the last day of the month) follow the
+    FY start month, like FiscalYearService.get_fy_year_for_date.
+    """
+    for fy_year in (check_date.year - 1, check_date.year, check_date.year + 1):
+        fy_start, fy_end = fy_bounds(fy_end_month, fy_end_day, fy_year)
+        if fy_start <= check_date <= fy_end:
+            return fy_year
+
+    if (fy_end_month % 12) + 1 > check_date.month:
+        return check_date.year + 1
+    return check_date.year
+
+
+class FiscalCalendar:
+    """
+    Immutable reporting calendar for one FY configuration, fiscal year and frequency.
+
+    Instances are shared through get_fiscal_calendar(), so period ends are
+    generated once per (fy_end_month, fy_end_day, fy_year, frequency) and
+    exposed as a tuple (ordered) and a frozenset (membership checks).
+    """
+
+    __slots__ = ('fy_end_month', 'fy_end_day', 'fy_year', 'frequency',
+                 'fy_start', 'fy_end', 'period_ends', 'period_end_set', '_period_by_month')
+
+    def __init__(self, fy_end_month: int, fy_end_day: int, fy_year: int, frequency: str):
+        self.fy_end_month = fy_end_month
+        self.fy_end_day = fy_end_day
+        self.fy_year = fy_year
+        self.frequency = frequency
+        self.fy_start, self.fy_end = fy_bounds(fy_end_month, fy_end_day, fy_year)
+
+        periods = self._build_periods()
+        self.period_ends: Tuple[date, ...] = tuple(end for _, end in periods)
+        self.period_end_set: FrozenSet[date] = frozenset(self.period_ends)
+
+        # (year, month) -> (period_start, period_end) for O(1) date -> period lookups
+        by_month: Dict[Tuple[int, int], Tuple[date, date]] = {}
+        for start, end in periods:
+            current = start
+            while current <= end:
+                by_month[(current.year, current.month)] = (start, end)
+                current += relativedelta(months=1)
+        self._period_by_month = by_month
+
+    def _build_periods(self) -> Tuple[Tuple[date, date], ...]:
+        if self.frequency == 'Annual':
+            return ((self.fy_start, self.fy_end),)
+
+        months = FREQUENCY_MONTHS.get(self.frequency)
+        if months is None:
+            return ()
+
+        periods = []
+        current = self.fy_start
+        while current <= self.fy_end:
+            period_end = (current + relativedelta(months=months)) - timedelta(days=1)
+            if period_end <= self.fy_end:
+                periods.append((current, period_end))
+            current = current + relativedelta(months=months)
+        return tuple(periods)
+
+    def __contains__(self, reporting_date: date) -> bool:
+        return reporting_date in self.period_end_set
+
+    def __iter__(self):
+        return iter(self.period_ends)
+
+    def __len__(self) -> int:
+        return len(self.period_ends)
+
+    def period_for(self, check_date: date) -> Optional[Tuple[date, date]]:
+        """(period_start, period_end) of the reporting period containing a date, or None."""
+        period = self._period_by_month.get((check_date.year, check_date.month))
+        if period and period[0] <= check_date <= period[1]:
+            return period
+        return None
+
+    def period_end_for(self, check_date: date) -> Optional[date]:
+        """End of the reporting period containing a date, or None."""
+        period = self.period_for(check_date)
+        return period[1] if period else None
+
+    def __repr__(self):
+        return (f'<FiscalCalendar FY{self.fy_year} {self.frequency} '
+                f'({self.fy_start.isoformat()} - {self.fy_end.isoformat()})>')
+
+
+@lru_cache(maxsize=2048)
+def get_fiscal_calendar(fy_end_month: int, fy_end_day: int, fy_year: int, frequency: str) -> FiscalCalendar:
+    """Shared FiscalCalendar for a FY configuration, fiscal year and frequency."""
+    return FiscalCalendar(fy_end_month, fy_end_day, fy_year, frequency)
@@ -0,0 +1,181 @@
+# Formula compiler for computed field expressions
+
+import ast
+import hashlib
+import math
+import threading
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class FormulaError(ValueError):
+    """Raised when a formula cannot be compiled or evaluated."""
+
+
+class CompiledFormula:
+    """
+    A formula expression parsed once into a validated AST and compiled to bytecode.
+
+    Only numeric constants, variables, parentheses and the + - * / operators
+    (plus unary minus/plus) are accepted. Variables are resolved by name from the
+    mapping passed to evaluate(), so "A" and "AB" can never collide the way
+    string substitution does.
+    """
+
+    _ALLOWED_BINARY_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div)
+    _ALLOWED_UNARY_OPS = (ast.UAdd, ast.USub)
+
+    def __init__(self, expression: str):
+        if not expression or not expression.strip():
+            raise FormulaError("Formula expression is empty")
+
+        self.expression = expression
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise FormulaError(f"Invalid formula syntax '{expression}': {e.msg}")
+
+        self.variables = self._validate(tree)
+        self._code = compile(tree, '<formula>', 'eval')
+
+    def _validate(self, tree: ast.Expression) -> FrozenSet[str]:
+        """Walk the AST, rejecting anything that is not plain arithmetic."""
+        variables = set()
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.Expression, ast.Load)):
+                continue
+            if isinstance(node, ast.Name):
+                variables.add(node.id)
+            elif isinstance(node, ast.Constant):
+                if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                    raise FormulaError(f"Unsupported constant in formula: {node.value!r}")
+            elif isinstance(node, ast.BinOp):
+                if not isinstance(node.op, self._ALLOWED_BINARY_OPS):
+                    raise FormulaError(f"Unsupported operator in formula: {type(node.op).__name__}")
+            elif isinstance(node, ast.UnaryOp):
+                if not isinstance(node.op, self._ALLOWED_UNARY_OPS):
+                    raise FormulaError(f"Unsupported operator in formula: {type(node.op).__name__}")
+            elif isinstance(node, self._ALLOWED_BINARY_OPS + self._ALLOWED_UNARY_OPS):
+                continue
+            else:
+                raise FormulaError(f"Unsupported expression in formula: {type(node).__name__}")
+        return frozenset(variables)
+
+    def missing_variables(self, values: Mapping[str, object]) -> FrozenSet[str]:
+        """Return the variables of this formula that have no value in the mapping."""
+        return frozenset(name for name in self.variables if values.get(name) is None)
+
+    def evaluate(self, values: Mapping[str, float]) -> float:
+        """
+        Evaluate the formula against a variable -> value mapping.
+
+        Raises:
+            FormulaError: If a variable is missing or the evaluation fails
+        """
+        missing = self.missing_variables(values)
+        if missing:
+            raise FormulaError(f"Missing values for variables: {', '.join(sorted(missing))}")
+
+        namespace = {name: float(values[name]) for name in self.variables}
+        try:
+            result = eval(self._code, {'__builtins__': {}}, namespace)
+        except ZeroDivisionError:
+            raise FormulaError(f"Division by zero in formula '{self.expression}'")
+        except Exception as e:
+            raise FormulaError(f"Failed to evaluate formula '{self.expression}': {str(e)}")
+
+        return float(result)
+
+    def evaluate_many(self, columns: Mapping[str, Sequence[Optional[float]]]) -> List[Optional[float]]:
+        """
+        Evaluate the formula once over arrays of values (vectorized mode).
+
+        Args:
+            columns: Mapping of variable name to equally sized sequences of values;
+                     None marks a missing value for that row
+
+        Returns:
+            One result per row; None where a variable is missing or the result
+            is not finite (e.g. division by zero)
+        """
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise FormulaError("All value columns must have the same length")
+        size = lengths.pop() if lengths else 0
+
+        missing = [name for name in self.variables if name not in columns]
+        if missing:
+            return [None] * size
+
+        namespace = {
+            name: np.array([np.nan if v is None else v for v in columns[name]], dtype=float)
+            for name in self.variables
+        }
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = eval(self._code, {'__builtins__': {}}, namespace)
+
+        result = np.broadcast_to(np.asarray(result, dtype=float), (size,))
+        return [float(v) if math.isfinite(v) else None for v in result.tolist()]
+
+
+class FormulaCompiler:
+    """
+    Process-wide cache of compiled formulas.
+
+    Entries are keyed by field_id and the hash of the formula text, so editing
+    a field's formula transparently recompiles it on the next lookup.
+    """
+
+    def __init__(self, max_size: int = 2048):
+        self.max_size = max_size
+        self._by_field: Dict[str, Tuple[str, CompiledFormula]] = {}
+        self._by_hash: Dict[str, CompiledFormula] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def formula_hash(expression: str) -> str:
+        """Stable hash of a formula expression."""
+        return hashlib.sha1(expression.strip().encode('utf-8')).hexdigest()
+
+    def compile(self, expression: str, field_id: Optional[str] = None) -> CompiledFormula:
+        """Return the compiled form of an expression, compiling it at most once."""
+        formula_hash = self.formula_hash(expression or '')
+
+        with self._lock:
+            if field_id is not None:
+                cached = self._by_field.get(field_id)
+                if cached and cached[0] == formula_hash:
+                    return cached[1]
+            compiled = self._by_hash.get(formula_hash)
+
+        if compiled is None:
+            compiled = CompiledFormula(expression)
+
+        with self._lock:
+            if len(self._by_hash) >= self.max_size:
+                self._by_hash.clear()
+                self._by_field.clear()
+            self._by_hash[formula_hash] = compiled
+            if field_id is not None:
+                self._by_field[field_id] = (formula_hash, compiled)
+
+        return compiled
+
+    def for_field(self, field) -> CompiledFormula:
+        """Compile a FrameworkDataField's formula_expression, cached by field_id."""
+        return self.compile(field.formula_expression, field.field_id)
+
+    def invalidate(self, field_ids: Optional[Iterable[str]] = None):
+        """Drop cached formulas for the given fields, or everything if None."""
+        with self._lock:
+            if field_ids is None:
+                self._by_field.clear()
+                self._by_hash.clear()
+            else:
+                for field_id in field_ids:
+                    self._by_field.pop(field_id, None)
+
+
+# Global formula compiler instance
+formula_compiler = FormulaCompiler()
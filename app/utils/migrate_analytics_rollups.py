@@ -0,0 +1,100 @@
+"""
+Database migration script for the cross-tenant analytics rollups
+
+Creates the rollup tables served by CrossTenantAnalyticsService (see
+app/models/analytics_rollup.py), the esg_data indexes used by incremental
+refreshes and the company industry column, then builds the rollups.
+
+Keep them current afterwards with:
+    flask refresh-analytics-rollups --interval 300
+
+Usage:
+    python3 -c "from app.utils.migrate_analytics_rollups import migrate; migrate()"
+
+Or from Python shell:
+    from app.utils.migrate_analytics_rollups import migrate
+    migrate()
+
+Rollback:
+- DROP TABLE analytics_daily_rollups, analytics_field_benchmarks, analytics_rollup_watermarks
+- DROP INDEX idx_esg_updated_at, idx_esg_company_created
+- ALTER TABLE company DROP COLUMN industry
+"""
+
+from ..extensions import db
+from sqlalchemy import text
+
+
+def migrate():
+    """
+    Apply the analytics rollup migration.
+
+    Changes:
+    1. Company: Add industry column
+    2. ESGData: Create idx_esg_updated_at and idx_esg_company_created indexes
+    3. Create analytics rollup tables
+    4. Build the rollups from existing data
+    """
+    from ..models.analytics_rollup import AnalyticsDailyRollup, AnalyticsFieldBenchmark, AnalyticsRollupWatermark
+    from ..services.analytics_rollup import AnalyticsRollupService
+
+    print("=" * 70)
+    print("CROSS-TENANT ANALYTICS ROLLUPS - DATABASE MIGRATION")
+    print("=" * 70)
+    print()
+
+    try:
+        # Step 1: Add industry column
+        print("[1/4] Adding industry to Company table...")
+        try:
+            db.session.execute(text("ALTER TABLE company ADD COLUMN industry VARCHAR(50)"))
+            db.session.commit()
+            print("✓ Company table updated successfully")
+        except Exception as e:
+            if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
+                print("⊳ Column already exists, skipping...")
+                db.session.rollback()
+            else:
+                raise
+
+        # Step 2: Indexes for the change window and per-day recounts
+        print("\n[2/4] Creating esg_data indexes...")
+        db.session.execute(text("CREATE INDEX IF NOT EXISTS idx_esg_updated_at ON esg_data(updated_at)"))
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_esg_company_created
+            ON esg_data(company_id, created_at)
+        """))
+        db.session.commit()
+        print("✓ Created idx_esg_updated_at and idx_esg_company_created indexes")
+
+        # Step 3: Create tables (no-op when they already exist)
+        print("\n[3/4] Creating analytics rollup tables...")
+        for model in (AnalyticsDailyRollup, AnalyticsFieldBenchmark, AnalyticsRollupWatermark):
+            model.__table__.create(db.engine, checkfirst=True)
+        print("✓ Analytics rollup tables ready")
+
+        # Step 4: Initial build
+        print("\n[4/4] Building rollups from existing data...")
+        result = AnalyticsRollupService.refresh(full=True)
+        print(f"✓ Rolled up {result['entries_changed']} entries into {result['cells_recounted']} daily cells")
+
+        print("\n" + "=" * 70)
+        print("MIGRATION COMPLETED SUCCESSFULLY")
+        print("=" * 70)
+        return True
+
+    except Exception as e:
+        db.session.rollback()
+        print("\n" + "=" * 70)
+        print("✗ MIGRATION FAILED!")
+        print("=" * 70)
+        print(f"Error: {str(e)}")
+        raise
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        migrate()
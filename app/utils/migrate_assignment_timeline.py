@@ -0,0 +1,92 @@
+"""
+Database migration script for the assignment history timeline
+
+Creates the index behind keyset pagination of the timeline API, in the
+timeline's (assigned_date DESC NULLS LAST, series_version DESC, id DESC)
+order so pages are read off the index without a sort, and, on
+PostgreSQL, trigram indexes that let its substring search over field, entity
+and user names use an index instead of scanning each table.
+
+Usage:
+    python3 -c "from app.utils.migrate_assignment_timeline import migrate; migrate()"
+
+Or from Python shell:
+    from app.utils.migrate_assignment_timeline import migrate
+    migrate()
+
+Rollback:
+- DROP INDEX idx_assignment_company_timeline
+- DROP INDEX idx_field_name_trgm, idx_entity_name_trgm, idx_user_name_trgm (PostgreSQL)
+"""
+
+from ..extensions import db
+from sqlalchemy import text
+
+
+TRIGRAM_INDEXES = (
+    ('idx_field_name_trgm', 'framework_data_fields', 'field_name'),
+    ('idx_entity_name_trgm', 'entity', 'name'),
+    ('idx_user_name_trgm', '"user"', 'name'),
+)
+
+
+def migrate():
+    """
+    Apply the assignment timeline migration.
+
+    Changes:
+    1. DataPointAssignment: Create idx_assignment_company_timeline index
+    2. PostgreSQL only: Enable pg_trgm and create trigram indexes on name columns
+    """
+    print("=" * 70)
+    print("ASSIGNMENT HISTORY TIMELINE - DATABASE MIGRATION")
+    print("=" * 70)
+    print()
+
+    try:
+        # Step 1: Keyset pagination index, matching the timeline's sort order.
+        # Recreated, since an earlier version of this migration built it ascending
+        print("[1/2] Creating timeline index on data_point_assignments...")
+        # Outside PostgreSQL NULLs already sort last when descending
+        nulls_last = " NULLS LAST" if db.engine.dialect.name == 'postgresql' else ""
+        db.session.execute(text("DROP INDEX IF EXISTS idx_assignment_company_timeline"))
+        db.session.execute(text(f"""
+            CREATE INDEX idx_assignment_company_timeline
+            ON data_point_assignments(company_id, assigned_date DESC{nulls_last}, series_version DESC, id DESC)
+        """))
+        db.session.commit()
+        print("✓ Created idx_assignment_company_timeline index")
+
+        # Step 2: Trigram indexes for ILIKE '%term%' search
+        print("\n[2/2] Creating trigram search indexes...")
+        if db.engine.dialect.name != 'postgresql':
+            print(f"⊳ {db.engine.dialect.name} has no trigram indexes, skipping...")
+        else:
+            db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            for index_name, table, column in TRIGRAM_INDEXES:
+                db.session.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)"
+                ))
+            db.session.commit()
+            print(f"✓ Created {', '.join(name for name, _, _ in TRIGRAM_INDEXES)}")
+
+        print("\n" + "=" * 70)
+        print("MIGRATION COMPLETED SUCCESSFULLY")
+        print("=" * 70)
+        return True
+
+    except Exception as e:
+        db.session.rollback()
+        print("\n" + "=" * 70)
+        print("✗ MIGRATION FAILED!")
+        print("=" * 70)
+        print(f"Error: {str(e)}")
+        raise
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        migrate()
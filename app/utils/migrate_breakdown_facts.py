@@ -0,0 +1,115 @@
+"""
+Database migration script for the dimensional breakdown fact table
+
+Creates esg_data_breakdowns (see ESGDataBreakdown) and fills it from the
+dimension_values JSON of existing entries. New and updated entries maintain
+their fact rows automatically.
+
+Run this script ONCE to apply the database schema changes. Re-running it
+rebuilds the fact rows.
+
+Usage:
+    python3 -c "from app.utils.migrate_breakdown_facts import migrate; migrate()"
+
+Or from Python shell:
+    from app.utils.migrate_breakdown_facts import migrate
+    migrate()
+
+Rollback:
+- DROP TABLE esg_data_breakdowns
+"""
+
+from ..extensions import db
+
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def backfill_breakdown_facts(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Rebuild the fact rows of every entry holding a structured breakdown.
+
+    Structured payloads have an empty canonical dimension_key, so only those
+    entries are read, in data_id order (keyset pagination). Each batch
+    replaces its fact rows with one DELETE and one executemany INSERT.
+
+    Args:
+        batch_size: Entries read per batch
+
+    Returns:
+        int: Number of fact rows written
+    """
+    from ..models.esg_data import ESGData, ESGDataBreakdown
+
+    table = ESGDataBreakdown.__table__
+    written = 0
+    last_id = ''
+    while True:
+        rows = db.session.query(ESGData.data_id, ESGData.dimension_values).filter(
+            ESGData.data_id > last_id,
+            ESGData.dimension_key == ''
+        ).order_by(ESGData.data_id).limit(batch_size).all()
+        if not rows:
+            break
+
+        facts = []
+        for data_id, dimension_values in rows:
+            facts.extend(ESGDataBreakdown.rows_for(data_id, dimension_values))
+
+        db.session.execute(table.delete().where(table.c.data_id.in_([data_id for data_id, _ in rows])))
+        if facts:
+            db.session.execute(table.insert(), facts)
+        db.session.commit()
+        written += len(facts)
+
+        last_id = rows[-1][0]
+
+    return written
+
+
+def migrate():
+    """
+    Apply the breakdown fact table migration.
+
+    Changes:
+    1. ESGDataBreakdown: Create esg_data_breakdowns table and index
+    2. ESGDataBreakdown: Backfill fact rows from existing dimension_values
+    """
+    from ..models.esg_data import ESGDataBreakdown
+
+    print("=" * 70)
+    print("DIMENSIONAL BREAKDOWN FACTS - DATABASE MIGRATION")
+    print("=" * 70)
+    print()
+
+    try:
+        # Step 1: Create table (no-op when it already exists)
+        print("[1/2] Creating esg_data_breakdowns table...")
+        ESGDataBreakdown.__table__.create(db.engine, checkfirst=True)
+        print("✓ esg_data_breakdowns table ready")
+
+        # Step 2: Backfill
+        print("\n[2/2] Building fact rows from existing dimensional data...")
+        written = backfill_breakdown_facts()
+        print(f"✓ Wrote {written} fact rows")
+
+        print("\n" + "=" * 70)
+        print("MIGRATION COMPLETED SUCCESSFULLY")
+        print("=" * 70)
+        return True
+
+    except Exception as e:
+        db.session.rollback()
+        print("\n" + "=" * 70)
+        print("✗ MIGRATION FAILED!")
+        print("=" * 70)
+        print(f"Error: {str(e)}")
+        raise
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        migrate()
@@ -0,0 +1,186 @@
+"""
+Database migration script for the indexed ESGData dimension key
+
+Adds the esg_data.dimension_key column (canonical key of dimension_values,
+see ESGData.canonical_dimension_key), backfills it for existing rows, indexes
+it and widens the uniqueness constraint to one entry per dimension
+combination.
+
+Run this script ONCE to apply the database schema changes.
+
+Usage:
+    python3 -c "from app.utils.migrate_dimension_key import migrate; migrate()"
+
+Or from Python shell:
+    from app.utils.migrate_dimension_key import migrate
+    migrate()
+
+Rollback:
+- Recreate uq_esg_single_entry_per_date on (field_id, entity_id, reporting_date, company_id)
+- DROP INDEX idx_esg_dimension_key
+- ALTER TABLE esg_data DROP COLUMN dimension_key
+"""
+
+from ..extensions import db
+from sqlalchemy import text
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_dimension_keys(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Compute dimension_key for every existing esg_data row.
+
+    Rows are read in data_id order (keyset pagination) and only rows whose
+    stored key differs are updated, one executemany per batch that leaves
+    updated_at untouched, so the backfill can be re-run safely.
+
+    Args:
+        batch_size: Rows read and updated per batch
+
+    Returns:
+        int: Number of rows updated
+    """
+    from ..models.esg_data import ESGData
+
+    updated = 0
+    last_id = ''
+    while True:
+        rows = db.session.query(
+            ESGData.data_id, ESGData.dimension_values, ESGData.dimension_key
+        ).filter(
+            ESGData.data_id > last_id
+        ).order_by(ESGData.data_id).limit(batch_size).all()
+        if not rows:
+            break
+
+        changes = []
+        for data_id, dimension_values, dimension_key in rows:
+            key = ESGData.canonical_dimension_key(dimension_values)
+            if key != dimension_key:
+                changes.append({'data_id': data_id, 'dimension_key': key})
+        if changes:
+            db.session.execute(
+                text("UPDATE esg_data SET dimension_key = :dimension_key WHERE data_id = :data_id"),
+                changes
+            )
+            db.session.commit()
+            updated += len(changes)
+
+        last_id = rows[-1][0]
+
+    return updated
+
+
+def migrate():
+    """
+    Apply the dimension key migration.
+
+    Changes:
+    1. ESGData: Add dimension_key column
+    2. ESGData: Backfill dimension_key from dimension_values
+    3. ESGData: Create idx_esg_dimension_key index
+    4. ESGData: Include dimension_key in uq_esg_single_entry_per_date
+    """
+
+    print("=" * 70)
+    print("ESG DATA DIMENSION KEY - DATABASE MIGRATION")
+    print("=" * 70)
+    print()
+
+    db_url = str(db.engine.url)
+    is_sqlite = 'sqlite' in db_url.lower()
+
+    try:
+        # Step 1: Add dimension_key column
+        print("[1/4] Adding dimension_key to ESGData table...")
+        try:
+            db.session.execute(text("""
+                ALTER TABLE esg_data
+                ADD COLUMN dimension_key VARCHAR(255) DEFAULT '' NOT NULL
+            """))
+            db.session.commit()
+            print("✓ ESGData table updated successfully")
+        except Exception as e:
+            if "duplicate column name" in str(e).lower() or "already exists" in str(e).lower():
+                print("⊳ Column already exists, skipping...")
+                db.session.rollback()
+            else:
+                raise
+
+        # Step 2: Backfill existing rows
+        print("\n[2/4] Backfilling dimension_key for existing data...")
+        updated = backfill_dimension_keys()
+        print(f"✓ Updated {updated} rows")
+
+        # Step 3: Index for dimensional lookups
+        print("\n[3/4] Creating idx_esg_dimension_key index...")
+        db.session.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_esg_dimension_key
+            ON esg_data(field_id, entity_id, dimension_key)
+        """))
+        db.session.commit()
+        print("✓ Created idx_esg_dimension_key index")
+
+        # Step 4: One entry per dimension combination
+        print("\n[4/4] Including dimension_key in uq_esg_single_entry_per_date...")
+        if is_sqlite:
+            # SQLite cannot drop a constraint declared in CREATE TABLE; only a
+            # constraint created as a named index can be replaced in place
+            is_index = db.session.execute(text("""
+                SELECT name FROM sqlite_master
+                WHERE type='index' AND name='uq_esg_single_entry_per_date'
+            """)).fetchone() is not None
+            if is_index or not _sqlite_has_table_unique_constraint():
+                db.session.execute(text("DROP INDEX IF EXISTS uq_esg_single_entry_per_date"))
+                db.session.execute(text("""
+                    CREATE UNIQUE INDEX uq_esg_single_entry_per_date
+                    ON esg_data(field_id, entity_id, reporting_date, company_id, dimension_key)
+                """))
+                db.session.commit()
+                print("✓ Unique index recreated")
+            else:
+                print("⊳ Constraint is part of the table definition; it stays in place until the")
+                print("  esg_data table is rebuilt (e.g. db.create_all() on a fresh database)")
+        else:
+            db.session.execute(text("""
+                ALTER TABLE esg_data
+                DROP CONSTRAINT IF EXISTS uq_esg_single_entry_per_date
+            """))
+            db.session.execute(text("""
+                ALTER TABLE esg_data
+                ADD CONSTRAINT uq_esg_single_entry_per_date
+                UNIQUE (field_id, entity_id, reporting_date, company_id, dimension_key)
+            """))
+            db.session.commit()
+            print("✓ Unique constraint recreated")
+
+        print("\n" + "=" * 70)
+        print("MIGRATION COMPLETED SUCCESSFULLY")
+        print("=" * 70)
+        return True
+
+    except Exception as e:
+        db.session.rollback()
+        print("\n" + "=" * 70)
+        print("✗ MIGRATION FAILED!")
+        print("=" * 70)
+        print(f"Error: {str(e)}")
+        raise
+
+
+def _sqlite_has_table_unique_constraint() -> bool:
+    """True if esg_data's CREATE TABLE statement declares the uniqueness constraint."""
+    row = db.session.execute(text("""
+        SELECT sql FROM sqlite_master WHERE type='table' AND name='esg_data'
+    """)).fetchone()
+    return bool(row and 'uq_esg_single_entry_per_date' in (row[0] or ''))
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        migrate()
@@ -1,7 +1,16 @@
 # Phase 4: Unit conversion utilities for ESG DataVault
 
+import numpy as np
+
+
 class UnitConverter:
-    """Utility class for converting between different units within the same category."""
+    """Utility class for converting between different units within the same category.
+
+    CONVERSION_FACTORS is flattened once into UNIT_CATEGORIES (unit -> category)
+    and FACTOR_TABLE ((from_unit, to_unit) -> multiplier) so that category
+    lookups and conversions are single dict lookups, and a whole column of
+    values converts with one multiplication.
+    """
     
     # Unit conversion mappings (base unit -> multiplier to convert to base)
     CONVERSION_FACTORS = {
@@ -104,13 +113,47 @@ class UnitConverter:
         }
     }
 
+    # Flat lookup tables, filled from CONVERSION_FACTORS by build_tables()
+    UNIT_CATEGORIES = {}
+    FACTOR_TABLE = {}
+
+    @classmethod
+    def build_tables(cls):
+        """Rebuild UNIT_CATEGORIES and FACTOR_TABLE from CONVERSION_FACTORS."""
+        unit_categories = {}
+        factor_table = {}
+        for category, data in cls.CONVERSION_FACTORS.items():
+            conversions = data['conversions']
+            for from_unit, from_multiplier in conversions.items():
+                unit_categories.setdefault(from_unit, category)
+                for to_unit, to_multiplier in conversions.items():
+                    # Via the base unit: value * from_multiplier / to_multiplier
+                    factor_table[(from_unit, to_unit)] = (
+                        1.0 if from_unit == to_unit else from_multiplier / to_multiplier
+                    )
+        cls.UNIT_CATEGORIES = unit_categories
+        cls.FACTOR_TABLE = factor_table
+
     @classmethod
     def get_unit_category(cls, unit):
         """Get the category for a given unit."""
-        for category, data in cls.CONVERSION_FACTORS.items():
-            if unit in data['conversions']:
-                return category
-        return None
+        return cls.UNIT_CATEGORIES.get(unit)
+
+    @classmethod
+    def get_conversion_factor(cls, from_unit, to_unit):
+        """Get the multiplier converting from_unit to to_unit, or None if they are not convertible."""
+        return cls.FACTOR_TABLE.get((from_unit, to_unit))
+
+    @classmethod
+    def _conversion_error(cls, from_unit, to_unit):
+        """Explain why from_unit cannot be converted to to_unit."""
+        from_category = cls.get_unit_category(from_unit)
+        to_category = cls.get_unit_category(to_unit)
+
+        if not from_category or not to_category:
+            return f"Unknown unit(s): {from_unit} or {to_unit}"
+
+        return f"Cannot convert between different categories: {from_category} -> {to_category}"
 
     @classmethod
     def get_available_units(cls, category):
@@ -132,30 +175,49 @@ class UnitConverter:
             tuple: (converted_value, success, error_message)
         """
         try:
-            # Find categories for both units
-            from_category = cls.get_unit_category(from_unit)
-            to_category = cls.get_unit_category(to_unit)
-            
-            if not from_category or not to_category:
-                return value, False, f"Unknown unit(s): {from_unit} or {to_unit}"
-            
-            if from_category != to_category:
-                return value, False, f"Cannot convert between different categories: {from_category} -> {to_category}"
-            
+            factor = cls.get_conversion_factor(from_unit, to_unit)
+
+            if factor is None:
+                return value, False, cls._conversion_error(from_unit, to_unit)
+
             # Same unit, no conversion needed
             if from_unit == to_unit:
                 return value, True, None
-            
-            # Convert to base unit, then to target unit
-            conversions = cls.CONVERSION_FACTORS[from_category]['conversions']
-            base_value = value * conversions[from_unit]
-            converted_value = base_value / conversions[to_unit]
-            
-            return converted_value, True, None
-            
-        except (KeyError, ZeroDivisionError, TypeError) as e:
+
+            return value * factor, True, None
+
+        except TypeError as e:
             return value, False, f"Conversion error: {str(e)}"
 
+    @classmethod
+    def convert_values(cls, values, from_unit, to_unit):
+        """Convert a whole column of values from one unit to another in one operation.
+
+        Args:
+            values (numpy.ndarray or list): The values to convert; in a list,
+                None marks a missing value and is kept as None
+            from_unit (str): Source unit
+            to_unit (str): Target unit
+
+        Returns:
+            tuple: (converted_values, success, error_message), where
+            converted_values is a float array for an array input and a list
+            otherwise (the input itself when the conversion fails)
+        """
+        factor = cls.get_conversion_factor(from_unit, to_unit)
+
+        if factor is None:
+            return values, False, cls._conversion_error(from_unit, to_unit)
+
+        try:
+            if isinstance(values, np.ndarray):
+                return values.astype(float) * factor, True, None
+
+            return [None if value is None else value * factor for value in values], True, None
+
+        except (TypeError, ValueError) as e:
+            return values, False, f"Conversion error: {str(e)}"
+
     @classmethod
     def normalize_to_default(cls, value, unit, field_default_unit):
         """Convert a value to the field's default unit if different.
@@ -182,6 +244,60 @@ class UnitConverter:
             "error": error
         }
 
+    @classmethod
+    def normalize_values(cls, values, units, field_default_unit):
+        """Convert a column of values, each with its own unit, to the field's default unit.
+
+        Rows sharing a unit are converted together, so the cost is one
+        multiplication over the column rather than one conversion per value.
+
+        Args:
+            values (numpy.ndarray or list): The values to normalize
+            units (str or list): Unit of every value, or one unit for all of
+                them; an empty unit means the value is already in the default unit
+            field_default_unit (str): Default unit for the field
+
+        Returns:
+            tuple: (normalized_values, success, conversion_info); values whose
+            unit cannot be converted are left unchanged and listed by unit in
+            conversion_info["failed_units"]
+        """
+        if units is None or isinstance(units, str):
+            if not units or units == field_default_unit:
+                return values, True, {"conversion_applied": False}
+
+            converted_values, success, error = cls.convert_values(values, units, field_default_unit)
+            return converted_values, success, {
+                "conversion_applied": success,
+                "target_unit": field_default_unit,
+                "failed_units": {} if success else {units: error},
+            }
+
+        factors = {}
+        failed_units = {}
+        for unit in set(units):
+            if not unit or unit == field_default_unit:
+                factors[unit] = 1.0
+                continue
+            factor = cls.get_conversion_factor(unit, field_default_unit)
+            if factor is None:
+                failed_units[unit] = cls._conversion_error(unit, field_default_unit)
+                factor = 1.0
+            factors[unit] = factor
+
+        row_factors = np.fromiter((factors[unit] for unit in units), dtype=float, count=len(units))
+        if isinstance(values, np.ndarray):
+            normalized_values = values.astype(float) * row_factors
+        else:
+            normalized_values = [None if value is None else value * factor
+                                 for value, factor in zip(values, row_factors.tolist())]
+
+        return normalized_values, not failed_units, {
+            "conversion_applied": any(factor != 1.0 for factor in factors.values()),
+            "target_unit": field_default_unit,
+            "failed_units": failed_units,
+        }
+
     @classmethod
     def get_unit_dropdown_options(cls, unit_category):
         """Get formatted options for unit dropdown based on category.
@@ -235,6 +351,9 @@ class UnitConverter:
         return True, actual_category, None
 
 
+UnitConverter.build_tables()
+
+
 # Convenience functions for common operations
 
 def convert_to_field_default(esg_data_value, input_unit, field):
@@ -258,6 +377,29 @@ def convert_to_field_default(esg_data_value, input_unit, field):
     )
 
 
+def convert_column_to_field_default(values, input_units, field):
+    """Convert a column of ESG data values to the field's default unit.
+
+    Args:
+        values (numpy.ndarray or list): The raw values
+        input_units (str or list): Unit of every value, or one unit for all of them
+        field (FrameworkDataField): The field object
+
+    Returns:
+        tuple: (converted_values, conversion_info)
+    """
+    if not field.default_unit:
+        return values, {"no_default_unit": True}
+
+    converted_values, success, conversion_info = UnitConverter.normalize_values(
+        values,
+        input_units,
+        field.default_unit
+    )
+
+    return converted_values, conversion_info
+
+
 def get_unit_options_for_field(field):
     """Get unit dropdown options for a specific field.
     
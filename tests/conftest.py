@@ -0,0 +1,67 @@
+"""
+Shared test fixtures.
+
+The app fixture builds the application on an in-memory database without
+migrations and without recomputing computed fields on write. A module
+adjusts it by overriding the app_config fixture (extra config attributes)
+or the app_caches fixture (process-local caches cleared around each test).
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestingConfig
+
+
+class ServiceTestingConfig(TestingConfig):
+    SKIP_MIGRATIONS = True
+
+
+@pytest.fixture
+def app_config():
+    """Config attributes set on top of ServiceTestingConfig."""
+    return {'COMPUTED_FIELD_RECOMPUTE_ON_WRITE': False}
+
+
+@pytest.fixture
+def app_caches():
+    """Caches cleared before and after each test."""
+    return ()
+
+
+@pytest.fixture
+def app(app_config, app_caches):
+    """Create application for testing."""
+    config = type('ModuleTestingConfig', (ServiceTestingConfig,), dict(app_config))
+    app = create_app(config)
+    with app.app_context():
+        for cache in app_caches:
+            cache.clear()
+        yield app
+        for cache in app_caches:
+            cache.clear()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def record_statements(app):
+    """Context manager collecting the SQL statements executed inside it."""
+
+    @contextmanager
+    def record():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    return record
@@ -0,0 +1,111 @@
+"""
+Unit tests for the set-based batch engine in AggregationService.compute_multiple_fields.
+
+Tests cover:
+- Parity with per-tuple compute_field_value results
+- Constant query count regardless of the number of tuples
+"""
+
+import pytest
+from datetime import date
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField, FieldVariableMapping
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.services.aggregation import AggregationService
+
+
+@pytest.fixture
+def computed_setup(app):
+    """Create a computed field C = A + 2*B with monthly raw data for several entities."""
+    company = Company(name="Batch Co", slug="batch-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+
+    user = User(name="Admin", email="admin@batch.co", role="ADMIN", company_id=company.id)
+    db.session.add(user)
+
+    framework = Framework(framework_name="Batch FW", company_id=company.id)
+    db.session.add(framework)
+    db.session.flush()
+
+    raw_a = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                               field_name="Raw A", value_type="NUMBER")
+    raw_b = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                               field_name="Raw B", value_type="NUMBER")
+    computed = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                  field_name="Computed C", value_type="NUMBER", is_computed=True)
+    db.session.add_all([raw_a, raw_b, computed])
+    db.session.flush()
+    computed.formula_expression = "A + B"
+
+    db.session.add_all([
+        FieldVariableMapping(computed_field_id=computed.field_id, raw_field_id=raw_a.field_id,
+                             variable_name="A", coefficient=1.0),
+        FieldVariableMapping(computed_field_id=computed.field_id, raw_field_id=raw_b.field_id,
+                             variable_name="B", coefficient=2.0),
+    ])
+
+    entities = []
+    for i in range(3):
+        entity = Entity(name=f"Entity {i}", entity_type="Site", company_id=company.id)
+        db.session.add(entity)
+        entities.append(entity)
+    db.session.flush()
+
+    for entity in entities:
+        db.session.add(DataPointAssignment(field_id=computed.field_id, entity_id=entity.id,
+                                           frequency='Annual', assigned_by=user.id, company_id=company.id))
+        for raw in (raw_a, raw_b):
+            db.session.add(DataPointAssignment(field_id=raw.field_id, entity_id=entity.id,
+                                               frequency='Monthly', assigned_by=user.id, company_id=company.id))
+        for month in (1, 2, 3):
+            month_end = date(2024, month, 28)
+            db.session.add(ESGData(entity_id=entity.id, field_id=raw_a.field_id, company_id=company.id,
+                                   raw_value=str(10 * (entity.id + month)), reporting_date=month_end))
+            db.session.add(ESGData(entity_id=entity.id, field_id=raw_b.field_id, company_id=company.id,
+                                   raw_value=str(entity.id + month), reporting_date=month_end))
+
+    db.session.commit()
+    return {'computed': computed, 'entities': entities}
+
+
+class TestComputeMultipleFields:
+
+    def test_matches_single_computation(self, app, computed_setup):
+        service = AggregationService()
+        tuples = [
+            (computed_setup['computed'].field_id, entity.id, date(2024, 12, 31))
+            for entity in computed_setup['entities']
+        ]
+
+        batch = service.compute_multiple_fields(tuples)
+
+        for key in tuples:
+            assert batch[key] == pytest.approx(service.compute_field_value(*key))
+            assert batch[key] is not None
+
+    def test_missing_field_returns_none(self, app, computed_setup):
+        service = AggregationService()
+        key = ('missing-field', computed_setup['entities'][0].id, date(2024, 12, 31))
+
+        assert service.compute_multiple_fields([key]) == {key: None}
+
+    def test_query_count_is_constant(self, app, computed_setup, record_statements):
+        service = AggregationService()
+        field_id = computed_setup['computed'].field_id
+        entity_ids = [entity.id for entity in computed_setup['entities']]
+
+        with record_statements() as single:
+            service.compute_multiple_fields([(field_id, entity_ids[0], date(2024, 12, 31))])
+        db.session.expire_all()
+        with record_statements() as many:
+            service.compute_multiple_fields(
+                [(field_id, entity_id, date(2024, month, 28)) for entity_id in entity_ids for month in (1, 2, 3)]
+            )
+
+        assert len(many) == len(single)
@@ -0,0 +1,186 @@
+"""
+Unit tests for the cross-tenant analytics rollups.
+
+Tests cover:
+- Full and incremental refreshes producing the same daily cells
+- Update activity and benchmarks following changes past the watermark
+- Late-committing rows behind the watermark and overlapping refresh windows
+- Analytics endpoints served from the rollups without touching esg_data
+"""
+
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.models.analytics_rollup import AnalyticsDailyRollup
+from app.services.analytics_rollup import AnalyticsRollupService
+from app.services.analytics_service import CrossTenantAnalyticsService
+
+
+@pytest.fixture
+def rollup_setup(app):
+    """Two tenants in different industries, each with one framework of two fields."""
+    tenants = []
+    for index, industry in enumerate(('Energy', 'Retail')):
+        company = Company(name=f"Tenant {index}", slug=f"tenant-{index}", fy_end_month=12, fy_end_day=31)
+        company.industry = industry
+        db.session.add(company)
+        db.session.flush()
+        user = User(name="Admin", email=f"admin@tenant{index}.co", role="ADMIN", company_id=company.id)
+        framework = Framework(framework_name=f"Framework {index}", company_id=company.id)
+        entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+        db.session.add_all([user, framework, entity])
+        db.session.flush()
+        fields = [FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                     field_name=name, value_type="NUMBER") for name in ("Energy", "Water")]
+        db.session.add_all(fields)
+        db.session.flush()
+        assignments = [DataPointAssignment(field_id=field.field_id, entity_id=entity.id, frequency='Monthly',
+                                           assigned_by=user.id, company_id=company.id) for field in fields]
+        db.session.add_all(assignments)
+        db.session.flush()
+        tenants.append({'company': company, 'entity': entity, 'fields': fields, 'framework': framework,
+                        'dates': assignments[0].get_valid_reporting_dates(2024)})
+    db.session.commit()
+    return tenants
+
+
+def _entry(tenant, field, month, value, days_ago=0):
+    row = ESGData(entity_id=tenant['entity'].id, field_id=tenant['fields'][field].field_id, raw_value=value,
+                  reporting_date=tenant['dates'][month], company_id=tenant['company'].id)
+    row.created_at = datetime.now(UTC) - timedelta(days=days_ago)
+    db.session.add(row)
+    return row
+
+
+def _cells():
+    return sorted(
+        (row.day, row.company_id, row.framework_id, row.entries_created, row.entries_completed,
+         row.assignments_created, row.assignments_active)
+        for row in AnalyticsDailyRollup.query
+    )
+
+
+class TestRollupRefresh:
+
+    def test_incremental_refresh_matches_full_rebuild(self, app, rollup_setup):
+        energy, retail = rollup_setup
+        _entry(energy, 0, 0, '10', days_ago=3)
+        _entry(energy, 0, 1, None, days_ago=3)
+        _entry(retail, 1, 0, '5')
+        db.session.commit()
+        first = AnalyticsRollupService.refresh()
+
+        pending = ESGData.query.filter_by(raw_value=None).one()
+        pending.raw_value = '12'
+        _entry(energy, 1, 0, '7', days_ago=3)
+        db.session.commit()
+        second = AnalyticsRollupService.refresh()
+        incremental = _cells()
+
+        AnalyticsRollupService.refresh(full=True)
+
+        assert first['entries_changed'] == 3
+        assert second['entries_changed'] == 2
+        assert incremental == _cells()
+        energy_cell = [cell for cell in incremental if cell[1] == energy['company'].id and cell[3]]
+        assert [cell[3:5] for cell in energy_cell] == [(3, 3)]
+
+    def test_update_activity_recounted_per_refresh(self, app, rollup_setup):
+        energy = rollup_setup[0]
+        row = _entry(energy, 0, 0, '10')
+        row.updated_at = datetime.now(UTC) - timedelta(days=2)
+        db.session.commit()
+        AnalyticsRollupService.refresh()
+        AnalyticsRollupService.refresh()  # Re-reading the lag window does not count twice
+        assert sum(cell.entries_updated for cell in AnalyticsDailyRollup.query) == 1
+
+        # The write moves from the day of the previous one to today
+        row.raw_value = '11'
+        db.session.commit()
+        AnalyticsRollupService.refresh()
+
+        updated = {cell.day: cell.entries_updated for cell in AnalyticsDailyRollup.query if cell.entries_updated}
+        assert updated == {datetime.now(UTC).date(): 1}
+        metrics = CrossTenantAnalyticsService.get_global_metrics()['metrics']
+        assert metrics['data_quality']['recent_updates'] == 1
+        assert metrics['system_overview']['total_esg_records'] == 1
+
+    def test_late_commit_behind_watermark_is_picked_up(self, app, rollup_setup):
+        energy = rollup_setup[0]
+        _entry(energy, 0, 0, '10')
+        db.session.commit()
+        first = AnalyticsRollupService.refresh()
+
+        # Stamped before the rows already read, committed after the refresh
+        late = _entry(energy, 0, 1, '12')
+        late.updated_at = datetime.fromisoformat(first['watermark']) - timedelta(minutes=1)
+        db.session.commit()
+        second = AnalyticsRollupService.refresh()
+
+        assert second['watermark'] == first['watermark']
+        assert sum(cell[3] for cell in _cells()) == 2
+
+    def test_benchmarks_follow_changed_fields(self, app, rollup_setup):
+        energy, retail = rollup_setup
+        for month, value in enumerate(('1', '2', '3')):
+            _entry(energy, 0, month, value)
+        for month, value in enumerate(('4', '5', 'n/a')):
+            _entry(retail, 0, month, value)
+        db.session.commit()
+        AnalyticsRollupService.refresh()
+
+        overall = CrossTenantAnalyticsService.get_benchmark_data()['benchmarks']['data']
+        by_industry = CrossTenantAnalyticsService.get_benchmark_data(industry='Energy')['benchmarks']['data']
+        assert by_industry == {}
+        # Fields of both tenants are benchmarked separately: 3 + 2 numeric values
+        assert overall == {}
+
+        for month in range(3, 5):
+            _entry(energy, 0, month, str(month + 1))
+        db.session.commit()
+        AnalyticsRollupService.refresh()
+
+        benchmark = CrossTenantAnalyticsService.get_benchmark_data(industry='Energy')['benchmarks']['data']
+        statistics = benchmark['Framework 0::Energy']['statistics']
+        assert benchmark['Framework 0::Energy']['sample_size'] == 5
+        assert (statistics['min'], statistics['max'], statistics['median']) == (1.0, 5.0, 3.0)
+
+
+class TestAnalyticsFromRollups:
+
+    def test_endpoints_do_not_read_esg_data(self, app, rollup_setup, record_statements):
+        energy, retail = rollup_setup
+        _entry(energy, 0, 0, '10')
+        _entry(energy, 1, 0, None)
+        _entry(retail, 0, 0, '3', days_ago=5)
+        db.session.commit()
+        AnalyticsRollupService.refresh()
+
+        with record_statements() as statements:
+            metrics = CrossTenantAnalyticsService.get_global_metrics()
+            comparison = CrossTenantAnalyticsService.get_tenant_comparison(anonymize=False)
+            trends = CrossTenantAnalyticsService.get_trend_analysis(days=30)
+
+        assert not [statement for statement in statements if 'esg_data' in statement]
+        assert not [statement for statement in statements if 'data_point_assignments' in statement]
+
+        overview = metrics['metrics']['system_overview']
+        assert (overview['total_esg_records'], overview['total_data_points']) == (3, 4)
+        assert metrics['metrics']['data_quality']['completion_rate'] == 50.0
+        assert sorted(item['usage_count'] for item in metrics['metrics']['framework_usage']) == [2, 2]
+
+        tenants = {item['tenant_id']: item for item in comparison['comparison']['tenant_data']}
+        assert tenants['Tenant 0']['entity_count'] == 1
+        assert tenants['Tenant 0']['completion_rate'] == 50.0
+        assert comparison['comparison']['industry_benchmarks']['Retail']['total_data_points'] == 2
+
+        assert [point['count'] for point in trends['trends']['daily_data_entries']] == [1, 2]
+        assert trends['trends']['data_as_of'] is not None
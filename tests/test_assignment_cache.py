@@ -0,0 +1,206 @@
+"""
+Unit tests for the LRU+TTL cache and the assignment resolution cache built on it.
+
+Tests cover:
+- O(1) LRU eviction, TTL expiry, negative caching and counters
+- Tag-based invalidation
+- Snapshot storage and invalidation on assignment writes
+- Per-tenant active-assignment index
+"""
+
+import pytest
+from datetime import date
+from flask import g
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.services.assignment_versioning import (
+    AssignmentResolutionService, assignment_cache, active_assignment_index
+)
+from app.utils.cache import LRUTTLCache, MISSING
+
+
+class TestLRUTTLCache:
+
+    def test_lru_eviction(self):
+        cache = LRUTTLCache(max_size=2, ttl=None)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1  # 'b' is now least recently used
+        cache.set('c', 3)
+
+        assert cache.get('b') is MISSING
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.stats()['evictions'] == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr('app.utils.cache.time.monotonic', lambda: now[0])
+        cache = LRUTTLCache(max_size=10, ttl=5)
+        cache.set('a', 1)
+
+        now[0] += 4
+        assert cache.get('a') == 1
+        now[0] += 2
+        assert cache.get('a') is MISSING
+        assert cache.stats()['expirations'] == 1
+
+    def test_caches_none(self):
+        cache = LRUTTLCache()
+        cache.set('a', None)
+        assert cache.get('a') is None
+        assert cache.stats()['hits'] == 1
+
+    def test_invalidate_tag(self):
+        cache = LRUTTLCache()
+        cache.set('a', 1, tags=['x'])
+        cache.set('b', 2, tags=['x', 'y'])
+        cache.set('c', 3, tags=['y'])
+
+        assert cache.invalidate_tag('x') == 2
+        assert cache.get('a') is MISSING
+        assert cache.get('b') is MISSING
+        assert cache.get('c') == 3
+
+    def test_second_tier_shared_between_workers(self):
+        tier = SharedTier()
+        worker_a = LRUTTLCache(second_tier=tier)
+        worker_b = LRUTTLCache(second_tier=tier)
+        worker_a.set('a', 1, tags=[('company', 1)])
+        worker_a.set('b', 2, tags=[('company', 2)])
+
+        # Promoted entries keep their tags
+        assert worker_b.get('a') == 1
+        assert worker_b.invalidate_tag(('company', 1)) == 1
+
+        # Worker A's local copy is dropped by worker B's invalidation
+        assert worker_a.get('a') is MISSING
+        assert worker_a.get('b') == 2
+
+
+class SharedTier:
+    """In-memory stand-in for RedisCacheTier shared by several caches (workers)."""
+
+    def __init__(self):
+        self.entries = {}
+        self.generation_counter = 0
+
+    def get(self, key):
+        return self.entries.get(key, MISSING)
+
+    def set(self, key, value, ttl=None, tags=()):
+        self.entries[key] = (value, tuple(tags))
+
+    def invalidate_tag(self, tag):
+        self.entries = {key: entry for key, entry in self.entries.items() if tag not in entry[1]}
+        self.generation_counter += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.generation_counter += 1
+
+    def generation(self):
+        return self.generation_counter
+
+
+@pytest.fixture
+def app_caches():
+    return (assignment_cache, active_assignment_index)
+
+
+@pytest.fixture
+def assignment(app):
+    company = Company(name="Cache Co", slug="cache-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+
+    user = User(name="Admin", email="admin@cache.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Cache FW", company_id=company.id)
+    entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+    db.session.add_all([user, framework, entity])
+    db.session.flush()
+
+    field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                               field_name="Energy", value_type="NUMBER")
+    db.session.add(field)
+    db.session.flush()
+
+    assignment = DataPointAssignment(field_id=field.field_id, entity_id=entity.id,
+                                     frequency='Annual', assigned_by=user.id, company_id=company.id)
+    db.session.add(assignment)
+    db.session.commit()
+    return assignment
+
+
+class TestAssignmentResolutionCache:
+
+    def test_second_resolution_is_served_from_snapshot(self, app, assignment):
+        key = (assignment.field_id, assignment.entity_id, date(2024, 12, 31))
+
+        first = AssignmentResolutionService.resolve_assignment(*key)
+        cached = assignment_cache.get(*key)
+        assert isinstance(cached, dict)
+        assert cached['id'] == assignment.id
+
+        db.session.remove()
+        second = AssignmentResolutionService.resolve_assignment(*key)
+        assert second.id == first.id
+        assert second.frequency == 'Annual'
+        # Restored instances are attached to the current session
+        assert second.field.field_name == "Energy"
+
+    def test_update_invalidates_cached_resolution(self, app, assignment):
+        key = (assignment.field_id, assignment.entity_id, date(2024, 12, 31))
+        AssignmentResolutionService.resolve_assignment(*key)
+        assert assignment_cache.get(*key) is not MISSING
+
+        assignment.series_status = 'inactive'
+        db.session.commit()
+
+        assert assignment_cache.get(*key) is MISSING
+        assert AssignmentResolutionService.resolve_assignment(*key) is None
+
+
+class TestActiveAssignmentIndex:
+
+    def test_tenant_resolution_uses_one_query_per_tenant(self, app, assignment, record_statements):
+        g.tenant = assignment.company
+        field_id, entity_id = assignment.field_id, assignment.entity_id
+        with record_statements() as statements:
+            for month in range(1, 13):
+                resolved = AssignmentResolutionService.resolve_assignment(
+                    field_id, entity_id, date(2024, month, 28))
+                assert resolved.id == assignment.id
+            assert AssignmentResolutionService.resolve_assignment(
+                field_id, entity_id + 1, date(2024, 12, 31)) is None
+
+        assert len(statements) == 1
+
+    def test_write_bumps_company_version(self, app, assignment):
+        company_id = assignment.company_id
+        record = active_assignment_index.lookup(company_id, assignment.field_id, assignment.entity_id)
+        assert record.frequency == 'Annual'
+
+        version = active_assignment_index.version(company_id)
+        assignment.frequency = 'Monthly'
+        db.session.commit()
+
+        assert active_assignment_index.version(company_id) != version
+        record = active_assignment_index.lookup(company_id, assignment.field_id, assignment.entity_id)
+        assert record.frequency == 'Monthly'
+
+    def test_rebuilt_after_max_age_without_version_change(self, app, assignment, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr('app.services.assignment_versioning.time.monotonic', lambda: now[0])
+        company_id = assignment.company_id
+        index = active_assignment_index.get_index(company_id)
+
+        now[0] += app.config['ACTIVE_ASSIGNMENT_INDEX_MAX_AGE'] - 1
+        assert active_assignment_index.get_index(company_id) is index
+        now[0] += 2
+        assert active_assignment_index.get_index(company_id) is not index
@@ -0,0 +1,161 @@
+"""
+Unit tests for the assignment history timeline API.
+
+Tests cover:
+- Data entry counts and change summaries of a page with one query each
+- Keyset pagination walking the whole history without gaps or repeats
+- Search over field, entity and user names
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from flask import current_app, g
+from flask_login import login_user
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.routes.admin_assignment_history import assignment_timeline_api
+
+
+@pytest.fixture
+def timeline_setup(app):
+    """
+    Energy and Water assigned to two sites (two of them on the same date),
+    with Energy at Site 1 re-versioned to Quarterly: five assignments.
+    """
+    company = Company(name="Timeline Co", slug="timeline-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    g.tenant = company
+    admin = User(name="Alice Admin", email="admin@timeline.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Timeline FW", company_id=company.id)
+    sites = [Entity(name=f"Site {i}", entity_type="Site", company_id=company.id) for i in (1, 2)]
+    db.session.add_all([admin, framework, *sites])
+    db.session.flush()
+    energy, water = [FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                        field_name=name, value_type="NUMBER", default_unit="kWh")
+                     for name in ("Energy", "Water")]
+    db.session.add_all([energy, water])
+    db.session.flush()
+
+    start = datetime(2024, 1, 1)
+    assignments = []
+    for index, (field, site) in enumerate((f, s) for f in (energy, water) for s in sites):
+        assignment = DataPointAssignment(field_id=field.field_id, entity_id=site.id, frequency='Monthly',
+                                         assigned_by=admin.id, company_id=company.id)
+        assignment.assigned_date = start + timedelta(days=index)
+        assignments.append(assignment)
+    assignments[3].assigned_date = assignments[2].assigned_date  # Tie on the date
+    db.session.add_all(assignments)
+    db.session.flush()
+
+    # Energy at Site 1: v1 deactivated and replaced by v2
+    first = assignments[0]
+    first.series_status = 'inactive'
+    db.session.flush()
+    second = DataPointAssignment(field_id=energy.field_id, entity_id=sites[0].id, frequency='Quarterly',
+                                 assigned_by=admin.id, company_id=company.id,
+                                 data_series_id=first.data_series_id, series_version=2)
+    second.assigned_date = start + timedelta(days=10)
+    db.session.add(second)
+    db.session.flush()
+
+    dates = second.get_valid_reporting_dates(2024)
+    for month in range(3):
+        db.session.add(ESGData(entity_id=sites[0].id, field_id=energy.field_id, raw_value='1',
+                               reporting_date=dates[month], company_id=company.id))
+    linked = ESGData(entity_id=sites[0].id, field_id=energy.field_id, raw_value='2',
+                     reporting_date=dates[3], company_id=company.id)
+    linked.assignment_id = second.id
+    db.session.add(linked)
+    db.session.commit()
+
+    return {'company': company, 'admin': admin, 'assignments': assignments + [second], 'second': second}
+
+
+def _get(setup, **params):
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    with current_app.test_request_context(f'/admin/assignment-history/api/timeline?{query}'):
+        g.tenant = setup['company']
+        login_user(setup['admin'])
+        response = assignment_timeline_api()
+        status = 200
+        if isinstance(response, tuple):
+            response, status = response
+        return status, response.get_json()
+
+
+class TestAssignmentTimeline:
+
+    def test_page_enrichment_in_batched_queries(self, app, timeline_setup, record_statements):
+        with record_statements() as statements:
+            status, data = _get(timeline_setup, per_page=10)
+
+        assert status == 200
+        items = {(item['field_name'], item['entity_name'], item['version']): item for item in data['timeline']}
+        assert data['timeline'][0]['version'] == 2
+        latest = items[('Energy', 'Site 1', 2)]
+        assert latest['changes_summary'] == 'Frequency: Monthly → Quarterly'
+        assert latest['data_entry_count'] == 4  # 1 linked + 3 unlinked entries of the field and entity
+        assert items[('Energy', 'Site 1', 1)]['changes_summary'] == 'Initial assignment'
+        assert items[('Energy', 'Site 1', 1)]['data_entry_count'] == 3
+        assert items[('Water', 'Site 2', 1)]['data_entry_count'] == 0
+        assert data['pagination']['total'] == 5
+
+        assert len([statement for statement in statements if 'FROM esg_data' in statement]) == 1
+        previous_lookups = [statement for statement in statements
+                            if 'data_point_assignments.series_version' in statement and ' IN ' in statement]
+        assert len(previous_lookups) == 1
+
+    def test_keyset_pagination_walks_history(self, app, timeline_setup):
+        _, reference = _get(timeline_setup, per_page=100)
+        expected = [item['id'] for item in reference['timeline']]
+
+        seen = []
+        cursor = ''
+        while True:
+            status, data = _get(timeline_setup, per_page=2, cursor=cursor)
+            assert status == 200
+            assert 'total' not in data['pagination']
+            seen.extend(item['id'] for item in data['timeline'])
+            cursor = data['pagination']['next_cursor']
+            if not data['pagination']['has_next']:
+                assert cursor is None
+                break
+
+        assert seen == expected
+        _, page_two = _get(timeline_setup, page=2, per_page=2)
+        assert [item['id'] for item in page_two['timeline']] == expected[2:4]
+        assert _get(timeline_setup, cursor='not-a-cursor')[0] == 400
+
+    def test_keyset_pagination_with_undated_assignments(self, app, timeline_setup):
+        for assignment in timeline_setup['assignments'][1:3]:
+            assignment.assigned_date = None
+        db.session.commit()
+        _, reference = _get(timeline_setup, per_page=100)
+        expected = [item['id'] for item in reference['timeline']]
+        assert [item['assigned_date'] for item in reference['timeline']][-2:] == [None, None]
+
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            _, data = _get(timeline_setup, per_page=2, cursor=cursor)
+            seen.extend(item['id'] for item in data['timeline'])
+            cursor = data['pagination']['next_cursor']
+
+        assert seen == expected
+
+    def test_search_matches_field_entity_and_user_names(self, app, timeline_setup):
+        def matches(term):
+            return {(item['field_name'], item['entity_name']) for item in _get(timeline_setup, search=term)[1]['timeline']}
+
+        assert matches('wat') == {('Water', 'Site 1'), ('Water', 'Site 2')}
+        assert matches('site 2') == {('Energy', 'Site 2'), ('Water', 'Site 2')}
+        assert len(matches('alice')) == 4
+        assert matches('nothing') == set()
@@ -0,0 +1,159 @@
+"""
+Unit tests for the dimensional breakdown fact table.
+
+Tests cover:
+- Fact rows written, rewritten and deleted with their entry
+- By-dimension, cross-entity and time-series aggregations grouped in SQL
+- Backfill from existing dimension_values
+"""
+
+import pytest
+from flask import g
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData, ESGDataBreakdown
+from app.services.user_v2 import aggregation_service as aggregation_module
+from app.services.user_v2.aggregation_service import AggregationService
+from app.services.user_v2.dimensional_data_service import DimensionalDataService
+from app.utils.migrate_breakdown_facts import backfill_breakdown_facts
+
+
+@pytest.fixture
+def breakdown_setup(app, monkeypatch):
+    """Monthly field reported by gender and age for two sites."""
+    company = Company(name="Breakdown Co", slug="breakdown-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    g.tenant = company
+    user = User(name="Admin", email="admin@breakdown.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Breakdown FW", company_id=company.id)
+    sites = [Entity(name=f"Site {i}", entity_type="Site", company_id=company.id) for i in (1, 2)]
+    db.session.add_all([user, framework, *sites])
+    db.session.flush()
+    field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                               field_name="Employees", value_type="NUMBER")
+    db.session.add(field)
+    db.session.flush()
+    assignment = DataPointAssignment(field_id=field.field_id, entity_id=sites[0].id, frequency='Monthly',
+                                     assigned_by=user.id, company_id=company.id)
+    db.session.add(assignment)
+    db.session.commit()
+    monkeypatch.setattr(aggregation_module, 'current_user', user)
+
+    return {'company': company, 'user': user, 'sites': sites, 'field': field,
+            'dates': assignment.get_valid_reporting_dates(2024)}
+
+
+def _payload(male_young, male_old, female_young):
+    return DimensionalDataService.build_dimension_values_json({
+        'dimensions': ['gender', 'age'],
+        'breakdowns': [
+            {'dimensions': {'gender': 'Male', 'age': '<30'}, 'raw_value': male_young},
+            {'dimensions': {'gender': 'Male', 'age': '30+'}, 'raw_value': male_old},
+            {'dimensions': {'gender': 'Female', 'age': '<30'}, 'raw_value': female_young},
+        ]
+    })
+
+
+def _submit(setup, site, month, *values):
+    payload = _payload(*values)
+    row = ESGData(entity_id=setup['sites'][site].id, field_id=setup['field'].field_id,
+                  raw_value=str(payload['totals']['overall']), reporting_date=setup['dates'][month],
+                  company_id=setup['company'].id, dimension_values=payload)
+    db.session.add(row)
+    return row
+
+
+def _facts(data_id):
+    return sorted(
+        (fact.dimension, fact.dimension_value, fact.amount)
+        for fact in ESGDataBreakdown.query.filter_by(data_id=data_id)
+    )
+
+
+class TestBreakdownFacts:
+
+    def test_facts_follow_their_entry(self, app, breakdown_setup):
+        row = _submit(breakdown_setup, 0, 0, 10, 20, None)
+        db.session.commit()
+        data_id = row.data_id
+
+        assert _facts(data_id) == [('age', '30+', 20.0), ('age', '<30', 10.0),
+                                   ('gender', 'Male', 10.0), ('gender', 'Male', 20.0)]
+
+        row.dimension_values = _payload(1, None, 2)
+        db.session.commit()
+        assert _facts(data_id) == [('age', '<30', 1.0), ('age', '<30', 2.0),
+                                   ('gender', 'Female', 2.0), ('gender', 'Male', 1.0)]
+
+        db.session.delete(row)
+        db.session.commit()
+        assert _facts(data_id) == []
+
+    def test_aggregate_by_dimension(self, app, breakdown_setup):
+        setup = breakdown_setup
+        _submit(setup, 0, 0, 10, 20, 5)
+        db.session.commit()
+
+        result = AggregationService.aggregate_by_dimension(
+            setup['field'].field_id, setup['sites'][0].id, 'gender', setup['dates'][0]
+        )
+        missing = AggregationService.aggregate_by_dimension(
+            setup['field'].field_id, setup['sites'][0].id, 'department', setup['dates'][0]
+        )
+
+        assert result['aggregated_values'] == {'Male': 30.0, 'Female': 5.0}
+        assert result['total'] == 35.0
+        assert missing == {'success': False, 'error': 'Dimension department not found in data'}
+
+    def test_cross_entity_totals_grouped_in_sql(self, app, breakdown_setup, record_statements):
+        setup = breakdown_setup
+        _submit(setup, 0, 0, 10, 20, 5)
+        _submit(setup, 1, 0, 1, 2, 3)
+        db.session.commit()
+        args = (setup['field'].field_id, [site.id for site in setup['sites']], setup['dates'][0])
+        setup['user'].company_id  # Reload the user expired by the commit
+
+        with record_statements() as statements:
+            result = AggregationService.calculate_cross_entity_totals(*args, aggregate_dimensions=True)
+
+        assert len(statements) == 2
+        assert result['total'] == 41.0
+        assert result['by_entity'] == {'Site 1': 35.0, 'Site 2': 6.0}
+        assert result['dimensional_aggregation']['by_dimension'] == {
+            'gender': {'Male': 33.0, 'Female': 8.0},
+            'age': {'<30': 19.0, '30+': 22.0},
+        }
+
+    def test_historical_dimension_series(self, app, breakdown_setup):
+        setup = breakdown_setup
+        _submit(setup, 0, 0, 10, 20, 5)
+        _submit(setup, 0, 1, 1, 2, 3)
+        db.session.commit()
+        dates = setup['dates']
+
+        result = AggregationService.aggregate_historical_data(
+            setup['field'].field_id, setup['sites'][0].id,
+            dates[0].isoformat(), dates[1].isoformat(), dimension_name='gender'
+        )
+
+        assert [point['value'] for point in result['time_series']] == [35.0, 6.0]
+        assert result['dimension_time_series']['Male'] == [
+            {'date': dates[0].isoformat(), 'value': 30.0},
+            {'date': dates[1].isoformat(), 'value': 3.0},
+        ]
+
+    def test_backfill(self, app, breakdown_setup):
+        row = _submit(breakdown_setup, 0, 0, 10, 20, 5)
+        db.session.commit()
+        ESGDataBreakdown.query.delete()
+        db.session.commit()
+
+        assert backfill_breakdown_facts(batch_size=1) == 6
+        assert backfill_breakdown_facts() == 6
+        assert len(_facts(row.data_id)) == 6
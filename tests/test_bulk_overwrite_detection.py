@@ -0,0 +1,110 @@
+"""
+Unit tests for bulk overwrite detection in BulkValidationService.
+
+Tests cover:
+- Overwrites found with chunked lookups and attachment counts
+- Dimension matching through the canonical dimension key
+- Query count independent of the number of rows
+"""
+
+import pytest
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData, ESGDataAttachment
+from app.services.user_v2.bulk_upload.validation_service import BulkValidationService
+
+
+@pytest.fixture
+def upload_setup(app):
+    """A monthly field with existing data (one entry with an attachment) in the current FY."""
+    company = Company(name="Upload Co", slug="upload-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+
+    user = User(name="Admin", email="admin@upload.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Upload FW", company_id=company.id)
+    entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+    db.session.add_all([user, framework, entity])
+    db.session.flush()
+
+    field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                               field_name="Energy", value_type="NUMBER")
+    db.session.add(field)
+    db.session.flush()
+
+    assignment = DataPointAssignment(field_id=field.field_id, entity_id=entity.id,
+                                     frequency='Monthly', assigned_by=user.id, company_id=company.id)
+    db.session.add(assignment)
+    db.session.flush()
+
+    dates = assignment.get_valid_reporting_dates()
+    first = ESGData(entity_id=entity.id, field_id=field.field_id, company_id=company.id,
+                    raw_value="10", reporting_date=dates[0], notes="checked")
+    second = ESGData(entity_id=entity.id, field_id=field.field_id, company_id=company.id,
+                     raw_value="20", reporting_date=dates[1], dimension_values={"Gender": "Male"})
+    db.session.add_all([first, second])
+    db.session.flush()
+
+    db.session.add(ESGDataAttachment(data_id=first.data_id, filename="proof.pdf", file_path="/tmp/proof.pdf",
+                                     file_size=10, mime_type="application/pdf", uploaded_by=user.id))
+    db.session.commit()
+
+    def make_rows(count, dimensions=None):
+        return [
+            {
+                'row_number': i + 2,
+                'field_id': field.field_id,
+                'field_name': field.field_name,
+                'entity_id': entity.id,
+                'assignment_id': assignment.id,
+                'reporting_date': dates[i % len(dates)],
+                'value': str(i),
+                'dimensions': dimensions,
+                'notes': None
+            }
+            for i in range(count)
+        ]
+
+    return {'make_rows': make_rows, 'first': first, 'second': second, 'user': user}
+
+
+class TestOverwriteDetection:
+
+    def test_detects_overwrites_with_attachments(self, app, upload_setup):
+        rows = upload_setup['make_rows'](3)
+
+        result = BulkValidationService.validate_and_check_overwrites(rows, upload_setup['user'])
+
+        assert result['valid'] is True
+        assert result['overwrite_count'] == 2
+        first, second = sorted(result['overwrite_rows'], key=lambda r: r['row_number'])
+        assert first['data_id'] == upload_setup['first'].data_id
+        assert first['has_attachments'] is True
+        assert first['has_notes'] is True
+        assert second['has_attachments'] is False
+        assert rows[0]['is_overwrite'] is True
+        assert 'is_overwrite' not in rows[2]
+
+    def test_dimension_key_matching(self, app, upload_setup):
+        make_rows = upload_setup['make_rows']
+
+        same = BulkValidationService.validate_and_check_overwrites(
+            make_rows(2, {'gender': 'Male'})[1:], upload_setup['user'])
+        different = BulkValidationService.validate_and_check_overwrites(
+            make_rows(2, {'gender': 'Female'})[1:], upload_setup['user'])
+
+        assert same['overwrite_count'] == 1
+        assert different['overwrite_count'] == 0
+
+    def test_lookup_query_count_is_constant(self, app, upload_setup, record_statements):
+        rows = upload_setup['make_rows'](12)
+        with record_statements() as statements:
+            existing = BulkValidationService._find_existing_data(rows)
+
+        assert len(existing) == 2
+        assert len([statement for statement in statements if 'esg_data_attachments' in statement]) == 1
@@ -0,0 +1,169 @@
+"""
+Unit tests for the bulk write path in BulkSubmissionService.
+
+Tests cover:
+- New entries and overwrites persisted with their audit logs
+- Batched bulk INSERT statements
+- Per-stage timings and rollback on failure
+- Dimensional breakdown fact rows rewritten for inserted and overwritten entries
+"""
+
+import pytest
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData, ESGDataAuditLog, ESGDataBreakdown
+from app.services.user_v2.bulk_upload.submission_service import BulkSubmissionService
+from app.services.user_v2.dimensional_data_service import DimensionalDataService
+
+
+@pytest.fixture
+def app_config(app_config):
+    return {**app_config, 'BULK_UPLOAD_SUBMIT_BATCH_SIZE': 3}
+
+
+@pytest.fixture
+def submission_setup(app):
+    """A monthly field with one existing entry for the first period."""
+    company = Company(name="Submit Co", slug="submit-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+
+    user = User(name="Admin", email="admin@submit.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Submit FW", company_id=company.id)
+    entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+    db.session.add_all([user, framework, entity])
+    db.session.flush()
+
+    field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                               field_name="Energy", value_type="NUMBER")
+    db.session.add(field)
+    db.session.flush()
+
+    assignment = DataPointAssignment(field_id=field.field_id, entity_id=entity.id,
+                                     frequency='Monthly', assigned_by=user.id, company_id=company.id)
+    db.session.add(assignment)
+    db.session.flush()
+
+    dates = assignment.get_valid_reporting_dates(2024)
+    existing = ESGData(entity_id=entity.id, field_id=field.field_id, company_id=company.id,
+                       raw_value="10", reporting_date=dates[0])
+    db.session.add(existing)
+    db.session.commit()
+
+    rows = [
+        {
+            'row_number': i + 2,
+            'field_id': field.field_id,
+            'entity_id': entity.id,
+            'assignment_id': assignment.id,
+            'reporting_date': dates[i],
+            'parsed_value': float(i + 1),
+            'dimensions': None,
+            'notes': 'bulk' if i == 1 else None
+        }
+        for i in range(6)
+    ]
+    rows[0]['is_overwrite'] = True
+    rows[0]['existing_data_id'] = existing.data_id
+
+    return {'rows': rows, 'user': user, 'existing_id': existing.data_id}
+
+
+class TestBulkSubmission:
+
+    def test_inserts_and_updates_with_audit_logs(self, app, submission_setup):
+        result = BulkSubmissionService.submit_bulk_data(
+            submission_setup['rows'], 'upload.xlsx', submission_setup['user']
+        )
+
+        assert result['success'] is True
+        assert result['new_entries'] == 5
+        assert result['updated_entries'] == 1
+        assert ESGData.query.count() == 6
+
+        updated = db.session.get(ESGData, submission_setup['existing_id'])
+        assert updated.raw_value == '1.0'
+
+        created = ESGData.query.filter_by(notes='bulk').one()
+        assert created.is_draft is False
+        assert created.dimension_values == {}
+
+        logs = {log.data_id: log for log in ESGDataAuditLog.query.all()}
+        assert len(logs) == 6
+        update_log = logs[submission_setup['existing_id']]
+        assert update_log.change_type == 'Excel Upload Update'
+        assert update_log.old_value == 10.0
+        assert 'previous_submission_date' in update_log.change_metadata
+        assert logs[created.data_id].change_metadata['batch_id'] == result['batch_id']
+
+    def test_new_entries_inserted_per_batch(self, app, submission_setup, record_statements):
+        with record_statements() as statements:
+            BulkSubmissionService.submit_bulk_data(
+                submission_setup['rows'], 'upload.xlsx', submission_setup['user']
+            )
+
+        # Six rows in batches of three, one of them an overwrite
+        assert len([statement for statement in statements if statement.startswith('INSERT INTO esg_data ')]) == 2
+
+    def test_reports_stage_timings(self, app, submission_setup):
+        result = BulkSubmissionService.submit_bulk_data(
+            submission_setup['rows'], 'upload.xlsx', submission_setup['user']
+        )
+
+        assert set(result['timings']) == {
+            'prepare_ms', 'insert_ms', 'update_ms', 'breakdowns_ms', 'audit_log_ms',
+            'attachments_ms', 'commit_ms', 'recompute_ms', 'total_ms'
+        }
+
+    def test_missing_overwrite_target_rolls_back(self, app, submission_setup):
+        rows = submission_setup['rows']
+        rows[4]['is_overwrite'] = True
+        rows[4]['existing_data_id'] = 'missing'
+
+        result = BulkSubmissionService.submit_bulk_data(rows, 'upload.xlsx', submission_setup['user'])
+
+        assert result['success'] is False
+        assert ESGData.query.count() == 1
+        assert ESGDataAuditLog.query.count() == 0
+
+    def test_breakdown_facts_follow_bulk_writes(self, app, submission_setup):
+        existing = db.session.get(ESGData, submission_setup['existing_id'])
+        existing.dimension_values = _payload(Male=4, Female=6)
+        db.session.commit()
+        assert _facts(existing.data_id) == [('gender', 'Female', 6.0), ('gender', 'Male', 4.0)]
+
+        rows = submission_setup['rows'][:2]
+        rows[0]['dimensions'] = _payload(Male=1, Female=2)
+        rows[1]['dimensions'] = _payload(Male=3)
+        result = BulkSubmissionService.submit_bulk_data(rows, 'upload.xlsx', submission_setup['user'])
+        assert result['success'] is True
+
+        # The overwrite replaces the old facts instead of adding to them
+        assert _facts(existing.data_id) == [('gender', 'Female', 2.0), ('gender', 'Male', 1.0)]
+        created = ESGData.query.filter_by(notes='bulk').one()
+        assert _facts(created.data_id) == [('gender', 'Male', 3.0)]
+
+        rows[0]['dimensions'] = None
+        rows[0]['is_overwrite'], rows[0]['existing_data_id'] = True, existing.data_id
+        BulkSubmissionService.submit_bulk_data(rows[:1], 'upload.xlsx', submission_setup['user'])
+        assert _facts(existing.data_id) == []
+
+
+def _payload(**amounts):
+    return DimensionalDataService.build_dimension_values_json({
+        'dimensions': ['gender'],
+        'breakdowns': [{'dimensions': {'gender': gender}, 'raw_value': amount} for gender, amount in amounts.items()]
+    })
+
+
+def _facts(data_id):
+    db.session.expire_all()
+    return sorted(
+        (fact.dimension, fact.dimension_value, fact.amount)
+        for fact in ESGDataBreakdown.query.filter_by(data_id=data_id)
+    )
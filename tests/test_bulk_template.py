@@ -0,0 +1,152 @@
+"""
+Unit tests for the bulk upload template generator.
+
+Tests cover:
+- Overdue and pending dates chosen from submitted data fetched in bulk
+- Dimension combinations expanded per field into sorted dimension columns
+- A constant number of queries and a write-only workbook the parser reads back
+"""
+
+from datetime import date
+
+import pytest
+from flask import g
+from openpyxl import load_workbook
+from werkzeug.datastructures import FileStorage
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.dimension import Dimension, DimensionValue, FieldDimension
+from app.models.esg_data import ESGData
+from app.services.user_v2.bulk_upload import template_service as template_module
+from app.services.user_v2.bulk_upload.template_service import TemplateGenerationService
+from app.services.user_v2.bulk_upload.upload_service import FileUploadService
+
+
+@pytest.fixture
+def template_setup(app, monkeypatch):
+    """
+    Headcount (Gender x Age), Energy and computed Intensity assigned monthly
+    to the user's site, with "today" just past the sixth month end.
+    """
+    company = Company(name="Template Co", slug="template-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    g.tenant = company
+    site = Entity(name="Site", entity_type="Site", company_id=company.id)
+    framework = Framework(framework_name="Template FW", company_id=company.id)
+    db.session.add_all([site, framework])
+    db.session.flush()
+    user = User(name="User", email="user@template.co", role="USER", company_id=company.id, entity_id=site.id)
+    fields = {name: FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                       field_name=name, value_type="NUMBER", is_computed=(name == 'Intensity'))
+              for name in ('Headcount', 'Energy', 'Intensity')}
+    db.session.add_all([user, *fields.values()])
+    db.session.flush()
+
+    for dim_name, values in (('Gender', ('Male', 'Female')), ('Age', ('<30', '30+'))):
+        dimension = Dimension(name=dim_name, company_id=company.id)
+        db.session.add(dimension)
+        db.session.flush()
+        db.session.add_all([DimensionValue(dimension.dimension_id, value, company.id, display_order=order)
+                            for order, value in enumerate(values)])
+        db.session.add(FieldDimension(fields['Headcount'].field_id, dimension.dimension_id, company.id))
+
+    assignments = {name: DataPointAssignment(field_id=field.field_id, entity_id=site.id, frequency='Monthly',
+                                             assigned_by=user.id, company_id=company.id)
+                   for name, field in fields.items()}
+    db.session.add_all(assignments.values())
+    db.session.commit()
+
+    dates = assignments['Energy'].get_valid_reporting_dates()
+
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return dates[5] + (dates[6] - dates[5]) / 2
+
+    monkeypatch.setattr(template_module, 'date', FrozenDate)
+    return {'company': company, 'user': user, 'site': site, 'fields': fields, 'dates': dates}
+
+
+def _submit(setup, field, month):
+    db.session.add(ESGData(entity_id=setup['site'].id, field_id=setup['fields'][field].field_id, raw_value='1',
+                           reporting_date=setup['dates'][month], company_id=setup['company'].id))
+
+
+def _sheet_rows(output, sheet_name='Data Entry'):
+    workbook = load_workbook(output)
+    sheet = workbook[sheet_name]
+    rows = [list(row) for row in sheet.iter_rows(values_only=True)]
+    return sheet, [dict(zip(rows[0], row)) for row in rows[1:]]
+
+
+class TestTemplateGeneration:
+
+    def test_overdue_and_pending_rows(self, app, template_setup):
+        setup = template_setup
+        dates = setup['dates']
+        _submit(setup, 'Energy', 0)
+        _submit(setup, 'Energy', 2)
+        db.session.commit()
+
+        sheet, rows = _sheet_rows(TemplateGenerationService.generate_template(setup['user'], 'overdue_and_pending'))
+
+        energy = [(row['Rep_Date'], row['Status']) for row in rows if row['Field_Name'] == 'Energy']
+        assert energy == [(dates[month].isoformat(), 'OVERDUE') for month in (1, 3, 4, 5)] + \
+            [(dates[6].isoformat(), 'PENDING')]
+        headcount = [row for row in rows if row['Field_Name'] == 'Headcount']
+        assert len(headcount) == 7 * 4
+        assert {(row['Dimension_Age'], row['Dimension_Gender']) for row in headcount} == {
+            ('<30', 'Male'), ('<30', 'Female'), ('30+', 'Male'), ('30+', 'Female')
+        }
+        assert not [row for row in rows if row['Field_Name'] == 'Intensity']
+
+        header = [cell.value for cell in sheet[1]]
+        assert header[:5] == ['Field_Name', 'Entity', 'Rep_Date', 'Dimension_Age', 'Dimension_Gender']
+        assert sheet.column_dimensions['L'].hidden and sheet.protection.sheet
+        value_cell, unit_cell = sheet.cell(row=2, column=6), sheet.cell(row=2, column=7)
+        assert not value_cell.protection.locked
+        assert unit_cell.protection.locked and unit_cell.fill.start_color.rgb.endswith('E0E0E0')
+
+    def test_overdue_and_pending_filters(self, app, template_setup):
+        setup = template_setup
+        dates = setup['dates']
+        for month in range(6):
+            _submit(setup, 'Energy', month)
+        db.session.commit()
+
+        _, overdue = _sheet_rows(TemplateGenerationService.generate_template(setup['user'], 'overdue'))
+        _, pending = _sheet_rows(TemplateGenerationService.generate_template(setup['user'], 'pending'))
+
+        assert {row['Field_Name'] for row in overdue} == {'Headcount'}
+        assert len(overdue) == 6 * 4
+        assert {(row['Field_Name'], row['Rep_Date']) for row in pending} == {('Headcount', dates[0].isoformat())}
+
+        for month in range(6):
+            _submit(setup, 'Headcount', month)
+        db.session.commit()
+        with pytest.raises(ValueError, match='No valid overdue assignments'):
+            TemplateGenerationService.generate_template(setup['user'], 'overdue')
+
+    def test_constant_queries_and_parser_round_trip(self, app, template_setup, record_statements):
+        setup = template_setup
+        user = setup['user']
+        db.session.expire_all()
+
+        with record_statements() as statements:
+            output = TemplateGenerationService.generate_template(user, 'overdue_and_pending')
+
+        assert len([statement for statement in statements if 'FROM field_dimensions' in statement]) == 1
+        assert len([statement for statement in statements if 'FROM esg_data' in statement]) == 1
+        assert len(statements) <= 6
+
+        parsed = FileUploadService.parse_file(FileStorage(output, filename='template.xlsx'))
+        assert parsed['success'] is True
+        assert parsed['total_rows'] == 7 * 4 + 7
+        dimensional = [row for row in parsed['rows'] if row['dimensions']]
+        assert dimensional[0]['dimensions'].keys() == {'age', 'gender'}
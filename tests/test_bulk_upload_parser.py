@@ -0,0 +1,108 @@
+"""
+Unit tests for the streaming bulk upload parser in FileUploadService.
+
+Tests cover:
+- Streaming .xlsx and .csv uploads in chunks
+- Vectorized normalization of IDs, dates, values, notes and dimensions
+- Row level parse errors and the row limit
+"""
+
+import io
+from datetime import date, datetime
+from openpyxl import Workbook
+from werkzeug.datastructures import FileStorage
+
+from app.services.user_v2.bulk_upload.upload_service import FileUploadService
+
+
+HEADER = ['Field_ID', 'Field_Name', 'Entity_ID', 'Entity_Name', 'Rep_Date',
+          'Dimension_Gender', 'Value', 'Unit', 'Notes', 'Assignment_ID']
+
+
+def _xlsx_upload(rows, sheet_name='Data Entry'):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = sheet_name
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return FileStorage(buffer, filename='upload.xlsx')
+
+
+class TestStreamingParser:
+
+    def test_parses_xlsx_rows(self, app):
+        upload = _xlsx_upload([
+            ['f1', 'Energy', 3, 'Site', datetime(2024, 1, 31), 'Male', 12.5, 'kWh', None, 'a1'],
+            ['f1', 'Energy', '3', 'Site', '2024-02-29', None, 'n/a', 'kWh', '  checked ', 'a1'],
+        ])
+
+        result = FileUploadService.parse_file(upload)
+
+        assert result['success'] is True
+        first, second = result['rows']
+        assert first['row_number'] == 2
+        assert first['entity_id'] == 3
+        assert first['reporting_date'] == date(2024, 1, 31)
+        assert first['value'] == 12.5
+        assert first['dimensions'] == {'gender': 'Male'}
+        assert second['reporting_date'] == date(2024, 2, 29)
+        assert second['dimensions'] is None
+        assert second['notes'] == 'checked'
+
+    def test_streams_in_chunks(self, app):
+        rows = [['f1', 'Energy', 1, 'Site', date(2024, 1, 31), None, i, 'kWh', None, 'a1'] for i in range(7)]
+
+        parsed = list(FileUploadService.iter_rows(_xlsx_upload(rows), chunk_size=3))
+
+        assert [row['row_number'] for row in parsed] == list(range(2, 9))
+        assert [row['value'] for row in parsed] == list(range(7))
+
+    def test_row_errors_and_blank_rows(self, app):
+        upload = _xlsx_upload([
+            ['f1', 'Energy', 3, 'Site', 'not a date', None, 1, 'kWh', None, 'a1'],
+            [None] * len(HEADER),
+            ['f1', 'Energy', None, 'Site', '2024-03-31', None, 1, 'kWh', None, 'a1'],
+            ['f1', 'Energy', 3, 'Site', None, None, 1, 'kWh', None, 'a1'],
+        ])
+
+        result = FileUploadService.parse_file(upload)
+
+        assert result['success'] is False
+        assert result['errors'] == [
+            'Row 2: Invalid reporting date format: not a date. Expected YYYY-MM-DD',
+            'Row 4: Entity_ID is missing',
+            'Row 5: Reporting date is missing or empty',
+        ]
+
+    def test_parses_csv(self, app):
+        upload = FileStorage(io.BytesIO(
+            b"Field_ID,Field_Name,Entity_ID,Rep_Date,Value,Assignment_ID,Dimension_Age\n"
+            b"f1,Energy,3,2024-01-31,5,a1,<30\n"
+        ), filename='upload.csv')
+
+        result = FileUploadService.parse_file(upload)
+
+        assert result['success'] is True
+        assert result['rows'][0]['dimensions'] == {'age': '<30'}
+        assert result['rows'][0]['value'] == 5
+
+    def test_missing_columns(self, app):
+        upload = FileStorage(io.BytesIO(b"Field_ID,Value\nf1,5\n"), filename='upload.csv')
+
+        result = FileUploadService.parse_file(upload)
+
+        assert result['success'] is False
+        assert 'Template missing required columns' in result['errors'][0]
+
+    def test_row_limit(self, app):
+        app.config['BULK_UPLOAD_MAX_ROWS'] = 2
+        rows = [['f1', 'Energy', 1, 'Site', date(2024, 1, 31), None, 1, 'kWh', None, 'a1']] * 3
+
+        result = FileUploadService.parse_file(_xlsx_upload(rows))
+
+        assert result['success'] is False
+        assert result['errors'] == ['Maximum 2 rows allowed (found more than 2 rows)']
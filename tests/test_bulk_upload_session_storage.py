@@ -0,0 +1,143 @@
+"""
+Unit tests for bulk upload session storage.
+
+Tests cover:
+- Summary and row slices stored separately and loaded on demand
+- Expiry and index based cleanup of the local disk backend
+- The Redis backend with native TTLs
+"""
+
+import pytest
+from datetime import date
+
+from app.services.user_v2.bulk_upload.session_storage_service import (
+    SessionStorageService, RedisSessionBackend, encode_payload, decode_payload, split_slices
+)
+
+
+@pytest.fixture
+def app_config(app_config, tmp_path):
+    """Local session storage in a private directory."""
+    return {**app_config, 'BULK_UPLOAD_SESSION_BACKEND': 'local',
+            'BULK_UPLOAD_SESSION_DIR': str(tmp_path / 'uploads')}
+
+
+def _upload_data(row_count=3):
+    return {
+        'rows': [{'row_number': i + 2, 'reporting_date': date(2024, 1, 31), 'value': i} for i in range(row_count)],
+        'filename': 'upload.xlsx',
+        'user_id': 7
+    }
+
+
+class FakeRedis:
+    """In-memory stand-in for the subset of the Redis client used by the backend."""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+        self.ttls[key] = ttl
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+
+class TestEncoding:
+
+    def test_round_trip_is_compact(self):
+        rows = _upload_data(500)['rows']
+
+        payload = encode_payload(rows)
+
+        assert decode_payload(payload)[0] == {'row_number': 2, 'reporting_date': '2024-01-31', 'value': 0}
+        assert len(payload) < len(repr(rows)) / 5
+
+    def test_split_slices(self):
+        slices = split_slices(_upload_data())
+
+        assert set(slices) == {'summary', 'rows'}
+        assert slices['summary'] == {'filename': 'upload.xlsx', 'user_id': 7, '_slices': ['rows']}
+
+
+class TestLocalDiskStorage:
+
+    def test_store_and_retrieve_slices(self, app):
+        assert SessionStorageService.store('upload-1', _upload_data()) is True
+
+        summary = SessionStorageService.retrieve_summary('upload-1')
+        full = SessionStorageService.retrieve('upload-1')
+
+        assert summary['user_id'] == 7
+        assert 'rows' not in summary
+        assert len(full['rows']) == 3
+        assert full['rows'][0]['reporting_date'] == '2024-01-31'
+
+    def test_restore_replaces_slices(self, app):
+        SessionStorageService.store('upload-1', _upload_data())
+        SessionStorageService.store('upload-1', {'validated_rows': [{'row_number': 2}], 'user_id': 7})
+
+        data = SessionStorageService.retrieve('upload-1')
+
+        assert 'rows' not in data
+        assert data['validated_rows'] == [{'row_number': 2}]
+
+    def test_expired_upload_is_not_returned(self, app):
+        app.config['BULK_UPLOAD_SESSION_TIMEOUT'] = -1
+        SessionStorageService.store('upload-1', _upload_data())
+
+        assert SessionStorageService.retrieve('upload-1') is None
+
+    def test_cleanup_only_removes_expired_uploads(self, app):
+        SessionStorageService.store('fresh', _upload_data())
+        app.config['BULK_UPLOAD_SESSION_TIMEOUT'] = -1000
+        SessionStorageService.store('stale', _upload_data())
+
+        assert SessionStorageService.cleanup_expired() == 1
+        app.config['BULK_UPLOAD_SESSION_TIMEOUT'] = 30 * 60
+        assert SessionStorageService.retrieve_summary('fresh') is not None
+
+    def test_delete(self, app):
+        SessionStorageService.store('upload-1', _upload_data())
+
+        assert SessionStorageService.delete('upload-1') is True
+        assert SessionStorageService.retrieve('upload-1') is None
+
+
+class TestRedisStorage:
+
+    def test_slices_use_native_ttl(self, app):
+        client = FakeRedis()
+        backend = RedisSessionBackend(client)
+
+        backend.store('upload-1', split_slices(_upload_data()), 1800)
+        loaded = backend.load('upload-1', ['rows'])
+
+        assert set(client.ttls.values()) == {1800}
+        assert loaded['summary']['filename'] == 'upload.xlsx'
+        assert len(loaded['rows']) == 3
+        assert 'rows' not in backend.load('upload-1', [])
+
+    def test_restore_and_delete(self, app):
+        client = FakeRedis()
+        backend = RedisSessionBackend(client)
+
+        backend.store('upload-1', split_slices(_upload_data()), 1800)
+        backend.store('upload-1', split_slices({'validated_rows': [], 'user_id': 7}), 1800)
+        assert 'bulk_upload:upload-1:rows' not in client.values
+
+        backend.delete('upload-1')
+        assert client.values == {}
+        assert backend.load('upload-1', []) is None
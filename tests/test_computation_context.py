@@ -0,0 +1,157 @@
+"""
+Unit tests for the batch-loaded ComputationContextService.
+
+Tests cover:
+- Dependency tree, calculation steps and validation built from one snapshot
+- A fixed number of queries per snapshot, shared across the endpoints
+- Snapshots dropped when the entity's data is written
+"""
+
+import pytest
+from flask import g
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField, FieldVariableMapping
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.services.dependency_graph import dependency_graphs
+from app.services.user_v2.computation_context_service import ComputationContextService, snapshot_cache
+
+
+@pytest.fixture
+def app_caches():
+    return (dependency_graphs, snapshot_cache)
+
+
+@pytest.fixture
+def context_setup(app):
+    """Monthly raw fields A (submitted) and B (missing), computed C = A + B and D = C + A."""
+    company = Company(name="Context Co", slug="context-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    g.tenant = company
+    user = User(name="Admin", email="admin@context.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Context FW", company_id=company.id)
+    entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+    db.session.add_all([user, framework, entity])
+    db.session.flush()
+
+    def field(name, formula=None):
+        new_field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                       field_name=name, value_type="NUMBER", is_computed=bool(formula))
+        new_field.formula_expression = formula
+        db.session.add(new_field)
+        return new_field
+
+    a, b, c, d = field("A"), field("B"), field("C", "A + B"), field("D", "C + A")
+    db.session.flush()
+    db.session.add_all([
+        FieldVariableMapping(computed_field_id=c.field_id, raw_field_id=a.field_id, variable_name='A'),
+        FieldVariableMapping(computed_field_id=c.field_id, raw_field_id=b.field_id, variable_name='B'),
+        FieldVariableMapping(computed_field_id=d.field_id, raw_field_id=c.field_id, variable_name='C'),
+        FieldVariableMapping(computed_field_id=d.field_id, raw_field_id=a.field_id, variable_name='A',
+                             coefficient=2.0),
+    ])
+    assignments = []
+    for target in (a, b, c, d):
+        assignments.append(DataPointAssignment(field_id=target.field_id, entity_id=entity.id, frequency='Monthly',
+                                               assigned_by=user.id, company_id=company.id))
+    db.session.add_all(assignments)
+    db.session.flush()
+
+    month = assignments[0].get_valid_reporting_dates(2024)[0]
+    db.session.add_all([
+        ESGData(entity_id=entity.id, field_id=a.field_id, raw_value='10', reporting_date=month,
+                company_id=company.id),
+        ESGData(entity_id=entity.id, field_id=c.field_id, raw_value=None, calculated_value=40.0,
+                reporting_date=month, company_id=company.id),
+    ])
+    db.session.commit()
+
+    return {'company': company, 'entity': entity, 'month': month, 'a': a, 'b': b, 'c': c, 'd': d}
+
+
+def _args(setup, key='d'):
+    return setup[key].field_id, setup['entity'].id, setup['month']
+
+
+class TestComputationSnapshot:
+
+    def test_dependency_tree(self, app, context_setup):
+        tree = ComputationContextService.build_dependency_tree(*_args(context_setup))
+
+        assert tree['field_name'] == 'D'
+        assert [(dep['field_name'], dep['variable_name']) for dep in tree['dependencies']] == [('A', 'A'), ('C', 'C')]
+        c_node = tree['dependencies'][1]
+        assert c_node['value'] == 40.0  # materialized calculated_value
+        assert [(dep['field_name'], dep['status']) for dep in c_node['dependencies']] == [
+            ('A', 'available'), ('B', 'missing')
+        ]
+        assert c_node['status'] == 'partial'
+
+        shallow = ComputationContextService.build_dependency_tree(*_args(context_setup), max_depth=1)
+        assert shallow['dependencies'][0]['field_name'] == 'Max depth reached'
+
+    def test_steps_and_validation(self, app, context_setup):
+        steps = ComputationContextService.get_calculation_steps(*_args(context_setup, 'c'))
+        validation = ComputationContextService.validate_dependencies(*_args(context_setup, 'c'))
+
+        assert [step['operation'] for step in steps] == ['FETCH', 'ERROR']
+        assert steps[0]['output'] == 10.0
+        assert 'Missing values for variables: B' in steps[1]['details']
+        assert validation['satisfied_count'] == 1
+        assert validation['missing'] == [
+            {'field_id': context_setup['b'].field_id, 'field_name': 'B', 'reason': 'No data submitted for this period'}
+        ]
+
+    def test_coefficient_step_and_formula(self, app, context_setup):
+        context = ComputationContextService.get_computation_context(*_args(context_setup))
+
+        assert context['success'] is True
+        assert context['formula'] == 'C  +  (2.0 × A)'
+        # C contributes its materialized value: 2 * 10 + 40
+        assert [step['operation'] for step in context['calculation_steps']] == ['FETCH', 'MULTIPLY', 'FETCH', 'FORMULA']
+        assert context['calculation_steps'][-1]['output'] == 60.0
+        assert context['current_values'][context_setup['a'].field_id]['value'] == '10'
+        assert context['calculation_status'] == 'partial'
+
+    def test_dimensional_rows_do_not_replace_totals(self, app, context_setup):
+        db.session.add(ESGData(entity_id=context_setup['entity'].id, field_id=context_setup['a'].field_id,
+                               raw_value='3', reporting_date=context_setup['month'],
+                               company_id=context_setup['company'].id, dimension_values={'gender': 'Male'}))
+        db.session.commit()
+
+        steps = ComputationContextService.get_calculation_steps(*_args(context_setup, 'c'))
+        context = ComputationContextService.get_computation_context(*_args(context_setup))
+
+        assert steps[0]['output'] == 10.0
+        assert context['current_values'][context_setup['a'].field_id]['value'] == '10'
+
+    def test_endpoints_share_one_snapshot(self, app, context_setup, record_statements):
+        args = _args(context_setup)
+        g.tenant.id  # Reload the tenant expired by the fixture's commit
+
+        with record_statements() as load_queries:
+            ComputationContextService.build_dependency_tree(*args)
+        with record_statements() as shared_queries:
+            ComputationContextService.get_calculation_steps(*args)
+            ComputationContextService.validate_dependencies(*args)
+            ComputationContextService.build_dependency_tree(*args)
+
+        # Graph build, fields, assignments, values, latest values
+        assert len(load_queries) == 5
+        assert len(shared_queries) == 0
+
+    def test_data_write_drops_snapshot(self, app, context_setup):
+        args = _args(context_setup, 'c')
+        assert ComputationContextService.validate_dependencies(*args)['is_complete'] is False
+
+        db.session.add(ESGData(entity_id=context_setup['entity'].id, field_id=context_setup['b'].field_id,
+                               raw_value='5', reporting_date=context_setup['month'],
+                               company_id=context_setup['company'].id))
+        db.session.commit()
+
+        assert ComputationContextService.validate_dependencies(*args)['is_complete'] is True
@@ -0,0 +1,117 @@
+"""
+Unit tests for the set-based DataStatusService.
+
+Tests cover:
+- complete / overdue / pending classification per field
+- Draft entries do not count as submitted
+- Query count independent of the number of fields
+- Completeness check for a single reporting date
+"""
+
+import pytest
+from datetime import date
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.services.user_v2.data_status_service import DataStatusService
+from app.services.user_v2.historical_data_service import HistoricalDataService
+
+
+@pytest.fixture
+def status_setup(app):
+    """Three monthly fields for FY2024: fully reported, partially reported and draft only."""
+    company = Company(name="Status Co", slug="status-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+
+    user = User(name="Admin", email="admin@status.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Status FW", company_id=company.id)
+    entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+    db.session.add_all([user, framework, entity])
+    db.session.flush()
+
+    fields = []
+    for name in ("Complete", "Partial", "Draft"):
+        field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                   field_name=name, value_type="NUMBER")
+        db.session.add(field)
+        fields.append(field)
+    db.session.flush()
+
+    for field in fields:
+        db.session.add(DataPointAssignment(field_id=field.field_id, entity_id=entity.id,
+                                           frequency='Monthly', assigned_by=user.id, company_id=company.id))
+    db.session.flush()
+
+    valid_dates = DataPointAssignment.query.first().get_valid_reporting_dates(2024)
+    complete, partial, draft = fields
+    for report_date in valid_dates:
+        db.session.add(ESGData(entity_id=entity.id, field_id=complete.field_id, company_id=company.id,
+                               raw_value="1", reporting_date=report_date))
+    db.session.add(ESGData(entity_id=entity.id, field_id=partial.field_id, company_id=company.id,
+                           raw_value="1", reporting_date=valid_dates[0]))
+    draft_entry = ESGData(entity_id=entity.id, field_id=draft.field_id, company_id=company.id,
+                          raw_value="1", reporting_date=valid_dates[0])
+    draft_entry.is_draft = True
+    db.session.add(draft_entry)
+    db.session.commit()
+
+    return {'company': company, 'entity': entity, 'fields': fields, 'valid_dates': valid_dates}
+
+
+class TestFieldStatuses:
+
+    def test_classifies_fields(self, app, status_setup):
+        complete, partial, draft = status_setup['fields']
+        statuses = DataStatusService.get_field_statuses(
+            status_setup['entity'].id,
+            [f.field_id for f in status_setup['fields']] + ['unassigned'],
+            2024,
+            status_setup['company'],
+            today=date(2025, 6, 1)
+        )
+
+        assert statuses[complete.field_id] == 'complete'
+        assert statuses[partial.field_id] == 'overdue'
+        assert statuses[draft.field_id] == 'overdue'
+        assert statuses['unassigned'] == 'pending'
+
+    def test_nothing_past_due_is_pending(self, app, status_setup):
+        statuses = DataStatusService.get_field_statuses(
+            status_setup['entity'].id,
+            [f.field_id for f in status_setup['fields']],
+            2024,
+            status_setup['company'],
+            today=date(2023, 6, 1)
+        )
+
+        assert set(statuses.values()) == {'pending'}
+
+    def test_query_count_is_constant(self, app, status_setup, record_statements):
+        entity_id = status_setup['entity'].id
+        field_ids = [f.field_id for f in status_setup['fields']]
+        company = status_setup['company']
+        with record_statements() as statements:
+            DataStatusService.get_field_statuses(entity_id, field_ids, 2024, company, today=date(2025, 6, 1))
+
+        # One assignment query and one submission query
+        assert len(statements) == 2
+
+
+class TestCheckDataCompleteness:
+
+    def test_counts_submitted_fields(self, app, status_setup):
+        complete, partial, draft = status_setup['fields']
+        result = HistoricalDataService.check_data_completeness(
+            status_setup['entity'].id, status_setup['valid_dates'][1]
+        )
+
+        assert result['success'] is True
+        assert result['total_fields'] == 3
+        assert result['submitted_count'] == 1
+        assert {f['field_id'] for f in result['missing_fields']} == {partial.field_id, draft.field_id}
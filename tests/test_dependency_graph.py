@@ -0,0 +1,191 @@
+"""
+Unit tests for the compiled computed-field dependency graph.
+
+Tests cover:
+- Forward/reverse adjacency, closures and topological order
+- Cycle detection and cycle-safe dependency trees
+- Single-query builds, caching and invalidation on mapping writes
+- DependencyService and model methods reading from the graph
+"""
+
+import pytest
+from flask import g
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField, FieldVariableMapping
+from app.models.data_assignment import DataPointAssignment
+from app.services.dependency_graph import (
+    DependencyGraph, DependencyEdge, FieldNode, dependency_graphs, get_dependency_graph
+)
+from app.services.dependency_service import DependencyService
+
+
+@pytest.fixture
+def app_caches():
+    return (dependency_graphs,)
+
+
+@pytest.fixture
+def fields(app):
+    """Raw fields A and B, computed C = A + B and computed D = C * A."""
+    company = Company(name="Graph Co", slug="graph-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    framework = Framework(framework_name="Graph FW", company_id=company.id)
+    db.session.add(framework)
+    db.session.flush()
+
+    def field(name, formula=None):
+        new_field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                       field_name=name, value_type="NUMBER", is_computed=bool(formula))
+        new_field.formula_expression = formula
+        db.session.add(new_field)
+        return new_field
+
+    a, b, c, d = field("A"), field("B"), field("C", "A + B"), field("D", "A * B")
+    db.session.flush()
+    db.session.add_all([
+        FieldVariableMapping(computed_field_id=c.field_id, raw_field_id=a.field_id, variable_name='A'),
+        FieldVariableMapping(computed_field_id=c.field_id, raw_field_id=b.field_id, variable_name='B'),
+        FieldVariableMapping(computed_field_id=d.field_id, raw_field_id=c.field_id, variable_name='A'),
+        FieldVariableMapping(computed_field_id=d.field_id, raw_field_id=a.field_id, variable_name='B'),
+    ])
+    db.session.commit()
+
+    return {'company': company, 'a': a, 'b': b, 'c': c, 'd': d}
+
+
+def _ids(fields, *names):
+    return [fields[name].field_id for name in names]
+
+
+class TestDependencyGraph:
+
+    def test_adjacency_and_closures(self, app, fields):
+        graph = get_dependency_graph(fields['company'].id)
+        a, b, c, d = _ids(fields, 'a', 'b', 'c', 'd')
+
+        assert graph.dependencies(d) == (c, a)
+        assert graph.all_dependencies(d) == (c, a, b)
+        assert set(graph.dependants(a)) == {c, d}
+        assert graph.all_dependants(b) == {c, d}
+
+        order = graph.topological_order
+        assert order.index(a) < order.index(c) < order.index(d)
+        assert graph.cyclic_fields == frozenset()
+
+    def test_dependency_tree(self, app, fields):
+        graph = get_dependency_graph(fields['company'].id)
+
+        tree = graph.dependency_tree(fields['d'].field_id)
+
+        assert tree['formula'] == 'A * B'
+        assert [dep['variable'] for dep in tree['dependencies']] == ['A', 'B']
+        nested = tree['dependencies'][0]['dependencies']
+        assert nested['field_name'] == 'C'
+        assert [dep['field_name'] for dep in nested['dependencies']] == ['A', 'B']
+        assert graph.dependency_tree(fields['a'].field_id) is None
+
+    def test_would_create_cycle(self, app, fields):
+        graph = get_dependency_graph(fields['company'].id)
+        a, c, d = _ids(fields, 'a', 'c', 'd')
+
+        assert graph.would_create_cycle(c, [d]) is True
+        assert graph.would_create_cycle(c, [c]) is True
+        assert graph.would_create_cycle(d, [a]) is False
+
+    def test_cycle_detection(self):
+        nodes = {key: FieldNode(key, key, key != 'raw', None, 1) for key in ('x', 'y', 'z', 'raw')}
+        graph = DependencyGraph(nodes, {
+            'x': (DependencyEdge('A', 1.0, 'y'),),
+            'y': (DependencyEdge('A', 1.0, 'x'), DependencyEdge('B', 1.0, 'raw')),
+            'z': (DependencyEdge('A', 1.0, 'x'),),
+        })
+
+        assert graph.cyclic_fields == {'x', 'y'}
+        assert graph.has_cycle('z') is True
+        assert set(graph.all_dependencies('z')) == {'x', 'y', 'raw'}
+        assert 'x' not in graph.topological_order
+        # Tree terminates where the cycle closes
+        assert graph.dependency_tree('x')['dependencies'][0]['dependencies']['dependencies'][0]['field_id'] == 'x'
+
+
+class TestDependencyGraphRegistry:
+
+    def test_built_with_one_query_and_cached(self, app, fields, record_statements):
+        company_id = fields['company'].id
+        with record_statements() as statements:
+            first = get_dependency_graph(company_id)
+            second = get_dependency_graph(company_id)
+
+        assert len(statements) == 1
+        assert first is second
+
+    def test_mapping_write_invalidates(self, app, fields):
+        company_id = fields['company'].id
+        graph = get_dependency_graph(company_id)
+        version = dependency_graphs.version(company_id)
+
+        db.session.add(FieldVariableMapping(computed_field_id=fields['d'].field_id,
+                                            raw_field_id=fields['b'].field_id, variable_name='C'))
+        db.session.commit()
+
+        assert dependency_graphs.version(company_id) != version
+        rebuilt = get_dependency_graph(company_id)
+        assert rebuilt is not graph
+        assert fields['b'].field_id in rebuilt.dependencies(fields['d'].field_id)
+
+    def test_rebuilt_after_max_age_without_version_change(self, app, fields, monkeypatch):
+        # Another worker's write without Redis never moves this worker's version
+        now = [1000.0]
+        monkeypatch.setattr('app.services.dependency_graph.time.monotonic', lambda: now[0])
+        company_id = fields['company'].id
+        graph = get_dependency_graph(company_id)
+
+        now[0] += app.config['DEPENDENCY_GRAPH_MAX_AGE'] - 1
+        assert get_dependency_graph(company_id) is graph
+        now[0] += 2
+        assert get_dependency_graph(company_id) is not graph
+
+
+class TestGraphConsumers:
+
+    def test_model_methods(self, app, fields):
+        d = fields['d']
+
+        assert [f.field_name for f in d.get_all_dependencies()] == ['C', 'A', 'B']
+        assert d.check_circular_dependency() is False
+        assert {f.field_name for f in fields['a'].get_dependants()} == {'C', 'D'}
+
+    def test_auto_include_fields(self, app, fields):
+        g.tenant = fields['company']
+
+        result = DependencyService.get_auto_include_fields(
+            [fields['d'].field_id], {fields['a'].field_id}
+        )
+
+        assert set(result['auto_include']) == set(_ids(fields, 'b', 'c'))
+        assert result['already_selected'] == [fields['a'].field_id]
+
+    def test_removal_impact(self, app, fields):
+        company = fields['company']
+        g.tenant = company
+        user = User(name="Admin", email="admin@graph.co", role="ADMIN", company_id=company.id)
+        entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+        db.session.add_all([user, entity])
+        db.session.flush()
+        db.session.add(DataPointAssignment(field_id=fields['c'].field_id, entity_id=entity.id,
+                                           frequency='Monthly', assigned_by=user.id, company_id=company.id))
+        db.session.commit()
+
+        blocked = DependencyService.check_removal_impact([fields['b'].field_id])
+        free = DependencyService.check_removal_impact([fields['d'].field_id])
+
+        assert blocked['can_remove'] is False
+        assert blocked['blocking_fields'] == [
+            {'removed_field': 'B', 'blocked_by': 'C', 'assignment_count': 1}
+        ]
+        assert free['can_remove'] is True
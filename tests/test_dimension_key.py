@@ -0,0 +1,134 @@
+"""
+Unit tests for the indexed ESGData dimension key.
+
+Tests cover:
+- Canonical key format, filter matching and maintenance on ORM writes
+- One entry per dimension combination
+- Dimension-filtered aggregation matching stored keys
+- Backfill of existing rows
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.services.aggregation import AggregationMethod, AggregationRule, aggregation_service
+from app.utils.migrate_dimension_key import backfill_dimension_keys
+
+
+@pytest.fixture
+def dimension_setup(app):
+    """Monthly field with one assignment."""
+    company = Company(name="Dimension Co", slug="dimension-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    g.tenant = company
+    user = User(name="Admin", email="admin@dimension.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Dimension FW", company_id=company.id)
+    entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+    db.session.add_all([user, framework, entity])
+    db.session.flush()
+    field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                               field_name="Employees", value_type="NUMBER")
+    db.session.add(field)
+    db.session.flush()
+    assignment = DataPointAssignment(field_id=field.field_id, entity_id=entity.id, frequency='Monthly',
+                                     assigned_by=user.id, company_id=company.id)
+    db.session.add(assignment)
+    db.session.commit()
+
+    return {'company': company, 'entity': entity, 'field': field, 'assignment': assignment,
+            'month': assignment.get_valid_reporting_dates(2024)[0]}
+
+
+def _entry(setup, value, dimensions):
+    row = ESGData(entity_id=setup['entity'].id, field_id=setup['field'].field_id, raw_value=str(value),
+                  reporting_date=setup['month'], company_id=setup['company'].id, dimension_values=dimensions)
+    db.session.add(row)
+    return row
+
+
+class TestDimensionKey:
+
+    def test_canonical_key(self):
+        assert ESGData.canonical_dimension_key({'Gender': ' Male', 'age': '<30'}) == 'age:<30|gender:Male'
+        assert ESGData.canonical_dimension_key(None) == ''
+        # A structured breakdown payload is the field's total entry
+        assert ESGData.canonical_dimension_key({'version': 2, 'breakdowns': [{'gender': 'Male'}], 'totals': {}}) == ''
+        assert ESGData.canonical_dimension_key({'note': 'x' * 300}).startswith('sha1:')
+
+    def test_key_matches_filter(self):
+        key = ESGData.canonical_dimension_key({'gender': 'Male', 'age': '<30'})
+
+        assert ESGData.dimension_key_matches(key, {'Gender': 'Male'}) is True
+        assert ESGData.dimension_key_matches(key, {'gender': 'Male', 'age': '<30'}) is True
+        assert ESGData.dimension_key_matches(key, {'gender': 'Female'}) is False
+        assert ESGData.dimension_key_matches('', {'gender': 'Male'}) is False
+        assert ESGData.dimension_key_matches('', None) is True
+
+    def test_separators_in_values_are_escaped(self):
+        key = ESGData.canonical_dimension_key({'site': 'A|B', 'ratio': '1:2', 'share': '5%'})
+
+        assert key == 'ratio:1%3A2|share:5%25|site:A%7CB'
+        assert ESGData.dimension_key_matches(key, {'site': 'A|B', 'ratio': '1:2'}) is True
+        assert ESGData.dimension_key_matches(key, {'site': 'A'}) is False
+        # Values that only look alike once separators are parsed stay distinct
+        assert ESGData.canonical_dimension_key({'a': 'x|b:y'}) != ESGData.canonical_dimension_key({'a': 'x', 'b': 'y'})
+
+    def test_key_maintained_on_write(self, app, dimension_setup):
+        row = _entry(dimension_setup, 10, {'gender': 'Male'})
+        db.session.commit()
+        assert row.dimension_key == 'gender:Male'
+
+        row.dimension_values = {'gender': 'Female', 'age': '30-50'}
+        db.session.commit()
+
+        stored = db.session.execute(text("SELECT dimension_key FROM esg_data")).scalar_one()
+        assert stored == 'age:30-50|gender:Female'
+
+    def test_one_entry_per_dimension_combination(self, app, dimension_setup):
+        _entry(dimension_setup, 10, {'gender': 'Male'})
+        _entry(dimension_setup, 20, {'gender': 'Female'})
+        db.session.commit()
+
+        _entry(dimension_setup, 30, {'Gender': 'Male'})
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_dimension_filtered_aggregation(self, app, dimension_setup):
+        setup = dimension_setup
+        _entry(setup, 10, {'gender': 'Male', 'age': '<30'})
+        _entry(setup, 20, {'gender': 'Male', 'age': '30-50'})
+        _entry(setup, 40, {'gender': 'Female', 'age': '<30'})
+        db.session.commit()
+
+        mapping = SimpleNamespace(dimension_filter={'gender': 'Male'}, aggregation_type='SPECIFIC_DIMENSION')
+        rule = AggregationRule(method=AggregationMethod.SUM, lookback_months=1)
+
+        total = aggregation_service._aggregate_dependency_values(
+            setup['field'].field_id, setup['entity'].id, setup['month'], rule, setup['assignment'], mapping
+        )
+
+        assert total == 30
+
+    def test_backfill(self, app, dimension_setup):
+        _entry(dimension_setup, 10, {'gender': 'Male'})
+        _entry(dimension_setup, 20, None)
+        db.session.commit()
+        db.session.execute(text("UPDATE esg_data SET dimension_key = 'stale' WHERE dimension_key != ''"))
+        db.session.commit()
+
+        assert backfill_dimension_keys(batch_size=1) == 1
+        assert backfill_dimension_keys() == 0
+        assert sorted(db.session.execute(text("SELECT dimension_key FROM esg_data")).scalars()) == ['', 'gender:Male']
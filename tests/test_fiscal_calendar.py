@@ -0,0 +1,67 @@
+"""
+Unit tests for the memoized fiscal calendar.
+
+Tests cover:
+- FY bounds and period ends for calendar and non-calendar fiscal years
+- Memoization of calendars
+- O(1) date -> period and date -> FY lookups
+"""
+
+import pytest
+from datetime import date
+
+from app.utils.fiscal_calendar import fy_bounds, fiscal_year_for_date, get_fiscal_calendar
+
+
+class TestFyBounds:
+
+    def test_march_year_end(self):
+        assert fy_bounds(3, 31, 2025) == (date(2024, 4, 1), date(2025, 3, 31))
+
+    def test_december_year_end(self):
+        assert fy_bounds(12, 31, 2024) == (date(2024, 1, 1), date(2024, 12, 31))
+
+    def test_end_day_clamped_to_month_length(self):
+        assert fy_bounds(2, 31, 2024)[1] == date(2024, 2, 29)
+
+    @pytest.mark.parametrize("check_date, expected", [
+        (date(2024, 4, 1), 2025),
+        (date(2025, 3, 31), 2025),
+        (date(2025, 4, 1), 2026),
+        (date(2024, 1, 15), 2024),
+    ])
+    def test_fiscal_year_for_date(self, check_date, expected):
+        assert fiscal_year_for_date(3, 31, check_date) == expected
+
+
+class TestFiscalCalendar:
+
+    def test_monthly_period_ends(self):
+        fiscal_calendar = get_fiscal_calendar(3, 31, 2025, 'Monthly')
+
+        assert isinstance(fiscal_calendar.period_ends, tuple)
+        assert len(fiscal_calendar) == 12
+        assert fiscal_calendar.period_ends[0] == date(2024, 4, 30)
+        assert fiscal_calendar.period_ends[10] == date(2025, 2, 28)
+        assert fiscal_calendar.period_ends[-1] == date(2025, 3, 31)
+
+    def test_quarterly_and_annual_period_ends(self):
+        assert get_fiscal_calendar(3, 31, 2025, 'Quarterly').period_ends == (
+            date(2024, 6, 30), date(2024, 9, 30), date(2024, 12, 31), date(2025, 3, 31)
+        )
+        assert get_fiscal_calendar(3, 31, 2025, 'Annual').period_ends == (date(2025, 3, 31),)
+
+    def test_calendars_are_memoized(self):
+        assert get_fiscal_calendar(12, 31, 2024, 'Monthly') is get_fiscal_calendar(12, 31, 2024, 'Monthly')
+
+    def test_membership_and_period_lookup(self):
+        fiscal_calendar = get_fiscal_calendar(3, 31, 2025, 'Quarterly')
+
+        assert date(2024, 9, 30) in fiscal_calendar
+        assert date(2024, 9, 29) not in fiscal_calendar
+        assert fiscal_calendar.period_for(date(2024, 8, 15)) == (date(2024, 7, 1), date(2024, 9, 30))
+        assert fiscal_calendar.period_end_for(date(2025, 1, 1)) == date(2025, 3, 31)
+        assert fiscal_calendar.period_end_for(date(2025, 4, 1)) is None
+
+    def test_unknown_frequency_has_no_periods(self):
+        assert get_fiscal_calendar(12, 31, 2024, 'Weekly').period_ends == ()
@@ -0,0 +1,80 @@
+"""
+Unit tests for the compiled formula evaluator used by computed fields.
+
+Tests cover:
+- Safe AST validation (only arithmetic on variables and numbers)
+- Scalar evaluation without string substitution collisions
+- Vectorized evaluation over value columns
+- Caching by field_id and formula hash
+"""
+
+import pytest
+
+from app.utils.formula_compiler import CompiledFormula, FormulaCompiler, FormulaError
+
+
+class TestCompiledFormula:
+
+    def test_evaluate_basic_arithmetic(self):
+        formula = CompiledFormula("(A + B) * C / 2")
+        assert formula.variables == frozenset({'A', 'B', 'C'})
+        assert formula.evaluate({'A': 1, 'B': 3, 'C': 5}) == pytest.approx(10.0)
+
+    def test_negative_values_and_unary_minus(self):
+        formula = CompiledFormula("A - -B")
+        assert formula.evaluate({'A': 1.0, 'B': -3.0}) == pytest.approx(-2.0)
+
+    def test_multi_letter_variables_do_not_collide(self):
+        formula = CompiledFormula("A + AB")
+        assert formula.evaluate({'A': 1, 'AB': 10}) == pytest.approx(11.0)
+
+    @pytest.mark.parametrize("expression", [
+        "__import__('os')",
+        "A ** 2",
+        "A.real",
+        "[A]",
+        "A if B else C",
+        "'text'",
+    ])
+    def test_rejects_unsafe_expressions(self, expression):
+        with pytest.raises(FormulaError):
+            CompiledFormula(expression)
+
+    def test_missing_variable_raises(self):
+        with pytest.raises(FormulaError):
+            CompiledFormula("A + B").evaluate({'A': 1})
+
+    def test_division_by_zero_raises(self):
+        with pytest.raises(FormulaError):
+            CompiledFormula("A / B").evaluate({'A': 1, 'B': 0})
+
+    def test_evaluate_many(self):
+        formula = CompiledFormula("A / B")
+        results = formula.evaluate_many({'A': [1, 2, None, 4], 'B': [2, 4, 1, 0]})
+        assert results == [0.5, 0.5, None, None]
+
+    def test_evaluate_many_missing_column(self):
+        assert CompiledFormula("A + B").evaluate_many({'A': [1, 2]}) == [None, None]
+
+
+class TestFormulaCompiler:
+
+    def test_caches_by_field_and_hash(self):
+        compiler = FormulaCompiler()
+        first = compiler.compile("A + B", "field-1")
+        assert compiler.compile("A + B", "field-1") is first
+        # Same text for another field reuses the compiled formula
+        assert compiler.compile("A + B", "field-2") is first
+
+    def test_recompiles_when_formula_changes(self):
+        compiler = FormulaCompiler()
+        first = compiler.compile("A + B", "field-1")
+        second = compiler.compile("A * B", "field-1")
+        assert second is not first
+        assert second.evaluate({'A': 2, 'B': 3}) == pytest.approx(6.0)
+
+    def test_invalidate(self):
+        compiler = FormulaCompiler()
+        first = compiler.compile("A + B", "field-1")
+        compiler.invalidate()
+        assert compiler.compile("A + B", "field-1") is not first
@@ -0,0 +1,148 @@
+"""
+Unit tests for the framework coverage engine.
+
+Tests cover:
+- Coverage of tenant and global frameworks from one grouped query
+- KPI cards, chart data, framework list and single coverage sharing the summary
+- Cached summaries dropped by assignment and field writes
+"""
+
+import pytest
+from flask import g
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.services import frameworks_service
+from app.services.framework_coverage import build_coverage_summary, coverage_cache
+
+
+@pytest.fixture
+def app_caches():
+    return (coverage_cache,)
+
+
+@pytest.fixture
+def coverage_setup(app):
+    """
+    Tenant framework with 4 fields (2 assigned, one of them inactive),
+    an empty tenant framework and a global framework with 2 fields (1 assigned).
+    """
+    provider = Company(name="Provider", slug="provider", fy_end_month=12, fy_end_day=31)
+    provider.is_global_framework_provider = True
+    company = Company(name="Tenant", slug="tenant", fy_end_month=12, fy_end_day=31)
+    db.session.add_all([provider, company])
+    db.session.flush()
+    g.tenant = company
+    user = User(name="Admin", email="admin@tenant.co", role="ADMIN", company_id=company.id)
+    site = Entity(name="Site", entity_type="Site", company_id=company.id)
+    frameworks = {
+        'tenant': Framework(framework_name="Tenant FW", company_id=company.id),
+        'empty': Framework(framework_name="Empty FW", company_id=company.id),
+        'global': Framework(framework_name="Global FW", company_id=provider.id),
+    }
+    db.session.add_all([user, site, *frameworks.values()])
+    db.session.flush()
+
+    def fields(key, owner, count):
+        created = [FrameworkDataField(framework_id=frameworks[key].framework_id, company_id=owner.id,
+                                      field_name=f"{key} {index}", value_type="NUMBER") for index in range(count)]
+        db.session.add_all(created)
+        db.session.flush()
+        return created
+
+    tenant_fields = fields('tenant', company, 4)
+    global_fields = fields('global', provider, 2)
+    assignments = [DataPointAssignment(field_id=field.field_id, entity_id=site.id, frequency='Monthly',
+                                       assigned_by=user.id, company_id=company.id)
+                   for field in (tenant_fields[0], tenant_fields[1], global_fields[0])]
+    db.session.add_all(assignments)
+    db.session.flush()
+    assignments[1].series_status = 'inactive'
+    db.session.commit()
+
+    return {'company': company, 'provider': provider, 'user': user, 'site': site, 'frameworks': frameworks,
+            'tenant_fields': tenant_fields}
+
+
+class TestFrameworkCoverage:
+
+    def test_summary_in_one_grouped_query(self, app, coverage_setup, record_statements):
+        frameworks = coverage_setup['frameworks']
+        company_id = coverage_setup['company'].id
+
+        with record_statements() as queries:
+            summary = build_coverage_summary(company_id)
+
+        assert len(queries) == 2  # Global provider lookup and the grouped coverage query
+        tenant = summary[frameworks['tenant'].framework_id]
+        assert (tenant.total_fields, tenant.fields_with_data) == (4, 1)
+        assert tenant.last_assigned is not None
+        assert summary[frameworks['empty'].framework_id][:2] == (0, 0)
+        assert summary[frameworks['global'].framework_id][:2] == (2, 1)
+
+        # The provider sees its own framework without the tenant's assignments
+        provider_summary = build_coverage_summary(coverage_setup['provider'].id)
+        assert list(provider_summary) == [frameworks['global'].framework_id]
+        assert provider_summary[frameworks['global'].framework_id][:2] == (2, 0)
+
+    def test_consumers_share_the_summary(self, app, coverage_setup, record_statements):
+        frameworks = coverage_setup['frameworks']
+        company_id = coverage_setup['company'].id
+
+        listed = {item['framework_name']: item for item in frameworks_service.list_frameworks(company_id)}
+        assert (listed['Tenant FW']['coverage_percentage'], listed['Tenant FW']['total_fields']) == (25.0, 4)
+        assert (listed['Global FW']['coverage_percentage'], listed['Global FW']['is_global']) == (50.0, True)
+        assert listed['Global FW']['is_editable'] is False
+        assert listed['Empty FW']['last_updated'] is None
+
+        kpis = frameworks_service.get_framework_kpis(company_id)
+        assert kpis['overall_coverage'] == 12.5  # Mean of the tenant's own frameworks: 25% and 0%
+        with record_statements() as chart_queries:
+            chart = frameworks_service.get_chart_data(company_id)
+        assert chart['top_5_frameworks'][0] == {'name': 'Global FW', 'coverage': 50.0}
+        assert len(chart_queries) == 3  # Provider lookup and the two framework lists; coverage is cached
+
+        coverage = frameworks_service.get_framework_coverage(frameworks['global'].framework_id, company_id)
+        assert (coverage['fields_with_data'], coverage['total_fields']) == (1, 2)
+
+    def test_query_count_independent_of_framework_count(self, app, coverage_setup, record_statements):
+        company = coverage_setup['company']
+        company_id = company.id
+        with record_statements() as few:
+            frameworks_service.list_frameworks(company_id)
+
+        for index in range(10):
+            framework = Framework(framework_name=f"Extra {index}", company_id=company_id)
+            db.session.add(framework)
+            db.session.flush()
+            db.session.add(FrameworkDataField(framework_id=framework.framework_id, company_id=company_id,
+                                              field_name=f"Extra field {index}", value_type="NUMBER"))
+        db.session.commit()
+
+        with record_statements() as many:
+            listed = frameworks_service.list_frameworks(company_id)
+        assert len(listed) == 13
+        assert len(many) == len(few)
+
+    def test_summary_follows_assignment_and_field_writes(self, app, coverage_setup):
+        company_id = coverage_setup['company'].id
+        tenant_id = coverage_setup['frameworks']['tenant'].framework_id
+
+        def tenant_coverage():
+            return frameworks_service.get_framework_coverage(tenant_id, company_id)
+
+        assert tenant_coverage()['coverage_percentage'] == 25.0
+
+        db.session.add(DataPointAssignment(field_id=coverage_setup['tenant_fields'][2].field_id,
+                                           entity_id=coverage_setup['site'].id, frequency='Monthly',
+                                           assigned_by=coverage_setup['user'].id, company_id=company_id))
+        db.session.commit()
+        assert tenant_coverage()['fields_with_data'] == 2
+
+        db.session.delete(coverage_setup['tenant_fields'][3])
+        db.session.commit()
+        assert (tenant_coverage()['total_fields'], tenant_coverage()['coverage_percentage']) == (3, 66.7)
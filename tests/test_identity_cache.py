@@ -0,0 +1,154 @@
+"""
+Unit tests for the tenant and user snapshot cache.
+
+Tests cover:
+- Tenant and user resolution served without queries once cached
+- Restored snapshots behave like session-bound Company/User instances
+- Invalidation on company and user writes
+- Invalidations published by other workers
+"""
+
+import json
+import os
+import pytest
+from flask import g
+
+from app import db
+from app.middleware.tenant import load_tenant
+from app.models.company import Company
+from app.models.user import User, load_user
+from app.services import identity_cache
+from app.services.identity_cache import get_company_by_slug, get_user_by_id, handle_invalidation_message
+
+
+@pytest.fixture
+def identity_setup(app):
+    company = Company(name="Acme", slug="acme", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    user = User(name="Admin", email="admin@acme.co", role="ADMIN", company_id=company.id)
+    db.session.add(user)
+    db.session.commit()
+    return {'company_id': company.id, 'user_id': user.id}
+
+
+class TestTenantCache:
+
+    def test_load_tenant_uses_cached_snapshot(self, app, identity_setup, record_statements):
+        get_company_by_slug('acme')
+        db.session.remove()
+
+        with app.test_request_context('/', base_url='http://acme.esgdatavault.online'):
+            with record_statements() as statements:
+                load_tenant()
+
+            assert len(statements) == 0
+            assert isinstance(g.tenant, Company)
+            assert g.tenant.id == identity_setup['company_id']
+            assert g.tenant in db.session
+            # Relationships still lazy-load from the restored instance
+            assert [u.email for u in g.tenant.users] == ['admin@acme.co']
+
+    def test_unknown_slug_is_not_cached(self, app, identity_setup):
+        assert get_company_by_slug('missing') is None
+        assert len(identity_cache.tenant_cache) == 0
+
+    def test_deactivate_invalidates(self, app, identity_setup):
+        company = get_company_by_slug('acme')
+        company.deactivate()
+        db.session.commit()
+        db.session.remove()
+
+        assert get_company_by_slug('acme').is_active is False
+
+    def test_slug_change_invalidates_old_slug(self, app, identity_setup):
+        company = get_company_by_slug('acme')
+        company.slug = 'acme-new'
+        db.session.commit()
+        db.session.remove()
+
+        assert get_company_by_slug('acme') is None
+        assert get_company_by_slug('acme-new').id == identity_setup['company_id']
+
+
+class TestUserCache:
+
+    def test_user_loader_uses_cached_snapshot(self, app, identity_setup, record_statements):
+        user_id = identity_setup['user_id']
+        load_user(str(user_id))
+        db.session.remove()
+
+        with record_statements() as statements:
+            user = load_user(str(user_id))
+
+        assert len(statements) == 0
+        assert isinstance(user, User)
+        assert user.is_admin()
+
+    def test_role_and_status_toggle_invalidates(self, app, identity_setup):
+        user = get_user_by_id(identity_setup['user_id'])
+        user.role = 'USER'
+        user.is_active = False
+        db.session.commit()
+        db.session.remove()
+
+        reloaded = get_user_by_id(identity_setup['user_id'])
+        assert reloaded.role == 'USER'
+        assert reloaded.is_active is False
+
+    def test_rollback_drops_uncommitted_snapshot(self, app, identity_setup):
+        user = get_user_by_id(identity_setup['user_id'])
+        user.name = 'Uncommitted'
+        db.session.flush()
+        get_user_by_id(identity_setup['user_id'])
+        db.session.rollback()
+        db.session.remove()
+
+        assert get_user_by_id(identity_setup['user_id']).name == 'Admin'
+
+
+class TestInvalidationMessages:
+
+    def test_remote_invalidation_applied(self, app, identity_setup):
+        get_company_by_slug('acme')
+        get_user_by_id(identity_setup['user_id'])
+
+        applied = handle_invalidation_message({'data': json.dumps({
+            'origin': 'other-worker', 'tags': [['company', identity_setup['company_id']]]
+        })})
+
+        assert applied is True
+        assert len(identity_cache.tenant_cache) == 0
+        assert len(identity_cache.user_cache) == 0
+
+    def test_own_messages_ignored(self, app, identity_setup):
+        message = {'data': json.dumps({'origin': identity_cache.process_origin(), 'tags': [['slug', 'acme']]})}
+
+        assert handle_invalidation_message(message) is False
+
+    def test_forked_worker_gets_its_own_origin_and_listener(self, app, identity_setup, monkeypatch):
+        parent_pid = os.getpid()
+        parent_message = {'data': json.dumps({'origin': identity_cache.process_origin(), 'tags': [['slug', 'acme']]})}
+        started = []
+
+        class RecordingThread:
+            def __init__(self, target, args, name, daemon):
+                self.args = args
+
+            def start(self):
+                started.append(os.getpid())
+
+        monkeypatch.setattr(identity_cache.threading, 'Thread', RecordingThread)
+        monkeypatch.setattr(identity_cache, '_listener_app', app)
+        monkeypatch.setattr(identity_cache, '_listener_pid', None)
+
+        get_company_by_slug('acme')
+        get_company_by_slug('acme')
+        assert started == [parent_pid]
+
+        # After fork() the child sees its parent's messages as remote and starts its own listener
+        child_pid = parent_pid + 1
+        monkeypatch.setattr(identity_cache.os, 'getpid', lambda: child_pid)
+        assert handle_invalidation_message(parent_message) is True
+        get_company_by_slug('acme')
+        assert started == [parent_pid, child_pid]
@@ -0,0 +1,187 @@
+"""
+Unit tests for the write-triggered recompute pipeline.
+
+Tests cover:
+- Raw writes materializing dependant computed values in dependency order
+- Overwrites, rollbacks, drafts and draft promotion
+- Deduplicated affected keys and one batched recompute per bulk upload
+"""
+
+import pytest
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField, FieldVariableMapping
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.services import recompute_pipeline
+from app.services.aggregation import aggregation_service
+from app.services.dependency_graph import dependency_graphs
+from app.services.recompute_pipeline import expand_affected_keys, process_pending
+from app.services.user_v2.bulk_upload.submission_service import BulkSubmissionService
+
+
+@pytest.fixture
+def app_config(app_config):
+    return {**app_config, 'COMPUTED_FIELD_RECOMPUTE_ON_WRITE': True}
+
+
+@pytest.fixture
+def app_caches():
+    return (dependency_graphs,)
+
+
+@pytest.fixture
+def pipeline_setup(app):
+    """Monthly raw fields A and B, computed C = A + B and D = C + C."""
+    company = Company(name="Recompute Co", slug="recompute-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    user = User(name="Admin", email="admin@recompute.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Recompute FW", company_id=company.id)
+    entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+    db.session.add_all([user, framework, entity])
+    db.session.flush()
+
+    def field(name, formula=None):
+        new_field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                       field_name=name, value_type="NUMBER", is_computed=bool(formula))
+        new_field.formula_expression = formula
+        db.session.add(new_field)
+        return new_field
+
+    a, b, c, d = field("A"), field("B"), field("C", "A + B"), field("D", "C + C")
+    db.session.flush()
+    db.session.add_all([
+        FieldVariableMapping(computed_field_id=c.field_id, raw_field_id=a.field_id, variable_name='A'),
+        FieldVariableMapping(computed_field_id=c.field_id, raw_field_id=b.field_id, variable_name='B'),
+        FieldVariableMapping(computed_field_id=d.field_id, raw_field_id=c.field_id, variable_name='C'),
+    ])
+    assignments = {}
+    for key, target in (('a', a), ('b', b), ('c', c), ('d', d)):
+        assignments[key] = DataPointAssignment(field_id=target.field_id, entity_id=entity.id, frequency='Monthly',
+                                               assigned_by=user.id, company_id=company.id)
+        db.session.add(assignments[key])
+    db.session.commit()
+
+    return {
+        'company': company, 'user': user, 'entity': entity, 'assignments': assignments,
+        'a': a, 'b': b, 'c': c, 'd': d,
+        'dates': assignments['a'].get_valid_reporting_dates(2024)
+    }
+
+
+def _submit(setup, field_key, value, reporting_date, **kwargs):
+    row = ESGData(entity_id=setup['entity'].id, field_id=setup[field_key].field_id, raw_value=str(value),
+                  reporting_date=reporting_date, company_id=setup['company'].id, **kwargs)
+    db.session.add(row)
+    return row
+
+
+def _calculated(setup, field_key, reporting_date):
+    row = ESGData.query.filter_by(field_id=setup[field_key].field_id, entity_id=setup['entity'].id,
+                                  reporting_date=reporting_date).one_or_none()
+    return row.calculated_value if row else None
+
+
+class TestRecomputePipeline:
+
+    def test_raw_writes_materialize_computed_values(self, app, pipeline_setup):
+        month = pipeline_setup['dates'][0]
+        _submit(pipeline_setup, 'a', 10, month)
+        _submit(pipeline_setup, 'b', 5, month)
+        db.session.commit()
+
+        stats = process_pending()
+
+        assert stats['keys'] == 2
+        assert stats['batches'] == 2  # C first, then D from the persisted C
+        assert _calculated(pipeline_setup, 'c', month) == 15
+        assert _calculated(pipeline_setup, 'd', month) == 30
+
+    def test_overwrite_updates_materialized_value(self, app, pipeline_setup):
+        month = pipeline_setup['dates'][0]
+        a = _submit(pipeline_setup, 'a', 10, month)
+        _submit(pipeline_setup, 'b', 5, month)
+        db.session.commit()
+        process_pending()
+
+        a.raw_value = '20'
+        db.session.commit()
+        process_pending()
+
+        assert _calculated(pipeline_setup, 'c', month) == 25
+        assert _calculated(pipeline_setup, 'd', month) == 50
+        assert ESGData.query.filter_by(field_id=pipeline_setup['c'].field_id).count() == 1
+
+    def test_rollback_discards_writes(self, app, pipeline_setup):
+        _submit(pipeline_setup, 'a', 10, pipeline_setup['dates'][0])
+        db.session.flush()
+        db.session.rollback()
+
+        assert process_pending()['sources'] == 0
+
+    def test_drafts_trigger_on_promotion(self, app, pipeline_setup):
+        month = pipeline_setup['dates'][0]
+        _submit(pipeline_setup, 'b', 5, month)
+        draft = _submit(pipeline_setup, 'a', 10, month)
+        draft.is_draft = True
+        db.session.commit()
+        db.session.info.pop(recompute_pipeline.QUEUE_KEY, None)
+
+        notes_only = ESGData.query.filter_by(field_id=pipeline_setup['b'].field_id).one()
+        notes_only.notes = 'context'
+        db.session.commit()
+        assert process_pending()['sources'] == 0
+
+        draft.is_draft = False
+        db.session.commit()
+        process_pending()
+
+        assert _calculated(pipeline_setup, 'c', month) == 15
+
+    def test_affected_keys_are_deduplicated(self, app, pipeline_setup):
+        setup = pipeline_setup
+        month = setup['dates'][0]
+        company_id, entity_id = setup['company'].id, setup['entity'].id
+
+        affected = expand_affected_keys(company_id, [
+            (setup['a'].field_id, entity_id, month),
+            (setup['b'].field_id, entity_id, month),
+            (setup['c'].field_id, entity_id, month),
+        ])
+
+        assert affected == {(setup['c'].field_id, entity_id, month), (setup['d'].field_id, entity_id, month)}
+
+    def test_bulk_upload_triggers_one_batched_recompute(self, app, pipeline_setup, monkeypatch):
+        setup = pipeline_setup
+        calls = []
+        compute = aggregation_service.compute_multiple_fields
+
+        def spy(keys, *args, **kwargs):
+            calls.append(len(keys))
+            return compute(keys, *args, **kwargs)
+
+        monkeypatch.setattr(aggregation_service, 'compute_multiple_fields', spy)
+        rows = [
+            {
+                'row_number': len(setup['dates']) * i + j + 2,
+                'field_id': setup[key].field_id,
+                'entity_id': setup['entity'].id,
+                'assignment_id': setup['assignments'][key].id,
+                'reporting_date': reporting_date,
+                'parsed_value': float(j + 1),
+                'dimensions': None,
+            }
+            for i, key in enumerate(('a', 'b'))
+            for j, reporting_date in enumerate(setup['dates'])
+        ]
+
+        result = BulkSubmissionService.submit_bulk_data(rows, 'upload.xlsx', setup['user'])
+
+        assert result['success'] is True
+        assert result['recomputed'] == 24
+        assert calls == [12, 12]
+        assert _calculated(setup, 'd', setup['dates'][-1]) == 48
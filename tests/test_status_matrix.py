@@ -0,0 +1,149 @@
+"""
+Unit tests for the admin data status matrix.
+
+Tests cover:
+- Latest value and status of every active assignment in one query
+- Filters, pagination and the total count
+- Per-tenant caching dropped by data and assignment writes
+"""
+
+import pytest
+from flask import g
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.services.user_v2.data_status_service import DataStatusService, MATRIX_COLUMNS, status_matrix_cache
+
+
+@pytest.fixture
+def app_caches():
+    return (status_matrix_cache,)
+
+
+@pytest.fixture
+def matrix_setup(app):
+    """Raw fields A and B and computed field C assigned to three sites."""
+    company = Company(name="Matrix Co", slug="matrix-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    g.tenant = company
+    user = User(name="Admin", email="admin@matrix.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Matrix FW", company_id=company.id)
+    sites = [Entity(name=f"Site {i}", entity_type="Site", company_id=company.id) for i in (1, 2, 3)]
+    db.session.add_all([user, framework, *sites])
+    db.session.flush()
+    fields = {}
+    for name in ("A", "B", "C"):
+        fields[name] = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                          field_name=name, value_type="NUMBER", is_computed=(name == "C"))
+    db.session.add_all(fields.values())
+    db.session.flush()
+    assignments = [DataPointAssignment(field_id=field.field_id, entity_id=site.id, frequency='Monthly',
+                                       assigned_by=user.id, company_id=company.id)
+                   for site in sites for field in fields.values()]
+    db.session.add_all(assignments)
+    db.session.commit()
+
+    return {'company': company, 'user': user, 'sites': sites, 'fields': fields,
+            'dates': assignments[0].get_valid_reporting_dates(2024)}
+
+
+def _entry(setup, field, site, month, raw_value=None, calculated_value=None, is_draft=False):
+    row = ESGData(entity_id=setup['sites'][site].id, field_id=setup['fields'][field].field_id,
+                  raw_value=raw_value, calculated_value=calculated_value,
+                  reporting_date=setup['dates'][month], company_id=setup['company'].id)
+    row.is_draft = is_draft
+    db.session.add(row)
+    return row
+
+
+def _cells(matrix):
+    return {(cell['entity_name'], cell['field_name']): cell
+            for cell in (dict(zip(MATRIX_COLUMNS, row)) for row in matrix['rows'])}
+
+
+class TestStatusMatrix:
+
+    def test_latest_status_in_one_query(self, app, matrix_setup, record_statements):
+        setup = matrix_setup
+        _entry(setup, 'A', 0, 0, '10')
+        _entry(setup, 'A', 0, 1, '11')
+        _entry(setup, 'A', 0, 2, '99', is_draft=True)
+        _entry(setup, 'B', 0, 0, None)
+        _entry(setup, 'C', 0, 1, calculated_value=21.0)
+        _entry(setup, 'C', 1, 1)
+        db.session.commit()
+        company_id = setup['company'].id
+
+        with record_statements() as queries:
+            matrix = DataStatusService.load_status_matrix(company_id)
+        cells = _cells(matrix)
+
+        assert len(queries) == 1
+        assert matrix['total'] == len(matrix['rows']) == 9
+        assert (cells[('Site 1', 'A')]['status'], cells[('Site 1', 'A')]['latest_value']) == ('complete', '11')
+        assert cells[('Site 1', 'A')]['latest_date'] == setup['dates'][1].isoformat()
+        assert cells[('Site 1', 'B')]['status'] == 'incomplete'
+        assert (cells[('Site 1', 'C')]['status'], cells[('Site 1', 'C')]['latest_value']) == ('computed', 21.0)
+        assert cells[('Site 2', 'C')]['status'] == 'pending_computation'
+        assert cells[('Site 3', 'A')]['status'] == 'no_data'
+        assert cells[('Site 3', 'A')]['is_computed'] is False
+
+    def test_unit_falls_back_to_field_default(self, app, matrix_setup):
+        setup = matrix_setup
+        setup['fields']['A'].default_unit = 'kWh'
+        units = {'Site 1': '', 'Site 2': 'MWh', 'Site 3': None}
+        for assignment in DataPointAssignment.query.filter_by(field_id=setup['fields']['A'].field_id):
+            assignment.unit = units[assignment.entity.name]
+        db.session.commit()
+
+        cells = _cells(DataStatusService.load_status_matrix(setup['company'].id))
+
+        assert {site: cells[(site, 'A')]['unit'] for site in units} == {
+            'Site 1': 'kWh', 'Site 2': 'MWh', 'Site 3': 'kWh'
+        }
+
+    def test_filters_and_pagination(self, app, matrix_setup):
+        setup = matrix_setup
+        _entry(setup, 'A', 0, 0, '10')
+        _entry(setup, 'A', 1, 0, '20')
+        db.session.commit()
+        company_id = setup['company'].id
+
+        complete = DataStatusService.load_status_matrix(company_id, status='complete')
+        first = DataStatusService.load_status_matrix(company_id, page=1, per_page=4)
+        last = DataStatusService.load_status_matrix(company_id, page=3, per_page=4)
+        beyond = DataStatusService.load_status_matrix(company_id, page=4, per_page=4)
+        site = DataStatusService.load_status_matrix(company_id, entity_id=setup['sites'][1].id, search='a')
+
+        assert sorted(_cells(complete)) == [('Site 1', 'A'), ('Site 2', 'A')]
+        assert (first['total'], len(first['rows'])) == (9, 4)
+        assert (last['total'], len(last['rows'])) == (9, 1)
+        assert (beyond['total'], beyond['rows']) == (9, [])
+        assert list(_cells(site)) == [('Site 2', 'A')]
+
+    def test_cache_dropped_by_writes(self, app, matrix_setup, record_statements):
+        setup = matrix_setup
+        company_id = setup['company'].id
+
+        DataStatusService.get_status_matrix(company_id)
+        with record_statements() as queries:
+            cached = DataStatusService.get_status_matrix(company_id)
+        assert len(queries) == 0
+        assert _cells(cached)[('Site 1', 'A')]['status'] == 'no_data'
+
+        _entry(setup, 'A', 0, 0, '10')
+        db.session.commit()
+        assert _cells(DataStatusService.get_status_matrix(company_id))[('Site 1', 'A')]['status'] == 'complete'
+
+        assignment = DataPointAssignment.query.filter_by(
+            field_id=setup['fields']['B'].field_id, entity_id=setup['sites'][0].id
+        ).one()
+        assignment.series_status = 'inactive'
+        db.session.commit()
+        assert DataStatusService.get_status_matrix(company_id)['total'] == 8
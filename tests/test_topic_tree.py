@@ -0,0 +1,143 @@
+"""
+Unit tests for the topic tree of the assign data points page.
+
+Tests cover:
+- Levels, full paths and own/subtree field counts across tenant and global frameworks
+- A fixed number of queries whatever the framework size
+- Cached trees dropped by topic, framework and field writes
+"""
+
+import pytest
+from flask import g
+
+from app import db
+from app.models.company import Company
+from app.models.framework import Framework, FrameworkDataField, Topic
+from app.services.topic_tree import build_topic_tree, get_topic_tree, topic_tree_cache
+
+
+@pytest.fixture
+def app_caches():
+    return (topic_tree_cache,)
+
+
+def _framework(company, name):
+    framework = Framework(framework_name=name, company_id=company.id)
+    db.session.add(framework)
+    db.session.flush()
+    return framework
+
+
+def _topic(framework, name, parent=None):
+    topic = Topic(name, framework_id=framework.framework_id, parent_id=parent.topic_id if parent else None)
+    db.session.add(topic)
+    db.session.flush()
+    return topic
+
+
+def _fields(company, framework, topic, count, prefix=''):
+    db.session.add_all([
+        FrameworkDataField(framework_id=framework.framework_id, company_id=company.id, topic_id=topic.topic_id,
+                           field_name=f"{prefix}{topic.name} {index}", value_type="NUMBER")
+        for index in range(count)
+    ])
+
+
+@pytest.fixture
+def tree_setup(app):
+    """
+    Tenant framework: Environment > Energy > Electricity, plus Social.
+    Global framework: Governance. Another tenant's framework: Hidden.
+    """
+    provider = Company(name="Provider", slug="provider", fy_end_month=12, fy_end_day=31)
+    provider.is_global_framework_provider = True
+    company = Company(name="Tenant", slug="tenant", fy_end_month=12, fy_end_day=31)
+    other = Company(name="Other", slug="other", fy_end_month=12, fy_end_day=31)
+    db.session.add_all([provider, company, other])
+    db.session.flush()
+    g.tenant = company
+
+    framework = _framework(company, "Tenant FW")
+    environment = _topic(framework, "Environment")
+    energy = _topic(framework, "Energy", environment)
+    electricity = _topic(framework, "Electricity", energy)
+    _topic(framework, "Social")
+    _fields(company, framework, environment, 1)
+    _fields(company, framework, energy, 2)
+    _fields(company, framework, electricity, 3)
+    _fields(other, framework, electricity, 4)  # Another tenant's fields are not counted
+
+    global_framework = _framework(provider, "Global FW")
+    governance = _topic(global_framework, "Governance")
+    _fields(provider, global_framework, governance, 5)
+
+    hidden = _framework(other, "Other FW")
+    _topic(hidden, "Hidden")
+    db.session.commit()
+
+    return {'company': company, 'provider': provider, 'framework': framework, 'global_framework': global_framework,
+            'hidden': hidden, 'energy': energy}
+
+
+class TestTopicTree:
+
+    def test_tree_structure_and_counts(self, app, tree_setup):
+        tree = build_topic_tree(tree_setup['company'].id)
+
+        assert [(node['framework_name'], node['name']) for node in tree] == [
+            ('Global FW', 'Governance'), ('Tenant FW', 'Environment'), ('Tenant FW', 'Social')
+        ]
+        governance, environment, social = tree
+        energy = environment['children'][0]
+        electricity = energy['children'][0]
+
+        assert (governance['field_count'], governance['total_field_count']) == (5, 5)
+        assert (environment['field_count'], environment['total_field_count']) == (1, 6)
+        assert (energy['field_count'], energy['total_field_count']) == (2, 5)
+        assert (electricity['level'], electricity['full_path']) == (2, 'Environment > Energy > Electricity')
+        assert (electricity['has_children'], electricity['children']) == (False, [])
+        assert environment['has_children'] and not social['has_children']
+
+        framework_id = tree_setup['framework'].framework_id
+        assert [node['name'] for node in build_topic_tree(tree_setup['company'].id, framework_id)] == \
+            ['Environment', 'Social']
+        assert build_topic_tree(tree_setup['company'].id, tree_setup['hidden'].framework_id) == []
+
+    def test_query_count_independent_of_size(self, app, tree_setup, record_statements):
+        company_id = tree_setup['company'].id
+        with record_statements() as small:
+            build_topic_tree(company_id)
+
+        framework = tree_setup['framework']
+        for index in range(20):
+            parent = _topic(framework, f"Topic {index}")
+            child = _topic(framework, f"Subtopic {index}", parent)
+            _fields(tree_setup['company'], framework, child, 2)
+        db.session.commit()
+
+        with record_statements() as large:
+            tree = build_topic_tree(company_id)
+
+        assert len(large) == len(small) == 4
+        assert len(tree) == 23
+        assert next(node for node in tree if node['name'] == 'Topic 7')['total_field_count'] == 2
+
+    def test_cache_dropped_by_writes(self, app, tree_setup, record_statements):
+        company_id = tree_setup['company'].id
+        get_topic_tree(company_id)
+        with record_statements() as queries:
+            get_topic_tree(company_id)
+        assert len(queries) == 0
+
+        _topic(tree_setup['framework'], "Water")
+        db.session.commit()
+        assert 'Water' in [node['name'] for node in get_topic_tree(company_id)]
+
+        _fields(tree_setup['company'], tree_setup['framework'], tree_setup['energy'], 1, prefix='New ')
+        db.session.commit()
+        environment = next(node for node in get_topic_tree(company_id) if node['name'] == 'Environment')
+        assert environment['total_field_count'] == 7
+
+        tree_setup['global_framework'].framework_name = "Renamed FW"
+        db.session.commit()
+        assert get_topic_tree(company_id)[0]['framework_name'] == 'Renamed FW'
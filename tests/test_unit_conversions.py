@@ -0,0 +1,60 @@
+"""
+Unit tests for the unit conversion tables.
+
+Tests cover:
+- Flat category and factor lookups agreeing with the nested conversion factors
+- Converting a whole column, as an array or a list, in one call
+- Normalizing a column with mixed units to a field's default unit
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.utils.unit_conversions import UnitConverter, convert_column_to_field_default
+
+
+class TestUnitConversionTables:
+
+    def test_flat_tables_match_conversion_factors(self):
+        for category, data in UnitConverter.CONVERSION_FACTORS.items():
+            conversions = data['conversions']
+            for from_unit in conversions:
+                assert UnitConverter.get_unit_category(from_unit) == category
+                for to_unit in conversions:
+                    expected = conversions[from_unit] / conversions[to_unit]
+                    assert UnitConverter.get_conversion_factor(from_unit, to_unit) == pytest.approx(expected)
+
+        assert UnitConverter.get_unit_category('furlong') is None
+        assert UnitConverter.get_conversion_factor('kWh', 'USD') is None
+        assert UnitConverter.convert_value(2, 'GJ', 'MWh') == (pytest.approx(0.556), True, None)
+
+    def test_convert_values_array_and_list(self):
+        values = np.arange(10000, dtype=float)
+        converted, success, error = UnitConverter.convert_values(values, 'Wh', 'kWh')
+        assert success and error is None
+        assert isinstance(converted, np.ndarray)
+        np.testing.assert_allclose(converted, values / 1000)
+
+        assert UnitConverter.convert_values([1500, None], 'kWh', 'MWh') == ([1.5, None], True, None)
+
+        unchanged, success, error = UnitConverter.convert_values([1, 2], 'kWh', 'kg')
+        assert (unchanged, success) == ([1, 2], False)
+        assert 'different categories' in error
+
+    def test_normalize_mixed_units_to_field_default(self):
+        field = SimpleNamespace(default_unit='kWh')
+
+        normalized, info = convert_column_to_field_default([2, 3000, 4, None, 5], ['MWh', 'Wh', None, 'kWh', 'kWh'], field)
+        assert normalized == pytest.approx([2000, 3, 4, None, 5])
+        assert info['conversion_applied'] and info['failed_units'] == {}
+
+        normalized, info = convert_column_to_field_default(np.array([1.0, 2.0]), ['MWh', 'USD'], field)
+        np.testing.assert_allclose(normalized, [1000, 2])
+        assert list(info['failed_units']) == ['USD']
+
+        normalized, info = convert_column_to_field_default(np.array([1.0, 2.0]), 'MWh', field)
+        np.testing.assert_allclose(normalized, [1000, 2000])
+        assert convert_column_to_field_default([1], 'MWh', SimpleNamespace(default_unit=None)) == \
+            ([1], {"no_default_unit": True})
@@ -0,0 +1,165 @@
+"""
+Unit tests for ValidationService historical comparison and batch validation.
+
+Tests cover:
+- The comparison window (existing, sequential, seasonal) loaded with one query
+- Dimension matching by canonical dimension key
+- Computed field impact projected from prefetched dependency values
+- validate_submissions() matching validate_submission() with a fixed query count
+"""
+
+import pytest
+from flask import g
+
+from app import db
+from app.models.company import Company
+from app.models.user import User
+from app.models.entity import Entity
+from app.models.framework import Framework, FrameworkDataField, FieldVariableMapping
+from app.models.data_assignment import DataPointAssignment
+from app.models.esg_data import ESGData
+from app.services.dependency_graph import dependency_graphs
+from app.services.validation_service import ValidationService
+
+
+@pytest.fixture
+def app_caches():
+    return (dependency_graphs,)
+
+
+@pytest.fixture
+def validation_setup(app):
+    """Monthly raw fields A and B, computed C = A + B, with 2024 history for A."""
+    company = Company(name="Validation Co", slug="validation-co", fy_end_month=12, fy_end_day=31)
+    db.session.add(company)
+    db.session.flush()
+    g.tenant = company
+    user = User(name="Admin", email="admin@validation.co", role="ADMIN", company_id=company.id)
+    framework = Framework(framework_name="Validation FW", company_id=company.id)
+    entity = Entity(name="Site", entity_type="Site", company_id=company.id)
+    db.session.add_all([user, framework, entity])
+    db.session.flush()
+
+    def field(name, formula=None):
+        new_field = FrameworkDataField(framework_id=framework.framework_id, company_id=company.id,
+                                       field_name=name, value_type="NUMBER", is_computed=bool(formula))
+        new_field.formula_expression = formula
+        db.session.add(new_field)
+        return new_field
+
+    a, b, c = field("A"), field("B"), field("C", "A + B")
+    db.session.flush()
+    db.session.add_all([
+        FieldVariableMapping(computed_field_id=c.field_id, raw_field_id=a.field_id, variable_name='A'),
+        FieldVariableMapping(computed_field_id=c.field_id, raw_field_id=b.field_id, variable_name='B'),
+    ])
+    assignments = {}
+    for key, target in (('a', a), ('b', b), ('c', c)):
+        assignments[key] = DataPointAssignment(field_id=target.field_id, entity_id=entity.id, frequency='Monthly',
+                                               assigned_by=user.id, company_id=company.id)
+        db.session.add(assignments[key])
+    db.session.flush()
+
+    dates = assignments['a'].get_valid_reporting_dates(2024)
+    for month, value in zip(dates[:4], (100, 100, 100, 100)):
+        db.session.add(ESGData(entity_id=entity.id, field_id=a.field_id, raw_value=str(value),
+                               reporting_date=month, company_id=company.id))
+    db.session.add_all([
+        ESGData(entity_id=entity.id, field_id=b.field_id, raw_value='50', reporting_date=dates[3],
+                company_id=company.id),
+        ESGData(entity_id=entity.id, field_id=c.field_id, raw_value=None, calculated_value=150.0,
+                reporting_date=dates[3], company_id=company.id),
+    ])
+    db.session.commit()
+
+    return {'company': company, 'entity': entity, 'assignments': assignments, 'dates': dates,
+            'a': a, 'b': b, 'c': c}
+
+
+def _row(setup, value, month_index, **kwargs):
+    return {
+        'field_id': setup['a'].field_id,
+        'entity_id': setup['entity'].id,
+        'value': value,
+        'reporting_date': setup['dates'][month_index],
+        'company_id': setup['company'].id,
+        **kwargs
+    }
+
+
+class TestHistoricalValues:
+
+    def test_comparison_window_in_one_query(self, app, validation_setup, record_statements):
+        setup = validation_setup
+        assignment = setup['assignments']['a']
+        # Resolve the arguments expired by the fixture's commit
+        args = (setup['a'].field_id, setup['entity'].id, setup['dates'][2], assignment, None)
+        assignment.frequency
+
+        with record_statements() as queries:
+            history = ValidationService._get_historical_values(*args)
+
+        assert len(queries) == 1
+        assert [entry['date'] for entry in history['sequential']] == [
+            setup['dates'][2].isoformat(), setup['dates'][1].isoformat(), setup['dates'][0].isoformat()
+        ]
+        assert history['sequential'][0]['is_current_period'] is True
+        assert history['sequential'][0]['period_label'].endswith('(existing)')
+        assert history['seasonal'] is None
+
+    def test_dimensions_matched_by_canonical_key(self, app, validation_setup):
+        setup = validation_setup
+        month = setup['dates'][5]
+        db.session.add(ESGData(entity_id=setup['entity'].id, field_id=setup['a'].field_id, raw_value='70',
+                               reporting_date=month, company_id=setup['company'].id,
+                               dimension_values={'Gender': 'Male '}))
+        db.session.commit()
+
+        def values(dimensions):
+            history = ValidationService._get_historical_values(
+                setup['a'].field_id, setup['entity'].id, month, setup['assignments']['a'], dimensions
+            )
+            return [entry['value'] for entry in history['sequential']]
+
+        assert values({'gender': 'Male'}) == [70.0]
+        assert values({'gender': 'Female'}) == []
+
+
+class TestValidateSubmissions:
+
+    def test_trend_and_computed_impact_flags(self, app, validation_setup):
+        result = ValidationService.validate_submission(**_row(validation_setup, 200, 3))
+
+        flags = {flag['type']: flag for flag in result['flags']}
+        assert result['passed'] is False
+        assert flags['trend_variance']['details']['variance_pct'] == 100
+        # C = 200 + 50 against the materialized 150
+        impact = flags['computed_field_impact']
+        assert impact['details']['computed_field_name'] == 'C'
+        assert impact['details']['projected_value'] == 250
+
+    def test_batch_matches_single_validation(self, app, validation_setup):
+        setup = validation_setup
+        rows = [_row(setup, 200, 3), _row(setup, 100, 2), _row(setup, 10, 8),
+                _row(setup, 5, 3, field_id=setup['b'].field_id)]
+
+        batch = ValidationService.validate_submissions(rows)
+        single = [ValidationService.validate_submission(**row) for row in rows]
+
+        assert [(result['risk_score'], result['flags']) for result in batch] == \
+            [(result['risk_score'], result['flags']) for result in single]
+        assert batch[1]['passed'] is True
+        assert batch[2]['flags'][0]['type'] == 'no_historical_data'
+
+    def test_batch_query_count_is_constant(self, app, validation_setup, record_statements):
+        setup = validation_setup
+        g.tenant.id  # Reload the tenant expired by the fixture's commit
+        ValidationService.validate_submissions([_row(setup, 100, 0)])  # Build the dependency graph
+
+        with record_statements() as small:
+            ValidationService.validate_submissions([_row(setup, 100, index) for index in range(2)])
+        with record_statements() as large:
+            ValidationService.validate_submissions([_row(setup, 100, index) for index in range(12)])
+
+        # Companies, assignments, history
+        assert len(small) == len(large) == 3